@@ -5,7 +5,7 @@ Tento modul obsahuje tovární funkci create_app, která:
 1. Inicializuje aplikaci a načítá konfiguraci.
 2. Nastavuje logování a bezpečnostní hlavičky.
 3. Inicializuje rozšíření (DB, Migrate, CSRF, Cache, Limiter, Login).
-4. Registruje blueprinty (moduly aplikace).
+4. Registruje blueprinty (moduly aplikace) a CLI příkazy.
 5. Definuje globální obsluhu chyb (404, 429, 500).
 """
 
@@ -34,6 +34,14 @@ def create_app(config_name=None):
     # Inicializace rozšíření
     db.init_app(app)
     migrate.init_app(app, db)
+
+    # Čtení na repliky (jen pokud je nastaveno DATABASE_REPLICA_URLS)
+    from .db_routing import init_replicas
+    init_replicas(app)
+
+    # SQLite v provozu: WAL/PRAGMA a fronta zapisovatelů (jen pokud je zapnuto)
+    from .sqlite_support import init_sqlite
+    init_sqlite(app)
     csrf.init_app(app)
     
     # Rate Limiter (omezení počtu požadavků)
@@ -67,13 +75,18 @@ def create_app(config_name=None):
     from .services.audit_service import register_audit_listeners
     register_audit_listeners()
 
+    from .services.local_cache import init_local_cache
+    init_local_cache(app)
+
     from .models.user import User, AnonymousUser
 
     login_manager.anonymous_user = AnonymousUser
 
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        # Role se načte rovnou (has_role se volá skoro v každé šabloně)
+        from sqlalchemy.orm import joinedload
+        return db.session.get(User, int(user_id), options=[joinedload(User.role)])
 
     # Registrace blueprintů (moduly aplikace)
     from .routes.substances import substances_bp
@@ -82,6 +95,8 @@ def create_app(config_name=None):
     from .routes.auth import auth_bp
     from .routes.admin import admin_bp
     from .routes.health import health_bp
+    from .routes.jobs import jobs_bp
+    from .routes.metrics import metrics_bp
 
     app.register_blueprint(substances_bp)
     app.register_blueprint(mixtures_bp)
@@ -89,6 +104,25 @@ def create_app(config_name=None):
     app.register_blueprint(auth_bp)
     app.register_blueprint(admin_bp)
     app.register_blueprint(health_bp)
+    app.register_blueprint(jobs_bp)
+    app.register_blueprint(metrics_bp)
+
+    # Monitoring (přepínání časování klasifikace, metriky požadavků pro /metrics)
+    from .monitoring import init_monitoring
+    from .monitoring.exporter import init_metrics
+    from .monitoring.sql import init_sql_accounting
+    from .monitoring.slow_requests import init_slow_requests
+    from .monitoring.sampler import init_sampler
+    init_monitoring(app)
+    init_metrics(app)
+    init_sql_accounting(app)
+    init_slow_requests(app)
+    init_sampler(app)
+
+    # Handlery úloh na pozadí a CLI příkazy
+    from .services import job_handlers  # noqa: F401 (registrace handlerů)
+    from .cli import register_cli
+    register_cli(app)
 
     # Obsluha chyb (Error Handlers)
     @app.errorhandler(404)
@@ -107,5 +141,9 @@ def create_app(config_name=None):
         app.logger.warning(f'Rate limit exceeded: {request.remote_addr}')
         return render_template("errors/429.html", error=e), 429
 
+    # Zahřátí workeru (WARMUP_MODE) - až je vše zaregistrované
+    from .warmup import start_warmup
+    start_warmup(app)
+
     return app
 
@@ -0,0 +1,191 @@
+"""
+CLI příkazy aplikace (flask <skupina> <příkaz>).
+
+Registruje je create_app přes register_cli(app).
+"""
+import os
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+jobs_cli = AppGroup("jobs", help="Úlohy na pozadí (importy, exporty, reklasifikace).")
+annex_vi_cli = AppGroup("annex-vi", help="Lokální tabulka harmonizované klasifikace (Příloha VI).")
+audit_cli = AppGroup("audit", help="Údržba auditního logu.")
+
+
+@jobs_cli.command("worker")
+@click.option("--processes", "-p", type=int, default=None, help="Počet worker procesů.")
+@click.option("--poll-interval", type=float, default=None, help="Interval dotazování fronty (s).")
+def jobs_worker(processes, poll_interval):
+    """Spustí pool worker procesů zpracovávajících frontu úloh."""
+    from app.services.job_service import run_worker_pool
+
+    config = current_app.config
+    processes = processes or config["JOBS_WORKER_PROCESSES"]
+    poll_interval = poll_interval or config["JOBS_POLL_INTERVAL"]
+    click.echo(f"Spouštím {processes} worker procesů (Ctrl+C pro ukončení)")
+    run_worker_pool(
+        os.environ.get("FLASK_ENV"),
+        processes=processes,
+        poll_interval=poll_interval,
+        stale_seconds=config["JOBS_STALE_SECONDS"],
+    )
+
+
+@jobs_cli.command("fail-stale")
+def jobs_fail_stale():
+    """Označí jako selhané úlohy, jejichž worker přestal odpovídat."""
+    from app.services.job_service import JobService
+
+    count = JobService.fail_stale(current_app.config["JOBS_STALE_SECONDS"])
+    click.echo(f"Označeno {count} úloh.")
+
+
+@annex_vi_cli.command("import")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--append", is_flag=True, help="Přidat k existující tabulce místo jejího nahrazení.")
+def annex_vi_import(path, append):
+    """Naimportuje tabulku Přílohy VI z CSV souboru."""
+    from app.services.annex_vi import AnnexViImporter, AnnexViIndex
+
+    with open(path, "rb") as file:
+        entries, errors = AnnexViImporter.parse_csv(file)
+    for error in errors[:20]:
+        click.echo(f"  {error}", err=True)
+    if not entries:
+        raise click.ClickException("Soubor neobsahuje žádné položky.")
+
+    count = AnnexViImporter.import_entries(entries, replace=not append)
+    AnnexViIndex.from_app(current_app).invalidate()
+    click.echo(f"Naimportováno {count} položek ({len(errors)} chyb).")
+
+
+@annex_vi_cli.command("lookup")
+@click.argument("query")
+def annex_vi_lookup(query):
+    """Vyhledá látku v lokální tabulce (CAS, EC, indexové číslo nebo název)."""
+    import json
+    from app.services.annex_vi import AnnexViIndex
+
+    hit = AnnexViIndex.from_app(current_app).lookup(query)
+    if hit is None:
+        raise click.ClickException("Látka v tabulce Přílohy VI není.")
+    click.echo(json.dumps(hit, ensure_ascii=False, indent=2))
+
+
+@audit_cli.command("compact")
+@click.option("--batch-size", type=int, default=500, show_default=True, help="Záznamů na transakci.")
+def audit_compact(batch_size):
+    """Převede starší záznamy audit logu na kompaktní diffy (opakovatelné)."""
+    from app.services.audit_service import compact_audit_log
+
+    result = compact_audit_log(batch_size)
+    click.echo(f"Prošlo {result['rows']} záznamů, upraveno {result['updated']}, "
+               f"uloženo {result['blobs']} bloků.")
+
+
+@audit_cli.command("archive")
+@click.option("--older-than-days", type=int, default=None, help="Výchozí AUDIT_RETENTION_DAYS.")
+@click.option("--batch-size", type=int, default=None, help="Záznamů na dávku (výchozí AUDIT_ARCHIVE_BATCH_SIZE).")
+def audit_archive(older_than_days, batch_size):
+    """Přesune staré záznamy audit logu do komprimovaných měsíčních archivů."""
+    from datetime import datetime, timedelta
+    from app.services.audit_archive import archive_audit_log, prune_blobs
+
+    config = current_app.config
+    days = older_than_days if older_than_days is not None else config["AUDIT_RETENTION_DAYS"]
+    batch_size = batch_size or config["AUDIT_ARCHIVE_BATCH_SIZE"]
+    result = archive_audit_log(
+        config["AUDIT_ARCHIVE_DIR"],
+        datetime.utcnow() - timedelta(days=days),
+        batch_size=batch_size,
+        pause=config["AUDIT_ARCHIVE_PAUSE"],
+    )
+    click.echo(f"Archivováno {result['archived']} záznamů ({', '.join(result['months']) or '-'}).")
+    if result["archived"]:
+        pruned = prune_blobs(batch_size, config["AUDIT_ARCHIVE_PAUSE"])
+        click.echo(f"Smazáno {pruned} nepoužívaných bloků.")
+
+
+@audit_cli.command("prune-blobs")
+@click.option("--batch-size", type=int, default=None, help="Záznamů na dávku (výchozí AUDIT_ARCHIVE_BATCH_SIZE).")
+def audit_prune_blobs(batch_size):
+    """Smaže bloky audit_blob, na které už neodkazuje žádný záznam."""
+    from app.services.audit_archive import prune_blobs
+
+    config = current_app.config
+    pruned = prune_blobs(batch_size or config["AUDIT_ARCHIVE_BATCH_SIZE"], config["AUDIT_ARCHIVE_PAUSE"])
+    click.echo(f"Smazáno {pruned} nepoužívaných bloků.")
+
+
+@audit_cli.command("search")
+@click.argument("entity_type", type=click.Choice(["substance", "mixture"]))
+@click.argument("entity_id", type=int)
+@click.option("--action", type=click.Choice(["CREATE", "UPDATE", "DELETE"]), default=None)
+def audit_search(entity_type, entity_id, action):
+    """Vypíše archivovanou historii entity (JSON Lines)."""
+    import json
+    from app.services.audit_archive import search_archive
+
+    records = search_archive(current_app.config["AUDIT_ARCHIVE_DIR"], entity_type, entity_id, action)
+    for record in records:
+        record.pop("blobs", None)
+        click.echo(json.dumps(record, ensure_ascii=False))
+    click.echo(f"Nalezeno {len(records)} záznamů.", err=True)
+
+
+@audit_cli.command("restore")
+@click.argument("month")
+@click.option("--entity", default=None, help="Jen jedna entita, např. mixture:12.")
+def audit_restore(month, entity):
+    """Vrátí záznamy z měsíčního archivu (YYYY-MM) zpět do audit logu."""
+    from app.services.audit_archive import archive_path, restore_archive
+
+    directory = current_app.config["AUDIT_ARCHIVE_DIR"]
+    if not os.path.exists(archive_path(directory, month)):
+        raise click.ClickException(f"Archiv pro {month} neexistuje.")
+    entity_type, entity_id = None, None
+    if entity:
+        entity_type, _, raw_id = entity.partition(":")
+        if not raw_id.isdigit():
+            raise click.BadParameter("Očekáváno <typ>:<id>, např. mixture:12.", param_hint="--entity")
+        entity_id = int(raw_id)
+    count = restore_archive(directory, month, entity_type, entity_id)
+    click.echo(f"Obnoveno {count} záznamů.")
+
+
+@click.command("index-advisor")
+@click.option("--verbose", is_flag=True, help="Vypíše SQL a celý plán každého dotazu.")
+@click.option("--fail-on-issues", is_flag=True, help="Skončí kódem 1, pokud nějaký dotaz prochází tabulku.")
+def index_advisor(verbose, fail_on_issues):
+    """EXPLAIN klíčových dotazů aplikace a hlášení sekvenčních průchodů."""
+    from app.extensions import db
+    from app.monitoring.index_advisor import run_advisor, table_sizes
+
+    sizes = table_sizes(db.session)
+    click.echo(f"Databáze: {db.engine.dialect.name} "
+               f"({', '.join(f'{table} {count}' for table, count in sizes.items())})")
+    report = run_advisor(db.session)
+    for item in report:
+        status = "!!" if item["issues"] else "OK"
+        click.echo(f"{status} {item['name']:26} {item['description']}")
+        for issue in item["issues"]:
+            click.echo(f"     - {issue}")
+        if verbose:
+            click.echo("     " + " ".join(item["sql"].split()))
+            for line in item["plan"]:
+                click.echo(f"     | {line}")
+    problems = sum(1 for item in report if item["issues"])
+    click.echo(f"\n{problems} z {len(report)} dotazů má problém v plánu.")
+    db.session.rollback()
+    if problems and fail_on_issues:
+        raise SystemExit(1)
+
+
+def register_cli(app):
+    """Zaregistruje CLI skupiny do aplikace (po migrate.init_app)."""
+    app.cli.add_command(jobs_cli)
+    app.cli.add_command(annex_vi_cli)
+    app.cli.add_command(audit_cli)
+    # Diagnostika schématu patří k ostatním databázovým příkazům (flask db ...)
+    app.cli.commands["db"].add_command(index_advisor)
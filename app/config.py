@@ -8,10 +8,11 @@ load_dotenv(os.path.join(basedir, ".env"))
 
 
 # === VALIDACE SECRET_KEY ===
+_production_envs = ("production", "sqlite-production")
 _secret_key = os.environ.get("SECRET_KEY")
 
 if not _secret_key:
-    if os.environ.get("FLASK_ENV") == "production":
+    if os.environ.get("FLASK_ENV") in _production_envs:
         raise ValueError(
             "SECRET_KEY musí být nastaven v produkčním prostředí! "
             "Vygeneruj pomocí: python -c \"import secrets; print(secrets.token_hex(32))\""
@@ -27,7 +28,7 @@ if not _secret_key:
 
 _weak_keys = ['dev-key', 'test-key', 'secret', 'changeme', '12345']
 if _secret_key and any(weak in _secret_key.lower() for weak in _weak_keys):
-    if os.environ.get("FLASK_ENV") == "production":
+    if os.environ.get("FLASK_ENV") in _production_envs:
         raise ValueError("SECRET_KEY je příliš slabý pro produkci!")
     else:
         warnings.warn("⚠️  VAROVÁNÍ: SECRET_KEY vypadá slabě!", UserWarning)
@@ -46,7 +47,127 @@ class Config:
     # Security limits
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16 MB
     PREFERRED_URL_SCHEME = os.environ.get('PREFERRED_URL_SCHEME', 'http')
-    
+
+    # Navazovatelné uploady velkých souborů (import) - chunky musí být < MAX_CONTENT_LENGTH
+    UPLOAD_SPOOL_DIR = os.environ.get(
+        "UPLOAD_SPOOL_DIR", os.path.join(basedir, "instance", "uploads")
+    )
+    UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # 8 MB
+    UPLOAD_MAX_SIZE = int(os.environ.get("UPLOAD_MAX_SIZE", 10 * 1024 ** 3))  # 10 GB
+    UPLOAD_EXPIRY_SECONDS = 24 * 3600
+
+    # Úlohy na pozadí (fronta v DB, workery: flask jobs worker)
+    # JOBS_EAGER=1 provádí úlohy rovnou v požadavku (bez workeru)
+    JOBS_EAGER = os.environ.get("JOBS_EAGER", "0") == "1"
+    JOBS_WORKER_PROCESSES = int(os.environ.get("JOBS_WORKER_PROCESSES", 2))
+    JOBS_POLL_INTERVAL = float(os.environ.get("JOBS_POLL_INTERVAL", 1.0))
+    JOBS_STALE_SECONDS = int(os.environ.get("JOBS_STALE_SECONDS", 3600))
+    JOBS_RESULT_DIR = os.environ.get(
+        "JOBS_RESULT_DIR", os.path.join(basedir, "instance", "job_results")
+    )
+    # Měřit nárůst paměti během úloh (tracemalloc, výsledek v job.result["memory"]) - zpomaluje
+    JOBS_MEMORY_DIAGNOSTICS = os.environ.get("JOBS_MEMORY_DIAGNOSTICS", "0") == "1"
+
+    # ECHA CHEM API (ECHA_BASE_URL lze přesměrovat na mirror/testovací server)
+    ECHA_BASE_URL = os.environ.get("ECHA_BASE_URL", "https://chem.echa.europa.eu")
+    ECHA_TIMEOUT = float(os.environ.get("ECHA_TIMEOUT", 10))
+    ECHA_MAX_CONCURRENCY = int(os.environ.get("ECHA_MAX_CONCURRENCY", 6))  # souběžná spojení na host
+    # Sdílený HTTP transport: pool keep-alive spojení, opakování GET (502/503/504, chyby spojení)
+    ECHA_POOL_SIZE = int(os.environ.get("ECHA_POOL_SIZE", 10))
+    ECHA_HTTP_RETRIES = int(os.environ.get("ECHA_HTTP_RETRIES", 2))
+    ECHA_HTTP_BACKOFF = float(os.environ.get("ECHA_HTTP_BACKOFF", 0.3))  # s, exponenciálně + jitter
+    # Circuit breaker: po N chybách v řadě se host na X sekund nedotazuje
+    ECHA_BREAKER_THRESHOLD = int(os.environ.get("ECHA_BREAKER_THRESHOLD", 5))
+    ECHA_BREAKER_RESET = float(os.environ.get("ECHA_BREAKER_RESET", 30))
+
+    # Cache odpovědí ECHA (tabulka echa_cache + LRU v procesu)
+    ECHA_CACHE_ENABLED = os.environ.get("ECHA_CACHE_ENABLED", "1") == "1"
+    ECHA_CACHE_TTL = int(os.environ.get("ECHA_CACHE_TTL", 7 * 24 * 3600))
+    # Jak dlouho po vypršení TTL se vrací starý obsah a revaliduje na pozadí
+    ECHA_CACHE_STALE_TTL = int(os.environ.get("ECHA_CACHE_STALE_TTL", 30 * 24 * 3600))
+    ECHA_CACHE_LRU_SIZE = int(os.environ.get("ECHA_CACHE_LRU_SIZE", 2048))
+    # Jak často LRU ověřuje, zda cache nevymazal jiný proces (s)
+    ECHA_CACHE_PURGE_CHECK_SECONDS = float(os.environ.get("ECHA_CACHE_PURGE_CHECK_SECONDS", 1))
+    # Vlákna pro revalidaci stale záznamů na pozadí (fronta je omezená)
+    ECHA_CACHE_REVALIDATE_WORKERS = int(os.environ.get("ECHA_CACHE_REVALIDATE_WORKERS", 2))
+
+    # Lokální tabulka Přílohy VI (flask annex-vi import) - fetch_data hledá nejdřív v ní
+    ANNEX_VI_ENABLED = os.environ.get("ANNEX_VI_ENABLED", "1") == "1"
+    ANNEX_VI_RELOAD_SECONDS = int(os.environ.get("ANNEX_VI_RELOAD_SECONDS", 60))  # kontrola změn tabulky
+
+    # Hromadné obohacení katalogu z ECHA (úloha echa_enrich)
+    ECHA_ENRICH_CONCURRENCY = int(os.environ.get("ECHA_ENRICH_CONCURRENCY", 4))
+    ECHA_ENRICH_RATE = float(os.environ.get("ECHA_ENRICH_RATE", 5.0))  # HTTP požadavků/s
+    ECHA_ENRICH_BURST = int(os.environ.get("ECHA_ENRICH_BURST", 10))
+    ECHA_ENRICH_MAX_RETRIES = 3
+    ECHA_ENRICH_BACKOFF = 1.0  # s, zdvojuje se s každým pokusem
+
+    # Časování kroků klasifikace: off | metrics (histogramy) | log (i do klasifikačního logu)
+    # Admin ho může zapnout pro jeden požadavek (?clp_timing=log nebo hlavička X-CLP-Stage-Timing)
+    CLP_STAGE_TIMING = os.environ.get("CLP_STAGE_TIMING", "off")
+
+    # Metriky pro Prometheus (/metrics). Procesy (gunicorn workery, job workery)
+    # zapisují snapshoty do sdíleného METRICS_DIR; prázdné = jen aktuální proces.
+    METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+    METRICS_DIR = os.environ.get("METRICS_DIR", os.path.join(basedir, "instance", "metrics"))
+    METRICS_FLUSH_SECONDS = float(os.environ.get("METRICS_FLUSH_SECONDS", 5))
+    METRICS_TOKEN = os.environ.get("METRICS_TOKEN")  # volitelný Bearer token pro scraper
+
+    # Počítání SQL dotazů na požadavek: hlavička X-SQL-Queries / Server-Timing
+    # a varování v logu pro požadavky nad rozpočtem
+    SQL_QUERY_HEADER = os.environ.get("SQL_QUERY_HEADER", "0") == "1"
+    SQL_QUERY_BUDGET = int(os.environ.get("SQL_QUERY_BUDGET", 30))
+    SQL_TIME_BUDGET_MS = float(os.environ.get("SQL_TIME_BUDGET_MS", 500))
+
+    # Záznamy pomalých požadavků (SQL, kroky klasifikace, profil) - /admin/slow-requests
+    SLOW_REQUEST_ENABLED = os.environ.get("SLOW_REQUEST_ENABLED", "1") == "1"
+    SLOW_REQUEST_THRESHOLD_MS = float(os.environ.get("SLOW_REQUEST_THRESHOLD_MS", 1000))
+    SLOW_REQUEST_SAMPLE_RATE = float(os.environ.get("SLOW_REQUEST_SAMPLE_RATE", 0.0))  # např. 0.001
+    SLOW_REQUEST_PROFILE = os.environ.get("SLOW_REQUEST_PROFILE", "sampled")  # off | sampled | always
+    SLOW_REQUEST_DIR = os.environ.get("SLOW_REQUEST_DIR", os.path.join(basedir, "instance", "slow_requests"))
+    SLOW_REQUEST_MAX_FILES = int(os.environ.get("SLOW_REQUEST_MAX_FILES", 200))
+
+    # Vzorkovací profiler spouštěný z administrace (/admin/profiler)
+    PROFILER_DIR = os.environ.get("PROFILER_DIR", os.path.join(basedir, "instance", "profiles"))
+    PROFILER_INTERVAL_MS = float(os.environ.get("PROFILER_INTERVAL_MS", 5))
+    PROFILER_MAX_SECONDS = float(os.environ.get("PROFILER_MAX_SECONDS", 300))  # pojistka i pro režim N požadavků
+
+    # Zápis audit logu: transactional (hromadně ve stejné transakci) | async (fronta + vlákno po commitu)
+    AUDIT_WRITE_MODE = os.environ.get("AUDIT_WRITE_MODE", "transactional")
+    AUDIT_QUEUE_SIZE = int(os.environ.get("AUDIT_QUEUE_SIZE", 10000))
+    AUDIT_BATCH_SIZE = int(os.environ.get("AUDIT_BATCH_SIZE", 500))
+    AUDIT_FLUSH_INTERVAL = float(os.environ.get("AUDIT_FLUSH_INTERVAL", 0.5))  # s
+    # Retence: starší záznamy přesouvá `flask audit archive` do měsíčních .jsonl.gz archivů
+    AUDIT_RETENTION_DAYS = int(os.environ.get("AUDIT_RETENTION_DAYS", 365))
+    AUDIT_ARCHIVE_DIR = os.environ.get("AUDIT_ARCHIVE_DIR", os.path.join(basedir, "instance", "audit_archive"))
+    AUDIT_ARCHIVE_BATCH_SIZE = int(os.environ.get("AUDIT_ARCHIVE_BATCH_SIZE", 1000))
+    AUDIT_ARCHIVE_PAUSE = float(os.environ.get("AUDIT_ARCHIVE_PAUSE", 0.1))  # s mezi dávkami
+
+    # SQLite v provozu (viz app/sqlite_support.py) - zapíná profil sqlite-production
+    SQLITE_TUNING = os.environ.get("SQLITE_TUNING", "0") == "1"  # WAL + PRAGMA
+    SQLITE_WRITER_LOCK = os.environ.get("SQLITE_WRITER_LOCK", "0") == "1"  # fronta zapisovatelů
+    SQLITE_WRITER_TIMEOUT = float(os.environ.get("SQLITE_WRITER_TIMEOUT", 30))  # s
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", 5000))
+    SQLITE_SYNCHRONOUS = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+    SQLITE_CACHE_SIZE_KB = int(os.environ.get("SQLITE_CACHE_SIZE_KB", 64 * 1024))
+
+    # Repliky pro čtení (viz app/db_routing.py) - URL oddělené čárkou, prázdné = vše na primár
+    DATABASE_REPLICA_URLS = [url.strip() for url in os.environ.get("DATABASE_REPLICA_URLS", "").split(",")
+                             if url.strip()]
+    REPLICA_STICKY_SECONDS = float(os.environ.get("REPLICA_STICKY_SECONDS", 10))  # čtení z primáru po zápisu
+    REPLICA_CHECK_INTERVAL = float(os.environ.get("REPLICA_CHECK_INTERVAL", 10))  # s mezi kontrolami repliky
+    REPLICA_RETRY_SECONDS = float(os.environ.get("REPLICA_RETRY_SECONDS", 30))  # vyřazení po chybě
+    REPLICA_MAX_LAG_SECONDS = float(os.environ.get("REPLICA_MAX_LAG_SECONDS", 0))  # PostgreSQL, 0 = bez limitu
+
+    # Lokální cache workerů a jejich invalidace (viz app/services/local_cache.py)
+    CACHE_GENERATION_CHECK_MS = int(os.environ.get("CACHE_GENERATION_CHECK_MS", 0))  # 0 = každý požadavek
+    CACHE_GENERATION_REDIS_CHECK_MS = int(os.environ.get("CACHE_GENERATION_REDIS_CHECK_MS", 5000))  # s pub/sub
+    LOCAL_CACHE_REDIS_URL = os.environ.get("REDIS_URL")  # pub/sub invalidace, prázdné = jen kontrola v DB
+
+    # Zahřátí workeru po startu (viz app/warmup.py): off / sync / background
+    WARMUP_MODE = os.environ.get("WARMUP_MODE", "off")
+
     # Session
     PERMANENT_SESSION_LIFETIME = timedelta(hours=2)
     SESSION_COOKIE_HTTPONLY = True
@@ -69,6 +190,10 @@ class DevelopmentConfig(Config):
     )
     SQLALCHEMY_ECHO = True
     SESSION_COOKIE_SECURE = False
+    SQL_QUERY_HEADER = os.environ.get("SQL_QUERY_HEADER", "1") == "1"
+
+    # Bez spuštěného workeru se úlohy v developmentu provádí rovnou
+    JOBS_EAGER = os.environ.get("JOBS_EAGER", "1") == "1"
 
 
 class ProductionConfig(Config):
@@ -91,6 +216,7 @@ class ProductionConfig(Config):
     
     SESSION_COOKIE_SECURE = True
     PREFERRED_URL_SCHEME = 'https'
+    WARMUP_MODE = os.environ.get("WARMUP_MODE", "background")
     
     # Redis cache/limiter (volitelné, pokud je REDIS_URL)
     _redis_url = os.environ.get('REDIS_URL')
@@ -100,18 +226,42 @@ class ProductionConfig(Config):
         RATELIMIT_STORAGE_URL = _redis_url
 
 
+class SQLiteProductionConfig(Config):
+    """
+    Produkce na jednom stroji se SQLite (waitress, scripts/start_waitress.bat).
+
+    WAL a fronta zapisovatelů - souběžné úpravy nekončí "database is locked".
+    """
+    DEBUG = False
+    TESTING = False
+
+    _db_path = os.environ.get("SQLITE_PATH", os.path.join(basedir, "instance", "clp_calculator.db"))
+    SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL") or "sqlite:///" + (
+        _db_path if os.path.isabs(_db_path) else os.path.join(basedir, _db_path)
+    )
+    SQLITE_TUNING = os.environ.get("SQLITE_TUNING", "1") == "1"
+    SQLITE_WRITER_LOCK = os.environ.get("SQLITE_WRITER_LOCK", "1") == "1"
+
+    SESSION_COOKIE_SECURE = True
+    WARMUP_MODE = os.environ.get("WARMUP_MODE", "sync")
+
+
 class TestingConfig(Config):
     """Konfigurace pro testování."""
     DEBUG = False
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
+    JOBS_EAGER = True
+    METRICS_DIR = ""
+    SLOW_REQUEST_ENABLED = False
 
 
 # Mapa konfigurací
 config_map = {
     'development': DevelopmentConfig,
     'production': ProductionConfig,
+    'sqlite-production': SQLiteProductionConfig,
     'testing': TestingConfig,
 }
 
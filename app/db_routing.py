@@ -0,0 +1,214 @@
+"""
+Směrování čtení na repliky databáze (DATABASE_REPLICA_URLS).
+
+Bez nakonfigurovaných replik se nic nemění - vše jde na primár.
+
+S replikami:
+    - Repliky mají vlastní enginy mimo SQLALCHEMY_BINDS - migrace
+      i db.create_all() se jich netýkají. URL SQLite replik zadávejte
+      absolutně.
+    - Čtecí požadavek (GET/HEAD/OPTIONS) dostane na začátku repliku (round
+      robin mezi dostupnými) a RoutingSession na ni posílá čisté SELECTy.
+      Flush, INSERT/UPDATE/DELETE, SELECT ... FOR UPDATE, textové dotazy
+      a vše mimo požadavek (CLI, workery úloh) jdou na primár. Jakmile
+      požadavek zapíše, zbytek jeho čtení jde také na primár.
+    - Read-your-writes: po zapisujícím požadavku (POST/... s úspěšnou
+      odpovědí) čte uživatel REPLICA_STICKY_SECONDS z primáru (značka ve
+      Flask session), takže po uložení a přesměrování vidí svou změnu.
+    - Výpadek: replika se před použitím nejvýš jednou za
+      REPLICA_CHECK_INTERVAL ověří dotazem (u PostgreSQL i zpoždění replikace
+      proti REPLICA_MAX_LAG_SECONDS). Nedostupná replika nebo chyba spojení
+      ji vyřadí na REPLICA_RETRY_SECONDS - požadavky mezitím čtou z primáru.
+
+Pohledy, které musí vidět čerstvá data zapisovaná jinými procesy (průběh
+úloh), se označí dekorátorem @use_primary.
+"""
+
+import itertools
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from flask import current_app, request, session as flask_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event, exc
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+STICKY_KEY = "_db_primary_until"
+
+_ROUTER_KEY = "db_router"
+_INFO_REPLICA = "db_replica"  # engine repliky zvolený pro požadavek
+_INFO_WROTE = "db_wrote"  # požadavek už zapisoval -> další čtení z primáru
+
+_PG_LAG_SQL = (
+    "SELECT CASE WHEN pg_is_in_recovery() "
+    "THEN COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) ELSE 0 END"
+)
+
+
+def use_primary(view):
+    """Pohled čte vždy z primáru (např. stav úloh zapisovaný workerem)."""
+    view._use_primary = True
+    return view
+
+
+def _is_replica_safe(clause) -> bool:
+    return bool(getattr(clause, "is_select", False)) and getattr(clause, "_for_update_arg", None) is None
+
+
+class RoutingSession(Session):
+    """Session, která čisté SELECTy čtecího požadavku posílá na zvolenou repliku."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            replica = self.info.get(_INFO_REPLICA)
+            if replica is not None:
+                if self._flushing or getattr(clause, "is_dml", False):
+                    self.info[_INFO_WROTE] = True
+                elif not self.info.get(_INFO_WROTE) and _is_replica_safe(clause):
+                    return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class Replica:
+    def __init__(self, name: str, engine):
+        self.name = name
+        self.engine = engine
+        self.down_until = 0.0
+        self.checked_at = float("-inf")
+        self.lag: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+
+class ReplicaRouter:
+    """Výběr dostupné repliky (round robin) s kontrolou stavu a dočasným vyřazením."""
+
+    def __init__(self, replicas: List[Replica], check_interval: float = 10.0,
+                 retry_seconds: float = 30.0, max_lag: float = 0.0):
+        self.replicas = replicas
+        self.check_interval = check_interval
+        self.retry_seconds = retry_seconds
+        self.max_lag = max_lag
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def choose(self):
+        """Engine dostupné repliky, nebo None (čte se z primáru)."""
+        start = next(self._counter)
+        for offset in range(len(self.replicas)):
+            replica = self.replicas[(start + offset) % len(self.replicas)]
+            if self._available(replica):
+                return replica.engine
+        return None
+
+    def mark_down(self, replica: Replica, reason: str) -> None:
+        with self._lock:
+            if replica.down_until <= time.monotonic():
+                logger.warning("Replika %s vyřazena na %.0f s: %s", replica.name, self.retry_seconds, reason)
+            replica.down_until = time.monotonic() + self.retry_seconds
+            replica.last_error = reason
+
+    def _available(self, replica: Replica) -> bool:
+        now = time.monotonic()
+        if replica.down_until > now:
+            return False
+        if now - replica.checked_at < self.check_interval:
+            return True
+        try:
+            lag = self._probe(replica.engine)
+        except Exception as error:  # noqa: BLE001 - jakákoli chyba = replika nedostupná
+            self.mark_down(replica, str(error).splitlines()[0])
+            return False
+        replica.lag = lag
+        if self.max_lag and lag is not None and lag > self.max_lag:
+            self.mark_down(replica, f"zpoždění replikace {lag:.1f} s")
+            return False
+        replica.checked_at = now
+        replica.last_error = None
+        return True
+
+    @staticmethod
+    def _probe(engine) -> Optional[float]:
+        with engine.connect() as connection:
+            if engine.dialect.name == "postgresql":
+                return float(connection.exec_driver_sql(_PG_LAG_SQL).scalar() or 0)
+            connection.exec_driver_sql("SELECT 1")
+        return None
+
+    def status(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        return [{
+            "name": replica.name,
+            "url": replica.engine.url.render_as_string(hide_password=True),
+            "available": replica.down_until <= now,
+            "lag_seconds": replica.lag,
+            "last_error": replica.last_error,
+        } for replica in self.replicas]
+
+
+def get_router(app=None) -> Optional[ReplicaRouter]:
+    return (app or current_app).extensions.get(_ROUTER_KEY)
+
+
+def init_replicas(app) -> None:
+    """Zapne směrování čtení, pokud jsou nakonfigurované repliky (volat po db.init_app)."""
+    from app.extensions import db
+    from app.monitoring.metrics import REGISTRY
+    from app.monitoring.sql import install_query_counter
+
+    urls = app.config.get("DATABASE_REPLICA_URLS") or []
+    if not urls:
+        return
+    options = dict(app.config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    replicas = [Replica(f"replica_{index}", create_engine(url, **options)) for index, url in enumerate(urls)]
+    router = ReplicaRouter(
+        replicas,
+        check_interval=app.config.get("REPLICA_CHECK_INTERVAL", 10.0),
+        retry_seconds=app.config.get("REPLICA_RETRY_SECONDS", 30.0),
+        max_lag=app.config.get("REPLICA_MAX_LAG_SECONDS", 0.0),
+    )
+    app.extensions[_ROUTER_KEY] = router
+    sticky_seconds = app.config.get("REPLICA_STICKY_SECONDS", 10.0)
+    requests_total = REGISTRY.counter(
+        "clp_db_read_requests_total", "Čtecí požadavky podle zdroje dat.", labels=("target",)
+    )
+
+    for replica in replicas:
+        install_query_counter(replica.engine)
+
+        @event.listens_for(replica.engine, "handle_error")
+        def _replica_error(context, replica=replica):
+            if context.is_disconnect or isinstance(context.sqlalchemy_exception, exc.OperationalError):
+                router.mark_down(replica, str(context.original_exception).splitlines()[0])
+
+    @app.before_request
+    def _route_reads():
+        if request.method not in SAFE_METHODS:
+            return
+        view = app.view_functions.get(request.endpoint)
+        if getattr(view, "_use_primary", False) or flask_session.get(STICKY_KEY, 0) > time.time():
+            replica = None
+        else:
+            replica = router.choose()
+        if replica is not None:
+            db.session.info[_INFO_REPLICA] = replica
+        requests_total.inc(target="replica" if replica is not None else "primary")
+
+    @app.after_request
+    def _stick_to_primary(response):
+        wrote = request.method not in SAFE_METHODS or db.session.info.get(_INFO_WROTE)
+        if wrote and response.status_code < 400:
+            flask_session[STICKY_KEY] = time.time() + sticky_seconds
+        elif flask_session.get(STICKY_KEY, 0) and flask_session[STICKY_KEY] <= time.time():
+            flask_session.pop(STICKY_KEY)
+        return response
+
+    @app.teardown_request
+    def _clear_route(exc_info):
+        db.session.info.pop(_INFO_REPLICA, None)
+        db.session.info.pop(_INFO_WROTE, None)
+
+    logger.info("Čtení směrováno na %d replik(y)", len(replicas))
@@ -3,8 +3,8 @@ Inicializace Flask rozšíření.
 
 Obsahuje definice a konfiguraci SQLAlchemy, Migrate, CSRF, LoginManager, Cache a Limiter.
 """
+import click
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_wtf.csrf import CSRFProtect
 from flask_login import LoginManager
 from flask_caching import Cache
@@ -12,8 +12,62 @@ from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask_talisman import Talisman
 
-db = SQLAlchemy()
-migrate = Migrate()
+from app.db_routing import RoutingSession
+
+
+class _DeferredMigrateConfig:
+    """Zástupce app.extensions["migrate"] - skutečný Flask-Migrate vznikne při prvním přístupu."""
+
+    def __init__(self, app, db, directory):
+        self._app = app
+        self._db = db
+        self._directory = directory
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        from flask_migrate import Migrate
+        Migrate(self._app, self._db, directory=self._directory)  # nahradí app.extensions["migrate"]
+        return getattr(self._app.extensions["migrate"], name)
+
+
+class _LazyDbGroup(click.Group):
+    """Skupina `flask db` - příkazy Flask-Migrate se načtou až při jejím použití."""
+
+    @staticmethod
+    def _migrate_cli():
+        from flask_migrate.cli import db as db_cli
+        return db_cli
+
+    def parse_args(self, ctx, args):
+        # Volby (-d/--directory, -x) a callback skupiny přebírá od Flask-Migrate
+        migrate_cli = self._migrate_cli()
+        self.params, self.callback = migrate_cli.params, migrate_cli.callback
+        return super().parse_args(ctx, args)
+
+    def list_commands(self, ctx):
+        return sorted(set(self.commands) | set(self._migrate_cli().list_commands(ctx)))
+
+    def get_command(self, ctx, cmd_name):
+        return self.commands.get(cmd_name) or self._migrate_cli().get_command(ctx, cmd_name)
+
+
+class LazyMigrate:
+    """
+    Flask-Migrate s odloženým importem - alembic (~80 ms importu) potřebují
+    jen příkazy `flask db` a flask_migrate.upgrade(), ne WSGI workery.
+    """
+
+    def __init__(self, directory: str = "migrations"):
+        self.directory = directory
+
+    def init_app(self, app, db) -> None:
+        app.extensions["migrate"] = _DeferredMigrateConfig(app, db, self.directory)
+        app.cli.add_command(_LazyDbGroup("db", help="Perform database migrations."))
+
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})  # čtení na repliky, viz db_routing.py
+migrate = LazyMigrate()
 csrf = CSRFProtect()
 login_manager = LoginManager()
 cache = Cache()
@@ -3,4 +3,8 @@ from .role import Role
 from .substance import Substance
 from .mixture import Mixture
 from .component import MixtureComponent, ComponentType
-from .audit import AuditLog
+from .audit import AuditLog, AuditBlob, AuditArchiveIndex
+from .job import Job, JobStatus
+from .echa_cache import EchaCacheEntry
+from .annex_vi import AnnexViEntry, AnnexViSynonym
+from .cache_generation import CacheGeneration
@@ -0,0 +1,59 @@
+"""
+Model lokální tabulky harmonizované klasifikace (CLP Příloha VI, tabulka 3).
+
+Slouží pro vyhledávání bez sítě (uzavřená pracoviště) - data se importují ze
+souboru dodaného uživatelem (flask annex-vi import). Hodnoty jsou uložené ve
+stejném tvaru, jaký vrací ECHAService (seznamy H-vět, piktogramů, SCL, ATE).
+"""
+from app.extensions import db
+
+
+class AnnexViEntry(db.Model):
+    """
+    Jedna položka Přílohy VI (jeden indexový záznam).
+    """
+
+    __tablename__ = "annex_vi_entry"
+
+    id = db.Column(db.Integer, primary_key=True)
+    index_number = db.Column(db.String(20), nullable=True, index=True)
+    cas_number = db.Column(db.String(20), nullable=True, index=True)
+    ec_number = db.Column(db.String(20), nullable=True, index=True)
+    name = db.Column(db.Text, nullable=False)
+
+    hazard_classes = db.Column(db.JSON, nullable=True)  # ["Flam. Liq. 2", ...]
+    h_phrases = db.Column(db.JSON, nullable=True)       # ["H225", ...]
+    ghs_symbols = db.Column(db.JSON, nullable=True)     # ["GHS02", ...]
+    scl_limits = db.Column(db.JSON, nullable=True)      # ["Skin Corr. 1A: >= 25", ...]
+    ate_values = db.Column(db.JSON, nullable=True)      # {"oral": 100.0, ...}
+    m_factor_acute = db.Column(db.Integer, nullable=True)
+    m_factor_chronic = db.Column(db.Integer, nullable=True)
+    notes = db.Column(db.String(100), nullable=True)
+
+    imported_at = db.Column(db.DateTime, nullable=False, default=db.func.now())
+
+    synonyms = db.relationship(
+        "AnnexViSynonym", backref="entry", cascade="all, delete-orphan", passive_deletes=True
+    )
+
+    def __repr__(self):
+        return f"<AnnexViEntry {self.index_number} {self.cas_number}>"
+
+
+class AnnexViSynonym(db.Model):
+    """
+    Další klíč, pod kterým lze položku najít (další CAS/EC čísla, synonyma názvu).
+
+    `key` je normalizovaný (viz annex_vi.normalize_key).
+    """
+
+    __tablename__ = "annex_vi_synonym"
+
+    id = db.Column(db.Integer, primary_key=True)
+    entry_id = db.Column(
+        db.Integer, db.ForeignKey("annex_vi_entry.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    key = db.Column(db.String(500), nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<AnnexViSynonym {self.key}>"
@@ -12,6 +12,12 @@ class AuditLog(db.Model):
     Ukládá kdo, co, kdy a jak změnil.
     """
     __tablename__ = "audit_log"
+    __table_args__ = (
+        # Historie jedné entity a stránkování (timestamp, id) - viz audit_history.py
+        db.Index("ix_audit_log_entity_timeline", "entity_type", "entity_id", "timestamp", "id"),
+        db.Index("ix_audit_log_timeline", "timestamp", "id"),
+        db.Index("ix_audit_log_user_timeline", "user_id", "timestamp", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)
@@ -25,3 +31,45 @@ class AuditLog(db.Model):
 
     def __repr__(self):
         return f"<AuditLog {self.action} {self.entity_type}:{self.entity_id} by User:{self.user_id}>"
+
+
+class AuditBlob(db.Model):
+    """
+    Velká hodnota z auditního logu uložená jednou podle obsahu (SHA-256).
+
+    Záznamy AuditLog na ni odkazují jako {"blob": hash, "size": n} - stejný
+    klasifikační log uložený stokrát zabírá místo jen jednou.
+    """
+    __tablename__ = "audit_blob"
+
+    hash = db.Column(db.String(64), primary_key=True)
+    content = db.Column(db.Text, nullable=False)
+    size = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<AuditBlob {self.hash[:12]} ({self.size} B)>"
+
+
+class AuditArchiveIndex(db.Model):
+    """
+    Index archivovaného audit logu: které entity mají záznamy v kterém měsíčním
+    archivu (instance/audit_archive/audit-YYYY-MM.jsonl.gz). Jeden řádek na
+    entitu a měsíc, takže zůstává malý i pro miliony archivovaných záznamů.
+    """
+    __tablename__ = "audit_archive_index"
+    __table_args__ = (
+        db.UniqueConstraint("month", "entity_type", "entity_id", name="uq_audit_archive_index_month_entity"),
+        db.Index("ix_audit_archive_index_entity", "entity_type", "entity_id"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    month = db.Column(db.String(7), nullable=False)  # YYYY-MM
+    entity_type = db.Column(db.String(50), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    first_at = db.Column(db.DateTime, nullable=True)
+    last_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<AuditArchiveIndex {self.month} {self.entity_type}:{self.entity_id} ({self.count})>"
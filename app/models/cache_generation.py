@@ -0,0 +1,23 @@
+"""
+Model čítače generací pro invalidaci in-process cache.
+
+Jeden řádek na druh entity (substance, mixture, annex_vi). Každá transakce,
+která entity daného druhu mění, zvýší jeho generaci - procesy podle změny
+poznají, že mají zahodit své lokální cache (viz app/services/local_cache.py).
+"""
+from app.extensions import db
+
+
+class CacheGeneration(db.Model):
+    """
+    Generace jednoho druhu entit.
+    """
+
+    __tablename__ = "cache_generation"
+
+    kind = db.Column(db.String(50), primary_key=True)
+    generation = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<CacheGeneration {self.kind}={self.generation}>"
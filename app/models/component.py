@@ -52,6 +52,11 @@ class MixtureComponent(db.Model):
             "concentration > 0 AND concentration <= 100",
             name="check_concentration_range",
         ),
+        # Složky směsi (detail, rozbalení, kontrola cyklů)
+        db.Index("ix_mixture_component_mixture", "mixture_id", "component_type"),
+        # Zpětné dotazy "ve kterých směsích je látka/směs" - mixture_id přímo z indexu
+        db.Index("ix_mixture_component_substance", "substance_id", "mixture_id"),
+        db.Index("ix_mixture_component_component_mixture", "component_mixture_id", "mixture_id"),
     )
 
     @validates("concentration")
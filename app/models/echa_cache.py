@@ -0,0 +1,26 @@
+"""
+Model perzistentní cache odpovědí ECHA API.
+
+Jeden záznam = jedna odpověď GET endpointu (klíč je URL včetně parametrů).
+Uchovává validátory (ETag, Last-Modified) pro podmíněnou revalidaci.
+"""
+from app.extensions import db
+
+
+class EchaCacheEntry(db.Model):
+    """
+    Uložená odpověď ECHA API.
+    """
+
+    __tablename__ = "echa_cache"
+
+    key = db.Column(db.String(512), primary_key=True)
+    status_code = db.Column(db.Integer, nullable=False)
+    body = db.Column(db.JSON, nullable=True)
+    etag = db.Column(db.String(255), nullable=True)
+    last_modified = db.Column(db.String(64), nullable=True)
+    fetched_at = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<EchaCacheEntry {self.key} ({self.status_code})>"
@@ -0,0 +1,81 @@
+"""
+Model úlohy na pozadí (Job).
+
+Fronta úloh je uložena přímo v databázi, takže nepotřebuje žádný externí broker.
+Workery si úlohy nárokují atomickým UPDATE a průběžně zapisují stav a progres.
+"""
+from app.extensions import db
+
+
+class JobStatus:
+    """Stavy úlohy."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class Job(db.Model):
+    """
+    Reprezentuje jednu úlohu na pozadí (import, export, reklasifikace...).
+    """
+
+    __tablename__ = "job"
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default=JobStatus.QUEUED, index=True)
+    params = db.Column(db.JSON, nullable=True)
+    result = db.Column(db.JSON, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+
+    progress_current = db.Column(db.Integer, nullable=False, default=0)
+    progress_total = db.Column(db.Integer, nullable=True)
+    message = db.Column(db.String(255), nullable=True)
+    cancel_requested = db.Column(db.Boolean, nullable=False, default=False)
+
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)
+    worker_id = db.Column(db.String(64), nullable=True)
+
+    created_at = db.Column(db.DateTime, default=db.func.now())
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)
+
+    user = db.relationship("User")
+
+    @property
+    def is_finished(self):
+        return self.status in JobStatus.FINISHED
+
+    @property
+    def percent(self):
+        if self.status == JobStatus.SUCCEEDED:
+            return 100
+        if not self.progress_total:
+            return None
+        return min(100, round(100 * self.progress_current / self.progress_total))
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress_current": self.progress_current,
+            "progress_total": self.progress_total,
+            "percent": self.percent,
+            "message": self.message,
+            "result": self.result,
+            "error": self.error,
+            "cancel_requested": self.cancel_requested,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+    def __repr__(self):
+        return f"<Job {self.id} {self.kind} {self.status}>"
@@ -19,7 +19,7 @@ class Mixture(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False, unique=True)
     created_date = db.Column(db.DateTime, default=db.func.now(), index=True)
-    updated_at = db.Column(db.DateTime, default=db.func.now(), onupdate=db.func.now())
+    updated_at = db.Column(db.DateTime, default=db.func.now(), onupdate=db.func.now(), index=True)
 
     final_health_hazards = db.Column(db.Text, nullable=True)
     final_physical_hazards = db.Column(db.Text, nullable=True)
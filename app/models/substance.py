@@ -71,6 +71,9 @@ class Substance(db.Model):
         # REMOVED: cascade="all, delete-orphan" -> This prevented safe deletion checks!
         # Now, if we try to delete Substance, DB ForeignKey constraint will block it
         # because MixtureComponents still exist.
+        # passive_deletes: při mazání nenačítat komponenty jen kvůli vynulování FK
+        # (route delete existenci komponent ověřuje samostatným dotazem)
+        passive_deletes=True,
     )
 
     __table_args__ = (
@@ -0,0 +1,23 @@
+"""
+Monitoring výkonu aplikace.
+
+metrics.py - registr metrik procesu (čítače a histogramy s labely)
+timing.py  - měření času kroků klasifikace (StageTimer / vypnutý NullTimer)
+
+init_monitoring(app) registruje přepínání časování pro jednotlivé požadavky.
+"""
+from .metrics import REGISTRY, Counter, Gauge, Histogram, MetricsRegistry
+from .timing import NULL_TIMER, NullTimer, StageTimer, resolve_timer, init_monitoring
+
+__all__ = [
+    "REGISTRY",
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "MetricsRegistry",
+    "NULL_TIMER",
+    "NullTimer",
+    "StageTimer",
+    "resolve_timer",
+    "init_monitoring",
+]
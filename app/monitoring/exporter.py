@@ -0,0 +1,404 @@
+"""
+Export metrik ve formátu Prometheus (/metrics).
+
+Každý proces (gunicorn worker, job worker) drží metriky v paměti (REGISTRY).
+Aby /metrics vracelo součet za všechny procesy bez ohledu na to, který
+worker požadavek obslouží, zapisuje každý proces svůj snapshot do sdíleného
+adresáře METRICS_DIR (metrics_<pid>.json, nejvýš jednou za
+METRICS_FLUSH_SECONDS) a endpoint snapshoty sečte. Gauge hodnoty se berou
+jen od běžících procesů. Čítače a histogramy skončených procesů se (pod
+zámkem) přičtou do jednoho souhrnného souboru dead_processes.json a soubor
+procesu se smaže - součty neklesají a adresář neroste s recyklací workerů
+(max_requests). Stejně se zachází se souborem po skončeném procesu, jehož
+pid dostal nový proces.
+
+Sbírá se:
+    http_request_duration_seconds    - latence požadavků po endpointech
+    clp_stage_duration_seconds       - kroky klasifikace (viz timing.py)
+    db_pool_*                        - pool spojení SQLAlchemy
+    cache_requests_total             - hit/miss flask_caching (+ cache_hit_ratio)
+    http_client_*                    - volání externích API (ECHA) přes HttpTransport
+    jobs_finished_total, job_duration_seconds - propustnost úloh na pozadí
+"""
+
+import glob
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows (waitress) - jediný proces, stačí zámek vláken
+    fcntl = None
+
+from .metrics import REGISTRY, MetricsRegistry, merge_snapshots
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Horní meze histogramu doby úloh (s) - importy a exporty trvají minuty
+JOB_BUCKETS = (1, 5, 15, 60, 300, 900, 3600)
+
+# Souhrn čítačů a histogramů skončených procesů a zámek pro jeho úpravy
+AGGREGATE_FILE = "dead_processes.json"
+LOCK_FILE = ".metrics.lock"
+
+_compact_lock = threading.Lock()
+
+
+# === Ukládání snapshotů procesů ===
+
+class MetricsStore:
+    """Snapshoty metrik procesů ve sdíleném adresáři."""
+
+    def __init__(self, directory: Optional[str], flush_seconds: float = 5.0,
+                 registry: MetricsRegistry = REGISTRY):
+        self.directory = directory or None
+        self.flush_seconds = flush_seconds
+        self.registry = registry
+        self._last_flush = 0.0
+        self._token_pid: Optional[int] = None
+        self._token_value = ""
+
+    @classmethod
+    def from_app(cls, app) -> "MetricsStore":
+        store = app.extensions.get("metrics_store")
+        if store is None:
+            store = app.extensions["metrics_store"] = cls(
+                app.config.get("METRICS_DIR"), app.config.get("METRICS_FLUSH_SECONDS", 5.0)
+            )
+        return store
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(self.directory, f"metrics_{pid}.json")
+
+    def _token(self) -> str:
+        """Identita procesu v souboru - odliší nový proces se stejným pid (i po forku)."""
+        pid = os.getpid()
+        if self._token_pid != pid:
+            self._token_pid, self._token_value = pid, uuid.uuid4().hex
+        return self._token_value
+
+    def flush(self, force: bool = False) -> None:
+        """Zapíše snapshot procesu (bez force nejvýš jednou za flush_seconds)."""
+        if not self.directory:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_flush < self.flush_seconds:
+            return
+        self._last_flush = now
+
+        pid = os.getpid()
+        first_flush = self._token_pid != pid
+        data = {"pid": pid, "token": self._token(), "written_at": time.time(), "metrics": self.registry.snapshot()}
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            if first_flush:
+                # Soubor po skončeném procesu se stejným pid - nepřepsat jeho čítače
+                previous = _read_json(self._path(pid))
+                if previous is not None and previous.get("token") != data["token"]:
+                    self.compact([self._path(pid)])
+            _write_json(self._path(pid), data)
+        except OSError:
+            logger.exception("Nelze zapsat snapshot metrik do %s", self.directory)
+
+    @contextmanager
+    def _locked(self):
+        """Zámek souhrnného souboru napříč procesy (flock) i vlákny."""
+        with _compact_lock, open(os.path.join(self.directory, LOCK_FILE), "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def compact(self, paths: List[str]) -> int:
+        """
+        Přičte čítače a histogramy snapshotů skončených procesů do souhrnného
+        souboru a snapshoty smaže.
+
+        Returns:
+            počet zpracovaných souborů
+        """
+        aggregate_path = os.path.join(self.directory, AGGREGATE_FILE)
+        compacted = 0
+        with self._locked():
+            aggregate = _read_json(aggregate_path) or {}
+            snapshots = [aggregate.get("metrics") or {}]
+            done = []
+            for path in paths:
+                data = _read_json(path)
+                if data is None:
+                    continue  # mezitím zpracoval jiný proces
+                if data.get("token") == self._token() and data.get("pid") == os.getpid():
+                    continue  # vlastní soubor
+                metrics = data.get("metrics") or {}
+                snapshots.append({name: m for name, m in metrics.items() if m.get("kind") != "gauge"})
+                done.append(path)
+            if not done:
+                return 0
+            # Nejdřív souhrn, pak mazání - při pádu mezi nimi se nic neztratí
+            _write_json(aggregate_path, {"written_at": time.time(), "metrics": merge_snapshots(snapshots)})
+            for path in done:
+                try:
+                    os.remove(path)
+                    compacted += 1
+                except FileNotFoundError:
+                    pass
+        return compacted
+
+    def collect(self) -> Dict[str, Dict[str, Any]]:
+        """Sečtené metriky všech procesů (bez adresáře jen tohoto procesu)."""
+        if not self.directory:
+            return add_derived(self.registry.snapshot())
+
+        self.flush(force=True)
+        snapshots, dead = [], []
+        for path in sorted(glob.glob(os.path.join(self.directory, "metrics_*.json"))):
+            data = _read_json(path)
+            if data is None:
+                continue  # soubor právě mizí nebo je poškozený
+            if _pid_alive(data.get("pid")):
+                snapshots.append(data.get("metrics") or {})
+            else:
+                dead.append(path)
+        if dead:
+            try:
+                self.compact(dead)
+            except OSError:
+                logger.exception("Nelze zhutnit snapshoty metrik v %s", self.directory)
+        aggregate = _read_json(os.path.join(self.directory, AGGREGATE_FILE))
+        if aggregate is not None:
+            snapshots.append(aggregate.get("metrics") or {})
+        return add_derived(merge_snapshots(snapshots))
+
+
+def _read_json(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path: str, data: Dict[str, Any]) -> None:
+    # Atomický zápis - čtenář nikdy neuvidí rozepsaný soubor
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".metrics_", suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # běží pod jiným uživatelem
+    except OSError:
+        return False
+    return True
+
+
+def add_derived(metrics: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Doplní odvozené metriky (cache_hit_ratio z počtu hitů a missů)."""
+    cache = metrics.get("cache_requests_total")
+    if cache:
+        counts = {sample["labels"][0]: sample["value"] for sample in cache["samples"]}
+        total = counts.get("hit", 0) + counts.get("miss", 0)
+        if total:
+            metrics["cache_hit_ratio"] = {
+                "kind": "gauge", "help": "Podíl hitů flask_caching cache.", "labels": [],
+                "samples": [{"labels": [], "value": counts.get("hit", 0) / total}],
+            }
+    return dict(sorted(metrics.items()))
+
+
+# === Textový formát Prometheus ===
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: Optional[Dict[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{value}"' for name, value in (extra or {}).items()]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def render_prometheus(metrics: Dict[str, Dict[str, Any]]) -> str:
+    """Převede (sloučený) snapshot na textový formát Prometheus 0.0.4."""
+    lines: List[str] = []
+    for name, metric in metrics.items():
+        kind = metric["kind"]
+        labels = metric.get("labels", [])
+        lines.append(f"# HELP {name} {_escape(metric.get('help', ''))}")
+        lines.append(f"# TYPE {name} {kind}")
+        for sample in metric["samples"]:
+            if kind != "histogram":
+                lines.append(f"{name}{_format_labels(labels, sample['labels'])} {_format_value(sample['value'])}")
+                continue
+            values = sample["value"]
+            cumulative = 0
+            for bound, count in zip(list(metric["buckets"]) + [math.inf], values[:-2]):
+                cumulative += count
+                le = {"le": _format_value(float(bound))}
+                lines.append(f"{name}_bucket{_format_labels(labels, sample['labels'], le)} {_format_value(cumulative)}")
+            lines.append(f"{name}_sum{_format_labels(labels, sample['labels'])} {_format_value(values[-2])}")
+            lines.append(f"{name}_count{_format_labels(labels, sample['labels'])} {_format_value(values[-1])}")
+    return "\n".join(lines) + "\n"
+
+
+# === Metriky aplikace ===
+
+def request_histogram(registry: MetricsRegistry = REGISTRY):
+    return registry.histogram(
+        "http_request_duration_seconds", "Doba zpracování HTTP požadavku.",
+        labels=("endpoint", "method", "status"),
+    )
+
+
+def cache_counter(registry: MetricsRegistry = REGISTRY):
+    return registry.counter("cache_requests_total", "Čtení z flask_caching cache.", labels=("result",))
+
+
+def record_job(kind: str, status: str, seconds: Optional[float], registry: MetricsRegistry = REGISTRY) -> None:
+    """Započítá dokončenou úlohu na pozadí (volá JobService.run)."""
+    registry.counter(
+        "jobs_finished_total", "Dokončené úlohy na pozadí.", labels=("kind", "status"),
+    ).inc(kind=kind, status=status)
+    if seconds is not None:
+        registry.histogram(
+            "job_duration_seconds", "Doba běhu úloh na pozadí.", labels=("kind",), buckets=JOB_BUCKETS,
+        ).observe(seconds, kind=kind)
+
+
+def _collect_db_pool() -> Dict[str, Dict[str, Any]]:
+    """Stav poolu spojení DB (jen pokud pool počty poskytuje, tj. QueuePool)."""
+    from flask import has_app_context
+    from app.extensions import db
+
+    if not has_app_context():
+        return {}
+    pool = db.engine.pool
+    if not hasattr(pool, "checkedout"):
+        return {}
+    values = {
+        "db_pool_checked_out": ("Spojení DB právě vypůjčená z poolu.", pool.checkedout()),
+        "db_pool_overflow": ("Spojení DB nad rámec velikosti poolu.", max(pool.overflow(), 0)),
+        "db_pool_size": ("Velikost poolu spojení DB.", pool.size()),
+    }
+    return {
+        name: {"kind": "gauge", "help": help, "labels": [], "samples": [{"labels": [], "value": value}]}
+        for name, (help, value) in values.items()
+    }
+
+
+def _collect_http_transports() -> Dict[str, Dict[str, Any]]:
+    """Metriky HttpTransportů procesu (ECHA) převedené na histogramy a čítače."""
+    from app.services.http_transport import LATENCY_BUCKETS, transport_metrics
+
+    durations, errors, rejected, circuit = [], [], [], []
+    for name, data in transport_metrics().items():
+        for endpoint, m in data["endpoints"].items():
+            over = m["count"] - sum(m["buckets"])
+            durations.append({"labels": [name, endpoint], "value": m["buckets"] + [over, m["total_seconds"], m["count"]]})
+            errors.append({"labels": [name, endpoint], "value": m["errors"]})
+            rejected.append({"labels": [name, endpoint], "value": m["rejected"]})
+        for host, state in data["breakers"].items():
+            circuit.append({"labels": [name, host], "value": 0 if state == "closed" else 1})
+    if not (durations or circuit):
+        return {}
+    labels = ["transport", "endpoint"]
+    return {
+        "http_client_request_duration_seconds": {
+            "kind": "histogram", "help": "Latence volání externích API.", "labels": labels,
+            "buckets": list(LATENCY_BUCKETS), "samples": durations,
+        },
+        "http_client_errors_total": {
+            "kind": "counter", "help": "Chybná volání externích API (výjimka nebo 5xx).",
+            "labels": labels, "samples": errors,
+        },
+        "http_client_rejected_total": {
+            "kind": "counter", "help": "Volání odmítnutá otevřeným circuit breakerem.",
+            "labels": labels, "samples": rejected,
+        },
+        "http_client_circuit_open": {
+            "kind": "gauge", "help": "Circuit breaker hostu není zavřený (1 = open/half-open).",
+            "labels": ["transport", "host"], "samples": circuit,
+        },
+    }
+
+
+REGISTRY.register_collector("db_pool", _collect_db_pool)
+REGISTRY.register_collector("http_transports", _collect_http_transports)
+
+
+def _instrument_cache(app) -> None:
+    """Obalí get() backendu flask_caching počítáním hitů a missů."""
+    from app.extensions import cache
+
+    backend = app.extensions.get("cache", {}).get(cache)
+    if backend is None or getattr(backend, "_metrics_instrumented", False):
+        return
+    original_get = backend.get
+    counter = cache_counter()
+
+    def get(*args, **kwargs):
+        value = original_get(*args, **kwargs)
+        counter.inc(result="miss" if value is None else "hit")
+        return value
+
+    backend.get = get
+    backend._metrics_instrumented = True
+
+
+def init_metrics(app) -> None:
+    """Měření doby požadavků a průběžný zápis snapshotu procesu."""
+    from flask import g, request
+
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+    _instrument_cache(app)
+    store = MetricsStore.from_app(app)
+    histogram = request_histogram()
+
+    @app.before_request
+    def _metrics_start():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _metrics_observe(response):
+        started = g.pop("metrics_started", None)
+        if started is not None:
+            histogram.observe(
+                time.perf_counter() - started,
+                endpoint=request.endpoint or "unmatched",
+                method=request.method,
+                status=response.status_code,
+            )
+        store.flush()
+        return response
@@ -0,0 +1,140 @@
+"""
+Index advisor: plány klíčových dotazů aplikace (flask db index-advisor).
+
+Každý dotaz z HOT_QUERIES se sestaví stejně jako v aplikaci (s ukázkovými
+parametry z databáze), spustí se přes EXPLAIN a v plánu se hledá:
+    - sekvenční průchod tabulkou (SQLite "SCAN <tabulka>" bez indexu,
+      PostgreSQL "Seq Scan on <tabulka>"),
+    - třídění mimo index (SQLite "USE TEMP B-TREE FOR ORDER BY", PostgreSQL "Sort").
+
+PostgreSQL volí sekvenční průchod i u malých tabulek, kde je levnější -
+výsledek má smysl jen nad daty produkční velikosti.
+"""
+
+import re
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Tuple
+
+from sqlalchemy import func, select
+
+from app.models import AuditLog, ComponentType, Job, JobStatus, Mixture, MixtureComponent, Substance
+
+# (název, popis, sestavení dotazu z ukázkových parametrů)
+HotQuery = Tuple[str, str, Callable[[Dict[str, Any]], Any]]
+
+HOT_QUERIES: List[HotQuery] = [
+    ("mixture_components", "Složky směsi (detail, rozbalení)",
+     lambda s: select(MixtureComponent).where(MixtureComponent.mixture_id == s["mixture_id"])),
+    ("mixture_subcomponents", "Vnořené směsi (kontrola cyklů)",
+     lambda s: select(MixtureComponent).where(
+         MixtureComponent.mixture_id == s["mixture_id"],
+         MixtureComponent.component_type == ComponentType.MIXTURE)),
+    ("substance_in_use", "Je látka použita ve směsi? (mazání látky)",
+     lambda s: select(MixtureComponent.id).where(MixtureComponent.substance_id == s["substance_id"]).limit(1)),
+    ("affected_by_substances", "Směsi dotčené změnou látek (reklasifikace)",
+     lambda s: select(MixtureComponent.mixture_id)
+     .where(MixtureComponent.substance_id.in_([s["substance_id"]])).distinct()),
+    ("affected_by_mixtures", "Nadřazené směsi (reklasifikace, další úroveň)",
+     lambda s: select(MixtureComponent.mixture_id)
+     .where(MixtureComponent.component_mixture_id.in_([s["mixture_id"]])).distinct()),
+    ("mixture_list", "Seznam směsí (nejnovější první)",
+     lambda s: select(Mixture).order_by(Mixture.created_date.desc()).limit(20)),
+    ("mixture_recently_updated", "Naposledy změněné směsi",
+     lambda s: select(Mixture.id).where(Mixture.updated_at >= s["since"])
+     .order_by(Mixture.updated_at.desc()).limit(20)),
+    ("substance_list", "Seznam látek podle názvu",
+     lambda s: select(Substance).order_by(Substance.name).limit(20)),
+    ("substance_by_cas", "Látka podle CAS (import, Příloha VI)",
+     lambda s: select(Substance.id).where(Substance.cas_number == s["cas_number"])),
+    ("audit_entity_history", "Historie entity v audit logu",
+     lambda s: select(AuditLog).where(AuditLog.entity_type == "mixture", AuditLog.entity_id == s["mixture_id"])
+     .order_by(AuditLog.timestamp.desc(), AuditLog.id.desc()).limit(11)),
+    ("audit_user_history", "Audit log podle uživatele",
+     lambda s: select(AuditLog).where(AuditLog.user_id == s["user_id"])
+     .order_by(AuditLog.timestamp.desc(), AuditLog.id.desc()).limit(51)),
+    ("job_claim", "Další úloha ve frontě (worker)",
+     lambda s: select(Job.id).where(Job.status == JobStatus.QUEUED).order_by(Job.id).limit(1)),
+]
+
+_SQLITE_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(.*)$")
+_POSTGRES_SEQ_SCAN = re.compile(r"Seq Scan on (\w+)")
+
+
+def sample_parameters(session) -> Dict[str, Any]:
+    """Ukázkové parametry dotazů - existující id, pokud v databázi nějaká jsou."""
+    def first(column, default):
+        value = session.execute(select(func.min(column))).scalar()
+        return default if value is None else value
+
+    return {
+        "mixture_id": first(Mixture.id, 1),
+        "substance_id": first(Substance.id, 1),
+        "user_id": first(AuditLog.user_id, 1),
+        "cas_number": first(Substance.cas_number, "50-00-0"),
+        "since": datetime.utcnow() - timedelta(days=7),
+    }
+
+
+def literal_sql(connection, statement) -> str:
+    """SQL dotazu pro dialekt spojení s parametry vloženými jako literály."""
+    return str(statement.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True}))
+
+
+def explain(connection, sql: str) -> List[str]:
+    """Plán dotazu jako řádky textu (SQLite EXPLAIN QUERY PLAN, PostgreSQL EXPLAIN)."""
+    dialect = connection.dialect
+    if dialect.name == "sqlite":
+        return [row[-1] for row in connection.exec_driver_sql("EXPLAIN QUERY PLAN " + sql)]
+    if dialect.name == "postgresql":
+        return [row[0] for row in connection.exec_driver_sql("EXPLAIN " + sql)]
+    raise ValueError(f"EXPLAIN není podporován pro {dialect.name}")
+
+
+def plan_issues(dialect_name: str, plan: List[str]) -> List[str]:
+    """Problémy v plánu: sekvenční průchody tabulkou a třídění mimo index."""
+    issues = []
+    for line in plan:
+        detail = line.strip()
+        if dialect_name == "sqlite":
+            match = _SQLITE_SCAN.match(detail)
+            if match and "INDEX" not in match.group(2):
+                issues.append(f"sekvenční průchod tabulkou {match.group(1)}")
+            elif "USE TEMP B-TREE FOR ORDER BY" in detail:
+                issues.append("třídění mimo index")
+        else:
+            match = _POSTGRES_SEQ_SCAN.search(detail)
+            if match:
+                issues.append(f"sekvenční průchod tabulkou {match.group(1)}")
+            elif detail.lstrip("-> ").startswith(("Sort ", "Incremental Sort ")):
+                issues.append("třídění mimo index")
+    return issues
+
+
+def table_sizes(session) -> Dict[str, int]:
+    return {
+        model.__tablename__: session.execute(select(func.count()).select_from(model)).scalar()
+        for model in (Substance, Mixture, MixtureComponent, AuditLog, Job)
+    }
+
+
+def run_advisor(session) -> List[Dict[str, Any]]:
+    """
+    Spustí EXPLAIN pro všechny HOT_QUERIES.
+
+    Returns:
+        [{"name", "description", "sql", "plan": [...], "issues": [...]}, ...]
+    """
+    connection = session.connection()
+    params = sample_parameters(session)
+    report = []
+    for name, description, build in HOT_QUERIES:
+        sql = literal_sql(connection, build(params))
+        plan = explain(connection, sql)
+        report.append({
+            "name": name,
+            "description": description,
+            "sql": sql,
+            "plan": plan,
+            "issues": plan_issues(connection.dialect.name, plan),
+        })
+    return report
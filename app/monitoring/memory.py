@@ -0,0 +1,200 @@
+"""
+Diagnostika paměti procesu (tracemalloc).
+
+Admin v administraci (/admin/memory) zapne tracemalloc ve workeru, udělá
+snapshot před a po operaci (import, export, reklasifikace) a porovná je:
+kde vzniklo nejvíc alokací a co mezi snapshoty narostlo. Snapshoty se drží
+v paměti procesu (nejvýš MAX_SNAPSHOTS, starší se zahazují).
+
+Úlohy na pozadí běží v jiných procesech - pro ně je JOBS_MEMORY_DIAGNOSTICS,
+který nárůst paměti během úlohy zapíše do job.result["memory"]
+(viz measure_block).
+
+tracemalloc zpomaluje alokace (řádově desítky %), proto se zapíná jen
+na dobu diagnostiky.
+"""
+
+import gc
+import os
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+# Kolik snapshotů se v procesu uchovává
+MAX_SNAPSHOTS = 10
+
+# Hloubka zásobníku ukládaná ke každé alokaci
+TRACE_FRAMES = 10
+
+# Vlastní režie tracemallocu a importů by zakrývala skutečné alokace
+_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+_snapshots: List[Dict[str, Any]] = []
+_lock = threading.Lock()
+
+
+def current_rss() -> Optional[int]:
+    """Aktuální RSS procesu v bajtech (Linux /proc, jinak None)."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def start(frames: int = TRACE_FRAMES) -> bool:
+    """Zapne tracemalloc. Vrací False, pokud už běžel."""
+    if tracemalloc.is_tracing():
+        return False
+    tracemalloc.start(frames)
+    return True
+
+
+def stop() -> None:
+    """Vypne tracemalloc a zahodí snapshoty."""
+    with _lock:
+        _snapshots.clear()
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def status() -> Dict[str, Any]:
+    tracing = tracemalloc.is_tracing()
+    current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+    with _lock:
+        snapshots = [{k: v for k, v in s.items() if k != "snapshot"} for s in _snapshots]
+    return {
+        "tracing": tracing,
+        "pid": os.getpid(),
+        "traced_current": current,
+        "traced_peak": peak,
+        "rss": current_rss(),
+        "snapshots": snapshots,
+    }
+
+
+def take_snapshot(label: str = "") -> Dict[str, Any]:
+    """
+    Uloží snapshot alokací (po gc.collect, aby se nepočítal odpad čekající na GC).
+
+    Raises:
+        RuntimeError: tracemalloc neběží.
+    """
+    if not tracemalloc.is_tracing():
+        raise RuntimeError("tracemalloc neběží - nejdřív ho zapněte.")
+    gc.collect()
+    snapshot = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+    current, peak = tracemalloc.get_traced_memory()
+    with _lock:
+        entry = {
+            "id": (_snapshots[-1]["id"] + 1) if _snapshots else 1,
+            "label": label or f"snapshot {len(_snapshots) + 1}",
+            "taken_at": datetime.utcnow().isoformat(timespec="seconds"),
+            "traced_current": current,
+            "traced_peak": peak,
+            "rss": current_rss(),
+            "snapshot": snapshot,
+        }
+        _snapshots.append(entry)
+        del _snapshots[:-MAX_SNAPSHOTS]
+    return {k: v for k, v in entry.items() if k != "snapshot"}
+
+
+def _get(snapshot_id: int):
+    with _lock:
+        for entry in _snapshots:
+            if entry["id"] == snapshot_id:
+                return entry["snapshot"]
+    return None
+
+
+def _stat_row(stat) -> Dict[str, Any]:
+    frame = stat.traceback[0]
+    return {
+        "location": f"{frame.filename}:{frame.lineno}",
+        "size": stat.size,
+        "count": stat.count,
+        "size_diff": getattr(stat, "size_diff", None),
+        "count_diff": getattr(stat, "count_diff", None),
+        "traceback": [f"{f.filename}:{f.lineno}" for f in stat.traceback][:TRACE_FRAMES],
+    }
+
+
+def top(snapshot_id: int, limit: int = 25, key_type: str = "lineno") -> List[Dict[str, Any]]:
+    """Místa s největším objemem alokované paměti ve snapshotu."""
+    snapshot = _get(snapshot_id)
+    if snapshot is None:
+        return []
+    return [_stat_row(stat) for stat in snapshot.statistics(key_type)[:limit]]
+
+
+def compare(before_id: int, after_id: int, limit: int = 25, key_type: str = "lineno") -> List[Dict[str, Any]]:
+    """Největší nárůsty (a poklesy) alokací mezi dvěma snapshoty."""
+    before, after = _get(before_id), _get(after_id)
+    if before is None or after is None:
+        return []
+    stats = after.compare_to(before, key_type)
+    return [_stat_row(stat) for stat in stats[:limit]]
+
+
+@contextmanager
+def measure_block(limit: int = 10):
+    """
+    Změří nárůst paměti uvnitř bloku. Výsledek se doplní do yieldnutého slovníku:
+    {"traced_growth", "traced_peak", "rss_before", "rss_after", "top_growth": [...]}.
+
+    Pokud tracemalloc neběžel, zapne ho jen na dobu bloku.
+    """
+    result: Dict[str, Any] = {}
+    own = not tracemalloc.is_tracing()
+    if own:
+        tracemalloc.start(TRACE_FRAMES)
+    gc.collect()
+    before = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+    traced_before = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    result["rss_before"] = current_rss()
+    try:
+        yield result
+    finally:
+        gc.collect()
+        after = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+        current, peak = tracemalloc.get_traced_memory()
+        result.update({
+            "traced_growth": current - traced_before,
+            "traced_peak": peak,
+            "rss_after": current_rss(),
+            "top_growth": [
+                {"location": row["location"], "size_diff": row["size_diff"], "count_diff": row["count_diff"]}
+                for row in (_stat_row(s) for s in after.compare_to(before, "lineno")[:limit])
+            ],
+        })
+        if own:
+            tracemalloc.stop()
+
+
+def growth_trend(samples: List[int], warmup: int = 0) -> Dict[str, Any]:
+    """
+    Trend paměti z opakovaných měření (soak test, python -m benchmarks.soak).
+
+    Sklon se počítá metodou nejmenších čtverců ze vzorků po `warmup`
+    prvních (zahřívací cykly plní cache a lazy importy). Vrací
+    {"cycles", "slope" (bajty/cyklus), "growth" (poslední - první)}.
+    """
+    values = samples[warmup:]
+    n = len(values)
+    if n < 2:
+        return {"cycles": n, "slope": 0.0, "growth": 0}
+    mean_x = (n - 1) / 2
+    mean_y = sum(values) / n
+    numerator = sum((x - mean_x) * (y - mean_y) for x, y in enumerate(values))
+    denominator = sum((x - mean_x) ** 2 for x in range(n))
+    return {"cycles": n, "slope": numerator / denominator, "growth": values[-1] - values[0]}
@@ -0,0 +1,208 @@
+"""
+Registr metrik procesu.
+
+Jednoduché čítače, stavové hodnoty (gauge) a histogramy s labely (bez externí
+závislosti). Hodnoty jsou v paměti procesu; snapshot() vrací serializovatelný
+stav, který lze sloučit se snapshoty jiných procesů (merge_snapshots).
+
+Hodnoty, které se nesbírají průběžně (pool spojení DB, metriky HTTP
+transportu), dodávají collectory volané až při snapshotu.
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Výchozí horní meze histogramu (s)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"Metrika {self.name} očekává labely {self.label_names}, dostala {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+
+class Counter(_Metric):
+    """Monotónně rostoucí čítač."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = [{"labels": list(key), "value": value} for key, value in self._values.items()]
+        return {"kind": self.kind, "help": self.help, "labels": list(self.label_names), "samples": samples}
+
+
+class Gauge(_Metric):
+    """Okamžitá hodnota (při slučování procesů se sčítá)."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = [{"labels": list(key), "value": value} for key, value in self._values.items()]
+        return {"kind": self.kind, "help": self.help, "labels": list(self.label_names), "samples": samples}
+
+
+class Histogram(_Metric):
+    """Histogram s pevnými mezemi (kumulativní až při exportu)."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [počty po intervalech..., +Inf, součet, počet]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                data = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            index = len(self.buckets)
+            for position, bound in enumerate(self.buckets):
+                if value <= bound:
+                    index = position
+                    break
+            data[index] += 1
+            data[-2] += value
+            data[-1] += 1
+
+    def count(self, **labels) -> int:
+        data = self._values.get(self._key(labels))
+        return data[-1] if data else 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = [{"labels": list(key), "value": list(data)} for key, data in self._values.items()]
+        return {
+            "kind": self.kind, "help": self.help, "labels": list(self.label_names),
+            "buckets": list(self.buckets), "samples": samples,
+        }
+
+
+class MetricsRegistry:
+    """Pojmenované metriky procesu (get-or-create)."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: Dict[str, Callable[[], Dict[str, Dict[str, Any]]]] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help: str, labels: Iterable[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help, labels)
+
+    def gauge(self, name: str, help: str, labels: Iterable[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, help, labels)
+
+    def histogram(self, name: str, help: str, labels: Iterable[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help, labels, buckets=buckets)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def _get_or_create(self, cls, name, help, labels, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, labels, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metrika {name} už existuje jako {metric.kind}")
+            return metric
+
+    def register_collector(self, name: str, collector: Callable[[], Dict[str, Dict[str, Any]]]) -> None:
+        """
+        Zaregistruje (nebo nahradí) collector - funkci vracející metriky ve
+        formátu snapshotu, volanou při každém snapshot().
+        """
+        with self._lock:
+            self._collectors[name] = collector
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Serializovatelný stav všech metrik včetně výstupu collectorů."""
+        with self._lock:
+            metrics = dict(self._metrics)
+            collectors = dict(self._collectors)
+        result = {name: metric.snapshot() for name, metric in metrics.items()}
+        for name, collector in collectors.items():
+            try:
+                result.update(collector())
+            except Exception:
+                logger.exception("Collector metrik %s selhal", name)
+        return dict(sorted(result.items()))
+
+    def clear(self) -> None:
+        """Smaže metriky (collectory zůstávají)."""
+        with self._lock:
+            self._metrics.clear()
+
+
+def merge_snapshots(snapshots: Iterable[Dict[str, Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+    """Sečte snapshoty více procesů (čítače i histogramy se sčítají)."""
+    merged: Dict[str, Dict[str, Any]] = {}
+    for snapshot in snapshots:
+        for name, metric in snapshot.items():
+            target = merged.get(name)
+            if target is None:
+                target = merged[name] = dict(metric, samples=[])
+                target["_index"] = {}
+            index = target["_index"]
+            for sample in metric["samples"]:
+                key = tuple(sample["labels"])
+                if key not in index:
+                    value = list(sample["value"]) if isinstance(sample["value"], list) else sample["value"]
+                    index[key] = {"labels": list(key), "value": value}
+                    target["samples"].append(index[key])
+                elif isinstance(sample["value"], list):
+                    existing = index[key]["value"]
+                    if len(existing) == len(sample["value"]):
+                        index[key]["value"] = [a + b for a, b in zip(existing, sample["value"])]
+                else:
+                    index[key]["value"] += sample["value"]
+    for metric in merged.values():
+        metric.pop("_index", None)
+    return merged
+
+
+# Registr procesu
+REGISTRY = MetricsRegistry()
@@ -0,0 +1,273 @@
+"""
+Vzorkovací (statistický) profiler pro běžící worker.
+
+Vlákno sampleru každých PROFILER_INTERVAL_MS přečte zásobníky všech vláken
+procesu (sys._current_frames) a počítá, kolikrát se který zásobník objevil.
+Režie je úměrná intervalu, ne počtu volání jako u cProfile, takže jde
+zapnout i na produkčním provozu (velké importy, hromadné reklasifikace).
+
+Admin ho spustí v aktuálním procesu (workeru) na N sekund nebo N
+požadavků (/admin/profiler). Výsledek se uloží do PROFILER_DIR jako:
+    *.collapsed - "frame;frame;frame počet" (flamegraph.pl, speedscope)
+    *.svg       - flame graph k prohlédnutí přímo v prohlížeči
+
+Zásobníky nečinných vláken (čekání na zámek, socket, frontu) se vynechávají.
+"""
+
+import hashlib
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from html import escape
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Listové rámce, ve kterých vlákno jen čeká (soubor, funkce)
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("socket.py", "accept"),
+    ("socket.py", "readinto"),
+    ("socketserver.py", "serve_forever"),
+    ("queue.py", "get"),
+    ("connection.py", "wait"),
+}
+
+# Nejvyšší hloubka ukládaného zásobníku (hlubší se zkrátí u kořene)
+MAX_STACK_DEPTH = 128
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__") or os.path.basename(code.co_filename)
+    return f"{module}:{code.co_name}"
+
+
+def _is_idle(frame) -> bool:
+    return (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in IDLE_FRAMES
+
+
+class StackSampler(threading.Thread):
+    """Vlákno vzorkující zásobníky procesu, dokud neuplyne `seconds` nebo se nezavolá stop()."""
+
+    def __init__(self, interval: float = 0.005, seconds: Optional[float] = None,
+                 requests: Optional[int] = None, output_dir: Optional[str] = None,
+                 include_idle: bool = False):
+        super().__init__(name="stack-sampler", daemon=True)
+        self.interval = interval
+        self.seconds = seconds
+        self.requests_left = requests
+        self.output_dir = output_dir
+        self.include_idle = include_idle
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started_at = datetime.utcnow()
+        self.duration = 0.0
+        self.files: List[str] = []
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+
+    def run(self) -> None:
+        started = time.monotonic()
+        own_id = threading.get_ident()
+        while not self._stop_event.is_set():
+            if self.seconds is not None and time.monotonic() - started >= self.seconds:
+                break
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or (not self.include_idle and _is_idle(frame)):
+                    continue
+                labels = []
+                while frame is not None and len(labels) < MAX_STACK_DEPTH:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(labels))] += 1
+            self.samples += 1
+            self._stop_event.wait(self.interval)
+        self.duration = time.monotonic() - started
+        self._write_output()
+
+    def stop(self, wait: bool = True) -> None:
+        self._stop_event.set()
+        if wait and self.is_alive() and threading.current_thread() is not self:
+            self.join()
+
+    def request_finished(self) -> None:
+        """Započítá dokončený požadavek (režim N požadavků)."""
+        with self._lock:
+            if self.requests_left is None:
+                return
+            self.requests_left -= 1
+            done = self.requests_left <= 0
+        if done:
+            self.stop(wait=False)
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self.is_alive(),
+            "pid": os.getpid(),
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "seconds": self.seconds,
+            "requests_left": self.requests_left,
+            "samples": self.samples,
+            "stacks": len(self.stacks),
+            "files": list(self.files),
+        }
+
+    def _write_output(self) -> None:
+        if not self.output_dir:
+            return
+        base = f"profile_{self.started_at.strftime('%Y%m%dT%H%M%S')}_{os.getpid()}"
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            with open(os.path.join(self.output_dir, base + ".collapsed"), "w", encoding="utf-8") as f:
+                f.write(self.collapsed())
+            title = f"PID {os.getpid()}, {self.samples} vzorků, {self.duration:.1f} s, interval {self.interval * 1000:.0f} ms"
+            with open(os.path.join(self.output_dir, base + ".svg"), "w", encoding="utf-8") as f:
+                f.write(render_flamegraph(self.stacks, title=title))
+            self.files = [base + ".collapsed", base + ".svg"]
+        except OSError:
+            logger.exception("Výstup profileru se nepodařilo uložit do %s", self.output_dir)
+        logger.info("Profiler ukončen: %d vzorků, %d zásobníků", self.samples, len(self.stacks))
+
+
+# === Flame graph (SVG) ===
+
+def _build_tree(stacks: Dict[str, int]) -> Dict[str, Any]:
+    root = {"name": "all", "value": 0, "children": {}}
+    for stack, count in stacks.items():
+        root["value"] += count
+        node = root
+        for label in stack.split(";"):
+            child = node["children"].get(label)
+            if child is None:
+                child = node["children"][label] = {"name": label, "value": 0, "children": {}}
+            child["value"] += count
+            node = child
+    return root
+
+
+def _color(name: str) -> str:
+    digest = hashlib.md5(name.encode("utf-8")).digest()
+    return f"rgb({205 + digest[0] % 50},{80 + digest[1] % 130},{digest[2] % 55})"
+
+
+def render_flamegraph(stacks: Dict[str, int], title: str = "", width: int = 1200,
+                      frame_height: int = 16) -> str:
+    """Samostatné SVG (kořen nahoře); šířka rámce odpovídá počtu vzorků."""
+    root = _build_tree(stacks)
+    total = root["value"] or 1
+    rects: List[Tuple[float, int, float, Dict[str, Any]]] = []
+    max_depth = 0
+
+    def layout(node, x, depth):
+        nonlocal max_depth
+        node_width = node["value"] / total * width
+        if node_width < 0.1:
+            return
+        max_depth = max(max_depth, depth)
+        rects.append((x, depth, node_width, node))
+        child_x = x
+        for child in sorted(node["children"].values(), key=lambda c: c["name"]):
+            layout(child, child_x, depth + 1)
+            child_x += child["value"] / total * width
+
+    layout(root, 0.0, 0)
+    top = 24
+    height = top + (max_depth + 1) * frame_height + 4
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'font-family="monospace" font-size="11">',
+        f'<text x="4" y="16" font-size="13">{escape(title)}</text>',
+    ]
+    for x, depth, node_width, node in rects:
+        y = top + depth * frame_height
+        label = f"{node['name']} ({node['value']} vzorků, {node['value'] / total * 100:.1f} %)"
+        parts.append(
+            f'<g><title>{escape(label)}</title>'
+            f'<rect x="{x:.2f}" y="{y}" width="{node_width:.2f}" height="{frame_height - 1}" '
+            f'fill="{_color(node["name"])}" rx="1"/>'
+        )
+        chars = int(node_width / 7)
+        if chars >= 4:
+            text = node["name"] if len(node["name"]) <= chars else node["name"][:chars - 2] + ".."
+            parts.append(f'<text x="{x + 3:.2f}" y="{y + frame_height - 4}">{escape(text)}</text>')
+        parts.append("</g>")
+    parts.append("</svg>")
+    return "\n".join(parts)
+
+
+# === Řízení profileru v procesu ===
+
+_active: Optional[StackSampler] = None
+_active_lock = threading.Lock()
+
+
+def start_profiling(output_dir: str, seconds: Optional[float] = None, requests: Optional[int] = None,
+                    interval: float = 0.005, max_seconds: float = 300) -> StackSampler:
+    """
+    Spustí profiler v tomto procesu (nejvýš jeden najednou).
+
+    Raises:
+        RuntimeError: Profiler už běží.
+    """
+    global _active
+    with _active_lock:
+        if _active is not None and _active.is_alive():
+            raise RuntimeError("Profiler v tomto procesu už běží.")
+        # Pojistka - profiler nesmí zůstat zapnutý donekonečna
+        seconds = min(seconds, max_seconds) if seconds else max_seconds
+        _active = StackSampler(interval=interval, seconds=seconds, requests=requests, output_dir=output_dir)
+        _active.start()
+        return _active
+
+
+def stop_profiling() -> Optional[StackSampler]:
+    """Zastaví běžící profiler (počká na zápis výstupu)."""
+    with _active_lock:
+        sampler = _active
+    if sampler is not None:
+        sampler.stop()
+    return sampler
+
+
+def current_sampler() -> Optional[StackSampler]:
+    return _active
+
+
+def list_profiles(output_dir: str) -> List[Dict[str, Any]]:
+    """Uložené profily (nejnovější první)."""
+    try:
+        names = os.listdir(output_dir)
+    except FileNotFoundError:
+        return []
+    profiles = {}
+    for name in names:
+        base, ext = os.path.splitext(name)
+        if name.startswith("profile_") and ext in (".collapsed", ".svg"):
+            entry = profiles.setdefault(base, {"name": base, "files": {}})
+            entry["files"][ext[1:]] = name
+            entry["size"] = entry.get("size", 0) + os.path.getsize(os.path.join(output_dir, name))
+    return sorted(profiles.values(), key=lambda p: p["name"], reverse=True)
+
+
+def init_sampler(app) -> None:
+    """Počítání požadavků pro profiler spuštěný v režimu N požadavků."""
+    from flask import request
+
+    @app.after_request
+    def _sampler_count_request(response):
+        sampler = _active
+        if sampler is not None and sampler.requests_left is not None and sampler.is_alive():
+            # Ovládání profileru samotného se nepočítá
+            if not (request.endpoint or "").startswith("admin.profiler"):
+                sampler.request_finished()
+        return response
@@ -0,0 +1,212 @@
+"""
+Záznamy pomalých požadavků.
+
+Požadavek, který trvá déle než SLOW_REQUEST_THRESHOLD_MS, nebo je náhodně
+vybraný (SLOW_REQUEST_SAMPLE_RATE), se uloží jako JSON do
+SLOW_REQUEST_DIR: provedené SQL příkazy s časy (viz sql.py), doby kroků
+klasifikace (viz timing.py) a u vybraných požadavků i profil cProfile.
+Adresář se rotuje - drží se nejvýš SLOW_REQUEST_MAX_FILES posledních
+záznamů. Prohlížet je lze v administraci (/admin/slow-requests).
+
+cProfile má velkou režii, proto profiluje jen náhodně vybrané požadavky
+(SLOW_REQUEST_PROFILE="sampled"), případně všechny ("always", development).
+Pomalý nevybraný požadavek se uloží bez profilu.
+"""
+
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import re
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ("off", "sampled", "always")
+
+# Kolik řádků profilu (seřazeno podle kumulativního času) se ukládá
+PROFILE_LINES = 40
+
+_NAME_RE = re.compile(r"^[\w.-]+\.json$")
+
+
+class SlowRequestStore:
+    """Rotující adresář se záznamy pomalých požadavků."""
+
+    def __init__(self, directory: str, max_files: int = 200):
+        self.directory = directory
+        self.max_files = max_files
+
+    @classmethod
+    def from_app(cls, app) -> "SlowRequestStore":
+        store = app.extensions.get("slow_request_store")
+        if store is None:
+            store = app.extensions["slow_request_store"] = cls(
+                app.config["SLOW_REQUEST_DIR"], app.config.get("SLOW_REQUEST_MAX_FILES", 200)
+            )
+        return store
+
+    def save(self, record: Dict[str, Any]) -> str:
+        """Uloží záznam a smaže nejstarší nad limit. Vrací jméno souboru."""
+        os.makedirs(self.directory, exist_ok=True)
+        endpoint = re.sub(r"[^\w.-]", "_", record.get("endpoint") or "unmatched")
+        name = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}_{os.getpid()}_{endpoint}.json"
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".slow_", suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False)
+        os.replace(tmp, os.path.join(self.directory, name))
+        self._rotate()
+        return name
+
+    def _names(self) -> List[str]:
+        try:
+            return sorted(name for name in os.listdir(self.directory) if _NAME_RE.match(name))
+        except FileNotFoundError:
+            return []
+
+    def _rotate(self) -> None:
+        names = self._names()
+        for name in names[:max(len(names) - self.max_files, 0)]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass  # smazal ho jiný proces
+
+    def list(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Přehled posledních záznamů (nejnovější první), bez SQL a profilu."""
+        summaries = []
+        for name in reversed(self._names()[-limit:]):
+            record = self.load(name)
+            if record is None:
+                continue
+            summaries.append({
+                "name": name,
+                **{key: record.get(key) for key in (
+                    "timestamp", "method", "path", "endpoint", "status", "duration_ms",
+                    "reason", "sql_count", "sql_ms",
+                )},
+                "profiled": bool(record.get("profile")),
+            })
+        return summaries
+
+    def load(self, name: str) -> Optional[Dict[str, Any]]:
+        if not _NAME_RE.match(name):
+            return None
+        try:
+            with open(os.path.join(self.directory, name), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def clear(self) -> int:
+        names = self._names()
+        for name in names:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+        return len(names)
+
+
+def _profile_text(profiler: cProfile.Profile) -> str:
+    out = io.StringIO()
+    stats = pstats.Stats(profiler, stream=out)
+    stats.strip_dirs().sort_stats("cumulative").print_stats(PROFILE_LINES)
+    return out.getvalue()
+
+
+def build_record(request, response, duration: float, reason: str, sql_stats=None,
+                 timers=(), profile: Optional[str] = None) -> Dict[str, Any]:
+    """Záznam pomalého požadavku (serializovatelný)."""
+    from flask_login import current_user
+
+    record = {
+        "timestamp": datetime.utcnow().isoformat(timespec="seconds"),
+        "method": request.method,
+        "path": request.full_path.rstrip("?"),
+        "endpoint": request.endpoint,
+        "status": response.status_code,
+        "duration_ms": round(duration * 1000, 1),
+        "reason": reason,
+        "user_id": current_user.get_id() if current_user else None,
+        "pid": os.getpid(),
+        "sql_count": sql_stats.count if sql_stats else None,
+        "sql_ms": round(sql_stats.milliseconds, 1) if sql_stats else None,
+        "sql": [
+            {"statement": statement, "ms": round(seconds * 1000, 3)}
+            for statement, seconds in (sql_stats.statements if sql_stats else [])
+        ],
+        "stages": [timer.summary() for timer in timers],
+        "profile": profile,
+    }
+    return record
+
+
+def init_slow_requests(app) -> None:
+    """
+    Zaregistruje zachytávání pomalých a náhodně vybraných požadavků.
+
+    Konfigurace se čte při každém požadavku, takže jde měnit za běhu (testy).
+    """
+    from flask import g, request
+
+    config = app.config
+
+    @app.before_request
+    def _slow_request_start():
+        if not config.get("SLOW_REQUEST_ENABLED"):
+            return
+        sample_rate = config.get("SLOW_REQUEST_SAMPLE_RATE", 0.0)
+        profile_mode = config.get("SLOW_REQUEST_PROFILE", "sampled")
+        g.slow_request_started = time.perf_counter()
+        g.slow_request_sampled = sample_rate > 0 and random.random() < sample_rate
+        # Nastavený režim CLP_STAGE_TIMING platí; při "off" se kroky klasifikace
+        # měří jen u náhodně vybraných požadavků (vypnuté časování jinak nic nestojí)
+        if (g.slow_request_sampled and not g.get("clp_stage_timing")
+                and config.get("CLP_STAGE_TIMING", "off") == "off"):
+            g.clp_stage_timing = "metrics"
+        if profile_mode == "always" or (profile_mode == "sampled" and g.slow_request_sampled):
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+                g.slow_request_profiler = profiler
+            except ValueError:
+                pass  # běží jiný profiler (např. debugger)
+
+    @app.after_request
+    def _slow_request_capture(response):
+        started = g.pop("slow_request_started", None)
+        profiler = g.pop("slow_request_profiler", None)
+        timers = g.pop("clp_stage_timers", ())
+        if profiler is not None:
+            profiler.disable()
+        if started is None:
+            return response
+
+        duration = time.perf_counter() - started
+        if duration * 1000 >= config.get("SLOW_REQUEST_THRESHOLD_MS", 1000):
+            reason = "threshold"
+        elif g.get("slow_request_sampled"):
+            reason = "sample"
+        else:
+            return response
+
+        try:
+            record = build_record(
+                request, response, duration, reason,
+                sql_stats=g.get("sql_stats"),
+                timers=timers,
+                profile=_profile_text(profiler) if profiler is not None else None,
+            )
+            SlowRequestStore.from_app(app).save(record)
+        except Exception:
+            logger.exception("Záznam pomalého požadavku se nepodařilo uložit")
+        if reason == "threshold":
+            logger.warning("Pomalý požadavek %s %s: %.0f ms", request.method, request.path, duration * 1000)
+        return response
@@ -0,0 +1,146 @@
+"""
+Počítání SQL dotazů a jejich času (SQLAlchemy events).
+
+Posluchače before/after_cursor_execute na enginu započítají každý příkaz do
+všech právě aktivních QueryStats (contextvar, takže vlákna ani souběžné
+požadavky se nemíchají). Dotazy mimo sledovaný blok se nepočítají.
+
+Pro požadavky:
+    - SQL_QUERY_HEADER: hlavičky X-SQL-Queries a Server-Timing (development)
+    - požadavek nad SQL_QUERY_BUDGET dotazů nebo SQL_TIME_BUDGET_MS se zaloguje
+
+V testech hlídá rozpočet dotazů assert_max_queries().
+"""
+
+import contextvars
+import logging
+import time
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Kolik příkazů (s časem) si QueryStats pamatuje - pro hlášení v testech a záznamy pomalých požadavků
+MAX_RECORDED_STATEMENTS = 100
+
+_active: contextvars.ContextVar[Tuple["QueryStats", ...]] = contextvars.ContextVar("sql_query_stats", default=())
+
+
+class QueryStats:
+    """Počet a celkový čas SQL příkazů v jednom sledovaném bloku."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: List[Tuple[str, float]] = []  # (SQL, sekundy)
+
+    @property
+    def milliseconds(self) -> float:
+        return self.seconds * 1000
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        if len(self.statements) < MAX_RECORDED_STATEMENTS:
+            self.statements.append((statement, seconds))
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active.get():
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    active = _active.get()
+    started = conn.info.get("query_started")
+    if not active or not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    for stats in active:
+        stats.record(statement, elapsed)
+
+
+def install_query_counter(engine) -> None:
+    """Zaregistruje posluchače na engine (opakované volání nic nedělá)."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def start_tracking() -> Tuple[QueryStats, contextvars.Token]:
+    stats = QueryStats()
+    return stats, _active.set(_active.get() + (stats,))
+
+
+def stop_tracking(token: contextvars.Token) -> None:
+    _active.reset(token)
+
+
+@contextmanager
+def track_queries():
+    """Context manager počítající SQL příkazy uvnitř bloku (vnořené bloky se počítají i do vnějších)."""
+    stats, token = start_tracking()
+    try:
+        yield stats
+    finally:
+        stop_tracking(token)
+
+
+@contextmanager
+def assert_max_queries(limit: int):
+    """
+    Test selže, pokud blok provede víc než `limit` SQL příkazů.
+
+    Použití:
+        with assert_max_queries(5):
+            client.get("/mixture/1")
+    """
+    with track_queries() as stats:
+        yield stats
+    if stats.count > limit:
+        listing = "\n".join(f"  {i}. {sql}" for i, (sql, _) in enumerate(stats.statements, start=1))
+        raise AssertionError(f"Očekáváno nejvýš {limit} SQL dotazů, provedeno {stats.count}:\n{listing}")
+
+
+def init_sql_accounting(app) -> None:
+    """Počítání dotazů pro každý požadavek (hlavička v developmentu, log nad rozpočtem)."""
+    from flask import g, request
+    from app.extensions import db
+
+    with app.app_context():
+        install_query_counter(db.engine)
+
+    query_budget: Optional[int] = app.config.get("SQL_QUERY_BUDGET")
+    time_budget_ms: Optional[float] = app.config.get("SQL_TIME_BUDGET_MS")
+
+    @app.before_request
+    def _sql_start():
+        g.sql_stats, g.sql_token = start_tracking()
+
+    @app.after_request
+    def _sql_report(response):
+        stats = g.get("sql_stats")
+        if stats is None:
+            return response
+        if app.config.get("SQL_QUERY_HEADER"):
+            response.headers["X-SQL-Queries"] = str(stats.count)
+            response.headers.add("Server-Timing", f'sql;dur={stats.milliseconds:.1f};desc="{stats.count} queries"')
+        if (query_budget and stats.count > query_budget) or (time_budget_ms and stats.milliseconds > time_budget_ms):
+            logger.warning(
+                "Požadavek %s %s (%s) provedl %d SQL dotazů za %.1f ms (rozpočet %s dotazů / %s ms)",
+                request.method, request.path, request.endpoint, stats.count, stats.milliseconds,
+                query_budget, time_budget_ms,
+            )
+        return response
+
+    @app.teardown_request
+    def _sql_stop(exc):
+        token = g.pop("sql_token", None)
+        g.pop("sql_stats", None)
+        if token is not None:
+            try:
+                stop_tracking(token)
+            except ValueError:
+                pass  # token z jiného kontextu (nemělo by nastat)
@@ -0,0 +1,153 @@
+"""
+Časování kroků klasifikace (run_clp_classification).
+
+StageTimer měří pro každý krok čas (wall) a procesorový čas vlákna (CPU).
+Když je časování vypnuté, engine dostane NULL_TIMER, jehož stage() vrací
+sdílený prázdný context manager - bez volání hodin a bez alokací.
+
+Režim (CLP_STAGE_TIMING nebo g.clp_stage_timing pro jeden požadavek):
+    "off"     - neměří se
+    "metrics" - doby kroků jdou do histogramu clp_stage_duration_seconds
+    "log"     - navíc se přidají do klasifikačního logu směsi
+"""
+
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, Optional, Union
+
+from .metrics import REGISTRY
+
+TIMING_MODES = ("off", "metrics", "log")
+
+# Hlavička / parametr pro zapnutí časování v jednom požadavku (jen admin)
+TIMING_HEADER = "X-CLP-Stage-Timing"
+TIMING_ARG = "clp_timing"
+
+_NULL_CONTEXT = nullcontext()
+
+
+class NullTimer:
+    """Vypnuté časování (nic neměří)."""
+
+    enabled = False
+    attach_to_log = False
+
+    def stage(self, name: str):
+        return _NULL_CONTEXT
+
+    def set(self, **info) -> None:
+        pass
+
+    def finish(self) -> None:
+        pass
+
+
+NULL_TIMER = NullTimer()
+
+
+class StageTimer:
+    """Doby jednotlivých kroků jedné klasifikace."""
+
+    enabled = True
+
+    def __init__(self, attach_to_log: bool = False, registry=REGISTRY):
+        self.attach_to_log = attach_to_log
+        self.registry = registry
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.info: Dict[str, Any] = {}
+        self._started = time.perf_counter()
+        self._started_cpu = time.thread_time()
+        self.total: Optional[Dict[str, float]] = None
+
+    @contextmanager
+    def stage(self, name: str):
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            stage = self.stages.setdefault(name, {"wall_ms": 0.0, "cpu_ms": 0.0})
+            stage["wall_ms"] += (time.perf_counter() - wall) * 1000
+            stage["cpu_ms"] += (time.thread_time() - cpu) * 1000
+
+    def set(self, **info) -> None:
+        """Doplňující údaje (počet komponent, počet rozbalených látek)."""
+        self.info.update(info)
+
+    def finish(self) -> None:
+        """Uzavře měření a zapíše doby do registru metrik."""
+        self.total = {
+            "wall_ms": (time.perf_counter() - self._started) * 1000,
+            "cpu_ms": (time.thread_time() - self._started_cpu) * 1000,
+        }
+        if self.registry is not None:
+            histogram = stage_histogram(self.registry)
+            for name, stage in self.stages.items():
+                histogram.observe(stage["wall_ms"] / 1000, stage=name)
+            histogram.observe(self.total["wall_ms"] / 1000, stage="total")
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "stages": {name: {k: round(v, 3) for k, v in s.items()} for name, s in self.stages.items()},
+            "total": {k: round(v, 3) for k, v in (self.total or {}).items()},
+            **self.info,
+        }
+
+    def log_entry(self) -> Dict[str, Any]:
+        """Záznam do klasifikačního logu směsi."""
+        parts = [f"{name} {stage['wall_ms']:.1f} ms" for name, stage in self.stages.items()]
+        total = self.total or {"wall_ms": 0.0, "cpu_ms": 0.0}
+        detail = (
+            f"{', '.join(parts)}; celkem {total['wall_ms']:.1f} ms (CPU {total['cpu_ms']:.1f} ms), "
+            f"{self.info.get('components', 0)} komponent, {self.info.get('substances', 0)} látek"
+        )
+        return {"step": "Časování kroků", "detail": detail, "result": "INFO", "timing": self.summary()}
+
+
+def stage_histogram(registry=REGISTRY):
+    return registry.histogram(
+        "clp_stage_duration_seconds", "Doba kroků klasifikace směsi (stage=total pro celou klasifikaci).",
+        labels=("stage",),
+    )
+
+
+def resolve_timer(timing: Union[None, str, StageTimer, NullTimer] = None):
+    """
+    Timer pro jednu klasifikaci.
+
+    Args:
+        timing: Instance timeru, režim ('off'/'metrics'/'log') nebo None =
+            režim požadavku (g.clp_stage_timing), jinak CLP_STAGE_TIMING.
+    """
+    if isinstance(timing, (StageTimer, NullTimer)):
+        return timing
+    if timing is None:
+        from flask import current_app, g, has_app_context
+
+        if not has_app_context():
+            return NULL_TIMER
+        timing = g.get("clp_stage_timing") or current_app.config.get("CLP_STAGE_TIMING", "off")
+    if timing == "off" or timing not in TIMING_MODES:
+        return NULL_TIMER
+    timer = StageTimer(attach_to_log=timing == "log")
+    _register_request_timer(timer)
+    return timer
+
+
+def _register_request_timer(timer: StageTimer) -> None:
+    """V rámci požadavku si timer zapamatuje (záznamy pomalých požadavků)."""
+    from flask import g, has_request_context
+
+    if has_request_context():
+        g.setdefault("clp_stage_timers", []).append(timer)
+
+
+def init_monitoring(app) -> None:
+    """Umožní adminům zapnout časování pro jeden požadavek (hlavička nebo ?clp_timing=log)."""
+    from flask import g, request
+    from flask_login import current_user
+
+    @app.before_request
+    def _stage_timing_override():
+        mode = request.headers.get(TIMING_HEADER) or request.args.get(TIMING_ARG)
+        if mode in TIMING_MODES and current_user.is_authenticated and current_user.has_role(["admin"]):
+            g.clp_stage_timing = mode
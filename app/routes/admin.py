@@ -1,17 +1,24 @@
 """
 Administrační rozhraní.
 
-Obsahuje endpointy pro správu uživatelů, rolí a prohlížení audit logu.
+Obsahuje endpointy pro správu uživatelů, rolí, prohlížení audit logu,
+správu cache ECHA API, záznamy pomalých požadavků, vzorkovací profiler
+a diagnostiku paměti.
 Práva jsou omezena pouze pro roli 'admin'.
 """
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+from datetime import datetime, timedelta
+from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, abort, send_from_directory
 from flask_login import login_required, current_user
 from app.models.user import User
 from app.models.role import Role
-from app.models.audit import AuditLog
+from app.services import audit_history
 from app.extensions import db
 from app.utils.security import admin_required
 from app.forms.admin import UserCreateForm
+from app.services.job_service import JobService
+from app.monitoring.slow_requests import SlowRequestStore
+from app.monitoring import sampler as profiler_sampler
+from app.monitoring import memory as memory_diagnostics
 
 admin_bp = Blueprint("admin", __name__)
 
@@ -41,8 +48,43 @@ def users():
 @login_required
 @admin_required
 def audit_log():
-    logs = AuditLog.query.order_by(AuditLog.timestamp.desc()).limit(200).all()
-    return render_template("admin/audit_log.html", logs=logs, active_tab="admin_audit")
+    """Audit log po stránkách s filtry (uživatel, akce, entita, časové rozmezí)."""
+    args = request.args
+    filters = {
+        "user_id": args.get("user_id", type=int),
+        "action": args.get("action") if args.get("action") in audit_history.ACTIONS else None,
+        "entity_type": args.get("entity_type") if args.get("entity_type") in audit_history.ENTITY_TYPES else None,
+        "entity_id": args.get("entity_id", type=int),
+        "since": _parse_date(args.get("since")),
+        "until": _parse_date(args.get("until"), end_of_day=True),
+    }
+    try:
+        logs, next_cursor = audit_history.audit_page(cursor=args.get("cursor") or None, **filters)
+    except ValueError:
+        abort(400)
+    # Parametry filtru pro odkaz na další stránku
+    filter_args = {key: value for key, value in args.items() if key != "cursor" and value}
+    return render_template(
+        "admin/audit_log.html",
+        logs=logs,
+        next_cursor=next_cursor,
+        filter_args=filter_args,
+        users=User.query.order_by(User.username).all(),
+        actions=audit_history.ACTIONS,
+        entity_types=audit_history.ENTITY_TYPES,
+        active_tab="admin_audit",
+    )
+
+
+def _parse_date(value, end_of_day=False):
+    """Datum z filtru (YYYY-MM-DD); horní mez zahrnuje celý den."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        return None
+    return parsed + timedelta(days=1) if end_of_day else parsed
 
 @admin_bp.route("/admin/user/<int:user_id>/update_role", methods=["POST"])
 @login_required
@@ -79,3 +121,158 @@ def delete_user(user_id):
     db.session.commit()
     flash(f"Uživatel {user.username} byl úspěšně odstraněn.", "success")
     return redirect(url_for("admin.users"))
+
+@admin_bp.route("/admin/echa-cache")
+@login_required
+@admin_required
+def echa_cache():
+    """Stav cache odpovědí ECHA API a metriky HTTP transportu."""
+    from app.services.echa_cache import EchaCache
+    from app.services.http_transport import transport_metrics
+
+    summary = EchaCache.from_app(current_app).summary()
+    transport = transport_metrics().get("echa")
+    return render_template("admin/echa_cache.html", summary=summary, transport=transport,
+                           active_tab="admin_echa_cache")
+
+@admin_bp.route("/admin/echa-cache/purge", methods=["POST"])
+@login_required
+@admin_required
+def echa_cache_purge():
+    from app.services.echa_cache import EchaCache
+
+    expired_only = request.form.get("scope") == "expired"
+    count = EchaCache.from_app(current_app).purge(expired_only=expired_only)
+    flash(f"Z ECHA cache bylo odstraněno {count} záznamů.", "success")
+    return redirect(url_for("admin.echa_cache"))
+
+@admin_bp.route("/admin/echa-cache/prewarm", methods=["POST"])
+@login_required
+@admin_required
+def echa_cache_prewarm():
+    """Spustí předehřátí cache (zadané CAS/EC, jinak celý katalog) jako úlohu."""
+    queries = [q.strip() for q in request.form.get("queries", "").replace(",", "\n").splitlines() if q.strip()]
+    job = JobService.submit("echa_prewarm", {"queries": queries}, user_id=current_user.id)
+    return redirect(url_for("jobs.view", job_id=job.id))
+
+@admin_bp.route("/admin/slow-requests")
+@login_required
+@admin_required
+def slow_requests():
+    """Přehled zachycených pomalých (a náhodně vybraných) požadavků."""
+    records = SlowRequestStore.from_app(current_app).list()
+    return render_template("admin/slow_requests.html", records=records, active_tab="admin_slow_requests")
+
+@admin_bp.route("/admin/slow-requests/<name>")
+@login_required
+@admin_required
+def slow_request_detail(name):
+    record = SlowRequestStore.from_app(current_app).load(name)
+    if record is None:
+        abort(404)
+    return render_template("admin/slow_request_detail.html", name=name, record=record,
+                           active_tab="admin_slow_requests")
+
+@admin_bp.route("/admin/slow-requests/clear", methods=["POST"])
+@login_required
+@admin_required
+def slow_requests_clear():
+    count = SlowRequestStore.from_app(current_app).clear()
+    flash(f"Smazáno {count} záznamů pomalých požadavků.", "success")
+    return redirect(url_for("admin.slow_requests"))
+
+@admin_bp.route("/admin/profiler")
+@login_required
+@admin_required
+def profiler():
+    """Stav vzorkovacího profileru tohoto workeru a uložené profily."""
+    sampler = profiler_sampler.current_sampler()
+    profiles = profiler_sampler.list_profiles(current_app.config["PROFILER_DIR"])
+    return render_template("admin/profiler.html", status=sampler.status() if sampler else None,
+                           profiles=profiles, active_tab="admin_profiler")
+
+@admin_bp.route("/admin/profiler/start", methods=["POST"])
+@login_required
+@admin_required
+def profiler_start():
+    config = current_app.config
+    mode = request.form.get("mode", "seconds")
+    value = request.form.get("value", type=float)
+    if not value or value <= 0:
+        flash("Zadejte kladný počet sekund nebo požadavků.", "warning")
+        return redirect(url_for("admin.profiler"))
+    try:
+        profiler_sampler.start_profiling(
+            config["PROFILER_DIR"],
+            seconds=value if mode == "seconds" else None,
+            requests=int(value) if mode == "requests" else None,
+            interval=config["PROFILER_INTERVAL_MS"] / 1000,
+            max_seconds=config["PROFILER_MAX_SECONDS"],
+        )
+    except RuntimeError as e:
+        flash(str(e), "warning")
+        return redirect(url_for("admin.profiler"))
+    current_app.logger.info(f"Profiler spuštěn uživatelem {current_user.username} ({mode}={value})")
+    flash("Profiler byl spuštěn v tomto workeru.", "success")
+    return redirect(url_for("admin.profiler"))
+
+@admin_bp.route("/admin/profiler/stop", methods=["POST"])
+@login_required
+@admin_required
+def profiler_stop():
+    sampler = profiler_sampler.stop_profiling()
+    if sampler is None:
+        flash("V tomto workeru profiler neběží.", "info")
+    else:
+        flash(f"Profiler zastaven ({sampler.samples} vzorků).", "success")
+    return redirect(url_for("admin.profiler"))
+
+@admin_bp.route("/admin/profiler/files/<path:filename>")
+@login_required
+@admin_required
+def profiler_file(filename):
+    if not filename.startswith("profile_") or not filename.endswith((".collapsed", ".svg")):
+        abort(404)
+    return send_from_directory(current_app.config["PROFILER_DIR"], filename,
+                               as_attachment=filename.endswith(".collapsed"))
+
+@admin_bp.route("/admin/memory")
+@login_required
+@admin_required
+def memory():
+    """Diagnostika paměti workeru: snapshoty tracemalloc, top alokace a nárůsty."""
+    status = memory_diagnostics.status()
+    snapshot_ids = [s["id"] for s in status["snapshots"]]
+    before = request.args.get("before", type=int)
+    after = request.args.get("after", type=int)
+    if after is None and snapshot_ids:
+        after = snapshot_ids[-1]
+    if before is None and len(snapshot_ids) > 1:
+        before = snapshot_ids[-2]
+
+    top = memory_diagnostics.top(after) if after else []
+    diff = memory_diagnostics.compare(before, after) if before and after and before != after else []
+    return render_template("admin/memory.html", status=status, top=top, diff=diff,
+                           before=before, after=after, active_tab="admin_memory")
+
+@admin_bp.route("/admin/memory/<action>", methods=["POST"])
+@login_required
+@admin_required
+def memory_action(action):
+    if action == "start":
+        if memory_diagnostics.start():
+            flash("tracemalloc zapnut v tomto workeru.", "success")
+        else:
+            flash("tracemalloc už běží.", "info")
+    elif action == "stop":
+        memory_diagnostics.stop()
+        flash("tracemalloc vypnut, snapshoty zahozeny.", "success")
+    elif action == "snapshot":
+        try:
+            entry = memory_diagnostics.take_snapshot(request.form.get("label", "").strip())
+            flash(f"Snapshot {entry['id']} ({entry['label']}) uložen.", "success")
+        except RuntimeError as e:
+            flash(str(e), "warning")
+    else:
+        abort(404)
+    return redirect(url_for("admin.memory"))
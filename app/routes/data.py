@@ -2,31 +2,34 @@
 Správa dat (Import/Export).
 
 Endpointy pro hromadný JSON import/export databáze a CSV operace s látkami.
+Importy, exporty i hromadná reklasifikace běží jako úlohy na pozadí (viz
+job_service) - endpoint úlohu jen založí a přesměruje na stránku s průběhem.
 """
+import json
+import os
 from flask import (
     Blueprint,
+    abort,
     render_template,
     request,
     redirect,
     url_for,
     flash,
-    send_file,
     current_app,
     make_response,
+    jsonify,
 )
 from flask_login import login_required, current_user
 from app.utils.security import admin_required
-import io
-import json
-from datetime import datetime
-from app.extensions import db
-from app.models import Substance, Mixture, MixtureComponent
-from app.services.clp import run_clp_classification
-from app.services.import_service import import_substances_from_csv
-from app.services.export_service import export_substances_to_csv, generate_csv_template
+from app.models import JobStatus
+from app.services.job_service import JobService
+from app.services.upload_service import UploadService, UploadError
 
 data_bp = Blueprint("data", __name__)
 
+# Kolik řádků z každé kategorie plánu importu se zobrazí v náhledu
+PLAN_PREVIEW_LIMIT = 200
+
 
 @data_bp.route("/data/management")
 @login_required
@@ -37,145 +40,268 @@ def management():
     return render_template("data_management.html", active_tab="data_management")
 
 
-@data_bp.route("/data/export")
+@data_bp.route("/data/export", methods=["POST"])
 @login_required
 @admin_required
 def export_data():
-    substances = Substance.query.all()
-    mixtures = Mixture.query.all()
-    data = {
-        "substances": [s.to_dict() for s in substances],
-        "mixtures": [m.to_dict() for m in mixtures],
-        "version": "1.0",
-        "exported_at": datetime.now().isoformat(),
-    }
-    json_data = json.dumps(data, indent=4, ensure_ascii=False)
-    bytes_io = io.BytesIO(json_data.encode("utf-8"))
-    return send_file(
-        bytes_io,
-        mimetype="application/json",
-        as_attachment=True,
-        download_name=f'clp_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json',
-    )
+    """Spustí export kompletní zálohy (JSON) jako úlohu na pozadí."""
+    job = JobService.submit("export_json", user_id=current_user.id)
+    return redirect(url_for("jobs.view", job_id=job.id))
+
+
+def _get_upload_service():
+    return UploadService.from_app(current_app)
+
+
+def _resolve_import_source(extensions):
+    """
+    Vrátí (upload_id, cestu) importovaného souboru.
+
+    Soubor je buď dokončený navazovatelný upload (pole `upload_id`), nebo klasický
+    multipart soubor (pole `file`), který se uloží do spool adresáře. Import pak
+    vždy čte ze souboru na disku.
+
+    Raises:
+        UploadError: Pokud soubor chybí nebo má špatnou příponu.
+
+    Args:
+        extensions: Povolená přípona (".csv") nebo n-tice přípon.
+    """
+    if isinstance(extensions, str):
+        extensions = (extensions,)
+
+    def check_extension(filename):
+        if not filename.lower().endswith(extensions):
+            formats = " nebo ".join(ext[1:].upper() for ext in extensions)
+            raise UploadError(f"Soubor musí být ve formátu {formats}.")
+
+    service = _get_upload_service()
+    upload_id = request.form.get("upload_id", "").strip()
+    if upload_id:
+        path = service.completed_path(upload_id)
+        check_extension(service.status(upload_id)["filename"])
+        return upload_id, path
+
+    file = request.files.get("file")
+    if file is None or file.filename == "":
+        raise UploadError("Nebyl vybrán soubor.")
+    # Přípona se ověří před uložením - odmítnutý soubor nezůstane ve spool adresáři
+    check_extension(file.filename)
+    upload_id = service.store(file.stream, file.filename, user_id=current_user.id)["upload_id"]
+    return upload_id, service.completed_path(upload_id)
 
 
 @data_bp.route("/data/import", methods=["POST"])
 @login_required
 @admin_required
 def import_data():
-    if "file" not in request.files:
-        flash("Nebyl vybrán soubor.", "danger")
-        return redirect(url_for("data.management"))
-
-    file = request.files["file"]
-    if file.filename == "":
-        flash("Nebyl vybrán soubor.", "danger")
+    """Spustí import zálohy JSON jako úlohu na pozadí."""
+    try:
+        upload_id, path = _resolve_import_source(".json")
+    except UploadError as e:
+        flash(str(e), "danger")
         return redirect(url_for("data.management"))
 
-    try:
-        data = json.loads(file.read().decode("utf-8"))
-        sub_count = 0
-        mix_count = 0
-
-        for s_data in data.get("substances", []):
-            if not Substance.query.filter_by(name=s_data["name"]).first():
-                db.session.add(Substance(**s_data))
-                sub_count += 1
-        db.session.commit()
-
-        for m_data in data.get("mixtures", []):
-            if not Mixture.query.filter_by(name=m_data["name"]).first():
-                new_mix = Mixture(name=m_data["name"])
-                db.session.add(new_mix)
-                db.session.flush()
-                for c_data in m_data.get("components", []):
-                    sub = Substance.query.filter_by(
-                        name=c_data["substance_name"]
-                    ).first()
-                    if sub:
-                        db.session.add(
-                            MixtureComponent(
-                                mixture_id=new_mix.id,
-                                substance_id=sub.id,
-                                concentration=c_data["concentration"],
-                            )
-                        )
-                run_clp_classification(new_mix)
-                mix_count += 1
-        db.session.commit()
-        flash(f"Importováno {sub_count} látek a {mix_count} směsí.", "success")
-    except Exception as e:
-        db.session.rollback()
-        flash(f"Chyba při importu: {str(e)}", "danger")
-    return redirect(url_for("data.management"))
+    job = JobService.submit("import_json", {"upload_id": upload_id}, user_id=current_user.id)
+    return redirect(url_for("jobs.view", job_id=job.id))
 
 
 @data_bp.route("/data/import/substances/csv", methods=["POST"])
 @login_required
 @admin_required
 def import_substances_csv():
-    """Import látek z CSV souboru."""
-    if "file" not in request.files:
-        flash("Nebyl vybrán soubor.", "danger")
+    """Spustí import látek z CSV souboru jako úlohu na pozadí."""
+    try:
+        upload_id, path = _resolve_import_source(".csv")
+    except UploadError as e:
+        flash(str(e), "danger")
         return redirect(url_for("data.management"))
 
-    file = request.files["file"]
-    if file.filename == "":
-        flash("Nebyl vybrán soubor.", "danger")
-        return redirect(url_for("data.management"))
+    job = JobService.submit("import_substances_csv", {"upload_id": upload_id}, user_id=current_user.id)
+    return redirect(url_for("jobs.view", job_id=job.id))
+
 
-    # Kontrola přípony
-    if not file.filename.lower().endswith('.csv'):
-        flash("Soubor musí být ve formátu CSV.", "danger")
+@data_bp.route("/data/import/plan", methods=["POST"])
+@login_required
+@admin_required
+def import_plan():
+    """Spustí dry-run importu (CSV nebo JSON) - porovnání s katalogem bez zápisu."""
+    try:
+        upload_id, path = _resolve_import_source((".csv", ".json"))
+    except UploadError as e:
+        flash(str(e), "danger")
         return redirect(url_for("data.management"))
 
+    job = JobService.submit("import_plan", {"upload_id": upload_id}, user_id=current_user.id)
+    return redirect(url_for("jobs.view", job_id=job.id))
+
+
+def _get_plan_job_or_404(job_id):
+    job = JobService.get(job_id)
+    if job is None or job.kind != "import_plan" or job.status != JobStatus.SUCCEEDED:
+        abort(404)
+    path = (job.result or {}).get("plan_file")
+    if not path or not os.path.exists(path):
+        abort(404)
+    return job, path
+
+
+@data_bp.route("/data/import/plan/<int:job_id>")
+@login_required
+@admin_required
+def import_plan_preview(job_id):
+    """Náhled plánu importu: nové, změněné a shodné látky, konflikty."""
+    job, path = _get_plan_job_or_404(job_id)
+    with open(path, encoding="utf-8") as f:
+        plan = json.load(f)
+    return render_template(
+        "import_plan.html",
+        job=job,
+        plan=plan,
+        limit=PLAN_PREVIEW_LIMIT,
+        active_tab="data_management",
+    )
+
+
+@data_bp.route("/data/import/plan/<int:job_id>/apply", methods=["POST"])
+@login_required
+@admin_required
+def import_plan_apply(job_id):
+    """Aplikuje potvrzený plán importu jako úlohu na pozadí (jen vlastní plán)."""
+    job, path = _get_plan_job_or_404(job_id)
+    if job.user_id != current_user.id:
+        abort(404)
+    apply_job = JobService.submit("import_apply", {"plan_job_id": job.id}, user_id=current_user.id)
+    return redirect(url_for("jobs.view", job_id=apply_job.id))
+
+
+@data_bp.route("/data/echa-enrich", methods=["POST"])
+@login_required
+@admin_required
+def echa_enrich():
+    """Spustí (nebo naváže) hromadné obohacení katalogu daty z ECHA."""
+    params = {}
+    resume_job_id = request.form.get("resume_job_id", type=int)
+    if resume_job_id:
+        params["resume_job_id"] = resume_job_id
+    job = JobService.submit("echa_enrich", params, user_id=current_user.id)
+    return redirect(url_for("jobs.view", job_id=job.id))
+
+
+@data_bp.route("/data/reclassify", methods=["POST"])
+@login_required
+@admin_required
+def reclassify_all():
+    """Spustí reklasifikaci všech směsí jako úlohu na pozadí."""
+    job = JobService.submit("reclassify_mixtures", user_id=current_user.id)
+    return redirect(url_for("jobs.view", job_id=job.id))
+
+
+# === Navazovatelné uploady (chunked) ===
+
+def _upload_error_response(e):
+    payload = {"error": str(e)}
+    if e.offset is not None:
+        payload["offset"] = e.offset
+    return jsonify(payload), e.status_code
+
+
+def _upload_public(meta):
+    return {
+        "upload_id": meta["upload_id"],
+        "filename": meta["filename"],
+        "size": meta["size"],
+        "offset": meta["offset"],
+        "complete": meta["complete"],
+        "sha256": meta["sha256"],
+        "chunk_size": current_app.config["UPLOAD_CHUNK_SIZE"],
+    }
+
+
+@data_bp.route("/data/uploads", methods=["POST"])
+@login_required
+@admin_required
+def create_upload():
+    """Založí nový upload. Očekává JSON {filename, size, sha256?}."""
+    data = request.get_json(silent=True) or {}
     try:
-        # Import látek
-        result = import_substances_from_csv(file, current_user.id if current_user else None)
-        
-        # Zobrazení výsledků
-        if result['success'] > 0:
-            flash(f"✅ Úspěšně importováno {result['success']} látek.", "success")
-        
-        if result['skipped'] > 0:
-            flash(f"⚠️ Přeskočeno {result['skipped']} látek (duplicity).", "warning")
-        
-        if result['warnings']:
-            for warning in result['warnings'][:5]:  # Max 5 varování
-                flash(f"⚠️ {warning}", "warning")
-            if len(result['warnings']) > 5:
-                flash(f"... a dalších {len(result['warnings']) - 5} varování", "warning")
-        
-        if result['errors']:
-            for error in result['errors'][:5]:  # Max 5 chyb
-                flash(f"❌ {error}", "danger")
-            if len(result['errors']) > 5:
-                flash(f"... a dalších {len(result['errors']) - 5} chyb", "danger")
-    
-    except Exception as e:
-        flash(f"Chyba při importu: {str(e)}", "danger")
-    
-    return redirect(url_for("data.management"))
+        size = int(data.get("size", -1))
+        meta = _get_upload_service().create(
+            data.get("filename", ""), size, sha256=data.get("sha256"), user_id=current_user.id
+        )
+    except (TypeError, ValueError) as e:
+        if isinstance(e, UploadError):
+            return _upload_error_response(e)
+        return jsonify({"error": "Neplatná velikost souboru."}), 400
+    return jsonify(_upload_public(meta)), 201
 
 
-@data_bp.route("/data/export/substances/csv")
+@data_bp.route("/data/uploads/<upload_id>", methods=["GET"])
 @login_required
 @admin_required
-def export_substances_csv():
-    """Export látek do CSV souboru."""
+def upload_status(upload_id):
+    """Stav uploadu - klient podle offsetu navazuje po výpadku spojení."""
     try:
-        csv_content = export_substances_to_csv()
-        
-        # Vytvoření response
-        response = make_response(csv_content)
-        response.headers["Content-Disposition"] = f"attachment; filename=substances_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-        response.headers["Content-Type"] = "text/csv; charset=utf-8"
-        
-        return response
-    
-    except Exception as e:
-        flash(f"Chyba při exportu: {str(e)}", "danger")
-        return redirect(url_for("data.management"))
+        return jsonify(_upload_public(_get_upload_service().status(upload_id)))
+    except UploadError as e:
+        return _upload_error_response(e)
+
+
+@data_bp.route("/data/uploads/<upload_id>", methods=["PUT", "PATCH"])
+@login_required
+@admin_required
+def upload_chunk(upload_id):
+    """
+    Přijme jeden chunk jako tělo požadavku.
+
+    Hlavičky: `Upload-Offset` (povinná), `X-Chunk-Sha256` (volitelná).
+    """
+    offset = request.headers.get("Upload-Offset", request.args.get("offset"))
+    try:
+        offset = int(offset)
+    except (TypeError, ValueError):
+        return jsonify({"error": "Chybí hlavička Upload-Offset."}), 400
+
+    try:
+        meta = _get_upload_service().append_chunk(
+            upload_id, offset, request.stream, chunk_sha256=request.headers.get("X-Chunk-Sha256")
+        )
+    except UploadError as e:
+        return _upload_error_response(e)
+    return jsonify(_upload_public(meta))
+
+
+@data_bp.route("/data/uploads/<upload_id>/complete", methods=["POST"])
+@login_required
+@admin_required
+def complete_upload(upload_id):
+    """Dokončí upload a ověří kontrolní součet celého souboru."""
+    try:
+        meta = _get_upload_service().complete(upload_id)
+    except UploadError as e:
+        return _upload_error_response(e)
+    return jsonify(_upload_public(meta))
+
+
+@data_bp.route("/data/uploads/<upload_id>", methods=["DELETE"])
+@login_required
+@admin_required
+def discard_upload(upload_id):
+    """Zruší upload a smaže spool soubory."""
+    try:
+        _get_upload_service().discard(upload_id)
+    except UploadError as e:
+        return _upload_error_response(e)
+    return "", 204
+
+
+@data_bp.route("/data/export/substances/csv", methods=["POST"])
+@login_required
+@admin_required
+def export_substances_csv():
+    """Spustí export látek do CSV jako úlohu na pozadí."""
+    job = JobService.submit("export_substances_csv", user_id=current_user.id)
+    return redirect(url_for("jobs.view", job_id=job.id))
 
 
 @data_bp.route("/data/template/substances/csv")
@@ -183,6 +309,8 @@ def export_substances_csv():
 @admin_required
 def download_csv_template():
     """Stáhnout CSV šablonu pro import látek."""
+    from app.services.export_service import generate_csv_template
+
     try:
         csv_content = generate_csv_template()
         
@@ -35,6 +35,26 @@ def health_check():
         }), 503
 
 
+@health_bp.route('/health/ready')
+def readiness_check():
+    """
+    Připravenost pro load balancer - 503, dokud worker nedokončí zahřátí
+    (WARMUP_MODE, viz app/warmup.py) nebo nedostupná databáze.
+    """
+    from app.warmup import get_state
+    state = get_state(current_app)
+    warmup = state.to_dict() if state is not None else None
+    if state is not None and not state.ready:
+        return jsonify({'status': 'warming_up', 'warmup': warmup}), 503
+
+    try:
+        db.session.execute(db.text('SELECT 1'))
+    except Exception as e:
+        current_app.logger.error(f"Readiness check failed: {e}")
+        return jsonify({'status': 'not_ready', 'error': str(e), 'warmup': warmup}), 503
+    return jsonify({'status': 'ready', 'warmup': warmup}), 200
+
+
 @health_bp.route('/health/detailed')
 def detailed_health_check():
     """
@@ -61,6 +81,18 @@ def detailed_health_check():
             'error': str(e)
         }
     
+    # === Repliky pro čtení (jen pokud jsou nastavené) ===
+    from app.db_routing import get_router
+    router = get_router()
+    if router is not None:
+        replicas = router.status()
+        available = sum(1 for replica in replicas if replica['available'])
+        health_status['checks']['replicas'] = {
+            # Bez repliky se čte z primáru - aplikace funguje dál
+            'status': 'healthy' if available == len(replicas) else 'degraded',
+            'replicas': replicas,
+        }
+
     # === 2. CACHE ===
     try:
         cache.set('health_check', 'ok', timeout=5)
@@ -0,0 +1,84 @@
+"""
+Stav úloh na pozadí.
+
+Endpointy pro JSON stav úlohy (polling), stránku s průběhem, zrušení úlohy
+a stažení výsledného souboru (exporty).
+"""
+import os
+from flask import Blueprint, render_template, jsonify, abort, send_file, redirect, url_for, flash
+from flask_login import login_required, current_user
+from app.db_routing import use_primary
+from app.extensions import limiter
+from app.models.job import JobStatus
+from app.services.job_service import JobService
+
+jobs_bp = Blueprint("jobs", __name__)
+
+# Klíče výsledku, které se ven neposílají (cesty k souborům, interní checkpoint)
+PRIVATE_RESULT_KEYS = ("file", "plan_file", "checkpoint")
+
+
+def _get_job_or_404(job_id):
+    job = JobService.get(job_id)
+    if job is None:
+        abort(404)
+    # Úlohu vidí její autor a administrátoři
+    if job.user_id != current_user.id and not current_user.is_admin:
+        abort(403)
+    return job
+
+
+@jobs_bp.route("/jobs/<int:job_id>")
+@login_required
+@limiter.exempt  # Stránka průběhu se dotazuje každou sekundu
+@use_primary  # Průběh zapisuje worker - replika by ho ukazovala se zpožděním
+def status(job_id):
+    """JSON stav úlohy."""
+    job = _get_job_or_404(job_id)
+    data = job.to_dict()
+    result = data["result"] or {}
+    data["result"] = {k: v for k, v in result.items() if k not in PRIVATE_RESULT_KEYS}
+    if job.status == JobStatus.SUCCEEDED:
+        if "file" in result:
+            data["download_url"] = url_for("jobs.download", job_id=job.id)
+        if "plan_file" in result:
+            data["preview_url"] = url_for("data.import_plan_preview", job_id=job.id)
+        if "reclassify_job_id" in result:
+            data["next_url"] = url_for("jobs.view", job_id=result["reclassify_job_id"])
+    return jsonify(data)
+
+
+@jobs_bp.route("/jobs/<int:job_id>/view")
+@login_required
+@use_primary
+def view(job_id):
+    """Stránka s průběhem úlohy."""
+    job = _get_job_or_404(job_id)
+    return render_template("job_status.html", job=job, active_tab="data_management")
+
+
+@jobs_bp.route("/jobs/<int:job_id>/cancel", methods=["POST"])
+@login_required
+def cancel(job_id):
+    """Požádá o zrušení úlohy."""
+    job = _get_job_or_404(job_id)
+    JobService.request_cancel(job.id)
+    flash("Požadavek na zrušení úlohy byl odeslán.", "info")
+    return redirect(url_for("jobs.view", job_id=job.id))
+
+
+@jobs_bp.route("/jobs/<int:job_id>/download")
+@login_required
+def download(job_id):
+    """Stažení souboru vytvořeného úlohou (export)."""
+    job = _get_job_or_404(job_id)
+    result = job.result or {}
+    path = result.get("file")
+    if job.status != JobStatus.SUCCEEDED or not path or not os.path.exists(path):
+        abort(404)
+    return send_file(
+        path,
+        mimetype=result.get("mimetype", "application/octet-stream"),
+        as_attachment=True,
+        download_name=result.get("filename", os.path.basename(path)),
+    )
@@ -0,0 +1,28 @@
+"""
+Endpoint /metrics pro Prometheus.
+
+Vrací metriky sečtené za všechny procesy aplikace (viz app.monitoring.exporter).
+Je-li nastaven METRICS_TOKEN, vyžaduje hlavičku Authorization: Bearer <token>.
+"""
+import hmac
+from flask import Blueprint, Response, abort, current_app, request
+from app.extensions import limiter, talisman
+from app.monitoring.exporter import CONTENT_TYPE, MetricsStore, render_prometheus
+
+metrics_bp = Blueprint('metrics', __name__)
+
+# Scraper se dotazuje pravidelně - rate limiting ani přesměrování na HTTPS nedává smysl
+limiter.exempt(metrics_bp)
+
+
+@metrics_bp.route('/metrics')
+@talisman(force_https=False)
+def metrics():
+    if not current_app.config.get("METRICS_ENABLED", True):
+        abort(404)
+    token = current_app.config.get("METRICS_TOKEN")
+    if token and not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        abort(401)
+
+    body = render_prometheus(MetricsStore.from_app(current_app).collect())
+    return Response(body, mimetype=None, content_type=CONTENT_TYPE)
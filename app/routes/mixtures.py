@@ -4,7 +4,7 @@ Správa směsí (Mixtures).
 Endpointy pro výpis, tvorbu, editaci a mazání směsí.
 Zajišťuje také zobrazení detailu a spouštění klasifikace při uložení.
 """
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
 from sqlalchemy import or_
 from flask_login import login_required
 from app.utils.security import editor_required
@@ -13,6 +13,7 @@ from app.models import Mixture, Substance, MixtureComponent
 from app.forms.mixture import MixtureForm
 from app.services.clp import run_clp_classification
 from app.services.mixture_service import MixtureService
+from app.services.audit_history import history_payload
 from app.constants.clp import H_PHRASES_DISPLAY
 from app.constants.p_phrases import ALL_P_PHRASES
 from sqlalchemy.exc import IntegrityError
@@ -62,13 +63,8 @@ def index():
 @editor_required
 def create():
     form = MixtureForm()
-    substance_data = [
-        s.to_dict() for s in Substance.query.order_by(Substance.name).all()
-    ]
-    mixture_data = [
-        {"id": m.id, "name": m.name} 
-        for m in Mixture.query.order_by(Mixture.name).all()
-    ]
+    substance_data = MixtureService.substance_choices()
+    mixture_data = MixtureService.mixture_choices()
     if form.validate_on_submit():
         try:
             name = form.name.data.strip()
@@ -117,20 +113,18 @@ def create():
 def detail(mixture_id):
     from sqlalchemy.orm import joinedload
 
-    from app.models.audit import AuditLog
-
+    # Komponenty včetně látek i vnořených směsí jedním dotazem (jinak N+1)
     mixture = (
         Mixture.query.options(
-            joinedload(Mixture.components).joinedload(MixtureComponent.substance)
+            joinedload(Mixture.components).options(
+                joinedload(MixtureComponent.substance),
+                joinedload(MixtureComponent.component_mixture),
+            )
         )
         .filter_by(id=mixture_id)
         .first_or_404()
     )
-    
-    audit_logs = AuditLog.query.filter_by(
-        entity_type='mixture', 
-        entity_id=mixture_id
-    ).order_by(AuditLog.timestamp.desc()).all()
+
     comp_details = []
     total = 0.0
     for comp in mixture.components:
@@ -164,23 +158,29 @@ def detail(mixture_id):
         h_phrases_display=H_PHRASES_DISPLAY,
         p_phrases_text=ALL_P_PHRASES,
         active_tab="mixtures",
-        audit_logs=audit_logs,
     )
 
 
+@mixtures_bp.route("/mixture/<int:mixture_id>/history")
+@login_required
+def history(mixture_id):
+    """Historie změn směsi (JSON po stránkách, načítá ji detail až na vyžádání)."""
+    try:
+        payload = history_payload("mixture", mixture_id, cursor=request.args.get("cursor"),
+                                  limit=request.args.get("limit", 10, type=int))
+    except ValueError:
+        return jsonify({"error": "Neplatný kurzor."}), 400
+    return jsonify(payload)
+
+
 @mixtures_bp.route("/mixture/<int:mixture_id>/edit", methods=["GET", "POST"])
 @login_required
 @editor_required
 def edit(mixture_id):
     mixture = db.get_or_404(Mixture, mixture_id)
     form = MixtureForm(obj=mixture)
-    substance_data = [
-        s.to_dict() for s in Substance.query.order_by(Substance.name).all()
-    ]
-    mixture_data = [
-        {"id": m.id, "name": m.name} 
-        for m in Mixture.query.filter(Mixture.id != mixture_id).order_by(Mixture.name).all()
-    ]
+    substance_data = MixtureService.substance_choices()
+    mixture_data = [m for m in MixtureService.mixture_choices() if m["id"] != mixture_id]
     
     from app.models import ComponentType
     existing = []
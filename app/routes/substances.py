@@ -8,14 +8,14 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_required
 from app.utils.security import editor_required
 from app.extensions import db
-from app.models import Substance
+from app.models import Substance, MixtureComponent
 from app.forms.substance import SubstanceForm
 from app.services.substance_service import SubstanceService
 from app.services.validation import validate_substance, check_duplicate_cas, ValidationMessage
 from app.constants.clp import HEALTH_H_PHRASES, ENV_H_PHRASES, SCL_HAZARD_CATEGORIES, PHYSICAL_H_PHRASES
 from sqlalchemy.exc import IntegrityError
-from flask import jsonify
-from app.services.echa_service import ECHAService
+from flask import jsonify, current_app
+from app.services.audit_history import history_payload
 
 substances_bp = Blueprint("substances", __name__)
 
@@ -149,12 +149,6 @@ def edit(substance_id):
         else []
     )
 
-    from app.models.audit import AuditLog
-    audit_logs = AuditLog.query.filter_by(
-        entity_type='substance', 
-        entity_id=substance_id
-    ).order_by(AuditLog.timestamp.desc()).all()
-
     return render_template(
         "substance_form.html",
         form=form,
@@ -167,16 +161,32 @@ def edit(substance_id):
         selected_physical_h_phrases=selected_physical,
         scl_hazard_categories=SCL_HAZARD_CATEGORIES,
         active_tab="substances",
-        audit_logs=audit_logs,
     )
 
 
+@substances_bp.route("/substance/<int:substance_id>/history")
+@login_required
+@editor_required
+def history(substance_id):
+    """Historie změn látky (JSON po stránkách, editační formulář ji načítá až na vyžádání)."""
+    try:
+        payload = history_payload("substance", substance_id, cursor=request.args.get("cursor"),
+                                  limit=request.args.get("limit", 10, type=int))
+    except ValueError:
+        return jsonify({"error": "Neplatný kurzor."}), 400
+    return jsonify(payload)
+
+
 @substances_bp.route("/substance/<int:substance_id>/delete", methods=["POST"])
 @login_required
 @editor_required
 def delete(substance_id):
     substance = db.get_or_404(Substance, substance_id)
-    if substance.components:
+    # Stačí vědět, zda existuje aspoň jedna komponenta - nenačítat je všechny
+    in_use = db.session.execute(
+        db.select(MixtureComponent.id).where(MixtureComponent.substance_id == substance_id).limit(1)
+    ).first()
+    if in_use:
         flash("Nelze smazat látku, která je součástí směsí.", "danger")
     else:
         db.session.delete(substance)
@@ -196,7 +206,9 @@ def fetch_echa():
     if not cas_or_ec:
         return jsonify({"error": "Chybí dotaz (CAS/EC)."}), 400
         
-    echa_service = ECHAService()
+    from app.services.echa_service import ECHAService  # requests až při prvním dotazu na ECHA
+
+    echa_service = ECHAService.from_app(current_app)
     result = echa_service.fetch_data(cas_or_ec)
     
     if "error" in result:
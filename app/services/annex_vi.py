@@ -0,0 +1,334 @@
+"""
+Lokální harmonizovaná klasifikace (CLP Příloha VI, tabulka 3).
+
+Import tabulky dodané uživatelem (CSV export Přílohy VI / C&L) do tabulek
+annex_vi_entry a annex_vi_synonym a index v paměti procesu pro vyhledání
+podle CAS, EC, indexového čísla nebo názvu (včetně synonym). Výsledek má
+stejný tvar jako ECHAService.fetch_data, takže ho ECHAService vrací přímo
+a na síť se obrací jen když látka v tabulce není.
+
+Příloha VI neobsahuje legislativní příznaky (SVHC, Příloha XIV/XVII, PBT...),
+proto je lokální výsledek neuvádí vůbec - chybějící klíč neznamená "ne".
+"""
+
+import csv
+import io
+import logging
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.extensions import db
+from app.models import AnnexViEntry, AnnexViSynonym
+from app.services.echa_service import ECHAService
+
+logger = logging.getLogger(__name__)
+
+# Velikost dávky pro hromadný INSERT
+IMPORT_BATCH_SIZE = 1000
+
+# Přijímané názvy sloupců (malými písmeny) -> pole položky
+COLUMN_ALIASES = {
+    "index_number": ("index_number", "index no", "index no.", "index"),
+    "name": ("name", "chemical name", "international chemical identification"),
+    "ec_number": ("ec_number", "ec no", "ec no.", "ec"),
+    "cas_number": ("cas_number", "cas no", "cas no.", "cas"),
+    "hazard_classes": ("hazard_classes", "hazard class and category code(s)", "classification"),
+    "h_phrases": ("h_phrases", "hazard statement code(s)", "h statements"),
+    "pictograms": ("pictograms", "pictogram, signal word code(s)", "pictogram", "ghs"),
+    "scl": ("scl", "specific conc. limits, m-factors and ate", "specific conc. limits"),
+    "m_factors": ("m_factors", "m-factors", "m-factor"),
+    "ate": ("ate", "ate values"),
+    "notes": ("notes",),
+    "synonyms": ("synonyms", "synonym"),
+}
+
+CAS_RE = re.compile(r"\b\d{2,7}-\d{2}-\d\b")
+EC_RE = re.compile(r"\b\d{3}-\d{3}-\d\b")
+H_RE = re.compile(r"\b(?:EUH|H)\d{3}[A-Za-z]{0,2}\b")
+GHS_RE = re.compile(r"\bGHS0\d\b")
+M_RE = re.compile(r"M\s*=\s*(\d+)(?:\s*\(?\s*(acute|chronic)\)?)?", re.IGNORECASE)
+# Řádky s M-faktorem nebo ATE nejsou SCL (pozor na "Muta. 1B; H340: ...")
+NOT_SCL_RE = re.compile(r"^\s*(M\s*=|M-factor|ATE\b)", re.IGNORECASE)
+ATE_RE = re.compile(
+    r"(oral|dermal|inhalation)[^;\n\d]*?([\d]+(?:[.,]\d+)?)\s*(mg/kg(?:\s*bw)?|mg/l|ppmv)?([^;\n]*)",
+    re.IGNORECASE,
+)
+
+
+def normalize_key(value: str) -> str:
+    """Klíč pro vyhledávání: malá písmena, bez nadbytečných mezer."""
+    return " ".join((value or "").lower().split())
+
+
+def _split(value: Optional[str]) -> List[str]:
+    return [part.strip() for part in re.split(r"[\n;|]+", value or "") if part.strip()]
+
+
+def _unique(values) -> List[str]:
+    return list(dict.fromkeys(values))
+
+
+def parse_scl(text: Optional[str]) -> List[str]:
+    """
+    'Skin Corr. 1A; H314: C ≥ 25 %' (řádky) -> ['Skin Corr. 1A: >= 25', ...].
+
+    Formát hodnot odpovídá ECHAService._parse_response.
+    """
+    limits = []
+    for line in re.split(r"\n+", text or ""):
+        if ":" not in line:
+            continue
+        hazard, condition = line.rsplit(":", 1)
+        hazard = hazard.split(";")[0].strip()
+        parsed = ECHAService._parse_scl_value(condition)
+        if hazard and parsed and not NOT_SCL_RE.match(hazard):
+            limits.append(f"{hazard}: {parsed}")
+    return limits
+
+
+def parse_m_factors(text: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    """
+    M-faktory (akutní, chronický).
+
+    Jediná hodnota bez upřesnění platí pro obě kategorie (starší znění
+    Přílohy VI), jinak první je akutní a druhá chronický.
+    """
+    acute = chronic = None
+    unlabeled = []
+    for value, kind in M_RE.findall(text or ""):
+        if kind.lower() == "acute":
+            acute = int(value)
+        elif kind.lower() == "chronic":
+            chronic = int(value)
+        else:
+            unlabeled.append(int(value))
+    if len(unlabeled) == 1 and acute is None and chronic is None:
+        return unlabeled[0], unlabeled[0]
+    for value in unlabeled:
+        if acute is None:
+            acute = value
+        elif chronic is None:
+            chronic = value
+    return acute, chronic
+
+
+def parse_ates(text: Optional[str]) -> Dict[str, float]:
+    """
+    'oral: ATE = 100 mg/kg bw; inhalation: 0,5 mg/L (dusts or mists)' -> ate_values.
+
+    Klíče odpovídají ECHAService._parse_response (inhalation_gas pro ppmV,
+    inhalation_vapour pro mg/L, prach/mlha zvlášť).
+    """
+    values = {}
+    for route, value, unit, rest in ATE_RE.findall(text or ""):
+        key = route.lower()
+        if key == "inhalation":
+            tail = rest.lower()
+            if unit.lower() == "ppmv":
+                key = "inhalation_gas"
+            elif "dust" in tail or "mist" in tail:
+                key = "inhalation_dust_mist"
+            else:
+                key = "inhalation_vapour"
+        values[key] = float(value.replace(",", "."))
+    return values
+
+
+def entry_to_result(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Položka (řádek tabulky) -> výsledek ve tvaru ECHAService.fetch_data."""
+    return {
+        "name": entry["name"],
+        "cas": entry["cas_number"],
+        "ec": entry["ec_number"],
+        "index_number": entry["index_number"],
+        "hazard_classes": list(entry["hazard_classes"] or []),
+        "scl_limits": list(entry["scl_limits"] or []),
+        "ghs_symbols": list(entry["ghs_symbols"] or []),
+        "h_phrases": list(entry["h_phrases"] or []),
+        "ate_values": dict(entry["ate_values"] or {}),
+        "m_factors": {"acute": entry["m_factor_acute"], "chronic": entry["m_factor_chronic"]},
+        "source": "annex_vi",
+    }
+
+
+class AnnexViImporter:
+    """Import tabulky Přílohy VI ze souboru CSV."""
+
+    @staticmethod
+    def parse_csv(file) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """
+        Načte položky z CSV (oddělovač čárka nebo středník, UTF-8).
+
+        Buňky mohou obsahovat více hodnot na řádcích (jako v originální
+        tabulce); další CAS/EC čísla a synonyma názvu se uloží jako klíče
+        pro vyhledávání.
+
+        Returns:
+            (entries, errors) - entries obsahují i seznam 'keys'
+        """
+        text = io.TextIOWrapper(file, encoding="utf-8-sig", errors="replace").read()
+        first_line = text.split("\n", 1)[0]
+        delimiter = max(",;\t", key=first_line.count)
+        reader = csv.DictReader(io.StringIO(text), delimiter=delimiter)
+
+        header = {normalize_key(column): column for column in reader.fieldnames or []}
+        columns = {}
+        for field, aliases in COLUMN_ALIASES.items():
+            for alias in aliases:
+                if alias in header:
+                    columns[field] = header[alias]
+                    break
+        if "name" not in columns or not ({"cas_number", "ec_number", "index_number"} & set(columns)):
+            return [], ["CSV musí obsahovat sloupec s názvem a alespoň jeden z CAS / EC / Index No."]
+
+        entries, errors = [], []
+        for row_num, row in enumerate(reader, start=2):
+            value = {field: (row.get(column) or "").strip() for field, column in columns.items()}
+            names = [name for name in value["name"].split("\n") if name.strip()]
+            if not names:
+                errors.append(f"Řádek {row_num}: chybí název")
+                continue
+
+            cas_numbers = _unique(CAS_RE.findall(value.get("cas_number", "")))
+            ec_numbers = _unique(EC_RE.findall(value.get("ec_number", "")))
+            scl_text = value.get("scl", "")
+            acute, chronic = parse_m_factors(value.get("m_factors") or scl_text)
+            pictograms = _unique(GHS_RE.findall(value.get("pictograms", "")))
+            h_phrases = _unique(H_RE.findall(value.get("h_phrases", "")) + H_RE.findall(value.get("hazard_classes", "")))
+
+            entry = {
+                "index_number": value.get("index_number") or None,
+                "cas_number": cas_numbers[0] if cas_numbers else None,
+                "ec_number": ec_numbers[0] if ec_numbers else None,
+                "name": names[0].strip(),
+                "hazard_classes": [hc for hc in _split(value.get("hazard_classes")) if not H_RE.fullmatch(hc)],
+                "h_phrases": h_phrases,
+                "ghs_symbols": pictograms,
+                "scl_limits": parse_scl(scl_text),
+                "ate_values": parse_ates(value.get("ate") or scl_text),
+                "m_factor_acute": acute,
+                "m_factor_chronic": chronic,
+                "notes": value.get("notes") or None,
+            }
+            keys = cas_numbers[1:] + ec_numbers[1:] + [normalize_key(n) for n in names]
+            keys += [normalize_key(s) for s in _split(value.get("synonyms"))]
+            entry["keys"] = _unique(key for key in keys if key)
+            entries.append(entry)
+        return entries, errors
+
+    @staticmethod
+    def import_entries(entries: List[Dict[str, Any]], replace: bool = True) -> int:
+        """
+        Uloží položky hromadným INSERT (po dávkách).
+
+        Args:
+            replace: Nejdřív smazat stávající tabulku (nové vydání Přílohy VI)
+
+        Returns:
+            Počet uložených položek
+        """
+        if replace:
+            db.session.execute(db.delete(AnnexViSynonym))
+            db.session.execute(db.delete(AnnexViEntry))
+
+        now = datetime.utcnow()
+        for start in range(0, len(entries), IMPORT_BATCH_SIZE):
+            batch = entries[start:start + IMPORT_BATCH_SIZE]
+            ids = db.session.execute(
+                db.insert(AnnexViEntry).returning(AnnexViEntry.id, sort_by_parameter_order=True),
+                [{k: v for k, v in entry.items() if k != "keys"} | {"imported_at": now} for entry in batch],
+            ).scalars().all()
+            synonyms = [
+                {"entry_id": entry_id, "key": key[:500]}
+                for entry_id, entry in zip(ids, batch)
+                for key in entry["keys"]
+            ]
+            if synonyms:
+                db.session.execute(db.insert(AnnexViSynonym), synonyms)
+        db.session.commit()
+        return len(entries)
+
+
+class AnnexViIndex:
+    """
+    Index Přílohy VI v paměti procesu (slovník klíč -> výsledek).
+
+    Načítá se líně přes engine (funguje i ve vláknech bez app kontextu).
+    Nejvýše jednou za `reload_seconds` se levným dotazem ověří, zda se
+    tabulka nezměnila (import v jiném procesu), a případně se načte znovu.
+    """
+
+    def __init__(self, engine, reload_seconds: float = 60):
+        self.engine = engine
+        self.reload_seconds = reload_seconds
+        self._index: Optional[Dict[str, Dict[str, Any]]] = None
+        self._signature = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_app(cls, app) -> "AnnexViIndex":
+        """Procesně sdílený index pro aplikaci (vzniká líně)."""
+        index = app.extensions.get("annex_vi_index")
+        if index is None:
+            index = cls(db.engine, reload_seconds=app.config["ANNEX_VI_RELOAD_SECONDS"])
+            app.extensions["annex_vi_index"] = index
+        return index
+
+    def lookup(self, query: str) -> Optional[Dict[str, Any]]:
+        """Výsledek pro CAS / EC / indexové číslo / název, nebo None."""
+        index = self._current()
+        hit = index.get(normalize_key(query))
+        return dict(hit, m_factors=dict(hit["m_factors"])) if hit else None
+
+    def __len__(self) -> int:
+        return len({id(value) for value in self._current().values()})
+
+    def invalidate(self) -> None:
+        """Vynutí nové načtení při příštím dotazu (po importu)."""
+        with self._lock:
+            self._index = None
+
+    def _current(self) -> Dict[str, Dict[str, Any]]:
+        now = time.monotonic()
+        index = self._index
+        if index is not None and now - self._checked_at < self.reload_seconds:
+            return index
+        with self._lock:
+            if self._index is not None and now - self._checked_at < self.reload_seconds:
+                return self._index
+            signature = self._read_signature()
+            if self._index is None or signature != self._signature:
+                self._index = self._load()
+                self._signature = signature
+            self._checked_at = now
+            return self._index
+
+    def _read_signature(self):
+        table = AnnexViEntry.__table__
+        with self.engine.connect() as conn:
+            return tuple(conn.execute(
+                db.select(db.func.count(table.c.id), db.func.max(table.c.imported_at))
+            ).one())
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        entries = AnnexViEntry.__table__
+        synonyms = AnnexViSynonym.__table__
+        index: Dict[str, Dict[str, Any]] = {}
+        by_id = {}
+        with self.engine.connect() as conn:
+            # Vzestupně podle indexového čísla: při kolizi klíčů vyhrává první položka
+            for row in conn.execute(db.select(entries).order_by(entries.c.index_number, entries.c.id)).mappings():
+                result = entry_to_result(row)
+                by_id[row["id"]] = result
+                for key in (row["cas_number"], row["ec_number"], row["index_number"], row["name"]):
+                    if key:
+                        index.setdefault(normalize_key(key), result)
+            for entry_id, key in conn.execute(db.select(synonyms.c.entry_id, synonyms.c.key)):
+                if entry_id in by_id:
+                    index.setdefault(key, by_id[entry_id])
+        logger.info("Načten index Přílohy VI: %d položek, %d klíčů", len(by_id), len(index))
+        return index
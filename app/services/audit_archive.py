@@ -0,0 +1,341 @@
+"""
+Retence audit logu: archivace starých záznamů do komprimovaných souborů.
+
+Záznamy starší než AUDIT_RETENTION_DAYS se po dávkách přesouvají do
+AUDIT_ARCHIVE_DIR jako JSON Lines komprimované gzipem, jeden soubor na měsíc
+(audit-YYYY-MM.jsonl.gz). Soubory se jen doplňují - každá dávka je nový
+gzip člen, takže zápis nikdy nepřepisuje už archivovaná data. Obsah bloků
+(audit_blob), na které záznam odkazuje, se ukládá přímo do řádku archivu.
+
+Každá dávka:
+    1. připíše záznamy do archivu (fsync),
+    2. v jedné krátké transakci doplní index (audit_archive_index) a záznamy
+       z audit_log smaže.
+Pád mezi kroky 1 a 2 znamená jen duplicitní řádky v archivu - vyhledávání
+i obnova je podle id zahazují.
+
+Bloky (audit_blob), na které po archivaci nic neodkazuje, maže samostatný
+průchod prune_blobs() po archivaci - mimo transakce archivace, po krátkých
+dávkách s pauzou (jejich obsah je v archivu, obnova je vrátí).
+
+Spouští se periodicky (cron / systemd timer): flask audit archive.
+"""
+
+import gzip
+import json
+import logging
+import os
+import re
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from app.extensions import db
+from app.models.audit import AuditArchiveIndex, AuditBlob, AuditLog
+from app.services.audit_service import insert_blobs
+
+logger = logging.getLogger(__name__)
+
+_FILE_RE = re.compile(r"^audit-(\d{4}-\d{2})\.jsonl\.gz$")
+
+
+def archive_path(directory: str, month: str) -> str:
+    return os.path.join(directory, f"audit-{month}.jsonl.gz")
+
+
+def list_archives(directory: str) -> List[Dict[str, Any]]:
+    """Měsíční archivy (nejstarší první) s velikostí souboru."""
+    try:
+        names = sorted(os.listdir(directory))
+    except FileNotFoundError:
+        return []
+    archives = []
+    for name in names:
+        match = _FILE_RE.match(name)
+        if match:
+            archives.append({
+                "month": match.group(1),
+                "path": os.path.join(directory, name),
+                "size": os.path.getsize(os.path.join(directory, name)),
+            })
+    return archives
+
+
+def _blob_refs(value, refs: set) -> None:
+    if isinstance(value, dict):
+        if "blob" in value and isinstance(value.get("blob"), str):
+            refs.add(value["blob"])
+        for item in value.values():
+            _blob_refs(item, refs)
+
+
+def _record(row, blobs: Dict[str, str]) -> Dict[str, Any]:
+    refs: set = set()
+    _blob_refs(row.changes, refs)
+    record = {
+        "id": row.id,
+        "user_id": row.user_id,
+        "entity_type": row.entity_type,
+        "entity_id": row.entity_id,
+        "action": row.action,
+        "changes": row.changes,
+        "timestamp": row.timestamp.isoformat(),
+    }
+    if refs:
+        record["blobs"] = {digest: blobs[digest] for digest in refs if digest in blobs}
+    return record
+
+
+def _append(path: str, records: List[Dict[str, Any]]) -> None:
+    """Připíše záznamy jako nový gzip člen (append-only) a počká na zápis na disk."""
+    payload = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+    with open(path, "ab") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb") as archive:
+            archive.write(payload.encode("utf-8"))
+        raw.flush()
+        os.fsync(raw.fileno())
+
+
+def _update_index(records: List[Dict[str, Any]], month: str) -> None:
+    stats: Dict[tuple, Dict[str, Any]] = {}
+    for record in records:
+        key = (record["entity_type"], record["entity_id"])
+        timestamp = datetime.fromisoformat(record["timestamp"])
+        entry = stats.setdefault(key, {"count": 0, "first_at": timestamp, "last_at": timestamp})
+        entry["count"] += 1
+        entry["first_at"] = min(entry["first_at"], timestamp)
+        entry["last_at"] = max(entry["last_at"], timestamp)
+
+    existing = {
+        (item.entity_type, item.entity_id): item
+        for item in AuditArchiveIndex.query.filter(
+            AuditArchiveIndex.month == month,
+            AuditArchiveIndex.entity_id.in_({entity_id for _, entity_id in stats}),
+        )
+    }
+    for (entity_type, entity_id), entry in stats.items():
+        item = existing.get((entity_type, entity_id))
+        if item is None:
+            db.session.add(AuditArchiveIndex(month=month, entity_type=entity_type, entity_id=entity_id, **entry))
+        else:
+            item.count += entry["count"]
+            item.first_at = min(item.first_at or entry["first_at"], entry["first_at"])
+            item.last_at = max(item.last_at or entry["last_at"], entry["last_at"])
+
+
+def prune_blobs(batch_size: int = 1000, pause: float = 0.0) -> int:
+    """
+    Smaže bloky audit_blob, na které neodkazuje žádný záznam audit_log.
+
+    Mark and sweep po krátkých transakcích (mezi dávkami prodleva `pause`):
+        1. průchod audit_log po id sesbírá odkazované hashe (jen čtení),
+        2. průchod audit_blob po hashi smaže neodkazované bloky vzniklé před
+           začátkem průchodu. Před každým mazáním se dočtou záznamy přibylé
+           od posledního čtení - nový záznam může odkazovat na starý blok.
+
+    Returns:
+        počet smazaných bloků
+    """
+    table = AuditLog.__table__
+    started = datetime.utcnow()
+    referenced: set = set()
+    last_id = 0
+
+    def read_new_rows() -> None:
+        nonlocal last_id
+        while True:
+            rows = db.session.execute(
+                db.select(table.c.id, table.c.changes)
+                .where(table.c.id > last_id).order_by(table.c.id).limit(batch_size)
+            ).all()
+            db.session.commit()  # neudržovat otevřenou čtecí transakci
+            if not rows:
+                return
+            last_id = rows[-1].id
+            for row in rows:
+                _blob_refs(row.changes, referenced)
+            if len(rows) < batch_size:
+                return
+            if pause:
+                time.sleep(pause)
+
+    read_new_rows()
+    pruned = 0
+    last_hash = ""
+    while True:
+        hashes = db.session.execute(
+            db.select(AuditBlob.hash)
+            .where(AuditBlob.hash > last_hash, AuditBlob.created_at < started)
+            .order_by(AuditBlob.hash).limit(batch_size)
+        ).scalars().all()
+        if not hashes:
+            db.session.commit()
+            break
+        last_hash = hashes[-1]
+        read_new_rows()
+        orphaned = [digest for digest in hashes if digest not in referenced]
+        if orphaned:
+            pruned += db.session.execute(db.delete(AuditBlob).where(AuditBlob.hash.in_(orphaned))).rowcount
+        db.session.commit()
+        if len(hashes) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+
+    if pruned:
+        logger.info("Smazáno %d nepoužívaných bloků audit logu", pruned)
+    return pruned
+
+
+def archive_audit_log(directory: str, older_than: datetime, batch_size: int = 1000,
+                      pause: float = 0.0,
+                      progress: Optional[Callable[[int, Optional[int]], None]] = None) -> Dict[str, Any]:
+    """
+    Přesune záznamy audit logu starší než `older_than` do měsíčních archivů.
+
+    Args:
+        pause: Prodleva mezi dávkami (s) - uvolní databázi ostatním zápisům.
+
+    Returns:
+        {"archived": počet záznamů, "months": [YYYY-MM, ...]}
+    """
+    os.makedirs(directory, exist_ok=True)
+    table = AuditLog.__table__
+    archived = 0
+    months = set()
+    while True:
+        rows = db.session.execute(
+            db.select(table).where(table.c.timestamp < older_than)
+            .order_by(table.c.timestamp, table.c.id).limit(batch_size)
+        ).all()
+        if not rows:
+            break
+
+        refs: set = set()
+        for row in rows:
+            _blob_refs(row.changes, refs)
+        blobs = dict(db.session.execute(
+            db.select(AuditBlob.hash, AuditBlob.content).where(AuditBlob.hash.in_(refs))
+        ).all()) if refs else {}
+
+        by_month: Dict[str, List[Dict[str, Any]]] = {}
+        for row in rows:
+            by_month.setdefault(row.timestamp.strftime("%Y-%m"), []).append(_record(row, blobs))
+        for month, records in by_month.items():
+            _append(archive_path(directory, month), records)
+
+        for month, records in by_month.items():
+            _update_index(records, month)
+        db.session.execute(table.delete().where(table.c.id.in_([row.id for row in rows])))
+        db.session.commit()
+
+        archived += len(rows)
+        months.update(by_month)
+        if progress:
+            progress(archived, None)
+        if len(rows) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+
+    if archived:
+        logger.info("Archivováno %d záznamů audit logu (%s)", archived, ", ".join(sorted(months)))
+    return {"archived": archived, "months": sorted(months)}
+
+
+def archive_expired(app, progress=None) -> Dict[str, Any]:
+    """
+    Archivace podle konfigurace aplikace (AUDIT_RETENTION_DAYS, AUDIT_ARCHIVE_DIR)
+    a po ní samostatný průchod mazání nepoužívaných bloků.
+    """
+    config = app.config
+    older_than = datetime.utcnow() - timedelta(days=config["AUDIT_RETENTION_DAYS"])
+    batch_size = config.get("AUDIT_ARCHIVE_BATCH_SIZE", 1000)
+    pause = config.get("AUDIT_ARCHIVE_PAUSE", 0.0)
+    result = archive_audit_log(
+        config["AUDIT_ARCHIVE_DIR"], older_than, batch_size=batch_size, pause=pause, progress=progress,
+    )
+    result["blobs_pruned"] = prune_blobs(batch_size, pause) if result["archived"] else 0
+    return result
+
+
+def read_archive(path: str) -> Iterator[Dict[str, Any]]:
+    """Záznamy jednoho archivu (bez duplicit podle id)."""
+    seen = set()
+    with gzip.open(path, "rt", encoding="utf-8") as archive:
+        for line in archive:
+            record = json.loads(line)
+            if record["id"] not in seen:
+                seen.add(record["id"])
+                yield record
+
+
+def search_archive(directory: str, entity_type: str, entity_id: int,
+                   action: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Archivovaná historie entity (nejnovější první).
+
+    Index určí, které měsíční soubory entitu obsahují - ostatní se nečtou.
+    """
+    months = db.session.execute(
+        db.select(AuditArchiveIndex.month)
+        .where(AuditArchiveIndex.entity_type == entity_type, AuditArchiveIndex.entity_id == entity_id)
+        .order_by(AuditArchiveIndex.month)
+    ).scalars().all()
+    results = []
+    for month in months:
+        path = archive_path(directory, month)
+        if not os.path.exists(path):
+            logger.warning("Archiv %s uvedený v indexu chybí", path)
+            continue
+        for record in read_archive(path):
+            if record["entity_type"] == entity_type and record["entity_id"] == entity_id \
+                    and (action is None or record["action"] == action):
+                results.append(record)
+    results.sort(key=lambda record: (record["timestamp"], record["id"]), reverse=True)
+    return results
+
+
+def restore_archive(directory: str, month: str, entity_type: Optional[str] = None,
+                    entity_id: Optional[int] = None, batch_size: int = 1000) -> int:
+    """
+    Vrátí záznamy z měsíčního archivu zpět do audit_log (i s bloky).
+
+    Záznamy, které v audit_log už jsou (stejné id), se přeskočí. Archiv
+    zůstává beze změny. Vrací počet obnovených záznamů.
+    """
+    table = AuditLog.__table__
+    restored = 0
+    batch: List[Dict[str, Any]] = []
+
+    def flush():
+        nonlocal restored
+        ids = [record["id"] for record in batch]
+        present = set(db.session.execute(db.select(table.c.id).where(table.c.id.in_(ids))).scalars())
+        rows, blobs = [], {}
+        for record in batch:
+            if record["id"] in present:
+                continue
+            blobs.update(record.get("blobs") or {})
+            row = {key: record[key] for key in ("id", "user_id", "entity_type", "entity_id", "action", "changes")}
+            row["timestamp"] = datetime.fromisoformat(record["timestamp"])
+            rows.append(row)
+        connection = db.session.connection()
+        insert_blobs(connection, blobs)
+        if rows:
+            connection.execute(table.insert(), rows)
+        db.session.commit()
+        restored += len(rows)
+        batch.clear()
+
+    for record in read_archive(archive_path(directory, month)):
+        if entity_type and record["entity_type"] != entity_type:
+            continue
+        if entity_id is not None and record["entity_id"] != entity_id:
+            continue
+        batch.append(record)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return restored
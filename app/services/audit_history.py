@@ -0,0 +1,97 @@
+"""
+Procházení auditního logu po stránkách (keyset pagination).
+
+Záznamy se řadí od nejnovějších podle (timestamp, id) a další stránka začíná
+za posledním záznamem předchozí (kurzor "<timestamp>_<id>"), ne přes OFFSET.
+S indexy ix_audit_log_*_timeline je tak načtení libovolné stránky stejně
+rychlé i při milionech záznamů.
+
+Používá ho administrace (/admin/audit-log) i historie na detailu látky
+a směsi (JSON, načítá se až na vyžádání).
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import joinedload
+
+from app.models.audit import AuditLog
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+ACTIONS = ("CREATE", "UPDATE", "DELETE")
+ENTITY_TYPES = ("substance", "mixture")
+
+
+def encode_cursor(log: AuditLog) -> str:
+    return f"{log.timestamp.isoformat()}_{log.id}"
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Raises:
+        ValueError: Neplatný kurzor.
+    """
+    timestamp, _, log_id = cursor.rpartition("_")
+    return datetime.fromisoformat(timestamp), int(log_id)
+
+
+def audit_page(entity_type: Optional[str] = None, entity_id: Optional[int] = None,
+               user_id: Optional[int] = None, action: Optional[str] = None,
+               since: Optional[datetime] = None, until: Optional[datetime] = None,
+               cursor: Optional[str] = None,
+               limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[AuditLog], Optional[str]]:
+    """
+    Jedna stránka auditního logu (nejnovější první).
+
+    Returns:
+        (záznamy, kurzor další stránky nebo None)
+
+    Raises:
+        ValueError: Neplatný kurzor.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    query = AuditLog.query.options(joinedload(AuditLog.user))
+    if entity_type:
+        query = query.filter(AuditLog.entity_type == entity_type)
+    if entity_id is not None:
+        query = query.filter(AuditLog.entity_id == entity_id)
+    if user_id is not None:
+        query = query.filter(AuditLog.user_id == user_id)
+    if action:
+        query = query.filter(AuditLog.action == action)
+    if since:
+        query = query.filter(AuditLog.timestamp >= since)
+    if until:
+        query = query.filter(AuditLog.timestamp < until)
+    if cursor:
+        timestamp, log_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            AuditLog.timestamp < timestamp,
+            and_(AuditLog.timestamp == timestamp, AuditLog.id < log_id),
+        ))
+
+    # O jeden záznam víc - pozná se z něj, jestli existuje další stránka
+    rows = query.order_by(AuditLog.timestamp.desc(), AuditLog.id.desc()).limit(limit + 1).all()
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def serialize_entry(log: AuditLog) -> Dict[str, Any]:
+    """Záznam pro JSON historie (diffy zůstávají v kompaktním tvaru)."""
+    return {
+        "id": log.id,
+        "timestamp": log.timestamp.isoformat(timespec="seconds") if log.timestamp else None,
+        "user": log.user.username if log.user else None,
+        "action": log.action,
+        "changes": log.changes if log.action == "UPDATE" else None,
+    }
+
+
+def history_payload(entity_type: str, entity_id: int, cursor: Optional[str] = None,
+                    limit: int = 10) -> Dict[str, Any]:
+    """Odpověď endpointu historie entity: {"items": [...], "next_cursor": ...}."""
+    rows, next_cursor = audit_page(entity_type=entity_type, entity_id=entity_id, cursor=cursor, limit=limit)
+    return {"items": [serialize_entry(log) for log in rows], "next_cursor": next_cursor}
@@ -3,18 +3,107 @@ Služba pro auditování změn v databázi.
 
 Tento modul zajišťuje logování změn (vytvoření, úprava, smazání) u klíčových entit 
 (Látky, Směsi) do auditního logu. Využívá SQLAlchemy event listenery.
+
+Mapper eventy záznamy jen sbírají do session.info; zapisují se hromadně
+(jeden víceřádkový INSERT) podle AUDIT_WRITE_MODE:
+    transactional - na konci každého flush ve stejné transakci (výchozí).
+                    Záznam se potvrdí právě tehdy, když se potvrdí změna
+                    (transakční outbox), nic se neztratí ani nepřebývá.
+    async         - po commitu do omezené fronty v procesu; AuditWriter je
+                    zapisuje po dávkách ve vlastní transakci. Transakce
+                    aplikace jsou kratší, ale záznamy čekající ve frontě se
+                    při pádu procesu ztratí. Plná fronta se zapíše rovnou
+                    (zpětný tlak místo zahazování).
+
+Záznamy jsou kompaktní: odvozená pole klasifikace (klasifikační log,
+final_* seznamy kódů) se ukládají jen jako hash obsahu a shrnutí
+přidaných/odebraných kódů, hodnoty delší než INLINE_MAX znaků jako odkaz
+{"blob": sha256, "size": n} na tabulku audit_blob (každý obsah jen jednou).
 """
 
+import atexit
+import hashlib
+import json
+import logging
+import queue
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from flask import current_app, has_app_context
 from flask_login import current_user
-from app.models.audit import AuditLog
-from app.extensions import db
 from sqlalchemy import event
-from datetime import datetime
-import json
+from sqlalchemy.orm import Session, object_session
+
+from app.extensions import db
+from app.models.audit import AuditBlob, AuditLog
+
+logger = logging.getLogger(__name__)
+
+AUDIT_WRITE_MODES = ("transactional", "async")
+
+# Klíč v session.info se záznamy čekajícími na zápis
+_PENDING_KEY = "audit_pending"
+
+# Delší hodnoty se ukládají do audit_blob (deduplikované podle hashe)
+INLINE_MAX = 200
+
+# Pole odvozená klasifikací - v diffu jen hash obsahu (+ shrnutí změn kódů)
+DERIVED_FIELDS = frozenset({
+    "classification_log",
+    "final_health_hazards",
+    "final_physical_hazards",
+    "final_environmental_hazards",
+    "final_ghs_codes",
+    "final_precautionary_statements",
+})
+
+# Odvozená pole se seznamem kódů oddělených čárkou ("H302, H315")
+CODE_LIST_FIELDS = DERIVED_FIELDS - {"classification_log"}
+
+# Klíč záznamu s obsahem bloků (není sloupec, odstraní se před INSERTem)
+_BLOBS_KEY = "_blobs"
+
+
+def _current_user_id() -> Optional[int]:
+    try:
+        if current_user and current_user.is_authenticated:
+            return current_user.id
+    except Exception:
+        pass
+    return None
+
+
+def _entity_type(entity) -> Optional[str]:
+    from app.models.substance import Substance
+    from app.models.mixture import Mixture
+
+    if isinstance(entity, Substance):
+        return "substance"
+    if isinstance(entity, Mixture):
+        return "mixture"
+    return None
+
 
 class AuditService:
     """Hlavní třída pro vytváření záznamů v audit logu."""
 
+    @staticmethod
+    def build_entry(entity, action, changes=None, blobs=None) -> Optional[Dict[str, Any]]:
+        """Řádek audit_log pro entitu (None, pokud se entita neaudituje)."""
+        entity_type = _entity_type(entity)
+        if not entity_type:
+            return None
+        return {
+            _BLOBS_KEY: blobs or {},
+            "user_id": _current_user_id(),
+            "entity_type": entity_type,
+            "entity_id": entity.id,
+            "action": action,
+            "changes": changes,
+            "timestamp": datetime.utcnow(),
+        }
+
     @staticmethod
     def log_change(entity, action, changes=None, connection=None):
         """
@@ -24,73 +113,337 @@ class AuditService:
             entity: Instance modelu (Substance/Mixture).
             action: Typ akce (CREATE, UPDATE, DELETE).
             changes: Slovník změn (pro UPDATE/CREATE).
-            connection: SQLAlchemy Connection (pro použití v event listeneru).
+            connection: SQLAlchemy Connection - záznam se vloží hned přes ni.
         """
-        from app.models.substance import Substance
-        from app.models.mixture import Mixture
-
-        entity_type = None
-        if isinstance(entity, Substance):
-            entity_type = "substance"
-        elif isinstance(entity, Mixture):
-            entity_type = "mixture"
-        
-        if not entity_type:
+        entry = AuditService.build_entry(entity, action, changes)
+        if entry is None:
             return
-
-        user_id = None
-        try:
-            if current_user and current_user.is_authenticated:
-                user_id = current_user.id
-        except Exception:
-            user_id = None
-
         if connection:
-            # Použijeme přímé vložení přes connection, aby se předešlo varování v flush procesu
-            connection.execute(
-                AuditLog.__table__.insert().values(
-                    user_id=user_id,
-                    entity_type=entity_type,
-                    entity_id=entity.id,
-                    action=action,
-                    changes=changes,
-                    timestamp=datetime.utcnow()
-                )
-            )
+            persist_entries(connection, [entry])
         else:
-            log_entry = AuditLog(
-                user_id=user_id,
-                entity_type=entity_type,
-                entity_id=entity.id,
-                action=action,
-                changes=changes
-            )
-            db.session.add(log_entry)
+            entry.pop(_BLOBS_KEY)
+            db.session.add(AuditLog(**entry))
 
     @staticmethod
-    def get_object_changes(obj):
+    def get_object_changes(obj, blobs=None):
         """
         Vypočítá změny u objektu před uložením.
+
+        Prochází jen sloupce, které se v této jednotce práce změnily
+        (committed_state), ne všechny atributy včetně vztahů. Obsah velkých
+        hodnot se přidá do `blobs` (hash -> text).
         """
+        blobs = {} if blobs is None else blobs
+        state = db.inspect(obj)
+        columns = state.mapper.column_attrs
         changes = {}
-        for attr in db.inspect(obj).attrs:
-            history = attr.history
-            if history.has_changes():
-                # history.deleted[0] je stará hodnota, history.added[0] je nová
-                old_val = history.deleted[0] if history.deleted else None
-                new_val = history.added[0] if history.added else None
-                
-                # Ignorujeme interní pole jako updated_at pokud se mění automaticky
-                if attr.key in ['updated_at']:
-                    continue
-                    
-                changes[attr.key] = {
-                    "old": str(old_val) if old_val is not None else None,
-                    "new": str(new_val) if new_val is not None else None
+        for key in list(state.committed_state):
+            # Ignorujeme interní pole jako updated_at pokud se mění automaticky
+            if key not in columns or key in ['updated_at']:
+                continue
+            history = state.attrs[key].history
+            if not history.has_changes():
+                continue
+            # history.deleted[0] je stará hodnota, history.added[0] je nová
+            old_val = history.deleted[0] if history.deleted else None
+            new_val = history.added[0] if history.added else None
+            if old_val == new_val:
+                continue
+            if key in DERIVED_FIELDS:
+                changes[key] = derived_change(key, old_val, new_val, blobs)
+            else:
+                changes[key] = {
+                    "old": compact_value(old_val, blobs),
+                    "new": compact_value(new_val, blobs),
                 }
         return changes
 
+    @staticmethod
+    def get_initial_data(obj, blobs=None):
+        """Vyplněné sloupce nové entity (pro záznam CREATE), bez klasifikačního logu."""
+        blobs = {} if blobs is None else blobs
+        state = db.inspect(obj)
+        data = {}
+        for column in state.mapper.column_attrs:
+            value = state.dict.get(column.key)
+            if value is not None and column.key != 'classification_log':
+                data[column.key] = compact_value(value, blobs)
+        return data
+
+
+# === Kompaktní hodnoty ===
+
+def _text(value) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False, sort_keys=True, default=str)
+    return str(value)
+
+
+def _blob_ref(text: str, blobs: Dict[str, str]) -> Dict[str, Any]:
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    blobs[digest] = text
+    return {"blob": digest, "size": len(text)}
+
+
+def compact_value(value, blobs: Dict[str, str]):
+    """Krátká hodnota jako text, dlouhá jako odkaz na audit_blob."""
+    if value is None:
+        return None
+    text = _text(value)
+    if len(text) <= INLINE_MAX:
+        return text
+    return _blob_ref(text, blobs)
+
+
+def _codes(value) -> set:
+    return {code.strip() for code in (value or "").split(",") if code.strip()}
+
+
+def derived_change(key: str, old, new, blobs: Dict[str, str]) -> Dict[str, Any]:
+    """Změna odvozeného pole: hashe obsahu a u seznamů kódů přidané/odebrané kódy."""
+    change = {
+        "derived": True,
+        "old": _blob_ref(_text(old), blobs) if old is not None else None,
+        "new": _blob_ref(_text(new), blobs) if new is not None else None,
+    }
+    if key in CODE_LIST_FIELDS:
+        old_codes, new_codes = _codes(old), _codes(new)
+        change["added"] = sorted(new_codes - old_codes)
+        change["removed"] = sorted(old_codes - new_codes)
+    return change
+
+
+def compact_changes(changes: Optional[Dict[str, Any]], blobs: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """
+    Převede uložený diff starého formátu (celé hodnoty jako str) na kompaktní.
+
+    Už kompaktní části ponechá beze změny, takže jde volat opakovaně.
+    """
+    if not changes:
+        return changes
+    if "initial" in changes:
+        initial = changes["initial"] or {}
+        return {"initial": {
+            key: value if isinstance(value, dict) else compact_value(value, blobs)
+            for key, value in initial.items() if key != "classification_log"
+        }}
+    compacted = {}
+    for key, diff in changes.items():
+        if not isinstance(diff, dict) or diff.get("derived"):
+            compacted[key] = diff
+        elif key in DERIVED_FIELDS:
+            compacted[key] = derived_change(key, diff.get("old"), diff.get("new"), blobs)
+        else:
+            compacted[key] = {
+                side: diff.get(side) if isinstance(diff.get(side), dict) else compact_value(diff.get(side), blobs)
+                for side in ("old", "new")
+            }
+    return compacted
+
+
+def compact_audit_log(batch_size: int = 500) -> Dict[str, int]:
+    """
+    Zkompaktní existující záznamy audit logu (po nasazení kompaktních diffů).
+
+    Returns:
+        {"rows": prošlé záznamy, "updated": změněné záznamy, "blobs": vložené bloky}
+    """
+    table = AuditLog.__table__
+    result = {"rows": 0, "updated": 0, "blobs": 0}
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            db.select(table.c.id, table.c.changes)
+            .where(table.c.id > last_id).order_by(table.c.id).limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        blobs: Dict[str, str] = {}
+        params = []
+        for row in rows:
+            compacted = compact_changes(row.changes, blobs)
+            if compacted != row.changes:
+                params.append({"row_id": row.id, "changes": compacted})
+        connection = db.session.connection()
+        insert_blobs(connection, blobs)
+        if params:
+            connection.execute(
+                table.update().where(table.c.id == db.bindparam("row_id")).values(changes=db.bindparam("changes")),
+                params,
+            )
+        db.session.commit()
+        result["rows"] += len(rows)
+        result["updated"] += len(params)
+        result["blobs"] += len(blobs)
+    return result
+
+
+def load_blob(digest: str) -> Optional[str]:
+    """Obsah hodnoty uložené v audit_blob (None, pokud neexistuje)."""
+    blob = db.session.get(AuditBlob, digest)
+    return blob.content if blob else None
+
+
+def insert_blobs(connection, blobs: Dict[str, str]) -> None:
+    """Vloží chybějící bloky (souběžné vložení stejného obsahu nevadí)."""
+    if not blobs:
+        return
+    table = AuditBlob.__table__
+    now = datetime.utcnow()
+    rows = [
+        {"hash": digest, "content": content, "size": len(content), "created_at": now}
+        for digest, content in blobs.items()
+    ]
+    dialect = connection.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        connection.execute(insert(table).on_conflict_do_nothing(index_elements=["hash"]), rows)
+        return
+    existing = set(connection.execute(
+        db.select(table.c.hash).where(table.c.hash.in_(list(blobs)))
+    ).scalars())
+    missing = [row for row in rows if row["hash"] not in existing]
+    if missing:
+        connection.execute(table.insert(), missing)
+
+
+def persist_entries(connection, entries: List[Dict[str, Any]], blobs: Optional[Dict[str, str]] = None) -> None:
+    """Zapíše záznamy (a jejich bloky i bloky z `blobs`) jedním víceřádkovým INSERTem."""
+    blobs = dict(blobs or {})
+    rows = []
+    for entry in entries:
+        blobs.update(entry.get(_BLOBS_KEY) or {})
+        rows.append({k: v for k, v in entry.items() if k != _BLOBS_KEY})
+    insert_blobs(connection, blobs)
+    connection.execute(AuditLog.__table__.insert(), rows)
+
+
+# === Zápis záznamů ===
+
+_writer_lock = threading.Lock()
+
+
+class AuditWriter:
+    """
+    Vlákno zapisující záznamy audit logu z omezené fronty víceřádkovými INSERTy.
+
+    Plná fronta se nezahazuje - enqueue() dávku zapíše rovnou ve volajícím vlákně.
+    """
+
+    def __init__(self, engine, max_size: int = 10000, batch_size: int = 500, interval: float = 0.5):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.interval = interval
+        self.queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=max_size)
+        self.written = 0
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def enqueue(self, entries: List[Dict[str, Any]]) -> None:
+        overflow = []
+        for entry in entries:
+            try:
+                self.queue.put_nowait(entry)
+            except queue.Full:
+                overflow.append(entry)
+        if overflow:
+            logger.warning("Fronta audit logu je plná, %d záznamů se zapisuje synchronně", len(overflow))
+            self._write(overflow)
+
+    def flush(self) -> None:
+        """Počká, až se zapíše vše, co je ve frontě."""
+        self.queue.join()
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self.queue.put(None)
+            self._thread.join(timeout=10)
+
+    def _write(self, rows: List[Dict[str, Any]]) -> None:
+        try:
+            with self.engine.begin() as connection:
+                persist_entries(connection, rows)
+            self.written += len(rows)
+        except Exception:
+            logger.exception("Zápis %d záznamů audit logu selhal", len(rows))
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            try:
+                first = self.queue.get(timeout=self.interval)
+            except queue.Empty:
+                continue
+            batch = []
+            taken = 1
+            if first is None:
+                stopping = True
+            else:
+                batch.append(first)
+            while len(batch) < self.batch_size and not stopping:
+                try:
+                    entry = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                taken += 1
+                if entry is None:
+                    stopping = True
+                else:
+                    batch.append(entry)
+            if batch:
+                self._write(batch)
+            for _ in range(taken):
+                self.queue.task_done()
+
+
+def get_writer() -> AuditWriter:
+    """Writer aplikace v tomto procesu (vytvoří se při prvním použití)."""
+    app = current_app._get_current_object()
+    with _writer_lock:
+        writer = app.extensions.get("audit_writer")
+        if writer is None:
+            config = app.config
+            writer = app.extensions["audit_writer"] = AuditWriter(
+                db.engine,
+                max_size=config.get("AUDIT_QUEUE_SIZE", 10000),
+                batch_size=config.get("AUDIT_BATCH_SIZE", 500),
+                interval=config.get("AUDIT_FLUSH_INTERVAL", 0.5),
+            )
+            atexit.register(writer.close)
+        return writer
+
+
+def _write_mode() -> str:
+    if has_app_context():
+        return current_app.config.get("AUDIT_WRITE_MODE", "transactional")
+    return "transactional"
+
+
+def _collect(target, action, changes=None, blobs=None) -> None:
+    session = object_session(target)
+    entry = AuditService.build_entry(target, action, changes, blobs)
+    if session is None or entry is None:
+        return
+    session.info.setdefault(_PENDING_KEY, []).append(entry)
+
+
+_listeners_registered = False
+
+
 def register_audit_listeners():
+    # Mapper eventy jsou globální - při opakovaném create_app (testy, workery)
+    # by se jinak každá změna zapsala do audit logu vícekrát
+    global _listeners_registered
+    if _listeners_registered:
+        return
+    _listeners_registered = True
+
     from app.models.substance import Substance
     from app.models.mixture import Mixture
 
@@ -99,11 +452,8 @@ def register_audit_listeners():
     def after_insert(mapper, connection, target):
         try:
             # Pro Create logujeme základní data (bez vztahů)
-            initial_data = {
-                k: str(v) for k, v in target.__dict__.items() 
-                if not k.startswith('_') and k != 'classification_log'
-            }
-            AuditService.log_change(target, 'CREATE', {"initial": initial_data}, connection=connection)
+            blobs = {}
+            _collect(target, 'CREATE', {"initial": AuditService.get_initial_data(target, blobs)}, blobs)
         except Exception:
             pass # Selhání logu nesmí shodit aplikaci
 
@@ -111,9 +461,10 @@ def register_audit_listeners():
     @event.listens_for(Mixture, 'after_update')
     def after_update(mapper, connection, target):
         try:
-            changes = AuditService.get_object_changes(target)
+            blobs = {}
+            changes = AuditService.get_object_changes(target, blobs)
             if changes:
-                AuditService.log_change(target, 'UPDATE', changes, connection=connection)
+                _collect(target, 'UPDATE', changes, blobs)
         except Exception:
             pass
 
@@ -121,6 +472,27 @@ def register_audit_listeners():
     @event.listens_for(Mixture, 'before_delete')
     def before_delete(mapper, connection, target):
         try:
-            AuditService.log_change(target, 'DELETE', connection=connection)
+            _collect(target, 'DELETE')
         except Exception:
             pass
+
+    @event.listens_for(Session, 'after_flush')
+    def write_pending(session, flush_context):
+        if _write_mode() == "async" or not session.info.get(_PENDING_KEY):
+            return
+        entries = session.info.pop(_PENDING_KEY)
+        try:
+            persist_entries(session.connection(), entries)
+        except Exception:
+            logger.exception("Zápis %d záznamů audit logu selhal", len(entries))
+            raise
+
+    @event.listens_for(Session, 'after_commit')
+    def enqueue_pending(session):
+        entries = session.info.pop(_PENDING_KEY, None)
+        if entries:
+            get_writer().enqueue(entries)
+
+    @event.listens_for(Session, 'after_rollback')
+    def discard_pending(session):
+        session.info.pop(_PENDING_KEY, None)
@@ -14,6 +14,7 @@ from .health import classify_by_concentration_limits
 from .env import classify_environmental_hazards
 from .physical import evaluate_flammable_liquids
 from .p_phrases import assign_p_phrases
+from app.monitoring.timing import resolve_timer
 
 
 def get_signal_word(ghs_codes: Set, h_phrases: Set = None) -> Optional[str]:
@@ -92,7 +93,7 @@ def apply_article_26_priorities(ghs_codes: Set, h_phrases: Set) -> Set:
     return ghs
 
 
-def run_clp_classification(mixture: Mixture) -> None:
+def run_clp_classification(mixture: Mixture, timing=None) -> None:
     """
     Hlavní orchestrátor klasifikace CLP. 
     Provádí výpočty v krocích:
@@ -102,8 +103,12 @@ def run_clp_classification(mixture: Mixture) -> None:
     4. Nebezpečnost pro životní prostředí
     5. Sloučení výsledků, určení signálního slova a prioritizace symbolů (Článek 26).
     Výsledky jsou uloženy přímo do objektu směsi.
+
+    `timing` volí měření doby kroků (viz app.monitoring.timing.resolve_timer);
+    bez něj platí režim požadavku nebo CLP_STAGE_TIMING.
     """
     all_log = []
+    timer = resolve_timer(timing)
 
     try:
         # 0. Rozbalit směsi na látky (pokud směs obsahuje jiné směsi)
@@ -113,6 +118,7 @@ def run_clp_classification(mixture: Mixture) -> None:
         # Získat seznam komponent pro výpočet (buď originální, nebo rozbalené)
         calc_components = mixture.components
         
+        timer.set(components=len(calc_components))
         has_mixture_components = False
         for comp in mixture.components:
             # Robustnější kontrola typu: zvládne Enum i řetězec z DB
@@ -123,25 +129,26 @@ def run_clp_classification(mixture: Mixture) -> None:
                 break
         
         if has_mixture_components:
-            # Rozbalit směsi na látky
-            expanded_substances = MixtureService.expand_mixture_components(mixture.id)
+            with timer.stage("expand"):
+                # Rozbalit směsi na látky
+                expanded_substances = MixtureService.expand_mixture_components(mixture.id)
             
-            # Vytvoříme dočasné komponenty pouze s látkami
-            from app.models import Substance
-            temp_components = []
-            for exp in expanded_substances:
-                # Vytvoříme dočasný objekt podobný MixtureComponent
-                class TempComponent:
-                    def __init__(self, substance_id, concentration):
-                        self.substance_id = substance_id
-                        self.concentration = concentration
-                        self.component_type = ComponentType.SUBSTANCE
-                        self.substance = Substance.query.get(substance_id)
+                # Vytvoříme dočasné komponenty pouze s látkami
+                from app.models import Substance
+                temp_components = []
+                for exp in expanded_substances:
+                    # Vytvoříme dočasný objekt podobný MixtureComponent
+                    class TempComponent:
+                        def __init__(self, substance_id, concentration):
+                            self.substance_id = substance_id
+                            self.concentration = concentration
+                            self.component_type = ComponentType.SUBSTANCE
+                            self.substance = Substance.query.get(substance_id)
                 
-                if exp.get('substance_id'):
-                    temp_components.append(
-                        TempComponent(exp['substance_id'], exp['concentration'])
-                    )
+                    if exp.get('substance_id'):
+                        temp_components.append(
+                            TempComponent(exp['substance_id'], exp['concentration'])
+                        )
             
             # Pro výpočet použijeme rozbalené komponenty
             calc_components = temp_components
@@ -174,7 +181,8 @@ def run_clp_classification(mixture: Mixture) -> None:
         # 1. ATEmix
         try:
             from .ate import calculate_mixture_ate, classify_by_atemix
-            atemix_results, ate_log = calculate_mixture_ate(mixture, components=calc_components)
+            with timer.stage("ate"):
+                atemix_results, ate_log = calculate_mixture_ate(mixture, components=calc_components)
             all_log.extend(ate_log)
 
 
@@ -194,7 +202,8 @@ def run_clp_classification(mixture: Mixture) -> None:
                 None,
             )
 
-            ate_h, ate_ghs, ate_class_log = classify_by_atemix(atemix_results)
+            with timer.stage("ate"):
+                ate_h, ate_ghs, ate_class_log = classify_by_atemix(atemix_results)
             all_log.extend(ate_class_log)
         except Exception as e:
             ate_h, ate_ghs = set(), set()
@@ -202,7 +211,8 @@ def run_clp_classification(mixture: Mixture) -> None:
 
         # 2. Health (Concentration Limits)
         try:
-            health_h, health_ghs, health_log = classify_by_concentration_limits(mixture, components=calc_components)
+            with timer.stage("health"):
+                health_h, health_ghs, health_log = classify_by_concentration_limits(mixture, components=calc_components)
             all_log.extend(health_log)
         except Exception as e:
             health_h, health_ghs = set(), set()
@@ -212,7 +222,8 @@ def run_clp_classification(mixture: Mixture) -> None:
 
         # 3. Environment
         try:
-            env_h, env_ghs, env_log = classify_environmental_hazards(mixture, components=calc_components)
+            with timer.stage("env"):
+                env_h, env_ghs, env_log = classify_environmental_hazards(mixture, components=calc_components)
             all_log.extend(env_log)
         except Exception as e:
             env_h, env_ghs = set(), set()
@@ -222,7 +233,8 @@ def run_clp_classification(mixture: Mixture) -> None:
         phys_h, phys_ghs = set(), set()
         try:
             if mixture.physical_state and hasattr(mixture.physical_state, 'value') and mixture.physical_state.value == 'liquid':
-                 phys_h, phys_ghs, phys_log = evaluate_flammable_liquids(mixture.flash_point, mixture.boiling_point)
+                 with timer.stage("physical"):
+                     phys_h, phys_ghs, phys_log = evaluate_flammable_liquids(mixture.flash_point, mixture.boiling_point)
                  all_log.extend(phys_log)
         except Exception as e:
              all_log.append({"step": "Chyba Fyzikální", "detail": str(e), "result": "ERROR"})
@@ -234,7 +246,8 @@ def run_clp_classification(mixture: Mixture) -> None:
         # 4. EUH Phrases
         from .euh import classify_euh_phrases
         try:
-            euh_h, euh_log = classify_euh_phrases(mixture, total_h, env_h, components=calc_components)
+            with timer.stage("euh"):
+                euh_h, euh_log = classify_euh_phrases(mixture, total_h, env_h, components=calc_components)
             total_h |= euh_h
             all_log.extend(euh_log)
         except Exception as e:
@@ -247,7 +260,8 @@ def run_clp_classification(mixture: Mixture) -> None:
         final_ghs = apply_article_26_priorities(total_ghs, total_h)
 
         # P-Phrases
-        final_p_codes = assign_p_phrases(total_h, mixture.user_type)
+        with timer.stage("p_phrases"):
+            final_p_codes = assign_p_phrases(total_h, mixture.user_type)
         mixture.final_precautionary_statements = ", ".join(final_p_codes)
 
         # Save to model
@@ -261,6 +275,11 @@ def run_clp_classification(mixture: Mixture) -> None:
             sorted([h for h in total_h if h.startswith("H4")])
         )
         mixture.final_ghs_codes = ", ".join(sorted(final_ghs))
+
+        timer.set(substances=len(calc_components))
+        timer.finish()
+        if timer.attach_to_log:
+            all_log.append(timer.log_entry())
         mixture.classification_log = all_log
 
     except Exception as e:
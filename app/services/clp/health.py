@@ -56,16 +56,68 @@ HAZARD_GROUPS = {
 
 CAT_TO_GROUP = {c: grp for grp, cats in HAZARD_GROUPS.items() for c in cats}
 
-# Mapování H-vět na hazard groups (předpočítané pro výkon)
-H_CODE_TO_GROUPS = {}
-for cat, h_code in SCL_HAZARD_TO_H_CODE.items():
-    if cat in CAT_TO_GROUP:
-        grp = CAT_TO_GROUP[cat]
-        H_CODE_TO_GROUPS.setdefault(h_code, set()).add(grp)
+# Předpočítané mapy - staví se jednou při importu a sdílí je všechny instance
+# klasifikátoru. Skupiny jsou n-tice v pořadí SCL_HAZARD_TO_H_CODE, takže
+# pořadí příspěvků (a záznamů v logu) nezávisí na hashování řetězců.
+_REPR_H_CODE_VARIANTS = ["H360F", "H360D", "H360FD", "H360Fd", "H360Df", "H361f", "H361d", "H361fd"]
+
+
+def _build_h_code_groups() -> Dict[str, Tuple[str, ...]]:
+    """H-věta -> hazard groups."""
+    groups: Dict[str, List[str]] = {}
+    for cat, h_code in SCL_HAZARD_TO_H_CODE.items():
+        grp = CAT_TO_GROUP.get(cat)
+        if grp and grp not in groups.setdefault(h_code, []):
+            groups[h_code].append(grp)
+    # Doplnění specifických Repr variant
+    for h_code in _REPR_H_CODE_VARIANTS:
+        if "Repr" not in groups.setdefault(h_code, []):
+            groups[h_code].append("Repr")
+    return {h_code: tuple(grps) for h_code, grps in groups.items()}
+
+
+H_CODE_TO_GROUPS: Dict[str, Tuple[str, ...]] = _build_h_code_groups()
+
+_EXPLICIT_TARGET_CATEGORIES = {
+    ("H314", "Skin"): "Skin Corr. 1",
+    ("H315", "Skin"): "Skin Irrit. 2",
+    ("H318", "Eye"): "Eye Dam. 1",
+    ("H319", "Eye"): "Eye Irrit. 2",
+    ("H336", "STOT_SE"): "STOT SE 3 (Narcotic)",
+}
+
+
+def _resolve_target_category(h_code: str, group: str) -> Optional[str]:
+    """Mapuje H-větu a skupinu na konkrétní výpočetní kategorii."""
+    res = _EXPLICIT_TARGET_CATEGORIES.get((h_code, group))
+    if res:
+        return res
 
-# Doplnění specifických Repr variant
-for h_code in ["H360F", "H360D", "H360FD", "H360Fd", "H360Df", "H361f", "H361d", "H361fd"]:
-    H_CODE_TO_GROUPS.setdefault(h_code, set()).add("Repr")
+    # Reprodukční toxicita a Akutní toxicita mají specifické sub-mappingy
+    if group == "Repr":
+        return "Repr. 1A" if h_code.startswith("H360") else "Repr. 2"
+
+    # Fallback na CLP konstanty
+    for cat_name, h in SCL_HAZARD_TO_H_CODE.items():
+        if h == h_code and CAT_TO_GROUP.get(cat_name) == group:
+            return cat_name
+    return None
+
+
+# (H-věta, skupina) -> výpočetní kategorie pro všechny dvojice z H_CODE_TO_GROUPS
+H_CODE_GROUP_TO_CATEGORY: Dict[Tuple[str, str], Optional[str]] = {
+    (h_code, grp): _resolve_target_category(h_code, grp)
+    for h_code, grps in H_CODE_TO_GROUPS.items()
+    for grp in grps
+}
+
+_THRESHOLDS = {
+    "Skin Corr. 1": SKIN_CORROSION_THRESHOLD_PERCENT,
+    "Skin Irrit. 2": SKIN_IRRITATION_THRESHOLD_PERCENT,
+    "Eye Dam. 1": EYE_DAMAGE_THRESHOLD_PERCENT,
+    "Eye Irrit. 2": EYE_IRRITATION_THRESHOLD_PERCENT,
+    "STOT SE 3": STOT_SE3_THRESHOLD_PERCENT,
+}
 
 
 class HealthHazardClassifier:
@@ -167,7 +219,7 @@ class HealthHazardClassifier:
         h_codes = [h.strip() for h in h_phrases_str.split(",")]
         
         for h_code in h_codes:
-            possible_groups = H_CODE_TO_GROUPS.get(h_code, set())
+            possible_groups = H_CODE_TO_GROUPS.get(h_code, ())
             for group in possible_groups:
                 target_cat = self._get_target_category(h_code, group)
                 if not target_cat:
@@ -217,14 +269,7 @@ class HealthHazardClassifier:
 
     def _get_threshold(self, category: str) -> float:
         """Vrátí standardní klasifikační limit pro danou kategorii."""
-        thresholds = {
-            "Skin Corr. 1": SKIN_CORROSION_THRESHOLD_PERCENT,
-            "Skin Irrit. 2": SKIN_IRRITATION_THRESHOLD_PERCENT,
-            "Eye Dam. 1": EYE_DAMAGE_THRESHOLD_PERCENT,
-            "Eye Irrit. 2": EYE_IRRITATION_THRESHOLD_PERCENT,
-            "STOT SE 3": STOT_SE3_THRESHOLD_PERCENT,
-        }
-        return thresholds.get(category, STANDARD_CONCENTRATION_LIMITS.get(category, {}).get("cl", 100.0))
+        return _THRESHOLDS.get(category, STANDARD_CONCENTRATION_LIMITS.get(category, {}).get("cl", 100.0))
 
     def _get_cutoff(self, category: str, h_code: str) -> float:
         """Vrátí mezní hodnotu (cut-off) pro uvažování látky."""
@@ -237,26 +282,10 @@ class HealthHazardClassifier:
         return GENERAL_CUTOFF_PERCENT
 
     def _get_target_category(self, h_code: str, group: str) -> str:
-        """Mapuje H-větu a skupinu na konkrétní výpočetní kategorii."""
-        mapping = {
-            ("H314", "Skin"): "Skin Corr. 1",
-            ("H315", "Skin"): "Skin Irrit. 2",
-            ("H318", "Eye"): "Eye Dam. 1",
-            ("H319", "Eye"): "Eye Irrit. 2",
-            ("H336", "STOT_SE"): "STOT SE 3 (Narcotic)",
-        }
-        res = mapping.get((h_code, group))
-        if res: return res
-
-        # Reprodukční toxicita a Akutní toxicita mají specifické sub-mappingy
-        if group == "Repr":
-            return "Repr. 1A" if h_code.startswith("H360") else "Repr. 2"
-        
-        # Fallback na CLP konstanty
-        for cat_name, h in SCL_HAZARD_TO_H_CODE.items():
-            if h == h_code and CAT_TO_GROUP.get(cat_name) == group:
-                return cat_name
-        return None
+        """Mapuje H-větu a skupinu na konkrétní výpočetní kategorii (předpočítáno)."""
+        if (h_code, group) in H_CODE_GROUP_TO_CATEGORY:
+            return H_CODE_GROUP_TO_CATEGORY[(h_code, group)]
+        return _resolve_target_category(h_code, group)
 
     # --- Evaluátory výsledků ---
 
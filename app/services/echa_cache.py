@@ -0,0 +1,337 @@
+"""
+Perzistentní cache odpovědí ECHA API.
+
+Dvě úrovně: in-process LRU (opakovaný dotaz bez I/O) a tabulka echa_cache
+(přežije restart, sdílí ji všechny procesy). Záznam je do vypršení TTL
+čerstvý; po vypršení se ještě ECHA_CACHE_STALE_TTL vrací starý obsah a na
+pozadí běží podmíněná revalidace (If-None-Match / If-Modified-Since). Když
+ECHA neodpovídá, vrací se uložená odpověď bez ohledu na stáří (offline).
+
+Vymazání (purge) zvýší generaci "echa_cache" v tabulce cache_generation
+(stejný mechanismus jako app/services/local_cache.py). Ostatní procesy ji
+při vyhledávání kontrolují nejvýš jednou za ECHA_CACHE_PURGE_CHECK_SECONDS
+a při změně své LRU zahodí - smazaná data tedy neservírují z paměti.
+
+Cache se volá z vláken poolu ECHA klienta bez aplikačního kontextu, proto
+pracuje přímo s enginem (Core), ne s db.session. Čtení z DB běží souběžně
+(zámek jen u zápisů; u jediného sdíleného spojení - StaticPool, SQLite v
+paměti - se serializuje i čtení). Revalidace na pozadí běží v malém poolu
+vláken (ECHA_CACHE_REVALIDATE_WORKERS); při plné frontě se přeskočí a
+vrací se dál stale obsah.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlencode
+
+import requests
+from sqlalchemy.pool import StaticPool
+
+from app.extensions import db
+from app.models.cache_generation import CacheGeneration
+from app.models.echa_cache import EchaCacheEntry
+from app.services.local_cache import bump_generations
+
+logger = logging.getLogger(__name__)
+
+# Odpovědi, které se ukládají (404 = látka/povinnosti neexistují)
+CACHEABLE_STATUSES = (200, 404)
+
+EPOCH = datetime(1970, 1, 1)
+
+# Kolik revalidací smí čekat ve frontě na jedno vlákno poolu
+REVALIDATE_QUEUE_PER_WORKER = 32
+
+# Druh v tabulce cache_generation, jehož zvýšení vyprázdní LRU všech procesů
+PURGE_KIND = "echa_cache"
+
+
+def cache_key(url: str, params: Optional[Dict[str, Any]] = None) -> str:
+    if not params:
+        return url
+    return f"{url}?{urlencode(sorted(params.items()))}"
+
+
+def _to_datetime(timestamp: float) -> datetime:
+    return datetime.utcfromtimestamp(timestamp)
+
+
+def _to_timestamp(value: datetime) -> float:
+    return (value - EPOCH).total_seconds()
+
+
+class CachedResponse:
+    """Odpověď z cache s rozhraním, které ECHAService používá u requests.Response."""
+
+    def __init__(self, url: str, status_code: int, body: Any, from_cache: bool = False):
+        self.url = url
+        self.status_code = status_code
+        self._body = body
+        self.from_cache = from_cache
+
+    def json(self):
+        return self._body
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+
+class EchaCache:
+    """Dvouúrovňová cache (LRU + DB) s TTL a stale-while-revalidate."""
+
+    def __init__(self, engine, ttl: int, stale_ttl: int, lru_size: int = 2048,
+                 purge_check_seconds: float = 1.0, revalidate_workers: int = 2):
+        self.engine = engine
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.lru_size = lru_size
+        self.purge_check_seconds = purge_check_seconds
+        self._generation: Optional[int] = None
+        self._generation_checked = float("-inf")
+        self.table = EchaCacheEntry.__table__
+        self.stats = {"hit": 0, "stale": 0, "miss": 0, "revalidated": 0, "offline": 0}
+        self._lru: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()  # zápisy
+        # Jediné sdílené spojení nesnese souběžné transakce ani při čtení
+        self._read_lock = self._db_lock if isinstance(engine.pool, StaticPool) else nullcontext()
+        self.revalidate_workers = revalidate_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_pid: Optional[int] = None
+        self._refreshing = set()
+
+    @classmethod
+    def from_app(cls, app) -> "EchaCache":
+        """Procesně sdílená instance cache pro aplikaci (vzniká líně)."""
+        cache = app.extensions.get("echa_cache")
+        if cache is None:
+            config = app.config
+            cache = cls(
+                db.engine,
+                ttl=config["ECHA_CACHE_TTL"],
+                stale_ttl=config["ECHA_CACHE_STALE_TTL"],
+                lru_size=config["ECHA_CACHE_LRU_SIZE"],
+                purge_check_seconds=config.get("ECHA_CACHE_PURGE_CHECK_SECONDS", 1.0),
+                revalidate_workers=config.get("ECHA_CACHE_REVALIDATE_WORKERS", 2),
+            )
+            app.extensions["echa_cache"] = cache
+        return cache
+
+    # === Čtení ===
+
+    def fetch(self, url: str, params: Optional[Dict[str, Any]],
+              do_get: Callable[[Dict[str, str]], requests.Response]) -> CachedResponse:
+        """
+        Vrátí odpověď z cache, nebo ji stáhne přes do_get(extra_headers).
+
+        Args:
+            url: URL endpointu
+            params: Query parametry (součást klíče)
+            do_get: Provede GET s doplňujícími hlavičkami (podmíněný dotaz)
+        """
+        key = cache_key(url, params)
+        entry = self._lookup(key)
+        now = time.time()
+
+        if entry is not None and now < entry["expires_at"]:
+            self._count("hit")
+            return self._response(key, entry)
+
+        if entry is not None and now < entry["expires_at"] + self.stale_ttl:
+            self._count("stale")
+            self._revalidate_async(key, entry, do_get)
+            return self._response(key, entry)
+
+        self._count("miss")
+        return self._refresh(key, entry, do_get)
+
+    def _lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        self._check_purged()
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None:
+                self._lru.move_to_end(key)
+                return entry
+
+        with self._read_lock, self.engine.connect() as conn:
+            row = conn.execute(
+                db.select(self.table).where(self.table.c.key == key)
+            ).mappings().first()
+        if row is None:
+            return None
+
+        entry = {
+            "status_code": row["status_code"],
+            "body": row["body"],
+            "etag": row["etag"],
+            "last_modified": row["last_modified"],
+            "expires_at": _to_timestamp(row["expires_at"]),
+        }
+        self._remember(key, entry)
+        return entry
+
+    def _check_purged(self) -> None:
+        """Zahodí LRU, pokud jiný proces mezitím cache vymazal (generace purge)."""
+        now = time.monotonic()
+        if now - self._generation_checked < self.purge_check_seconds:
+            return
+        self._generation_checked = now
+        table = CacheGeneration.__table__
+        try:
+            with self._read_lock, self.engine.connect() as conn:
+                generation = conn.execute(
+                    db.select(table.c.generation).where(table.c.kind == PURGE_KIND)
+                ).scalar() or 0
+        except Exception as e:
+            logger.warning(f"Kontrola generace ECHA cache selhala: {e}")
+            return
+        with self._lock:
+            if self._generation is not None and generation != self._generation:
+                self._lru.clear()
+            self._generation = generation
+
+    def _response(self, key: str, entry: Dict[str, Any]) -> CachedResponse:
+        return CachedResponse(key, entry["status_code"], entry["body"], from_cache=True)
+
+    # === Zápis a revalidace ===
+
+    def _refresh(self, key: str, entry: Optional[Dict[str, Any]],
+                 do_get: Callable[[Dict[str, str]], requests.Response]) -> CachedResponse:
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        try:
+            response = do_get(headers)
+        except requests.exceptions.RequestException:
+            if entry is None:
+                raise
+            logger.warning(f"ECHA nedostupná, vracím uloženou odpověď pro {key}")
+            self._count("offline")
+            return self._response(key, entry)
+
+        if response.status_code == 304 and entry is not None:
+            entry = dict(entry, expires_at=time.time() + self.ttl)
+            self._store(key, entry)
+            self._count("revalidated")
+            return self._response(key, entry)
+
+        if response.status_code in CACHEABLE_STATUSES:
+            try:
+                body = response.json()
+            except ValueError:
+                body = None
+            entry = {
+                "status_code": response.status_code,
+                "body": body,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "expires_at": time.time() + self.ttl,
+            }
+            self._store(key, entry)
+            return self._response(key, entry)
+
+        # Chyba serveru - pokud máme starší odpověď, je lepší než nic
+        if entry is not None and response.status_code >= 500:
+            self._count("offline")
+            return self._response(key, entry)
+        return CachedResponse(key, response.status_code, None)
+
+    def _revalidate_async(self, key: str, entry: Dict[str, Any],
+                          do_get: Callable[[Dict[str, str]], requests.Response]) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            if len(self._refreshing) >= self.revalidate_workers * REVALIDATE_QUEUE_PER_WORKER:
+                return  # fronta je plná - stale obsah se revaliduje při dalším dotazu
+            self._refreshing.add(key)
+            executor = self._revalidate_executor()
+
+        def _run():
+            try:
+                self._refresh(key, entry, do_get)
+            except Exception as e:
+                logger.warning(f"Revalidace ECHA cache selhala pro {key}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        executor.submit(_run)
+
+    def _revalidate_executor(self) -> ThreadPoolExecutor:
+        # Vlákna se po forku nedědí - každý proces má vlastní pool (volá se pod _lock)
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(self.revalidate_workers, thread_name_prefix="echa-revalidate")
+            self._executor_pid = os.getpid()
+        return self._executor
+
+    def _store(self, key: str, entry: Dict[str, Any]) -> None:
+        self._remember(key, entry)
+        values = {
+            "status_code": entry["status_code"],
+            "body": entry["body"],
+            "etag": entry["etag"],
+            "last_modified": entry["last_modified"],
+            "fetched_at": datetime.utcnow(),
+            "expires_at": _to_datetime(entry["expires_at"]),
+        }
+        try:
+            with self._db_lock, self.engine.begin() as conn:
+                updated = conn.execute(
+                    db.update(self.table).where(self.table.c.key == key).values(**values)
+                ).rowcount
+                if not updated:
+                    conn.execute(db.insert(self.table).values(key=key, **values))
+        except Exception as e:
+            # Cache nesmí shodit dotaz - odpověď zůstane alespoň v LRU
+            logger.warning(f"Uložení ECHA cache selhalo pro {key}: {e}")
+
+    def _remember(self, key: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._lru[key] = entry
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+    # === Správa ===
+
+    def purge(self, expired_only: bool = False) -> int:
+        """Smaže záznamy (všechny, nebo jen ty po vypršení stale okna) i z LRU všech procesů."""
+        query = db.delete(self.table)
+        if expired_only:
+            cutoff = _to_datetime(time.time() - self.stale_ttl)
+            query = query.where(self.table.c.expires_at < cutoff)
+        with self._db_lock, self.engine.begin() as conn:
+            count = conn.execute(query).rowcount
+            # Ostatní procesy podle nové generace vyprázdní své LRU
+            generation = bump_generations(conn, [PURGE_KIND])[PURGE_KIND]
+        with self._lock:
+            self._lru.clear()
+            self._generation = generation
+        return count
+
+    def summary(self) -> Dict[str, Any]:
+        """Počty záznamů a statistiky pro administraci."""
+        now = datetime.utcnow()
+        with self._read_lock, self.engine.connect() as conn:
+            total = conn.execute(db.select(db.func.count()).select_from(self.table)).scalar()
+            fresh = conn.execute(
+                db.select(db.func.count()).select_from(self.table).where(self.table.c.expires_at >= now)
+            ).scalar()
+        with self._lock:
+            return {"entries": total, "fresh": fresh, "lru": len(self._lru), **self.stats}
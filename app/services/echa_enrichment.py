@@ -0,0 +1,232 @@
+"""
+Hromadné obohacení katalogu látek daty z ECHA.
+
+Pro všechny látky s CAS číslem stáhne harmonizovanou klasifikaci (H-věty,
+piktogramy, SCL, ATE) a legislativní příznaky (SVHC, Příloha XIV/XVII, PBT...),
+porovná je s uloženými hodnotami a změny zapíše hromadným UPDATE (přes
+ImportPlanner.apply, včetně audit logu). Dotčené směsi se pak reklasifikují.
+
+Dotazy běží souběžně (omezený počet vláken) a HTTP požadavky na ECHA
+omezuje token bucket. Selhané dotazy se opakují s exponenciálním backoffem.
+Po každé dávce se ukládá checkpoint, takže po pádu lze navázat.
+"""
+
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from app.extensions import db
+from app.models import Substance
+from app.constants.clp import HEALTH_H_PHRASES, ENV_H_PHRASES, PHYSICAL_H_PHRASES
+from app.services.import_planner import ImportPlanner, diff_row
+
+logger = logging.getLogger(__name__)
+
+# Počet látek na dávku (zápis + checkpoint)
+ENRICH_BATCH_SIZE = 50
+
+# Kolik chybových hlášek se uchovává ve výsledku úlohy
+MAX_REPORTED_ERRORS = 100
+
+# Pole s harmonizovanou klasifikací - mění se jen pokud ECHA klasifikaci má
+HARMONISED_FIELDS = ("health_h_phrases", "env_h_phrases", "physical_h_phrases", "ghs_codes", "scl_limits")
+
+# Legislativní příznaky - ECHA je pro ně autoritativní zdroj
+FLAG_FIELDS = ("is_svhc", "is_reach_annex_xiv", "is_reach_annex_xvii", "is_pbt", "is_vpvb", "is_pmt", "is_vpvm")
+
+# Klíče ate_values z ECHAService -> sloupce látky
+ATE_FIELDS = {
+    "oral": "ate_oral",
+    "dermal": "ate_dermal",
+    "inhalation_gas": "ate_inhalation_gases",
+    "inhalation_vapour": "ate_inhalation_vapours",
+    "inhalation_dust_mist": "ate_inhalation_dusts_mists",
+}
+
+# M-faktory (uvádí jen lokální tabulka Přílohy VI)
+M_FACTOR_FIELDS = {"acute": "m_factor_acute", "chronic": "m_factor_chronic"}
+
+# Harmonizovaná pole jsou uložená jako seznam oddělený čárkou (porovnávají se jako množina)
+LIST_FIELDS = HARMONISED_FIELDS
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: průměrně `rate` požadavků za sekundu,
+    krátkodobě až `capacity` najednou.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Počká, dokud není k dispozici token."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def _split(value: Optional[str]) -> set:
+    return {part.strip() for part in (value or "").split(",") if part.strip()}
+
+
+def echa_to_substance_fields(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Převede výsledek ECHAService.fetch_data na sloupce látky.
+
+    Harmonizovaná pole se vrací jen pokud ECHA uvádí harmonizované H-věty,
+    jinak by se přepsala vlastní klasifikace látky prázdnými hodnotami.
+    ATE hodnoty jen pro cesty, které ECHA uvádí. Legislativní příznaky jen
+    pokud je zdroj uvádí (lokální Příloha VI je nemá).
+    """
+    fields = {flag: bool(data[flag]) for flag in FLAG_FIELDS if flag in data}
+
+    h_phrases = data.get("h_phrases") or []
+    if h_phrases:
+        def _join(codes):
+            return ", ".join(sorted(set(codes))) or None
+
+        fields["health_h_phrases"] = _join(h for h in h_phrases if h in HEALTH_H_PHRASES)
+        fields["env_h_phrases"] = _join(h for h in h_phrases if h in ENV_H_PHRASES)
+        fields["physical_h_phrases"] = _join(h for h in h_phrases if h in PHYSICAL_H_PHRASES)
+        fields["ghs_codes"] = _join(data.get("ghs_symbols") or [])
+        fields["scl_limits"] = ", ".join(data.get("scl_limits") or []) or None
+
+    for key, column in ATE_FIELDS.items():
+        value = (data.get("ate_values") or {}).get(key)
+        if value is not None:
+            fields[column] = value
+    for key, column in M_FACTOR_FIELDS.items():
+        value = (data.get("m_factors") or {}).get(key)
+        if value is not None:
+            fields[column] = value
+    return fields
+
+
+def diff_substance(existing, fields: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Rozdíl dat z ECHA proti uložené látce (seznamy se porovnávají jako množiny)."""
+    changes = diff_row(existing, fields, list(fields))
+    for field in LIST_FIELDS:
+        if field in changes and _split(changes[field]["old"]) == _split(changes[field]["new"]):
+            del changes[field]
+    return changes
+
+
+def fetch_with_retry(service, query: str, max_retries: int, backoff: float) -> Dict[str, Any]:
+    """
+    fetch_data s opakováním při chybě spojení (exponenciální backoff s jitterem).
+
+    Dotazuje vždy ECHA (local=False) - lokální Příloha VI nemá legislativní
+    příznaky. Nenalezená látka se neopakuje.
+    """
+    attempt = 0
+    while True:
+        result = service.fetch_data(query, local=False)
+        if "error" not in result or not result.get("retryable") or attempt >= max_retries:
+            return result
+        delay = backoff * (2 ** attempt)
+        time.sleep(delay + random.uniform(0, delay))
+        attempt += 1
+
+
+class EchaEnrichment:
+    """Dávkové obohacení katalogu (používá handler úlohy echa_enrich)."""
+
+    def __init__(self, service, concurrency: int = 4, max_retries: int = 3, backoff: float = 1.0,
+                 user_id: Optional[int] = None):
+        self.service = service
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.user_id = user_id
+
+    def pending_ids(self, after_id: int = 0, substance_ids: Optional[List[int]] = None) -> List[int]:
+        """ID látek s CAS, které se mají zpracovat (vzestupně, od checkpointu)."""
+        query = (
+            db.select(Substance.id)
+            .where(Substance.cas_number.isnot(None), Substance.id > after_id)
+            .order_by(Substance.id)
+        )
+        if substance_ids:
+            query = query.where(Substance.id.in_(substance_ids))
+        return db.session.execute(query).scalars().all()
+
+    def run(self, ids: List[int], state: Dict[str, Any],
+            on_batch: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        Zpracuje látky po dávkách.
+
+        Args:
+            ids: ID látek ke zpracování
+            state: Stav (checkpoint) - průběžně se aktualizuje a předává on_batch
+            on_batch: Callback po každé dávce (uložení checkpointu, progres)
+        """
+        fields = HARMONISED_FIELDS + FLAG_FIELDS + tuple(ATE_FIELDS.values()) + tuple(M_FACTOR_FIELDS.values())
+        columns = [Substance.id, Substance.name, Substance.cas_number] + [
+            getattr(Substance, field) for field in fields
+        ]
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="echa-enrich") as executor:
+            for start in range(0, len(ids), ENRICH_BATCH_SIZE):
+                batch_ids = ids[start:start + ENRICH_BATCH_SIZE]
+                existing = db.session.execute(
+                    db.select(*columns).where(Substance.id.in_(batch_ids)).order_by(Substance.id)
+                ).mappings().all()
+
+                results = executor.map(
+                    lambda row: fetch_with_retry(self.service, row["cas_number"], self.max_retries, self.backoff),
+                    existing,
+                )
+
+                updates = []
+                for row, data in zip(existing, results):
+                    if "error" in data:
+                        key = "failed" if data.get("retryable") else "not_found"
+                        state[key] += 1
+                        if data.get("retryable") and len(state["errors"]) < MAX_REPORTED_ERRORS:
+                            state["errors"].append(f"{row['cas_number']}: {data['error']}")
+                        continue
+                    changes = diff_substance(row, echa_to_substance_fields(data))
+                    if changes:
+                        updates.append({"id": row["id"], "name": row["name"], "changes": changes})
+                    else:
+                        state["unchanged"] += 1
+
+                applied = ImportPlanner.apply({"updates": updates}, user_id=self.user_id)
+                state["updated"] += applied["updated"]
+                state["conflicts"] += len(applied["conflicts"])
+                state["changed_ids"].extend(applied["substance_ids"])
+                state["last_id"] = batch_ids[-1]
+                state["processed"] += len(batch_ids)
+
+                if on_batch:
+                    on_batch(state)
+        return state
+
+    @staticmethod
+    def initial_state() -> Dict[str, Any]:
+        return {
+            "last_id": 0,
+            "processed": 0,
+            "updated": 0,
+            "unchanged": 0,
+            "not_found": 0,
+            "failed": 0,
+            "conflicts": 0,
+            "changed_ids": [],
+            "errors": [],
+        }
@@ -1,67 +1,190 @@
-import requests
+"""
+Klient ECHA CHEM API.
+
+Po dohledání ID látky se nezávislé dotazy (detail, harmonizovaná klasifikace
+a její čtyři doplňující endpointy, legislativní povinnosti) posílají souběžně
+přes sdílený pool vláken. Počet souběžných spojení na jeden host je omezen
+procesně globálním semaforem, každé volání má vlastní timeout a každý
+endpoint může selhat samostatně jako dřív. Odpovědi volitelně ukládá
+EchaCache (viz echa_cache.py). Požadavky jdou přes procesně sdílený transport
+(pool spojení, opakování, circuit breaker a metriky - viz http_transport.py).
+Je-li nahraná lokální tabulka Přílohy VI (annex_vi.py), hledá se nejdřív v ní.
+"""
 import logging
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+
+from app.services.http_transport import get_transport
 
 logger = logging.getLogger(__name__)
 
+# Sdílený pool vláken pro dílčí dotazy (vytváří se líně)
+EXECUTOR_WORKERS = 16
+_executor = None
+_executor_lock = threading.Lock()
+
+# Semafory omezující souběžná spojení na host: (host, limit) -> semafor
+_host_semaphores = {}
+_host_semaphores_lock = threading.Lock()
+
+# Doplňující endpointy harmonizované klasifikace: klíč ve výsledku -> cesta
+HARMONISED_ENDPOINTS = {
+    "scls": "specific-concentration-limits",
+    "pictograms": "pictograms",
+    "labelling": "labelling",
+    "ates": "acute-toxicity-estimates",
+}
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=EXECUTOR_WORKERS, thread_name_prefix="echa")
+        return _executor
+
+
+def _host_semaphore(url: str, limit: int) -> threading.BoundedSemaphore:
+    key = (urlsplit(url).netloc, limit)
+    with _host_semaphores_lock:
+        semaphore = _host_semaphores.get(key)
+        if semaphore is None:
+            semaphore = _host_semaphores[key] = threading.BoundedSemaphore(limit)
+        return semaphore
+
+
 class ECHAService:
     """
     Služba pro komunikaci s ECHA CHEM API (verze 2026).
     """
     BASE_URL = "https://chem.echa.europa.eu"
+    HEADERS = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+        "Accept": "application/json, text/plain, */*",
+        "Accept-Language": "en-US,en;q=0.9",
+        "Origin": "https://chem.echa.europa.eu",
+        "Referer": "https://chem.echa.europa.eu/substance-search"
+    }
 
-    def __init__(self, timeout=10):
+    def __init__(self, timeout=10, base_url=None, max_concurrency=6, cache=None, rate_limiter=None,
+                 transport=None, local_index=None):
         self.timeout = timeout
-        self.session = requests.Session()
-        self.session.headers.update({
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            "Accept": "application/json, text/plain, */*",
-            "Accept-Language": "en-US,en;q=0.9",
-            "Origin": "https://chem.echa.europa.eu",
-            "Referer": "https://chem.echa.europa.eu/substance-search"
-        })
-
-    def fetch_data(self, cas_or_ec):
+        self.base_url = (base_url or self.BASE_URL).rstrip("/")
+        self.max_concurrency = max_concurrency
+        self.cache = cache  # EchaCache nebo None (bez cache)
+        self.rate_limiter = rate_limiter  # objekt s acquire() (např. TokenBucket) nebo None
+        # Sdílený HttpTransport (výchozí nastavení, pokud není předán)
+        self.transport = transport or get_transport("echa", headers=self.HEADERS)
+        self.local_index = local_index  # AnnexViIndex nebo None (jen síť)
+
+    @classmethod
+    def from_app(cls, app, use_cache: bool = True) -> "ECHAService":
+        """
+        Vytvoří klienta podle konfigurace aplikace (ECHA_*).
+
+        use_cache=False obchází EchaCache - každý dotaz jde na ECHA (obnova dat).
+        """
+        from app.services.annex_vi import AnnexViIndex
+        from app.services.echa_cache import EchaCache
+
+        config = app.config
+        transport = get_transport(
+            "echa",
+            pool_size=config["ECHA_POOL_SIZE"],
+            retries=config["ECHA_HTTP_RETRIES"],
+            backoff=config["ECHA_HTTP_BACKOFF"],
+            failure_threshold=config["ECHA_BREAKER_THRESHOLD"],
+            reset_timeout=config["ECHA_BREAKER_RESET"],
+            headers=cls.HEADERS,
+        )
+        return cls(
+            timeout=config["ECHA_TIMEOUT"],
+            base_url=config["ECHA_BASE_URL"],
+            max_concurrency=config["ECHA_MAX_CONCURRENCY"],
+            cache=EchaCache.from_app(app) if use_cache and config["ECHA_CACHE_ENABLED"] else None,
+            transport=transport,
+            local_index=AnnexViIndex.from_app(app) if config["ANNEX_VI_ENABLED"] else None,
+        )
+
+    def fetch_data(self, cas_or_ec, local=True):
         """
         Získá kompletní data o látce z ECHA API.
+
+        Pokud je látka v lokální tabulce Přílohy VI, vrátí se harmonizovaná
+        klasifikace z ní (bez legislativních příznaků, 'source': 'annex_vi').
         
         Metoda stahuje:
         1. Základní info a ID látky.
         2. Harmonizovanou klasifikaci (C&L).
         3. Legislativní povinnosti (SVHC, PBT, atd.).
+
+        Kroky 2 a 3 (a detail látky) běží souběžně, jakmile je známo ID látky.
         
         Args:
             cas_or_ec: CAS nebo EC číslo látky.
+            local: Hledat nejdřív v lokální tabulce Přílohy VI.
             
         Returns:
-            Dict s daty látky nebo dict s klíčem 'error'.
+            Dict s daty látky nebo dict s klíčem 'error' (u chyb spojení navíc
+            'retryable': True).
         """
+        if local and self.local_index is not None:
+            hit = self.local_index.lookup(cas_or_ec)
+            if hit is not None:
+                return hit
+
         try:
             substance_id = self._get_substance_id(cas_or_ec)
             if not substance_id:
                 return {"error": "Látka nebyla v databázi ECHA nalezena."}
 
-            detail = self._get_detail(substance_id)
-            harmonised = self._get_harmonised_info(substance_id)
-            obligations = self._get_obligations_summary(substance_id)
+            executor = _get_executor()
+            detail_future = executor.submit(self._get_detail, substance_id)
+            obligations_future = executor.submit(self._get_obligations_summary, substance_id)
+            class_id = executor.submit(self._get_classification_id, substance_id).result()
+
+            harmonised = None
+            if class_id:
+                harmonised = self._get_harmonised_details(class_id)
+
+            detail = detail_future.result()
+            obligations = obligations_future.result()
 
             return self._parse_response(detail, harmonised, obligations)
 
         except requests.exceptions.RequestException as e:
             logger.error(f"Chyba při komunikaci s ECHA API: {e}")
-            return {"error": f"Nepodařilo se spojit s ECHA API: {str(e)}"}
+            return {"error": f"Nepodařilo se spojit s ECHA API: {str(e)}", "retryable": True}
         except Exception as e:
             logger.exception("Neočekávaná chyba při zpracování dat z ECHA")
             return {"error": f"Interní chyba při zpracování dat: {str(e)}"}
 
+    def _get(self, url, params=None, endpoint=None):
+        """GET přes cache (pokud je zapnutá); `endpoint` je jméno pro metriky."""
+        if self.cache is None:
+            return self._http_get(url, params, endpoint=endpoint)
+        return self.cache.fetch(url, params, lambda headers: self._http_get(url, params, headers, endpoint))
+
+    def _http_get(self, url, params=None, headers=None, endpoint=None):
+        """Síťový GET s per-host limitem souběžnosti a timeoutem volání."""
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        with _host_semaphore(url, self.max_concurrency):
+            return self.transport.get(url, endpoint=endpoint, params=params, headers=headers,
+                                      timeout=self.timeout)
+
     def _get_substance_id(self, query):
-        url = f"{self.BASE_URL}/api-substance/v1/substance"
+        url = f"{self.base_url}/api-substance/v1/substance"
         params = {
             "pageIndex": 1,
             "pageSize": 10,
             "searchText": query
         }
-        r = self.session.get(url, params=params, timeout=self.timeout)
+        r = self._get(url, params=params, endpoint="search")
         r.raise_for_status()
         data = r.json()
         
@@ -92,59 +215,63 @@ class ECHAService:
         return query == data
 
     def _get_detail(self, substance_id):
-        url = f"{self.BASE_URL}/api-substance/v1/substance/{substance_id}"
-        r = self.session.get(url, timeout=self.timeout)
+        url = f"{self.base_url}/api-substance/v1/substance/{substance_id}"
+        r = self._get(url, endpoint="detail")
         r.raise_for_status()
         return r.json()
 
-    def _get_harmonised_info(self, substance_id):
-        # 1. Získáme seznam klasifikací
-        url_classes = f"{self.BASE_URL}/api-cnl-inventory/harmonized/{substance_id}/classifications"
+    def _get_classification_id(self, substance_id):
+        """ID prominentní harmonizované klasifikace (nebo None)."""
+        url_classes = f"{self.base_url}/api-cnl-inventory/harmonized/{substance_id}/classifications"
         try:
-            r = self.session.get(url_classes, timeout=self.timeout)
+            r = self._get(url_classes, endpoint="classifications")
             r.raise_for_status()
             classes = r.json()
             items = classes.get("items", [])
             if not items:
                 return None
-            
+
             # Vybereme prominentní klasifikaci (isProminentFlag), pokud existuje,
             # jinak vezmeme první v seznamu.
             target_item = next((i for i in items if i.get("isProminentFlag")), items[0])
-            class_id = target_item.get("classificationId")
-            if not class_id:
-                return None
-            
-            # 2. Získáme konkrétní doplňující data pro tuto klasifikaci
-            res = {"class_id": class_id}
-            
-            endpoints = {
-                "scls": "specific-concentration-limits",
-                "pictograms": "pictograms",
-                "labelling": "labelling",
-                "ates": "acute-toxicity-estimates"
-            }
-            
-            for key, path in endpoints.items():
-                url = f"{self.BASE_URL}/api-cnl-inventory/harmonized/{path}/{class_id}"
-                try:
-                    r_detail = self.session.get(url, timeout=self.timeout)
-                    r_detail.raise_for_status()
-                    res[key] = r_detail.json()
-                except Exception as e:
-                    logger.warning(f"Nepodařilo se získat {key} pro {class_id}: {e}")
-                    res[key] = None
-                    
-            return res
+            return target_item.get("classificationId")
         except requests.exceptions.RequestException as e:
             logger.warning(f"Nepodařilo se získat harmonizovanou klasifikaci pro {substance_id}: {e}")
             return None
 
+    def _get_harmonised_details(self, class_id):
+        """Souběžně stáhne doplňující data klasifikace; každý endpoint smí selhat zvlášť."""
+        executor = _get_executor()
+        futures = {
+            key: executor.submit(self._get_harmonised_endpoint, path, class_id)
+            for key, path in HARMONISED_ENDPOINTS.items()
+        }
+        res = {"class_id": class_id}
+        for key, future in futures.items():
+            try:
+                res[key] = future.result()
+            except Exception as e:
+                logger.warning(f"Nepodařilo se získat {key} pro {class_id}: {e}")
+                res[key] = None
+        return res
+
+    def _get_harmonised_endpoint(self, path, class_id):
+        url = f"{self.base_url}/api-cnl-inventory/harmonized/{path}/{class_id}"
+        r = self._get(url, endpoint=path)
+        r.raise_for_status()
+        return r.json()
+
+    def _get_harmonised_info(self, substance_id):
+        class_id = self._get_classification_id(substance_id)
+        if not class_id:
+            return None
+        return self._get_harmonised_details(class_id)
+
     def _get_obligations_summary(self, substance_id):
         # Spolehlivější endpoint používaný přímo webovým rozhraním ECHA
-        url = f"{self.BASE_URL}/api-obligation-substance/v1/{substance_id}/summary/"
+        url = f"{self.base_url}/api-obligation-substance/v1/{substance_id}/summary/"
         params = {"rmlId": substance_id}
-        r = self.session.get(url, params=params, timeout=self.timeout)
+        r = self._get(url, params=params, endpoint="obligations")
         if r.status_code == 404:
             return None
         r.raise_for_status()
@@ -255,7 +382,8 @@ class ECHAService:
 
         return res
 
-    def _parse_scl_value(self, value_str):
+    @staticmethod
+    def _parse_scl_value(value_str):
         """
         Převádí "C ≥ 15 %" na ">= 15" nebo "5 % ≤ C < 15 %" na ">= 5; < 15"
         """
@@ -6,8 +6,36 @@ Zajišťuje generování CSV souborů s exportem databáze látek a vytváření
 
 import csv
 import io
-from typing import List, Optional
-from app.models import Substance
+import json
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, TextIO
+from app.models import Substance, Mixture
+
+# Počet záznamů načítaných z DB najednou při exportu
+EXPORT_BATCH_SIZE = 500
+
+
+CSV_FIELDNAMES = [
+    'name',
+    'cas_number',
+    'ghs_codes',
+    'health_h_phrases',
+    'env_h_phrases',
+    'ate_oral',
+    'ate_dermal',
+    'ate_inhalation_vapours',
+    'ate_inhalation_dusts_mists',
+    'ate_inhalation_gases',
+    'm_factor_acute',
+    'm_factor_chronic',
+    'scl_limits',
+    'ed_hh_cat',
+    'ed_env_cat',
+    'is_pbt',
+    'is_vpvb',
+    'is_pmt',
+    'is_vpvm'
+]
 
 
 def export_substances_to_csv(substance_ids: Optional[List[int]] = None) -> str:
@@ -20,43 +48,40 @@ def export_substances_to_csv(substance_ids: Optional[List[int]] = None) -> str:
     Returns:
         CSV string
     """
+    output = io.StringIO()
+    write_substances_csv(output, substance_ids)
+    return output.getvalue()
+
+
+def write_substances_csv(output: TextIO, substance_ids: Optional[List[int]] = None,
+                         progress: Optional[Callable[[int, int], None]] = None) -> int:
+    """
+    Zapíše látky ve formátu CSV do textového streamu (soubor, StringIO).
+
+    Látky se načítají po dávkách, takže export velkého katalogu nedrží
+    v paměti všechny objekty najednou.
+
+    Args:
+        output: Cílový textový stream
+        substance_ids: None = všechny látky, list = vybrané látky
+        progress: Volitelný callback(hotovo, celkem) volaný po každé dávce
+
+    Returns:
+        Počet zapsaných látek
+    """
     # Získání látek z databáze
     if substance_ids:
-        substances = Substance.query.filter(Substance.id.in_(substance_ids)).all()
+        query = Substance.query.filter(Substance.id.in_(substance_ids))
     else:
-        substances = Substance.query.order_by(Substance.name).all()
+        query = Substance.query.order_by(Substance.name)
+    total = query.count() if progress else 0
     
-    # Vytvoření CSV
-    output = io.StringIO()
-    
-    # Definice sloupců
-    fieldnames = [
-        'name',
-        'cas_number',
-        'ghs_codes',
-        'health_h_phrases',
-        'env_h_phrases',
-        'ate_oral',
-        'ate_dermal',
-        'ate_inhalation_vapours',
-        'ate_inhalation_dusts_mists',
-        'ate_inhalation_gases',
-        'm_factor_acute',
-        'm_factor_chronic',
-        'scl_limits',
-        'ed_hh_cat',
-        'ed_env_cat',
-        'is_pbt',
-        'is_vpvb',
-        'is_pmt',
-        'is_vpvm'
-    ]
-    
-    writer = csv.DictWriter(output, fieldnames=fieldnames)
+    writer = csv.DictWriter(output, fieldnames=CSV_FIELDNAMES)
     writer.writeheader()
     
     # Zápis látek
-    for substance in substances:
+    count = 0
+    for substance in query.yield_per(EXPORT_BATCH_SIZE):
         row = {
             'name': substance.name or '',
             'cas_number': substance.cas_number or '',
@@ -79,8 +104,48 @@ def export_substances_to_csv(substance_ids: Optional[List[int]] = None) -> str:
             'is_vpvm': '1' if substance.is_vpvm else '0',
         }
         writer.writerow(row)
+        count += 1
+        if progress and count % EXPORT_BATCH_SIZE == 0:
+            progress(count, total)
     
-    return output.getvalue()
+    return count
+
+
+def write_data_json(output: TextIO, progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, int]:
+    """
+    Zapíše kompletní zálohu (látky i směsi) ve formátu JSON do textového streamu.
+
+    Položky se serializují jednotlivě, takže výsledný dokument nikdy nevzniká
+    celý v paměti. Formát odpovídá tomu, co čte import_data_from_json.
+
+    Returns:
+        {'substances': int, 'mixtures': int}
+    """
+    total = (Substance.query.count() + Mixture.query.count()) if progress else 0
+    done = 0
+
+    def _write_items(query):
+        nonlocal done
+        first = True
+        count = 0
+        for obj in query.yield_per(EXPORT_BATCH_SIZE):
+            if not first:
+                output.write(",\n")
+            output.write(json.dumps(obj.to_dict(), ensure_ascii=False))
+            first = False
+            count += 1
+            done += 1
+            if progress and done % EXPORT_BATCH_SIZE == 0:
+                progress(done, total)
+        return count
+
+    output.write('{\n"substances": [\n')
+    sub_count = _write_items(Substance.query.order_by(Substance.id))
+    output.write('\n],\n"mixtures": [\n')
+    mix_count = _write_items(Mixture.query.order_by(Mixture.id))
+    output.write('\n],\n')
+    output.write(f'"version": "1.0",\n"exported_at": {json.dumps(datetime.now().isoformat())}\n}}\n')
+    return {"substances": sub_count, "mixtures": mix_count}
 
 
 def generate_csv_template() -> str:
@@ -92,29 +157,7 @@ def generate_csv_template() -> str:
     """
     output = io.StringIO()
     
-    fieldnames = [
-        'name',
-        'cas_number',
-        'ghs_codes',
-        'health_h_phrases',
-        'env_h_phrases',
-        'ate_oral',
-        'ate_dermal',
-        'ate_inhalation_vapours',
-        'ate_inhalation_dusts_mists',
-        'ate_inhalation_gases',
-        'm_factor_acute',
-        'm_factor_chronic',
-        'scl_limits',
-        'ed_hh_cat',
-        'ed_env_cat',
-        'is_pbt',
-        'is_vpvb',
-        'is_pmt',
-        'is_vpvm'
-    ]
-    
-    writer = csv.DictWriter(output, fieldnames=fieldnames)
+    writer = csv.DictWriter(output, fieldnames=CSV_FIELDNAMES)
     writer.writeheader()
     
     # Příkladové řádky
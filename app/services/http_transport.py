@@ -0,0 +1,250 @@
+"""
+Sdílený HTTP transport pro externí API (ECHA).
+
+Jedna requests.Session na proces a jméno transportu, takže se TCP/TLS
+spojení znovu používají (keep-alive) napříč dotazy i vlákny. Adaptér má
+nastavitelnou velikost poolu a opakuje idempotentní požadavky (GET/HEAD)
+s exponenciálním backoffem s jitterem. Circuit breaker (pro každý host) po
+sérii chyb na nastavenou dobu odmítá požadavky okamžitě, místo aby každý
+čekal na timeout. Pro každý endpoint se sbírá počet volání, chyby a latence.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# Horní meze histogramu latence (s)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Stavové kódy, u kterých má smysl opakovat (přetížení/výpadek brány)
+RETRY_STATUSES = (429, 502, 503, 504)
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Circuit breaker je otevřený - požadavek se vůbec neodeslal."""
+
+
+class CircuitBreaker:
+    """
+    Jednoduchý circuit breaker (closed -> open -> half-open).
+
+    Po `failure_threshold` chybách v řadě se otevře na `reset_timeout`
+    sekund. Potom pustí jeden zkušební požadavek; úspěch ho zavře, chyba
+    ho otevře znovu.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now: float) -> str:
+        if self.opened_at is None:
+            return self.CLOSED
+        if now - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self) -> bool:
+        """Smí se požadavek odeslat? V half-open stavu pustí jen jeden."""
+        with self._lock:
+            state = self._state(time.monotonic())
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._probe_in_flight or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self._probe_in_flight:
+                    logger.warning("Circuit breaker otevřen po %d chybách", self.failures)
+                self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+
+class EndpointMetrics:
+    """Počty volání, chyb a histogram latence jednoho endpointu."""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.rejected = 0  # odmítnuto otevřeným breakerem
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+
+    def observe(self, seconds: float, error: bool) -> None:
+        self.count += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        if error:
+            self.errors += 1
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.buckets[index] += 1
+                break
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "rejected": self.rejected,
+            "avg_ms": round(self.total_seconds / self.count * 1000, 1) if self.count else None,
+            "max_ms": round(self.max_seconds * 1000, 1),
+            "total_seconds": self.total_seconds,
+            "buckets": list(self.buckets),
+        }
+
+
+class HttpTransport:
+    """Sdílená session s poolem spojení, retry politikou a circuit breakerem."""
+
+    def __init__(self, pool_size: int = 10, retries: int = 2, backoff: float = 0.3,
+                 failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 headers: Optional[Dict[str, str]] = None):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.session = requests.Session()
+        if headers:
+            self.session.headers.update(headers)
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            backoff_jitter=backoff,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            respect_retry_after_header=True,
+            raise_on_status=False,  # po vyčerpání pokusů vrátit poslední odpověď
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._metrics: Dict[str, EndpointMetrics] = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        host = urlsplit(url).netloc
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = self._breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return breaker
+
+    def _endpoint_metrics(self, endpoint: str) -> EndpointMetrics:
+        with self._lock:
+            metrics = self._metrics.get(endpoint)
+            if metrics is None:
+                metrics = self._metrics[endpoint] = EndpointMetrics()
+            return metrics
+
+    def get(self, url: str, endpoint: Optional[str] = None, **kwargs) -> requests.Response:
+        """
+        GET přes sdílenou session.
+
+        Za chybu (pro breaker i metriky) se počítá výjimka spojení a odpověď 5xx.
+
+        Raises:
+            CircuitOpenError: Breaker pro host je otevřený.
+            requests.exceptions.RequestException: Chyba spojení.
+        """
+        endpoint = endpoint or urlsplit(url).path
+        metrics = self._endpoint_metrics(endpoint)
+        breaker = self.breaker(url)
+        if not breaker.allow():
+            with self._lock:
+                metrics.rejected += 1
+            raise CircuitOpenError(f"Circuit breaker je otevřený pro {urlsplit(url).netloc}")
+
+        started = time.perf_counter()
+        try:
+            response = self.session.get(url, **kwargs)
+        except requests.exceptions.RequestException:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                metrics.observe(elapsed, error=True)
+            breaker.record_failure()
+            raise
+
+        elapsed = time.perf_counter() - started
+        failed = response.status_code >= 500
+        with self._lock:
+            metrics.observe(elapsed, error=failed)
+        if failed:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return response
+
+    def metrics(self) -> Dict[str, Any]:
+        """Snapshot metrik po endpointech a stavů breakerů po hostech."""
+        with self._lock:
+            endpoints = {name: m.snapshot() for name, m in sorted(self._metrics.items())}
+            breakers = dict(self._breakers)
+        return {
+            "endpoints": endpoints,
+            "breakers": {host: breaker.state for host, breaker in breakers.items()},
+        }
+
+
+# === Registr transportů (jeden na proces a jméno) ===
+
+_transports: Dict[str, Any] = {}
+_transports_lock = threading.Lock()
+
+
+def get_transport(name: str, **options) -> HttpTransport:
+    """
+    Procesně sdílený transport daného jména.
+
+    Po forku (gunicorn preload) se vytvoří nový - session ani pool spojení se
+    mezi procesy sdílet nesmí. Změna nastavení (options) také vytvoří nový.
+    """
+    key = (name, os.getpid())
+    with _transports_lock:
+        entry = _transports.get(name)
+        if entry is None or entry[0] != key or entry[1] != options:
+            entry = (key, options, HttpTransport(**options))
+            _transports[name] = entry
+        return entry[2]
+
+
+def transport_metrics() -> Dict[str, Dict[str, Any]]:
+    """Metriky všech transportů tohoto procesu."""
+    pid = os.getpid()
+    with _transports_lock:
+        entries = list(_transports.items())
+    return {name: entry[2].metrics() for name, entry in entries if entry[0][1] == pid}
@@ -0,0 +1,313 @@
+"""
+Plánovač importu látek (dry-run + upsert).
+
+Příchozí řádky (CSV nebo záloha JSON) se jedním průchodem spárují s existujícím
+katalogem přes hash mapy podle CAS a názvu. Výsledkem je plán: nové látky,
+změněné látky (rozdíl po polích ze Substance.to_dict) a beze změny. Plán se
+nejprve zobrazí jako náhled a teprve po potvrzení se aplikuje - změněné látky
+hromadným UPDATE podle primárního klíče, nové hromadným vložením.
+"""
+
+import csv
+import io
+import json
+import math
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.extensions import db
+from app.models import Substance
+from app.services.audit_service import DERIVED_FIELDS, compact_value, derived_change, persist_entries
+from app.services.csv_parser import parse_substances_csv
+from app.constants.clp import HEALTH_H_PHRASES, ENV_H_PHRASES
+
+# Velikost dávky pro hromadný UPDATE/INSERT a hlášení progresu
+PLAN_BATCH_SIZE = 500
+
+# Pole, jejichž změna nemá vliv na klasifikaci směsí (nespouští reklasifikaci)
+CLASSIFICATION_NEUTRAL_FIELDS = {"name", "cas_number"}
+
+
+def plan_fields() -> List[str]:
+    """Porovnávaná pole - klíče Substance.to_dict bez primárního klíče."""
+    return [key for key in Substance().to_dict() if key != "id"]
+
+
+def _normalize(field: str, value: Any) -> Any:
+    """Převede hodnotu na typ sloupce, aby šlo porovnávat CSV, JSON i DB."""
+    if isinstance(value, str):
+        value = value.strip()
+        if value == "":
+            value = None
+
+    python_type = Substance.__table__.c[field].type.python_type
+    if python_type is bool:
+        if isinstance(value, str):
+            return value.lower() in ("1", "true", "yes", "ano")
+        return bool(value)
+    if value is None:
+        return None
+    if python_type is float:
+        return float(value)
+    if python_type is int:
+        return int(value)
+    return value
+
+
+def _equal(old: Any, new: Any) -> bool:
+    if isinstance(old, float) and isinstance(new, float):
+        return math.isclose(old, new, rel_tol=1e-9, abs_tol=1e-12)
+    return old == new
+
+
+def diff_row(existing, row: Dict[str, Any], fields: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Rozdíl příchozího řádku proti uložené látce.
+
+    Porovnávají se jen pole, která řádek obsahuje; hodnoty se před porovnáním
+    převedou na typ sloupce.
+
+    Returns:
+        {pole: {'old': ..., 'new': ...}} pro změněná pole
+    """
+    changes = {}
+    for field in fields:
+        if field not in row:
+            continue
+        old = _normalize(field, existing[field])
+        new = _normalize(field, row[field])
+        if not _equal(old, new):
+            changes[field] = {"old": old, "new": new}
+    return changes
+
+
+class ImportPlanner:
+    """Sestavení a aplikace plánu importu látek."""
+
+    @staticmethod
+    def rows_from_csv(file) -> Tuple[List[Dict[str, Any]], List[str], List[str], List[str]]:
+        """
+        Načte řádky z CSV (stejný parser a validace jako běžný import).
+
+        Porovnávají se jen sloupce, které CSV skutečně obsahuje - chybějící
+        sloupec nesmí vynulovat existující hodnotu.
+
+        Returns:
+            (rows, fields, errors, warnings)
+        """
+        file.seek(0)
+        header = next(csv.reader([file.readline().decode("utf-8", errors="replace")]), [])
+        rows, errors, warnings = parse_substances_csv(
+            file, set(HEALTH_H_PHRASES.keys()), set(ENV_H_PHRASES.keys())
+        )
+        header = {column.strip() for column in header}
+        fields = [field for field in plan_fields() if field in header]
+        return rows, fields, errors, warnings
+
+    @staticmethod
+    def rows_from_json(file) -> Tuple[List[Dict[str, Any]], List[str], List[str], List[str]]:
+        """
+        Načte látky ze zálohy JSON (formát export_data).
+
+        Každý řádek projde validátory modelu (CAS, nezáporné hodnoty).
+
+        Returns:
+            (rows, fields, errors, warnings)
+        """
+        data = json.load(io.TextIOWrapper(file, encoding="utf-8"))
+        known = set(plan_fields())
+        rows, errors = [], []
+        seen_fields = set()
+
+        for index, item in enumerate(data.get("substances", []), start=1):
+            row = {k: v for k, v in item.items() if k in known}
+            if not row.get("name"):
+                errors.append(f"Látka č. {index}: Chybí povinné pole 'name'")
+                continue
+            try:
+                Substance(**row)
+            except ValueError as e:
+                errors.append(f"Látka '{row['name']}': {e}")
+                continue
+            seen_fields.update(row)
+            rows.append(row)
+
+        fields = [field for field in plan_fields() if field in seen_fields]
+        return rows, fields, errors, []
+
+    @staticmethod
+    def plan(rows: List[Dict[str, Any]], fields: List[str],
+             progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+        """
+        Spáruje řádky s katalogem a spočítá rozdíly (nic nezapisuje).
+
+        Katalog se načte jedním dotazem do hash map podle CAS a názvu. Řádek se
+        páruje nejprve podle CAS, pak podle názvu; pokud CAS a název ukazují na
+        dvě různé látky, jde o konflikt a řádek se přeskočí.
+
+        Returns:
+            {
+                'fields': list,     # Porovnávaná pole
+                'inserts': list,    # Nové látky (data řádku)
+                'updates': list,    # {'id', 'name', 'changes': {pole: {'old', 'new'}}}
+                'unchanged': int,   # Počet shodných látek
+                'conflicts': list,  # Přeskočené řádky s důvodem
+            }
+        """
+        columns = [Substance.id] + [getattr(Substance, field) for field in fields
+                                    if field not in ("name", "cas_number")]
+        columns += [Substance.name, Substance.cas_number]
+        catalogue = db.session.execute(db.select(*columns)).mappings().all()
+
+        by_name = {}
+        by_cas = {}
+        ambiguous_cas = set()
+        for existing in catalogue:
+            by_name[existing["name"]] = existing
+            cas = existing["cas_number"]
+            if cas:
+                if cas in by_cas:
+                    ambiguous_cas.add(cas)
+                by_cas[cas] = existing
+
+        result = {"fields": fields, "inserts": [], "updates": [], "unchanged": 0, "conflicts": []}
+        seen = set()
+        total = len(rows)
+
+        for index, row in enumerate(rows, start=1):
+            if progress and index % PLAN_BATCH_SIZE == 0:
+                progress(index, total)
+
+            name = (row.get("name") or "").strip()
+            cas = (row.get("cas_number") or "").strip() or None
+
+            if cas in ambiguous_cas:
+                result["conflicts"].append(f"'{name}': CAS {cas} má v katalogu více látek")
+                continue
+            hit_cas = by_cas.get(cas) if cas else None
+            hit_name = by_name.get(name)
+            if hit_cas is not None and hit_name is not None and hit_cas["id"] != hit_name["id"]:
+                result["conflicts"].append(
+                    f"'{name}': CAS {cas} patří látce '{hit_cas['name']}', název jiné látce"
+                )
+                continue
+
+            target = hit_cas if hit_cas is not None else hit_name
+            key = ("id", target["id"]) if target is not None else ("name", name)
+            if key in seen or (target is None and cas and ("cas", cas) in seen):
+                result["conflicts"].append(f"'{name}': látka je v souboru vícekrát")
+                continue
+            seen.add(key)
+            if cas:
+                seen.add(("cas", cas))
+
+            if target is None:
+                result["inserts"].append(row)
+                continue
+
+            changes = diff_row(target, row, fields)
+            if changes:
+                result["updates"].append({"id": target["id"], "name": target["name"], "changes": changes})
+            else:
+                result["unchanged"] += 1
+
+        return result
+
+    @staticmethod
+    def apply(plan: Dict[str, Any], user_id: Optional[int] = None,
+              progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+        """
+        Aplikuje plán: změněné látky hromadným UPDATE, nové vložením.
+
+        Před zápisem se ověří, že se látky od sestavení plánu nezměnily (stará
+        hodnota každého měněného pole musí stále platit) a že mezitím nevznikla
+        látka se stejným názvem nebo CAS jako nová, jinak se řádek přeskočí
+        jako konflikt. Hromadný UPDATE obchází ORM eventy, proto se
+        záznamy do audit logu zapisují zde (kompaktní diff jako v AuditService,
+        jedním vícenásobným INSERT na dávku i s bloky).
+
+        Returns:
+            {'inserted', 'updated', 'conflicts', 'substance_ids'} - substance_ids
+            jsou látky se změnou relevantní pro klasifikaci směsí
+        """
+        updates = plan.get("updates", [])
+        inserts = plan.get("inserts", [])
+        total = len(updates) + len(inserts)
+        result = {"inserted": 0, "updated": 0, "conflicts": [], "substance_ids": []}
+
+        for start in range(0, len(updates), PLAN_BATCH_SIZE):
+            batch = updates[start:start + PLAN_BATCH_SIZE]
+            fields = sorted({field for item in batch for field in item["changes"]})
+            current = {
+                existing["id"]: existing
+                for existing in db.session.execute(
+                    db.select(Substance.id, *[getattr(Substance, f) for f in fields])
+                    .where(Substance.id.in_([item["id"] for item in batch]))
+                ).mappings()
+            }
+
+            params, audit_rows, blobs = [], [], {}
+            now = datetime.utcnow()
+            for item in batch:
+                existing = current.get(item["id"])
+                if existing is None:
+                    result["conflicts"].append(f"'{item['name']}': látka mezitím smazána")
+                    continue
+                if any(not _equal(_normalize(f, existing[f]), change["old"])
+                       for f, change in item["changes"].items()):
+                    result["conflicts"].append(f"'{item['name']}': látka byla mezitím upravena")
+                    continue
+
+                params.append({"id": item["id"], **{f: c["new"] for f, c in item["changes"].items()}})
+                audit_rows.append({
+                    "user_id": user_id,
+                    "entity_type": "substance",
+                    "entity_id": item["id"],
+                    "action": "UPDATE",
+                    "changes": {
+                        f: derived_change(f, c["old"], c["new"], blobs) if f in DERIVED_FIELDS else {
+                            "old": compact_value(c["old"], blobs),
+                            "new": compact_value(c["new"], blobs),
+                        }
+                        for f, c in item["changes"].items()
+                    },
+                    "timestamp": now,
+                })
+                if set(item["changes"]) - CLASSIFICATION_NEUTRAL_FIELDS:
+                    result["substance_ids"].append(item["id"])
+
+            if params:
+                db.session.execute(db.update(Substance), params)
+                persist_entries(db.session.connection(), audit_rows, blobs)
+                result["updated"] += len(params)
+            db.session.commit()
+            if progress:
+                progress(start + len(batch), total)
+
+        for start in range(0, len(inserts), PLAN_BATCH_SIZE):
+            batch = inserts[start:start + PLAN_BATCH_SIZE]
+            names = [row["name"] for row in batch]
+            cas_numbers = [row["cas_number"] for row in batch if row.get("cas_number")]
+            clashes = db.session.execute(
+                db.select(Substance.name, Substance.cas_number)
+                .where(db.or_(Substance.name.in_(names), Substance.cas_number.in_(cas_numbers)))
+            ).all()
+            taken_names = {name for name, _ in clashes}
+            taken_cas = {cas for _, cas in clashes if cas}
+
+            fresh = []
+            for row in batch:
+                if row["name"] in taken_names:
+                    result["conflicts"].append(f"'{row['name']}': látka s tímto názvem mezitím vytvořena")
+                elif row.get("cas_number") in taken_cas:
+                    result["conflicts"].append(
+                        f"'{row['name']}': látka s CAS {row['cas_number']} mezitím vytvořena"
+                    )
+                else:
+                    fresh.append(row)
+            db.session.add_all([Substance(**row) for row in fresh])
+            db.session.commit()
+            result["inserted"] += len(fresh)
+            if progress:
+                progress(len(updates) + start + len(batch), total)
+
+        return result
@@ -1,24 +1,33 @@
 # app/services/import_service.py
 """
-Import service pro hromadné importování látek z CSV.
+Import service pro hromadné importování látek z CSV a dat ze zálohy JSON.
 """
 
-from typing import Dict, List, Any
+import io
+import json
+from typing import Any, Callable, Dict, List, Optional
 from app.extensions import db
-from app.models import Substance
+from app.models import Substance, Mixture, MixtureComponent
 from app.services.csv_parser import parse_substances_csv
 from app.services.validation import check_duplicate_cas
 from app.constants.clp import HEALTH_H_PHRASES, ENV_H_PHRASES
 from sqlalchemy.exc import IntegrityError
 
 
-def import_substances_from_csv(file, user_id=None) -> Dict[str, Any]:
+# Po kolika záznamech se hlásí progres (a v režimu úlohy ukládá dávka)
+IMPORT_BATCH_SIZE = 500
+
+
+def import_substances_from_csv(file, user_id=None,
+                               progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
     """
     Importuje látky z CSV souboru.
     
     Args:
-        file: Stream souboru (z objektu request.files)
+        file: Binární stream souboru (request.files nebo soubor ve spool adresáři)
         user_id: ID uživatele (pro účely auditního logu)
+        progress: Volitelný callback(hotovo, celkem); úloha na pozadí v něm
+            commituje session, takže se import ukládá po dávkách
         
     Returns:
         {
@@ -57,7 +66,9 @@ def import_substances_from_csv(file, user_id=None) -> Dict[str, Any]:
             return result
         
         # Import látek
-        for substance_data in parsed_substances:
+        for index, substance_data in enumerate(parsed_substances, start=1):
+            if progress and index % IMPORT_BATCH_SIZE == 0:
+                progress(index, result['total'])
             try:
                 # Kontrola duplicitního CAS
                 cas = substance_data.get('cas_number')
@@ -93,3 +104,68 @@ def import_substances_from_csv(file, user_id=None) -> Dict[str, Any]:
         result['errors'].append(f"Neočekávaná chyba: {str(e)}")
     
     return result
+
+
+def import_data_from_json(file, progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, int]:
+    """
+    Importuje látky a směsi ze zálohy ve formátu JSON (viz export_data).
+
+    Existující položky (podle názvu) se přeskakují. Nové směsi se po vložení
+    komponent rovnou klasifikují.
+
+    Args:
+        file: Binární stream (request.files nebo otevřený spool soubor uploadu)
+        progress: Volitelný callback(hotovo, celkem) volaný po dávkách
+
+    Returns:
+        {'substances': int, 'mixtures': int} - počty importovaných položek
+
+    Raises:
+        Exception: Při chybě se transakce odvolá a výjimka se propaguje volajícímu.
+    """
+    from app.services.clp import run_clp_classification
+
+    try:
+        data = json.load(io.TextIOWrapper(file, encoding="utf-8"))
+        sub_count = 0
+        mix_count = 0
+        total = len(data.get("substances", [])) + len(data.get("mixtures", []))
+        done = 0
+
+        for s_data in data.get("substances", []):
+            done += 1
+            if progress and done % IMPORT_BATCH_SIZE == 0:
+                progress(done, total)
+            if not Substance.query.filter_by(name=s_data["name"]).first():
+                db.session.add(Substance(**s_data))
+                sub_count += 1
+        db.session.commit()
+
+        for m_data in data.get("mixtures", []):
+            done += 1
+            if progress and done % IMPORT_BATCH_SIZE == 0:
+                progress(done, total)
+            if not Mixture.query.filter_by(name=m_data["name"]).first():
+                new_mix = Mixture(name=m_data["name"])
+                db.session.add(new_mix)
+                db.session.flush()
+                for c_data in m_data.get("components", []):
+                    sub = Substance.query.filter_by(
+                        name=c_data["substance_name"]
+                    ).first()
+                    if sub:
+                        db.session.add(
+                            MixtureComponent(
+                                mixture_id=new_mix.id,
+                                substance_id=sub.id,
+                                concentration=c_data["concentration"],
+                            )
+                        )
+                run_clp_classification(new_mix)
+                mix_count += 1
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return {"substances": sub_count, "mixtures": mix_count}
@@ -0,0 +1,284 @@
+"""
+Handlery úloh na pozadí.
+
+Každý handler dostane JobContext (parametry, hlášení progresu) a vrací
+JSON-serializovatelný výsledek, který se uloží do job.result.
+Soubory vzniklé exportem se ukládají do JOBS_RESULT_DIR a stahují přes
+/jobs/<id>/download.
+"""
+
+import json
+import os
+from datetime import datetime
+from flask import current_app
+from app.extensions import db
+from app.models import Mixture
+from app.services.job_service import job_handler, JobContext
+from app.services.upload_service import UploadService
+
+# Po kolika směsích se při reklasifikaci commituje a hlásí progres
+RECLASSIFY_BATCH_SIZE = 50
+
+
+def _result_path(ctx: JobContext, filename: str) -> str:
+    result_dir = current_app.config["JOBS_RESULT_DIR"]
+    os.makedirs(result_dir, exist_ok=True)
+    return os.path.join(result_dir, f"job_{ctx.job_id}_{filename}")
+
+
+@job_handler("import_json")
+def import_json(ctx: JobContext):
+    """Import zálohy JSON z dokončeného uploadu."""
+    from app.services.import_service import import_data_from_json
+
+    uploads = UploadService.from_app(current_app)
+    upload_id = ctx.params["upload_id"]
+    try:
+        with open(uploads.completed_path(upload_id), "rb") as f:
+            counts = import_data_from_json(f, progress=ctx.progress)
+    finally:
+        uploads.discard(upload_id)
+    return counts
+
+
+@job_handler("import_substances_csv")
+def import_substances_csv(ctx: JobContext):
+    """Import látek z CSV z dokončeného uploadu."""
+    from app.services.import_service import import_substances_from_csv
+
+    uploads = UploadService.from_app(current_app)
+    upload_id = ctx.params["upload_id"]
+    try:
+        with open(uploads.completed_path(upload_id), "rb") as f:
+            result = import_substances_from_csv(f, ctx.job.user_id, progress=ctx.progress)
+    finally:
+        uploads.discard(upload_id)
+    return result
+
+
+@job_handler("export_json")
+def export_json(ctx: JobContext):
+    """Export kompletní zálohy do JSON souboru."""
+    from app.services.export_service import write_data_json
+
+    filename = f'clp_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json'
+    path = _result_path(ctx, filename)
+    with open(path, "w", encoding="utf-8") as f:
+        counts = write_data_json(f, progress=ctx.progress)
+    return {"file": path, "filename": filename, "mimetype": "application/json", **counts}
+
+
+@job_handler("export_substances_csv")
+def export_substances_csv(ctx: JobContext):
+    """Export látek do CSV souboru."""
+    from app.services.export_service import write_substances_csv
+
+    filename = f"substances_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    path = _result_path(ctx, filename)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        count = write_substances_csv(f, progress=ctx.progress)
+    return {"file": path, "filename": filename, "mimetype": "text/csv", "substances": count}
+
+
+@job_handler("reclassify_mixtures")
+def reclassify_mixtures(ctx: JobContext):
+    """
+    Hromadná reklasifikace směsí.
+
+    Parametr `mixture_ids` omezí reklasifikaci na vybrané směsi, bez něj se
+    přepočítá celý katalog.
+    """
+    from app.services.clp import run_clp_classification
+
+    mixture_ids = ctx.params.get("mixture_ids")
+    query = db.select(Mixture.id).order_by(Mixture.id)
+    if mixture_ids is not None:
+        query = query.where(Mixture.id.in_(mixture_ids))
+    ids = db.session.execute(query).scalars().all()
+
+    total = len(ids)
+    for index, mixture_id in enumerate(ids, start=1):
+        mixture = db.session.get(Mixture, mixture_id)
+        if mixture is not None:
+            run_clp_classification(mixture)
+        if index % RECLASSIFY_BATCH_SIZE == 0:
+            ctx.progress(index, total, f"Reklasifikováno {index} z {total} směsí")
+    db.session.commit()
+    return {"mixtures": total}
+
+
+@job_handler("import_plan")
+def import_plan(ctx: JobContext):
+    """
+    Dry-run importu: porovná soubor s katalogem a uloží plán (nic nezapisuje).
+
+    Plán se ukládá do souboru v JOBS_RESULT_DIR, v job.result je jen souhrn.
+    """
+    from app.services.import_planner import ImportPlanner
+
+    uploads = UploadService.from_app(current_app)
+    upload_id = ctx.params["upload_id"]
+    try:
+        filename = uploads.status(upload_id)["filename"]
+        with open(uploads.completed_path(upload_id), "rb") as f:
+            if filename.lower().endswith(".json"):
+                rows, fields, errors, warnings = ImportPlanner.rows_from_json(f)
+            else:
+                rows, fields, errors, warnings = ImportPlanner.rows_from_csv(f)
+    finally:
+        uploads.discard(upload_id)
+
+    plan = ImportPlanner.plan(rows, fields, progress=ctx.progress)
+    plan["errors"] = errors
+    plan["warnings"] = warnings
+    plan["source"] = filename
+
+    path = _result_path(ctx, "plan.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(plan, f, ensure_ascii=False)
+
+    return {
+        "plan_file": path,
+        "inserts": len(plan["inserts"]),
+        "updates": len(plan["updates"]),
+        "unchanged": plan["unchanged"],
+        "conflicts": len(plan["conflicts"]),
+        "errors": errors,
+    }
+
+
+@job_handler("import_apply")
+def import_apply(ctx: JobContext):
+    """
+    Aplikuje plán z úlohy import_plan a reklasifikuje jen dotčené směsi.
+
+    Reklasifikace běží jako navazující úloha reclassify_mixtures. Aplikovat
+    lze jen dokončený plán téhož uživatele.
+    """
+    from app.models import Job, JobStatus
+    from app.services.import_planner import ImportPlanner
+    from app.services.job_service import JobService
+    from app.services.mixture_service import MixtureService
+
+    plan_job_id = ctx.params.get("plan_job_id")
+    plan_job = db.session.get(Job, plan_job_id) if plan_job_id is not None else None
+    if plan_job is None or plan_job.kind != "import_plan":
+        raise ValueError(f"Plán importu {plan_job_id} neexistuje.")
+    if plan_job.user_id != ctx.job.user_id:
+        raise ValueError(f"Plán importu {plan_job_id} patří jinému uživateli.")
+    plan_file = (plan_job.result or {}).get("plan_file")
+    if plan_job.status != JobStatus.SUCCEEDED or not plan_file:
+        raise ValueError(f"Plán importu {plan_job_id} není dokončený.")
+    with open(plan_file, encoding="utf-8") as f:
+        plan = json.load(f)
+
+    result = ImportPlanner.apply(plan, user_id=ctx.job.user_id, progress=ctx.progress)
+    mixture_ids = sorted(MixtureService.find_affected_mixtures(result.pop("substance_ids")))
+    result["affected_mixtures"] = len(mixture_ids)
+
+    if mixture_ids:
+        followup = JobService.submit(
+            "reclassify_mixtures", {"mixture_ids": mixture_ids}, user_id=ctx.job.user_id
+        )
+        result["reclassify_job_id"] = followup.id
+    return result
+
+
+@job_handler("echa_prewarm")
+def echa_prewarm(ctx: JobContext):
+    """
+    Předehřeje ECHA cache pro zadané CAS/EC čísla.
+
+    Bez parametru `queries` se použijí CAS čísla všech látek v katalogu.
+    """
+    from app.models import Substance
+    from app.services.echa_service import ECHAService
+
+    queries = ctx.params.get("queries")
+    if not queries:
+        queries = db.session.execute(
+            db.select(Substance.cas_number)
+            .where(Substance.cas_number.isnot(None))
+            .distinct()
+            .order_by(Substance.cas_number)
+        ).scalars().all()
+
+    service = ECHAService.from_app(current_app)
+    total = len(queries)
+    found = 0
+    for index, query in enumerate(queries, start=1):
+        if "error" not in service.fetch_data(query, local=False):
+            found += 1
+        ctx.progress(index, total, f"Načteno {index} z {total}")
+    return {"queries": total, "found": found}
+
+
+@job_handler("echa_enrich")
+def echa_enrich(ctx: JobContext):
+    """
+    Hromadné obohacení látek daty z ECHA.
+
+    Parametry:
+        substance_ids: Volitelné omezení na vybrané látky
+        resume_job_id: Navázání na checkpoint dřívější (spadlé/zrušené) úlohy
+    """
+    from app.models import Job
+    from app.services.echa_enrichment import EchaEnrichment, TokenBucket
+    from app.services.echa_service import ECHAService
+    from app.services.job_service import JobService
+    from app.services.mixture_service import MixtureService
+
+    config = current_app.config
+    state = EchaEnrichment.initial_state()
+    resume_job_id = ctx.params.get("resume_job_id")
+    if resume_job_id:
+        previous = db.session.get(Job, resume_job_id)
+        if previous is not None and previous.result and "checkpoint" in previous.result:
+            state.update(previous.result["checkpoint"])
+
+    # Obnova dat - bez EchaCache (čerstvé i stale odpovědi by změny skryly)
+    service = ECHAService.from_app(current_app, use_cache=False)
+    service.rate_limiter = TokenBucket(config["ECHA_ENRICH_RATE"], config["ECHA_ENRICH_BURST"])
+    enrichment = EchaEnrichment(
+        service,
+        concurrency=config["ECHA_ENRICH_CONCURRENCY"],
+        max_retries=config["ECHA_ENRICH_MAX_RETRIES"],
+        backoff=config["ECHA_ENRICH_BACKOFF"],
+        user_id=ctx.job.user_id,
+    )
+
+    ids = enrichment.pending_ids(state["last_id"], ctx.params.get("substance_ids"))
+    total = state["processed"] + len(ids)
+
+    def _on_batch(current_state):
+        ctx.checkpoint({"checkpoint": current_state})
+        ctx.progress(
+            current_state["processed"], total,
+            f"Zpracováno {current_state['processed']} z {total} látek, změněno {current_state['updated']}",
+        )
+
+    enrichment.run(ids, state, on_batch=_on_batch)
+
+    mixture_ids = sorted(MixtureService.find_affected_mixtures(state["changed_ids"]))
+    result = {
+        key: state[key]
+        for key in ("processed", "updated", "unchanged", "not_found", "failed", "conflicts", "errors")
+    }
+    result["affected_mixtures"] = len(mixture_ids)
+    if mixture_ids:
+        followup = JobService.submit(
+            "reclassify_mixtures", {"mixture_ids": mixture_ids}, user_id=ctx.job.user_id
+        )
+        result["reclassify_job_id"] = followup.id
+    return result
+
+
+@job_handler("audit_archive")
+def audit_archive(ctx: JobContext):
+    """Archivace audit logu starší než AUDIT_RETENTION_DAYS (viz audit_archive.py)."""
+    from app.services.audit_archive import archive_expired
+
+    return archive_expired(
+        current_app,
+        progress=lambda done, total: ctx.progress(done, total, f"Archivováno {done} záznamů"),
+    )
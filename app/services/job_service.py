@@ -0,0 +1,318 @@
+"""
+Služba pro úlohy na pozadí.
+
+Úlohy (importy, exporty, hromadná reklasifikace) se zakládají do tabulky `job`
+a zpracovává je pool worker procesů spuštěný příkazem `flask jobs worker`.
+Nepotřebuje žádný externí broker - fronta je databáze, takže funguje i na
+jednouzlových instalacích. V režimu JOBS_EAGER (testy, development bez workeru)
+se úloha provede ihned v rámci požadavku.
+
+Handler úlohy je obyčejná funkce registrovaná dekorátorem @job_handler, která
+dostane JobContext a vrací JSON-serializovatelný výsledek.
+"""
+
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+from flask import current_app
+from app.extensions import db
+from app.models.job import Job, JobStatus
+from app.monitoring.exporter import MetricsStore, record_job
+from app.monitoring.memory import measure_block
+
+logger = logging.getLogger(__name__)
+
+# Registr handlerů: kind -> funkce(ctx) -> result
+JOB_HANDLERS: Dict[str, Callable[["JobContext"], Any]] = {}
+
+
+def job_handler(kind: str):
+    """Dekorátor registrující handler pro daný typ úlohy."""
+    def decorator(func):
+        JOB_HANDLERS[kind] = func
+        return func
+    return decorator
+
+
+class JobCancelled(BaseException):
+    """
+    Vyhozeno z JobContext.progress(), pokud uživatel úlohu zrušil.
+
+    Dědí z BaseException (stejně jako asyncio.CancelledError), aby ho nezachytily
+    obecné `except Exception` bloky v importních službách.
+    """
+
+
+class JobContext:
+    """
+    Kontext předávaný handleru - parametry úlohy, hlášení progresu a zrušení.
+    """
+
+    def __init__(self, job: Job):
+        self.job = job
+        self.params = dict(job.params or {})
+
+    @property
+    def job_id(self) -> int:
+        return self.job.id
+
+    def progress(self, current: int, total: Optional[int] = None, message: Optional[str] = None) -> None:
+        """
+        Zapíše progres úlohy a zkontroluje požadavek na zrušení.
+
+        Volá se na hranicích dávek - metoda commitne session, takže vše, co handler
+        do té doby zapsal, se uloží spolu s progresem.
+
+        Raises:
+            JobCancelled: Pokud byl mezitím vyžádán cancel.
+        """
+        self.job.progress_current = current
+        if total is not None:
+            self.job.progress_total = total
+        if message is not None:
+            self.job.message = message[:255]
+        self.job.heartbeat_at = datetime.utcnow()
+        db.session.commit()
+
+        if self.is_cancel_requested():
+            raise JobCancelled()
+
+    def checkpoint(self, data: Dict[str, Any]) -> None:
+        """Uloží mezivýsledek do job.result (např. pro navázání po pádu)."""
+        result = dict(self.job.result or {})
+        result.update(data)
+        self.job.result = result
+        db.session.commit()
+
+    def is_cancel_requested(self) -> bool:
+        # Čteme přímo z DB - příznak nastavuje jiný proces
+        flag = db.session.execute(
+            db.select(Job.cancel_requested).where(Job.id == self.job.id)
+        ).scalar()
+        return bool(flag)
+
+
+class JobService:
+    """Zakládání, spouštění a správa úloh."""
+
+    @staticmethod
+    def submit(kind: str, params: Optional[Dict[str, Any]] = None, user_id: Optional[int] = None) -> Job:
+        """
+        Založí úlohu ve frontě (a v režimu JOBS_EAGER ji rovnou provede).
+        """
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Neznámý typ úlohy: '{kind}'")
+
+        job = Job(kind=kind, params=params or {}, user_id=user_id, status=JobStatus.QUEUED)
+        db.session.add(job)
+        db.session.commit()
+        logger.info(f"Úloha {job.id} ({kind}) založena")
+
+        if current_app.config.get("JOBS_EAGER"):
+            JobService.run(job.id, worker_id="eager")
+            db.session.refresh(job)
+        return job
+
+    @staticmethod
+    def get(job_id: int) -> Optional[Job]:
+        return db.session.get(Job, job_id)
+
+    @staticmethod
+    def request_cancel(job_id: int) -> Optional[Job]:
+        """Požádá o zrušení. Úloha ve frontě se zruší hned, běžící při dalším progresu."""
+        job = db.session.get(Job, job_id)
+        if job is None or job.is_finished:
+            return job
+        if job.status == JobStatus.QUEUED:
+            job.status = JobStatus.CANCELLED
+            job.finished_at = datetime.utcnow()
+        job.cancel_requested = True
+        db.session.commit()
+        return job
+
+    @staticmethod
+    def claim_next(worker_id: str) -> Optional[int]:
+        """
+        Atomicky si nárokuje nejstarší úlohu ve frontě.
+
+        Podmíněný UPDATE (WHERE status = 'queued') zaručí, že stejnou úlohu
+        nezíská dva workery současně.
+        """
+        job_id = db.session.execute(
+            db.select(Job.id)
+            .where(Job.status == JobStatus.QUEUED)
+            .order_by(Job.id)
+            .limit(1)
+        ).scalar()
+        if job_id is None:
+            db.session.rollback()
+            return None
+
+        now = datetime.utcnow()
+        claimed = db.session.execute(
+            db.update(Job)
+            .where(Job.id == job_id, Job.status == JobStatus.QUEUED)
+            .values(status=JobStatus.RUNNING, worker_id=worker_id, started_at=now, heartbeat_at=now)
+        ).rowcount
+        db.session.commit()
+        return job_id if claimed == 1 else None
+
+    @staticmethod
+    def run(job_id: int, worker_id: str) -> None:
+        """Provede nárokovanou (nebo eager) úlohu a zapíše výsledek."""
+        job = db.session.get(Job, job_id)
+        if job is None:
+            return
+        if job.status == JobStatus.QUEUED:
+            job.status = JobStatus.RUNNING
+            job.worker_id = worker_id
+            job.started_at = datetime.utcnow()
+            db.session.commit()
+
+        handler = JOB_HANDLERS.get(job.kind)
+        try:
+            if handler is None:
+                raise ValueError(f"Neznámý typ úlohy: '{job.kind}'")
+            if current_app.config.get("JOBS_MEMORY_DIAGNOSTICS"):
+                # Nárůst paměti během úlohy (hledání úniků u importů/exportů)
+                with measure_block() as memory:
+                    result = handler(JobContext(job))
+                result = dict(result or {}, memory=memory)
+            else:
+                result = handler(JobContext(job))
+            if result is not None:
+                merged = dict(job.result or {})
+                merged.update(result)
+                job.result = merged
+            job.status = JobStatus.SUCCEEDED
+            if job.progress_total:
+                job.progress_current = job.progress_total
+        except JobCancelled:
+            db.session.rollback()
+            job.status = JobStatus.CANCELLED
+            job.message = "Zrušeno uživatelem"
+        except Exception as e:
+            db.session.rollback()
+            logger.exception(f"Úloha {job_id} ({job.kind}) selhala")
+            job.status = JobStatus.FAILED
+            job.error = str(e)
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+        logger.info(f"Úloha {job_id} ({job.kind}) skončila: {job.status}")
+
+        duration = (job.finished_at - job.started_at).total_seconds() if job.started_at else None
+        record_job(job.kind, job.status, duration)
+        MetricsStore.from_app(current_app).flush(force=True)
+
+    @staticmethod
+    def fail_stale(stale_seconds: int) -> int:
+        """
+        Označí jako selhané běžící úlohy, jejichž worker přestal hlásit progres
+        (pád procesu, restart serveru).
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=stale_seconds)
+        count = db.session.execute(
+            db.update(Job)
+            .where(Job.status == JobStatus.RUNNING, Job.heartbeat_at < cutoff)
+            .values(
+                status=JobStatus.FAILED,
+                error="Worker přestal odpovídat (pád nebo restart procesu).",
+                finished_at=datetime.utcnow(),
+            )
+        ).rowcount
+        db.session.commit()
+        return count
+
+
+# === Worker pool ===
+
+def _worker_main(config_name: Optional[str], worker_index: int, poll_interval: float) -> None:
+    """Hlavní smyčka jednoho worker procesu."""
+    from app import create_app
+
+    app = create_app(config_name)
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{worker_index}"
+    stopping = {"flag": False}
+
+    def _stop(signum, frame):
+        stopping["flag"] = True
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+
+    with app.app_context():
+        app.logger.info(f"Job worker {worker_id} spuštěn")
+        while not stopping["flag"]:
+            try:
+                job_id = JobService.claim_next(worker_id)
+            except Exception:
+                db.session.rollback()
+                app.logger.exception("Chyba při nárokování úlohy")
+                job_id = None
+
+            if job_id is None:
+                time.sleep(poll_interval)
+                continue
+
+            JobService.run(job_id, worker_id)
+            db.session.remove()
+        app.logger.info(f"Job worker {worker_id} ukončen")
+
+
+def run_worker_pool(config_name: Optional[str], processes: int, poll_interval: float,
+                    stale_seconds: int) -> None:
+    """
+    Spustí pool worker procesů a dohlíží na ně (spadlý worker se nahradí novým).
+
+    Procesy se vytváří metodou 'spawn', aby každý měl vlastní DB engine a
+    nedědil otevřená spojení rodiče.
+    """
+    from app import create_app
+
+    ctx = multiprocessing.get_context("spawn")
+    app = create_app(config_name)
+    with app.app_context():
+        stale = JobService.fail_stale(stale_seconds)
+        if stale:
+            app.logger.warning(f"{stale} nedokončených úloh označeno jako selhané")
+
+    workers = {}
+
+    def _spawn(index):
+        proc = ctx.Process(target=_worker_main, args=(config_name, index, poll_interval), daemon=False)
+        proc.start()
+        workers[index] = proc
+
+    for i in range(processes):
+        _spawn(i)
+
+    stopping = {"flag": False}
+
+    def _stop(signum, frame):
+        stopping["flag"] = True
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+
+    last_stale_check = time.monotonic()
+    while not stopping["flag"]:
+        time.sleep(1)
+        for index, proc in list(workers.items()):
+            if not proc.is_alive() and not stopping["flag"]:
+                app.logger.warning(f"Job worker {index} skončil (kód {proc.exitcode}), spouštím nový")
+                _spawn(index)
+        if time.monotonic() - last_stale_check > stale_seconds:
+            with app.app_context():
+                JobService.fail_stale(stale_seconds)
+            last_stale_check = time.monotonic()
+
+    for proc in workers.values():
+        proc.terminate()
+    for proc in workers.values():
+        proc.join(timeout=30)
@@ -0,0 +1,336 @@
+"""
+In-process cache s invalidací napříč procesy (workery gunicornu, job workery).
+
+Každý proces má vlastní paměť - cache naplněná v jednom workeru o zápisu
+v jiném neví. Protokol:
+
+1. Tabulka cache_generation má řádek na druh entity (KIND_TABLES). Každá
+   transakce, která mění tabulky daného druhu (flush ORM i hromadné
+   db.session.execute(insert/update/delete)), zvýší jeho generaci ve stejné
+   transakci - rollback tedy nic nezvýší. Generace se zvyšuje jednou za
+   transakci a druh.
+2. LocalCache je pojmenovaný segment závislý na druzích entit. Před čtením
+   se registr procesu nejvýš jednou za požadavek (a nejvýš jednou za
+   CACHE_GENERATION_CHECK_MS) podívá na generace; změněný druh vyprázdní
+   segmenty, které na něm závisí.
+3. Proces, který zapsal, své segmenty vyprázdní hned po commitu.
+4. S REDIS_URL se po commitu pošle zpráva přes pub/sub a ostatní procesy
+   cache vyprázdní okamžitě. Kontrola v DB zůstává jako pojistka (zprávy
+   pub/sub se mohou ztratit), jen s intervalem CACHE_GENERATION_REDIS_CHECK_MS.
+
+Použití:
+    SUBSTANCES = LocalCache("substance_choices", depends_on=("substance",))
+    data = SUBSTANCES.get_or_load("all", lambda: [...])
+
+Hodnoty v cache jsou sdílené mezi požadavky - nesmí se měnit na místě.
+"""
+
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from itertools import chain
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from flask import current_app, has_app_context, has_request_context, request
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models.cache_generation import CacheGeneration
+
+logger = logging.getLogger(__name__)
+
+# Druh entity -> tabulky, jejichž změna ho invaliduje
+KIND_TABLES = {
+    "substance": ("substance",),
+    "mixture": ("mixture", "mixture_component"),
+    "annex_vi": ("annex_vi_entry", "annex_vi_synonym"),
+}
+TABLE_KINDS = {table: kind for kind, tables in KIND_TABLES.items() for table in tables}
+
+REDIS_CHANNEL = "clp:cache-invalidate"
+REDIS_RETRY_SECONDS = 5
+
+_REGISTRY_KEY = "local_cache"
+_BUMPED_KEY = "cache_generation_bumped"  # session.info: {druh: generace} zvýšené v transakci
+_REQUEST_FLAG = "clp.cache_generation_checked"  # v request.environ - g patří kontextu aplikace, ten může sdílet víc požadavků
+
+_caches: Dict[str, "LocalCache"] = {}
+_listeners_registered = False
+
+
+def _origin() -> str:
+    # Po forku má každý worker vlastní pid - zprávy vlastního procesu se přeskočí
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class LocalCache:
+    """Pojmenovaný segment in-process cache závislý na druzích entit."""
+
+    def __init__(self, name: str, depends_on: Iterable[str], max_entries: int = 256):
+        unknown = set(depends_on) - set(KIND_TABLES)
+        if unknown:
+            raise ValueError(f"Neznámé druhy entit: {', '.join(sorted(unknown))}")
+        if name in _caches:
+            raise ValueError(f"Cache {name} už existuje")
+        self.name = name
+        self.depends_on = frozenset(depends_on)
+        self.max_entries = max_entries
+        _caches[name] = self
+
+    def get_or_load(self, key: Any, loader: Callable[[], Any]) -> Any:
+        """Hodnota z cache, nebo z loader() (bez aplikace se necachuje)."""
+        registry = get_registry()
+        if registry is None:
+            return loader()
+        registry.maybe_check()
+        return registry.get_or_load(self, key, loader)
+
+    def clear(self) -> None:
+        registry = get_registry()
+        if registry is not None:
+            registry.clear(self.name)
+
+
+class CacheRegistry:
+    """Segmenty LocalCache jednoho procesu a známé generace druhů entit."""
+
+    def __init__(self, check_interval_ms: int = 0, redis_check_interval_ms: int = 5000,
+                 redis_url: Optional[str] = None):
+        from app.monitoring.metrics import REGISTRY
+
+        self.check_interval_ms = check_interval_ms
+        self.redis_check_interval_ms = redis_check_interval_ms
+        self.redis_url = redis_url
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+        self._segments: Dict[str, "OrderedDict[Any, Any]"] = {}
+        self._generations: Dict[str, int] = {}
+        self._epoch = 0
+        self._last_check = float("-inf")
+        self._lock = threading.Lock()
+        self._redis = None
+        self._redis_pid: Optional[int] = None
+        self._redis_connected = False
+        self._invalidations = REGISTRY.counter(
+            "clp_local_cache_invalidations_total", "Vyprázdnění segmentů lokální cache.", labels=("cache", "source")
+        )
+
+    # === Čtení ===
+
+    def get_or_load(self, cache: LocalCache, key: Any, loader: Callable[[], Any]) -> Any:
+        with self._lock:
+            segment = self._segments.get(cache.name)
+            if segment is not None and key in segment:
+                segment.move_to_end(key)
+                self.stats["hits"] += 1
+                return segment[key]
+            self.stats["misses"] += 1
+            epoch = self._epoch
+
+        value = loader()
+        with self._lock:
+            # Invalidace během načítání - hodnota může být zastaralá, neukládá se
+            if self._epoch == epoch:
+                segment = self._segments.setdefault(cache.name, OrderedDict())
+                segment[key] = value
+                while len(segment) > cache.max_entries:
+                    segment.popitem(last=False)
+        return value
+
+    def clear(self, name: Optional[str] = None) -> None:
+        with self._lock:
+            for segment_name, segment in self._segments.items():
+                if name is None or segment_name == name:
+                    segment.clear()
+            self._epoch += 1
+
+    # === Kontrola generací ===
+
+    def maybe_check(self) -> None:
+        """Kontrola generací nejvýš jednou za požadavek a interval."""
+        if has_request_context():
+            if request.environ.get(_REQUEST_FLAG):
+                return
+            request.environ[_REQUEST_FLAG] = True
+        self._ensure_subscriber()
+        interval = self.redis_check_interval_ms if self._redis_connected else self.check_interval_ms
+        now = time.monotonic()
+        if (now - self._last_check) * 1000 < interval:
+            return
+        self._last_check = now
+        self.check()
+
+    def check(self) -> None:
+        # Přímo přes spojení session - čte vždy primár (ne repliku) a v rámci transakce požadavku
+        table = CacheGeneration.__table__
+        rows = db.session.connection().execute(select(table.c.kind, table.c.generation)).all()
+        self.apply(dict(rows), "db")
+
+    def apply(self, generations: Dict[str, int], source: str) -> None:
+        """Vyprázdní segmenty závislé na druzích, jejichž generace se změnila."""
+        with self._lock:
+            changed = {kind for kind, generation in generations.items()
+                       if self._generations.get(kind) != generation}
+            if not changed:
+                return
+            self._generations.update(generations)
+            for name, segment in self._segments.items():
+                if segment and _caches[name].depends_on & changed:
+                    segment.clear()
+                    self.stats["invalidations"] += 1
+                    self._invalidations.inc(cache=name, source=source)
+            self._epoch += 1
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "segments": {name: len(segment) for name, segment in self._segments.items()},
+                "generations": dict(self._generations),
+                "redis": self._redis_connected,
+                **self.stats,
+            }
+
+    # === Redis pub/sub ===
+
+    def _client(self):
+        if not self.redis_url:
+            return None
+        if self._redis is None:
+            try:
+                import redis
+            except ImportError:
+                logger.warning("REDIS_URL je nastaveno, ale balíček redis chybí - invalidace jen přes DB")
+                self.redis_url = None
+                return None
+            self._redis = redis.Redis.from_url(self.redis_url)
+        return self._redis
+
+    def publish(self, generations: Dict[str, int]) -> None:
+        client = self._client()
+        if client is None:
+            return
+        try:
+            client.publish(REDIS_CHANNEL, json.dumps({"origin": _origin(), "generations": generations}))
+        except Exception:  # noqa: BLE001 - ostatní procesy to zjistí z DB
+            logger.warning("Odeslání invalidace cache přes Redis selhalo", exc_info=True)
+
+    def handle_message(self, data) -> None:
+        payload = json.loads(data)
+        if payload.get("origin") != _origin():
+            self.apply({kind: int(generation) for kind, generation in payload["generations"].items()}, "redis")
+
+    def _ensure_subscriber(self) -> None:
+        # Vlákno se startuje líně v každém procesu (po forku workeru neexistuje)
+        if not self.redis_url or self._redis_pid == os.getpid():
+            return
+        self._redis_pid = os.getpid()
+        self._redis_connected = False
+        threading.Thread(target=self._listen, name="local-cache-invalidation", daemon=True).start()
+
+    def _listen(self) -> None:
+        pid = os.getpid()
+        while self._redis_pid == pid:
+            client = self._client()
+            if client is None:
+                return
+            try:
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(REDIS_CHANNEL)
+                self._redis_connected = True
+                for message in pubsub.listen():
+                    self.handle_message(message["data"])
+            except Exception:  # noqa: BLE001 - výpadek Redis = zpět na kontrolu v DB
+                logger.warning("Odběr invalidací cache z Redis přerušen", exc_info=True)
+            finally:
+                self._redis_connected = False
+            time.sleep(REDIS_RETRY_SECONDS)
+
+
+def get_registry(app=None) -> Optional[CacheRegistry]:
+    if app is None:
+        if not has_app_context():
+            return None
+        app = current_app
+    return app.extensions.get(_REGISTRY_KEY)
+
+
+def bump_generations(connection, kinds: Iterable[str]) -> Dict[str, int]:
+    """Zvýší generace druhů v transakci `connection` a vrátí nové hodnoty."""
+    kinds = sorted(set(kinds))
+    table = CacheGeneration.__table__
+    now = datetime.utcnow()
+    statement = (
+        table.update().where(table.c.kind.in_(kinds))
+        .values(generation=table.c.generation + 1, updated_at=now)
+    )
+    if connection.dialect.update_returning:
+        generations = dict(connection.execute(statement.returning(table.c.kind, table.c.generation)).all())
+    else:
+        connection.execute(statement)
+        generations = dict(connection.execute(
+            select(table.c.kind, table.c.generation).where(table.c.kind.in_(kinds))
+        ).all())
+    missing = [kind for kind in kinds if kind not in generations]
+    if missing:
+        connection.execute(table.insert(), [{"kind": kind, "generation": 1, "updated_at": now} for kind in missing])
+        generations.update({kind: 1 for kind in missing})
+    return generations
+
+
+def _bump(session, kinds) -> None:
+    bumped = session.info.setdefault(_BUMPED_KEY, {})
+    pending = set(kinds) - set(bumped)
+    if pending:
+        bumped.update(bump_generations(session.connection(), pending))
+
+
+def register_cache_listeners() -> None:
+    # Session eventy jsou globální - při opakovaném create_app jen jednou
+    global _listeners_registered
+    if _listeners_registered:
+        return
+    _listeners_registered = True
+
+    @event.listens_for(Session, "after_flush")
+    def bump_after_flush(session, flush_context):
+        kinds = {TABLE_KINDS.get(getattr(obj, "__tablename__", None))
+                 for obj in chain(session.new, session.dirty, session.deleted)}
+        kinds.discard(None)
+        if kinds:
+            _bump(session, kinds)
+
+    @event.listens_for(Session, "do_orm_execute")
+    def bump_bulk_dml(orm_execute_state):
+        if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+            return
+        table = getattr(orm_execute_state.statement, "table", None)
+        kind = TABLE_KINDS.get(getattr(table, "name", None))
+        if kind:
+            _bump(orm_execute_state.session, {kind})
+
+    @event.listens_for(Session, "after_commit")
+    def invalidate_after_commit(session):
+        bumped = session.info.pop(_BUMPED_KEY, None)
+        registry = get_registry() if bumped else None
+        if registry is not None:
+            registry.apply(bumped, "local")
+            registry.publish(bumped)
+
+    @event.listens_for(Session, "after_rollback")
+    def discard_bumped(session):
+        session.info.pop(_BUMPED_KEY, None)
+
+
+def init_local_cache(app) -> None:
+    config = app.config
+    app.extensions[_REGISTRY_KEY] = CacheRegistry(
+        check_interval_ms=config.get("CACHE_GENERATION_CHECK_MS", 0),
+        redis_check_interval_ms=config.get("CACHE_GENERATION_REDIS_CHECK_MS", 5000),
+        redis_url=config.get("LOCAL_CACHE_REDIS_URL"),
+    )
+    register_cache_listeners()
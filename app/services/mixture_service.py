@@ -6,11 +6,30 @@ Obsahuje business logiku pro vytváření, aktualizaci a validaci směsí.
 
 from typing import List, Dict, Any, Set
 from app.extensions import db
-from app.models import ComponentType
+from app.models import ComponentType, Mixture, Substance
+from app.services.local_cache import LocalCache
+
+# Nabídky formuláře směsi - načítají se při každém otevření, mění se zřídka
+SUBSTANCE_CHOICES = LocalCache("mixture_form_substances", depends_on=("substance",))
+MIXTURE_CHOICES = LocalCache("mixture_form_mixtures", depends_on=("mixture",))
 
 
 class MixtureService:
     """Service pro správu chemických směsí."""
+
+    @staticmethod
+    def substance_choices() -> List[Dict[str, Any]]:
+        """Všechny látky pro výběr složek (sdílený seznam - neměnit)."""
+        return SUBSTANCE_CHOICES.get_or_load("all", lambda: [
+            s.to_dict() for s in Substance.query.order_by(Substance.name).all()
+        ])
+
+    @staticmethod
+    def mixture_choices() -> List[Dict[str, Any]]:
+        """Všechny směsi (id, název) pro výběr vnořených směsí (sdílený seznam - neměnit)."""
+        return MIXTURE_CHOICES.get_or_load("all", lambda: [
+            {"id": m.id, "name": m.name} for m in Mixture.query.order_by(Mixture.name).all()
+        ])
     
     @staticmethod
     def parse_and_validate_components(
@@ -249,3 +268,46 @@ class MixtureService:
         
         return result
 
+
+    @staticmethod
+    def find_affected_mixtures(substance_ids) -> Set[int]:
+        """
+        Najde směsi, jejichž klasifikaci ovlivní změna zadaných látek.
+
+        Zahrnuje směsi obsahující látky přímo i směsi, které je obsahují
+        jako vnořené komponenty (transitivně). Prochází se po úrovních,
+        jeden dotaz na úroveň vnoření.
+
+        Args:
+            substance_ids: ID změněných látek
+
+        Returns:
+            Množina ID dotčených směsí
+        """
+        from app.models import MixtureComponent
+
+        substance_ids = list(substance_ids)
+        if not substance_ids:
+            return set()
+
+        affected: Set[int] = set(
+            db.session.execute(
+                db.select(MixtureComponent.mixture_id)
+                .where(MixtureComponent.substance_id.in_(substance_ids))
+                .distinct()
+            ).scalars()
+        )
+
+        frontier = set(affected)
+        while frontier:
+            parents = set(
+                db.session.execute(
+                    db.select(MixtureComponent.mixture_id)
+                    .where(MixtureComponent.component_mixture_id.in_(frontier))
+                    .distinct()
+                ).scalars()
+            )
+            frontier = parents - affected
+            affected |= frontier
+
+        return affected
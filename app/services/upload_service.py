@@ -0,0 +1,270 @@
+"""
+Služba pro navazovatelné nahrávání velkých souborů.
+
+Soubory přicházejí po částech (chunks), které se průběžně zapisují do dočasného
+souboru ve spool adresáři. Každý chunk lze ověřit kontrolním součtem SHA-256,
+po přerušení spojení lze pokračovat od posledního uloženého offsetu a hotový
+soubor se předává importu pouze cestou - nikdy se nenačítá celý do paměti.
+
+Stav uploadu je uložen vedle dat jako JSON soubor, takže funguje napříč
+všemi workery, které sdílí stejný spool adresář.
+"""
+
+import hashlib
+import json
+import os
+import re
+import secrets
+import time
+from typing import Any, BinaryIO, Dict, Optional
+
+# Velikost bloku pro streamované čtení/zápis (1 MB)
+BLOCK_SIZE = 1024 * 1024
+
+_UPLOAD_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+class UploadError(ValueError):
+    """Chyba při zpracování uploadu (neplatný offset, kontrolní součet, stav)."""
+
+    def __init__(self, message: str, status_code: int = 400, offset: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.offset = offset
+
+
+class UploadService:
+    """Správa navazovatelných uploadů ve spool adresáři."""
+
+    def __init__(self, spool_dir: str, max_size: Optional[int] = None, expiry_seconds: int = 24 * 3600):
+        self.spool_dir = spool_dir
+        self.max_size = max_size
+        self.expiry_seconds = expiry_seconds
+        os.makedirs(self.spool_dir, exist_ok=True)
+
+    @classmethod
+    def from_app(cls, app) -> "UploadService":
+        """Vytvoří službu podle konfigurace aplikace."""
+        return cls(
+            app.config["UPLOAD_SPOOL_DIR"],
+            max_size=app.config.get("UPLOAD_MAX_SIZE"),
+            expiry_seconds=app.config.get("UPLOAD_EXPIRY_SECONDS", 24 * 3600),
+        )
+
+    # === Cesty ===
+
+    def _check_id(self, upload_id: str) -> str:
+        if not upload_id or not _UPLOAD_ID_RE.match(upload_id):
+            raise UploadError("Neplatné ID uploadu.", status_code=404)
+        return upload_id
+
+    def _meta_path(self, upload_id: str) -> str:
+        return os.path.join(self.spool_dir, f"{self._check_id(upload_id)}.json")
+
+    def _part_path(self, upload_id: str) -> str:
+        return os.path.join(self.spool_dir, f"{self._check_id(upload_id)}.part")
+
+    def _data_path(self, upload_id: str) -> str:
+        return os.path.join(self.spool_dir, f"{self._check_id(upload_id)}.data")
+
+    def _load_meta(self, upload_id: str) -> Dict[str, Any]:
+        try:
+            with open(self._meta_path(upload_id), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise UploadError("Upload neexistuje nebo vypršel.", status_code=404)
+
+    def _save_meta(self, meta: Dict[str, Any]) -> None:
+        # Atomický zápis (rename), aby souběžné čtení nikdy neviděl poloviční JSON
+        path = self._meta_path(meta["upload_id"])
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, path)
+
+    # === Životní cyklus ===
+
+    def create(self, filename: str, total_size: int, sha256: Optional[str] = None,
+               user_id: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Založí nový upload a vrátí jeho stav.
+
+        Args:
+            filename: Původní název souboru (jen pro informaci a kontrolu přípony).
+            total_size: Očekávaná velikost souboru v bajtech.
+            sha256: Volitelný očekávaný SHA-256 celého souboru (hex).
+            user_id: ID uživatele, který upload zahájil.
+        """
+        if total_size is None or total_size < 0:
+            raise UploadError("Chybí nebo je neplatná velikost souboru.")
+        if self.max_size and total_size > self.max_size:
+            raise UploadError(
+                f"Soubor je příliš velký ({total_size} B, limit {self.max_size} B).",
+                status_code=413,
+            )
+
+        self.cleanup_expired()
+
+        upload_id = secrets.token_hex(16)
+        open(self._part_path(upload_id), "wb").close()
+        meta = {
+            "upload_id": upload_id,
+            "filename": os.path.basename(filename or "upload"),
+            "size": int(total_size),
+            "offset": 0,
+            "sha256": sha256.lower() if sha256 else None,
+            "user_id": user_id,
+            "complete": False,
+            "created_at": time.time(),
+            "updated_at": time.time(),
+        }
+        self._save_meta(meta)
+        return meta
+
+    def store(self, stream: BinaryIO, filename: str, user_id: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Uloží celý stream (klasický multipart upload) jako dokončený upload.
+
+        Data se kopírují po blocích, takže i zde zůstává paměťová náročnost konstantní.
+        """
+        meta = self.create(filename, 0, user_id=user_id)
+        upload_id = meta["upload_id"]
+        digest = hashlib.sha256()
+        size = 0
+        with open(self._data_path(upload_id), "wb") as f:
+            for block in iter(lambda: stream.read(BLOCK_SIZE), b""):
+                if self.max_size and size + len(block) > self.max_size:
+                    f.close()
+                    self.discard(upload_id)
+                    raise UploadError("Soubor je příliš velký.", status_code=413)
+                digest.update(block)
+                f.write(block)
+                size += len(block)
+        os.remove(self._part_path(upload_id))
+
+        meta.update(size=size, offset=size, sha256=digest.hexdigest(), complete=True, updated_at=time.time())
+        self._save_meta(meta)
+        return meta
+
+    def status(self, upload_id: str) -> Dict[str, Any]:
+        """Vrátí stav uploadu; offset odpovídá skutečné velikosti spool souboru."""
+        meta = self._load_meta(upload_id)
+        if not meta["complete"]:
+            meta["offset"] = os.path.getsize(self._part_path(upload_id))
+        return meta
+
+    def append_chunk(self, upload_id: str, offset: int, stream: BinaryIO,
+                     chunk_sha256: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Zapíše chunk ze streamu na zadaný offset.
+
+        Chunk se čte a zapisuje po blocích, takže v paměti je vždy nejvýše BLOCK_SIZE.
+        Pokud offset nesouhlasí s uloženou délkou, vyhodí UploadError (409) s aktuálním
+        offsetem, aby klient mohl navázat. Při nesouhlasu kontrolního součtu se
+        zapsaná data zahodí (soubor se zkrátí zpět na původní offset).
+        """
+        meta = self.status(upload_id)
+        if meta["complete"]:
+            raise UploadError("Upload je již dokončen.", status_code=409, offset=meta["offset"])
+        if offset != meta["offset"]:
+            raise UploadError(
+                f"Neočekávaný offset {offset}, očekáváno {meta['offset']}.",
+                status_code=409,
+                offset=meta["offset"],
+            )
+
+        digest = hashlib.sha256()
+        written = 0
+        part_path = self._part_path(upload_id)
+        with open(part_path, "r+b") as f:
+            f.seek(offset)
+            while True:
+                block = stream.read(BLOCK_SIZE)
+                if not block:
+                    break
+                written += len(block)
+                if offset + written > meta["size"]:
+                    f.truncate(offset)
+                    raise UploadError("Chunk přesahuje deklarovanou velikost souboru.", offset=offset)
+                digest.update(block)
+                f.write(block)
+
+            if chunk_sha256 and digest.hexdigest() != chunk_sha256.lower():
+                f.truncate(offset)
+                raise UploadError("Kontrolní součet chunku nesouhlasí.", status_code=422, offset=offset)
+            f.flush()
+            os.fsync(f.fileno())
+
+        meta["offset"] = offset + written
+        meta["updated_at"] = time.time()
+        self._save_meta(meta)
+        return meta
+
+    def complete(self, upload_id: str) -> Dict[str, Any]:
+        """
+        Dokončí upload - ověří velikost a SHA-256 a přesune soubor do finální podoby.
+        """
+        meta = self.status(upload_id)
+        if meta["complete"]:
+            return meta
+        if meta["offset"] != meta["size"]:
+            raise UploadError(
+                f"Upload není kompletní ({meta['offset']} z {meta['size']} B).",
+                status_code=409,
+                offset=meta["offset"],
+            )
+
+        part_path = self._part_path(upload_id)
+        actual_sha256 = file_sha256(part_path)
+        if meta["sha256"] and meta["sha256"] != actual_sha256:
+            raise UploadError("Kontrolní součet souboru nesouhlasí.", status_code=422)
+
+        os.replace(part_path, self._data_path(upload_id))
+        meta["sha256"] = actual_sha256
+        meta["complete"] = True
+        meta["updated_at"] = time.time()
+        self._save_meta(meta)
+        return meta
+
+    def completed_path(self, upload_id: str) -> str:
+        """Vrátí cestu k dokončenému souboru pro importní pipeline."""
+        meta = self._load_meta(upload_id)
+        if not meta["complete"]:
+            raise UploadError("Upload ještě není dokončen.", status_code=409)
+        return self._data_path(upload_id)
+
+    def discard(self, upload_id: str) -> None:
+        """Smaže upload včetně dat a metadat."""
+        for path in (self._part_path(upload_id), self._data_path(upload_id), self._meta_path(upload_id)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def cleanup_expired(self) -> int:
+        """Smaže uploady, které nebyly aktualizovány déle než expiry_seconds."""
+        removed = 0
+        cutoff = time.time() - self.expiry_seconds
+        for name in os.listdir(self.spool_dir):
+            if not name.endswith(".json"):
+                continue
+            upload_id = name[:-5]
+            if not _UPLOAD_ID_RE.match(upload_id):
+                continue
+            try:
+                meta = self._load_meta(upload_id)
+            except (UploadError, ValueError):
+                continue
+            if meta.get("updated_at", 0) < cutoff:
+                self.discard(upload_id)
+                removed += 1
+        return removed
+
+
+def file_sha256(path: str) -> str:
+    """Spočítá SHA-256 souboru po blocích."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
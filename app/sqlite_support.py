@@ -0,0 +1,181 @@
+"""
+Provoz na SQLite (profil FLASK_ENV=sqlite-production).
+
+Dvě části, obě se zapínají konfigurací a jen pro souborovou SQLite:
+
+1. PRAGMA při každém novém spojení (SQLITE_TUNING):
+       journal_mode=WAL  - čtení neblokuje zápis a naopak
+       busy_timeout      - místo okamžitého "database is locked" se čeká
+       synchronous=NORMAL, mmap_size, cache_size
+2. Fronta zapisovatelů v procesu (SQLITE_WRITER_LOCK): SQLite dovolí jen
+   jednu zapisující transakci. Souběžní zapisovatelé (vlákna waitress) by
+   jinak opakovaně narážely na zámek databáze a čekaly v busy_timeout
+   smyčce bez pořadí. Před prvním zápisem transakce se proto vlákno zařadí
+   do FIFO fronty a zámek drží do commitu/rollbacku. Čtení frontou
+   neprochází a běží souběžně (WAL).
+
+Zámek je jen v rámci procesu - víc procesů (job workery) se dál řeší
+busy_timeoutem.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Příkazy, před kterými se transakce zařadí do fronty zapisovatelů
+WRITE_PREFIXES = ("INSERT", "UPDATE", "DELETE", "REPLACE", "CREATE", "DROP", "ALTER")
+
+_LOCK_KEY = "sqlite_writer_lock"
+
+
+class FairWriterLock:
+    """
+    FIFO zámek zapisovatelů (férové pořadí podle příchodu).
+
+    Je reentrantní pro vlákno - vlákno, které už zapisuje, neblokuje samo sebe
+    (např. druhé spojení v téže obsluze požadavku).
+    """
+
+    def __init__(self, timeout: float = 30.0):
+        self.timeout = timeout
+        self._cond = threading.Condition()
+        self._queue: deque = deque()
+        self._owner: Optional[int] = None
+        self._depth = 0
+        self.acquired = 0
+        self.timeouts = 0
+
+    @property
+    def waiting(self) -> int:
+        return len(self._queue)
+
+    def acquire(self) -> float:
+        """
+        Počká na řadu a vrátí dobu čekání (s).
+
+        Raises:
+            TimeoutError: Nedostal se na řadu do `timeout` sekund.
+        """
+        me = threading.get_ident()
+        started = time.monotonic()
+        with self._cond:
+            if self._owner == me:
+                self._depth += 1
+                return 0.0
+            token = object()
+            self._queue.append(token)
+            deadline = started + self.timeout
+            while self._owner is not None or self._queue[0] is not token:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._queue.remove(token)
+                    self.timeouts += 1
+                    self._cond.notify_all()
+                    raise TimeoutError(f"Čekání na zápis do databáze přesáhlo {self.timeout:.0f} s")
+                self._cond.wait(remaining)
+            self._queue.popleft()
+            self._owner = me
+            self._depth = 1
+            self.acquired += 1
+        return time.monotonic() - started
+
+    def release(self) -> None:
+        with self._cond:
+            if self._depth == 0:
+                return
+            self._depth -= 1
+            if self._depth == 0:
+                self._owner = None
+                self._cond.notify_all()
+
+    def status(self) -> Dict[str, Any]:
+        return {"waiting": self.waiting, "acquired": self.acquired, "timeouts": self.timeouts,
+                "busy": self._owner is not None}
+
+
+def is_file_sqlite(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+def sqlite_pragmas(config) -> Dict[str, Any]:
+    """PRAGMA podle konfigurace (pořadí odpovídá pořadí nastavení)."""
+    return {
+        "journal_mode": "WAL",
+        "busy_timeout": int(config.get("SQLITE_BUSY_TIMEOUT_MS", 5000)),
+        "synchronous": config.get("SQLITE_SYNCHRONOUS", "NORMAL"),
+        "mmap_size": int(config.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)),
+        # Záporná hodnota = velikost v KiB (ne ve stránkách)
+        "cache_size": -int(config.get("SQLITE_CACHE_SIZE_KB", 64 * 1024)),
+    }
+
+
+def install_pragmas(engine, pragmas: Dict[str, Any]) -> None:
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def install_writer_lock(engine, lock: FairWriterLock) -> None:
+    """Zařadí každou zapisující transakci enginu do fronty `lock`."""
+    from app.monitoring.metrics import REGISTRY
+
+    wait_histogram = REGISTRY.histogram(
+        "clp_sqlite_writer_wait_seconds", "Čekání transakce ve frontě zapisovatelů SQLite."
+    )
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _writer_acquire(conn, cursor, statement, parameters, context, executemany):
+        if conn.info.get(_LOCK_KEY) or not statement.lstrip()[:7].upper().startswith(WRITE_PREFIXES):
+            return
+        wait_histogram.observe(lock.acquire())
+        conn.info[_LOCK_KEY] = True
+
+    def _writer_release(info):
+        if info.pop(_LOCK_KEY, False):
+            lock.release()
+
+    @event.listens_for(engine, "commit")
+    def _writer_commit(conn):
+        _writer_release(conn.info)
+
+    @event.listens_for(engine, "rollback")
+    def _writer_rollback(conn):
+        _writer_release(conn.info)
+
+    # Pojistka: spojení vrácené do poolu bez commitu/rollbacku přes Connection
+    @event.listens_for(engine, "checkin")
+    def _writer_checkin(dbapi_connection, connection_record):
+        _writer_release(connection_record.info)
+
+
+def init_sqlite(app) -> None:
+    """PRAGMA a fronta zapisovatelů pro souborovou SQLite podle konfigurace."""
+    from app.extensions import db
+
+    config = app.config
+    if not (config.get("SQLITE_TUNING") or config.get("SQLITE_WRITER_LOCK")):
+        return
+    with app.app_context():
+        engine = db.engine
+    if not is_file_sqlite(engine.url):
+        return
+    if config.get("SQLITE_TUNING"):
+        install_pragmas(engine, sqlite_pragmas(config))
+    if config.get("SQLITE_WRITER_LOCK"):
+        lock = FairWriterLock(timeout=config.get("SQLITE_WRITER_TIMEOUT", 30.0))
+        install_writer_lock(engine, lock)
+        app.extensions["sqlite_writer_lock"] = lock
+    logger.info("SQLite: WAL/PRAGMA %s, fronta zapisovatelů %s",
+                "zapnuto" if config.get("SQLITE_TUNING") else "vypnuto",
+                "zapnuta" if config.get("SQLITE_WRITER_LOCK") else "vypnuta")
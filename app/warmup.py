@@ -0,0 +1,179 @@
+"""
+Zahřátí workeru po startu (WARMUP_MODE) a připravenost pro load balancer.
+
+První požadavky po nasazení jinak platí import modulů klasifikace,
+kompilaci šablon Jinja, otevření spojení do DB a naplnění cache. Kroky
+(WARMUP_STEPS) to udělají předem:
+
+    modules     - import modulů klasifikace, exportu a ECHA (tabulky H-vět
+                  a mapy kódů se staví při importu)
+    templates   - kompilace všech šablon *.html
+    database    - otevření spojení (pool) primáru
+    annex_vi    - index Přílohy VI v paměti (jen s ANNEX_VI_ENABLED)
+    local_cache - nabídky látek a směsí pro formulář směsi
+
+Režimy:
+    off         - nic se nezahřívá, worker je připraven hned (vývoj, testy)
+    sync        - zahřátí přímo v create_app (waitress, jeden proces)
+    background  - vlákno po create_app; /health/ready vrací 503, dokud
+                  nedoběhne, takže balancer posílá provoz jen zahřátým workerům
+
+Gunicorn s preload_app (gunicorn_config.py) vytváří aplikaci v masteru
+a zahřívá ji synchronně ještě před forkem - workery dostanou importy,
+šablony i cache hotové. Spojení do DB se ale do workerů přenášet nesmí:
+post_fork volá after_fork(), který je zahodí a zahřátí zopakuje (už
+zahřáté kroky projdou rychle).
+
+Příkazy `flask ...` (FLASK_RUN_FROM_CLI) zahřátí přeskakují - např. flask db
+upgrade běží před existencí tabulek a nic neobsluhuje.
+
+Chyba kroku se zaloguje a zahřátí pokračuje - je to optimalizace, ne
+podmínka provozu (dostupnost DB hlídá /health).
+"""
+
+import importlib
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MODES = ("off", "sync", "background")
+
+_STATE_KEY = "warmup"
+
+# Moduly importované až při prvním použití (klasifikace, exporty, ECHA)
+WARMUP_MODULES = (
+    "app.services.clp.engine",
+    "app.services.clp.health",
+    "app.services.clp.env",
+    "app.services.export_service",
+    "app.services.echa_service",
+)
+
+
+def _warm_modules(app) -> None:
+    for name in WARMUP_MODULES:
+        importlib.import_module(name)
+
+
+def _warm_templates(app) -> None:
+    for name in app.jinja_env.list_templates(filter_func=lambda name: name.endswith(".html")):
+        app.jinja_env.get_template(name)
+
+
+def _warm_database(app) -> None:
+    from app.extensions import db
+    db.session.execute(db.text("SELECT 1"))
+
+
+def _warm_annex_vi(app) -> None:
+    if app.config.get("ANNEX_VI_ENABLED"):
+        from app.services.annex_vi import AnnexViIndex
+        len(AnnexViIndex.from_app(app))
+
+
+def _warm_local_cache(app) -> None:
+    from app.services.mixture_service import MixtureService
+    MixtureService.substance_choices()
+    MixtureService.mixture_choices()
+
+
+WARMUP_STEPS: List[Tuple[str, Callable[[Any], None]]] = [
+    ("modules", _warm_modules),
+    ("templates", _warm_templates),
+    ("database", _warm_database),
+    ("annex_vi", _warm_annex_vi),
+    ("local_cache", _warm_local_cache),
+]
+
+
+class WarmupState:
+    """Stav zahřátí v tomto procesu (pending -> running -> done)."""
+
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.status = "done" if mode == "off" else "pending"
+        self.pid = os.getpid()
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self.duration_ms: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "done"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "status": self.status,
+            "pid": self.pid,
+            "duration_ms": self.duration_ms,
+            "steps": self.steps,
+        }
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+def get_state(app) -> Optional[WarmupState]:
+    return app.extensions.get(_STATE_KEY)
+
+
+def warm_up(app, state: WarmupState) -> WarmupState:
+    """Provede všechny kroky WARMUP_STEPS (v app kontextu) a označí worker za připravený."""
+    from app.extensions import db
+
+    state.status = "running"
+    started = time.perf_counter()
+    with app.app_context():
+        for name, step in WARMUP_STEPS:
+            step_started = time.perf_counter()
+            try:
+                step(app)
+                state.steps[name] = {"ms": round((time.perf_counter() - step_started) * 1000, 1)}
+            except Exception as error:  # noqa: BLE001 - zahřátí nesmí shodit worker
+                db.session.rollback()
+                state.steps[name] = {"error": str(error).splitlines()[0] if str(error) else type(error).__name__}
+                logger.warning("Zahřátí: krok %s selhal", name, exc_info=True)
+        db.session.remove()
+    state.duration_ms = round((time.perf_counter() - started) * 1000, 1)
+    state.status = "done"
+    logger.info("Worker %d zahřátý za %.0f ms (%s)", state.pid, state.duration_ms,
+                ", ".join(f"{name} {info.get('ms', 'chyba')}" for name, info in state.steps.items()))
+    return state
+
+
+def start_warmup(app) -> WarmupState:
+    """Spustí zahřátí podle WARMUP_MODE a uloží stav do app.extensions (konec create_app)."""
+    mode = app.config.get("WARMUP_MODE", "off")
+    if mode not in MODES:
+        raise ValueError(f"Neplatný WARMUP_MODE {mode!r} (povoleno: {', '.join(MODES)})")
+    if os.environ.get("FLASK_RUN_FROM_CLI"):
+        mode = "off"
+    state = WarmupState(mode)
+    app.extensions[_STATE_KEY] = state
+    if mode == "sync":
+        warm_up(app, state)
+    elif mode == "background":
+        state._thread = threading.Thread(target=warm_up, args=(app, state), name="warmup", daemon=True)
+        state._thread.start()
+    return state
+
+
+def after_fork(app) -> Optional[WarmupState]:
+    """Po forku workeru (gunicorn post_fork s preload_app): nová spojení a nové zahřátí."""
+    from app.db_routing import get_router
+    from app.extensions import db
+
+    with app.app_context():
+        # close=False: spojení patří masteru, worker je jen zapomene
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+        router = get_router(app)
+        for replica in router.replicas if router is not None else ():
+            replica.engine.dispose(close=False)
+    return start_warmup(app)
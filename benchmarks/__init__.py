@@ -0,0 +1,8 @@
+"""
+Benchmarky výpočetního enginu CLP.
+
+generator.py - syntetický katalog látek a směsí (vnořené směsi, SCL, ATE, eko data)
+engine.py    - měření času a alokací klasifikace a jejích kroků
+
+Spuštění: python -m benchmarks --help
+"""
@@ -0,0 +1,64 @@
+"""
+CLI benchmarků: python -m benchmarks [--sizes 10,100,1000] [--depths 1,2,4,8]
+
+Běží nad dočasnou in-memory SQLite databází (nebo --database URL), výsledky
+ukládá jako JSON a volitelně je porovná s předchozím během (--compare).
+"""
+
+import argparse
+import json
+import sys
+
+from app import create_app
+from app.config import TestingConfig
+from app.extensions import db
+
+from .engine import DEFAULT_DEPTHS, DEFAULT_SIZES, compare, run_suite, save_results
+
+
+def _ints(value):
+    return tuple(int(part) for part in value.split(",") if part.strip())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmark enginu CLP.")
+    parser.add_argument("--sizes", type=_ints, default=DEFAULT_SIZES, help="Počty komponent (čárkou).")
+    parser.add_argument("--depths", type=_ints, default=DEFAULT_DEPTHS, help="Hloubky vnoření (čárkou).")
+    parser.add_argument("--repeat", type=int, default=5, help="Počet měřených opakování.")
+    parser.add_argument("--seed", type=int, default=0, help="Semínko generátoru.")
+    parser.add_argument("--database", default="sqlite:///:memory:", help="URL databáze (bude vyprázdněna!).")
+    parser.add_argument("--output", help="Soubor s výsledky (výchozí benchmarks/results/<datum>.json).")
+    parser.add_argument("--compare", help="Předchozí výsledky k porovnání.")
+    args = parser.parse_args(argv)
+
+    class BenchmarkConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = args.database
+        SECRET_KEY = "benchmark"
+
+    app = create_app(BenchmarkConfig)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        report = run_suite(args.sizes, args.depths, args.repeat, args.seed,
+                           progress=lambda message: print(f"... {message}", file=sys.stderr))
+        db.session.remove()
+        db.drop_all()
+
+    path = save_results(report, args.output)
+    print(f"{'měření':32} {'komp.':>6} {'hl.':>4} {'medián ms':>11} {'špička kB':>11}")
+    for row in report["results"]:
+        print(f"{row['name']:32} {row['components']:>6} {row['depth']:>4} "
+              f"{row['median_ms']:>11.3f} {row['alloc_peak_kb']:>11.1f}")
+    print(f"\nVýsledky uloženy do {path}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)
+        print(f"\nPorovnání s {args.compare} (poměr mediánů, < 1 = rychlejší):")
+        for row in compare(baseline, report):
+            print(f"{row['name']:32} {row['components']:>6} {row['depth']:>4} {row['ratio']!s:>8}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
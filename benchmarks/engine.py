@@ -0,0 +1,223 @@
+"""
+Benchmark výpočetního enginu CLP.
+
+Pro každou kombinaci počtu komponent a hloubky vnoření vytvoří syntetickou
+směs a změří čas (min/medián/průměr z `repeat` opakování) a alokace
+(tracemalloc: špička a čistý přírůstek jednoho volání) pro:
+
+- run_clp_classification (celá klasifikace včetně načítání z DB)
+- jednotlivé kroky: ate, health, env, euh, p_phrases
+- expand_mixture_components, parse_scls (SCL všech komponent)
+
+Kroky se měří nad předem načtenými komponentami (bez DB), celková
+klasifikace a rozbalení s prázdnou identity mapou (expire_all před každým
+opakováním), aby se započítalo i načítání z databáze.
+"""
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+
+from app.extensions import db
+from app.models import ComponentType, Substance
+from app.services.clp.ate import calculate_mixture_ate, classify_by_atemix
+from app.services.clp.engine import run_clp_classification
+from app.services.clp.env import classify_environmental_hazards
+from app.services.clp.euh import classify_euh_phrases
+from app.services.clp.health import classify_by_concentration_limits
+from app.services.clp.p_phrases import assign_p_phrases
+from app.services.clp.scl import parse_scls
+from app.services.mixture_service import MixtureService
+
+from .generator import SyntheticCatalogue, seed_catalogue
+
+DEFAULT_SIZES = (10, 100, 1000)
+DEFAULT_DEPTHS = (1, 2, 4, 8)
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def measure(func: Callable[[], Any], repeat: int = 5,
+            setup: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+    """
+    Změří funkci: jedno zahřívací volání, `repeat` měřených, jedno pod tracemalloc.
+
+    `setup` se volá před každým voláním a do měření se nezapočítává.
+    """
+    if setup:
+        setup()
+    func()
+
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - started) * 1000)
+
+    if setup:
+        setup()
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    before, _ = tracemalloc.get_traced_memory()
+    func()
+    current, peak = tracemalloc.get_traced_memory()
+    if not was_tracing:
+        tracemalloc.stop()
+
+    return {
+        "repeat": repeat,
+        "min_ms": round(min(times), 3),
+        "median_ms": round(statistics.median(times), 3),
+        "mean_ms": round(statistics.fmean(times), 3),
+        "alloc_peak_kb": round((peak - before) / 1024, 1),
+        "alloc_net_kb": round((current - before) / 1024, 1),
+    }
+
+
+def _calc_components(mixture) -> List[SimpleNamespace]:
+    """Rozbalené komponenty s načtenými látkami (jako engine pro vnořené směsi)."""
+    expanded = MixtureService.expand_mixture_components(mixture.id)
+    substances = {
+        substance.id: substance
+        for substance in db.session.execute(
+            db.select(Substance).where(Substance.id.in_([e["substance_id"] for e in expanded]))
+        ).scalars()
+    }
+    return [
+        SimpleNamespace(
+            substance_id=e["substance_id"],
+            concentration=e["concentration"],
+            component_type=ComponentType.SUBSTANCE,
+            substance=substances[e["substance_id"]],
+        )
+        for e in expanded
+    ]
+
+
+def benchmark_mixture(mixture, repeat: int) -> Dict[str, Dict[str, Any]]:
+    """Všechna měření pro jednu směs."""
+    components = _calc_components(mixture)
+    scl_strings = [c.substance.scl_limits for c in components if c.substance.scl_limits]
+
+    ate_values, _ = calculate_mixture_ate(mixture, components=components)
+    ate_h, _, _ = classify_by_atemix(ate_values)
+    health_h, _, _ = classify_by_concentration_limits(mixture, components=components)
+    env_h, _, _ = classify_environmental_hazards(mixture, components=components)
+    total_h = ate_h | health_h | env_h
+
+    def ate():
+        values, _ = calculate_mixture_ate(mixture, components=components)
+        classify_by_atemix(values)
+
+    results = {
+        "stage.ate": measure(ate, repeat),
+        "stage.health": measure(lambda: classify_by_concentration_limits(mixture, components=components), repeat),
+        "stage.env": measure(lambda: classify_environmental_hazards(mixture, components=components), repeat),
+        "stage.euh": measure(lambda: classify_euh_phrases(mixture, total_h, env_h, components=components), repeat),
+        "stage.p_phrases": measure(lambda: assign_p_phrases(total_h, mixture.user_type), repeat),
+        "parse_scls": measure(lambda: [parse_scls(value) for value in scl_strings], repeat),
+    }
+
+    mixture_id = mixture.id
+    results["expand_mixture_components"] = measure(
+        lambda: MixtureService.expand_mixture_components(mixture_id), repeat, setup=db.session.expire_all
+    )
+    results["run_clp_classification"] = measure(
+        lambda: run_clp_classification(mixture), repeat, setup=db.session.expire_all
+    )
+    db.session.rollback()
+    return results
+
+
+def run_suite(sizes=DEFAULT_SIZES, depths=DEFAULT_DEPTHS, repeat: int = 5, seed: int = 0,
+              progress: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    """
+    Spustí benchmark pro všechny kombinace velikosti a hloubky (v app kontextu).
+
+    Returns:
+        {'meta': {...}, 'results': [{'name', 'components', 'depth', 'min_ms', ...}]}
+    """
+    catalogue = SyntheticCatalogue(seed)
+    substance_ids = seed_catalogue(catalogue, max(sizes))
+
+    results = []
+    for size in sizes:
+        for depth in depths:
+            if depth > size:
+                continue
+            mixture = catalogue.build_mixture(substance_ids, size, depth, f"Benchmark {size}x{depth}")
+            if progress:
+                progress(f"{size} komponent, hloubka {depth}")
+            for name, metrics in benchmark_mixture(mixture, repeat).items():
+                results.append({"name": name, "components": size, "depth": depth, **metrics})
+
+    return {"meta": _meta(seed, repeat), "results": results}
+
+
+def _meta(seed: int, repeat: int) -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(__file__),
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "database": db.engine.url.render_as_string(hide_password=True),
+        "seed": seed,
+        "repeat": repeat,
+    }
+
+
+def save_results(report: Dict[str, Any], path: Optional[str] = None) -> str:
+    """Uloží výsledky jako JSON (výchozí benchmarks/results/<datum>.json)."""
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2, ensure_ascii=False)
+    return path
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Porovná dva běhy (medián času a špičku alokací).
+
+    Returns:
+        Řádky s 'ratio' = current / baseline (jen měření přítomná v obou bězích)
+    """
+    def key(row):
+        return row["name"], row["components"], row["depth"]
+
+    previous = {key(row): row for row in baseline["results"]}
+    rows = []
+    for row in current["results"]:
+        old = previous.get(key(row))
+        if old is None:
+            continue
+        rows.append({
+            "name": row["name"],
+            "components": row["components"],
+            "depth": row["depth"],
+            "baseline_ms": old["median_ms"],
+            "current_ms": row["median_ms"],
+            "ratio": round(row["median_ms"] / old["median_ms"], 3) if old["median_ms"] else None,
+            "alloc_peak_kb": row["alloc_peak_kb"],
+            "baseline_alloc_peak_kb": old["alloc_peak_kb"],
+        })
+    return rows
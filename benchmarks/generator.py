@@ -0,0 +1,190 @@
+"""
+Generátor syntetického katalogu pro benchmarky.
+
+Látky mají realistické rozložení H-vět (běžné věty jako H302/H315/H319/H412
+výrazně častěji než CMR), SCL ve formátu parse_scls, ATE hodnoty odpovídající
+kategorii akutní toxicity a u části látek ekotoxikologická data a M-faktory.
+Směsi mají zadaný počet komponent a hloubku vnoření. Generátor je
+deterministický pro dané semínko, aby šly běhy porovnávat.
+"""
+
+import random
+from typing import Any, Dict, List, Optional
+
+from app.extensions import db
+from app.models import ComponentType, Mixture, MixtureComponent, Substance
+from app.constants.clp import (
+    ATE_LIMITS,
+    ENV_H_PHRASES,
+    HEALTH_H_PHRASES,
+    PHYSICAL_H_PHRASES,
+    SCL_HAZARD_TO_H_CODE,
+)
+
+# Váhy H-vět (ostatní věty z číselníků mají váhu 1)
+COMMON_PHRASE_WEIGHTS = {
+    "H302": 30, "H315": 30, "H319": 30, "H317": 20, "H412": 20, "H226": 15,
+    "H225": 15, "H335": 12, "H336": 10, "H411": 12, "H318": 10, "H314": 8,
+    "H332": 8, "H312": 8, "H304": 8, "H400": 6, "H410": 6, "H373": 5, "H301": 4,
+    "H311": 3, "H331": 3, "H351": 3, "H361": 2, "H290": 4,
+}
+
+# Počet H-vět na látku: 0, 1, 2, ... (váhy)
+PHRASE_COUNT_WEIGHTS = (30, 25, 20, 12, 7, 4, 2)
+
+# Podíl látek s SCL (pokud mají větu, pro kterou SCL existuje)
+SCL_SHARE = 0.3
+
+# Podíl látek s environmentální klasifikací, které mají i testovací data
+ECO_DATA_SHARE = 0.5
+
+# Koncentrace vnořené směsi v rodičovské směsi (%)
+NESTED_CONCENTRATION = 20.0
+
+# H-věta akutní toxicity -> (sloupec ATE, typ limitu, kategorie)
+ACUTE_TOX_PHRASES = {
+    "H300": ("ate_oral", "oral", 2), "H301": ("ate_oral", "oral", 3), "H302": ("ate_oral", "oral", 4),
+    "H310": ("ate_dermal", "dermal", 2), "H311": ("ate_dermal", "dermal", 3), "H312": ("ate_dermal", "dermal", 4),
+    "H330": ("ate_inhalation_vapours", "vapour", 2), "H331": ("ate_inhalation_vapours", "vapour", 3),
+    "H332": ("ate_inhalation_vapours", "vapour", 4),
+}
+
+
+def _scl_categories() -> Dict[str, List[str]]:
+    """H-věta -> kategorie, pro které lze napsat SCL (bez variant se závorkou)."""
+    categories: Dict[str, List[str]] = {}
+    for category, h_code in SCL_HAZARD_TO_H_CODE.items():
+        if "(" not in category:
+            categories.setdefault(h_code, []).append(category)
+    return categories
+
+
+class SyntheticCatalogue:
+    """Deterministický generátor látek a směsí."""
+
+    def __init__(self, seed: int = 0):
+        self.random = random.Random(seed)
+        phrases = list(HEALTH_H_PHRASES) + list(ENV_H_PHRASES) + list(PHYSICAL_H_PHRASES)
+        self._phrases = phrases
+        self._weights = [COMMON_PHRASE_WEIGHTS.get(code, 1) for code in phrases]
+        self._scl_categories = _scl_categories()
+
+    # === Látky ===
+
+    def substance(self, index: int) -> Dict[str, Any]:
+        """Data jedné látky (klíče = sloupce Substance)."""
+        rnd = self.random
+        count = rnd.choices(range(len(PHRASE_COUNT_WEIGHTS)), PHRASE_COUNT_WEIGHTS)[0]
+        phrases = set(rnd.choices(self._phrases, self._weights, k=count))
+
+        row: Dict[str, Any] = {
+            "name": f"Synthetic substance {index:06d}",
+            "cas_number": f"{1000 + index}-{rnd.randint(10, 99)}-{rnd.randint(0, 9)}",
+            "health_h_phrases": self._join(p for p in phrases if p in HEALTH_H_PHRASES),
+            "env_h_phrases": self._join(p for p in phrases if p in ENV_H_PHRASES),
+            "physical_h_phrases": self._join(p for p in phrases if p in PHYSICAL_H_PHRASES),
+            "scl_limits": self.scl_string(phrases),
+            "m_factor_acute": 1,
+            "m_factor_chronic": 1,
+        }
+
+        for code in sorted(phrases & set(ACUTE_TOX_PHRASES)):
+            column, limit_type, category = ACUTE_TOX_PHRASES[code]
+            limits = ATE_LIMITS[limit_type]
+            row[column] = round(rnd.uniform(limits[category - 2], limits[category - 1]), 3)
+        if "ate_oral" not in row and rnd.random() < 0.2:
+            row["ate_oral"] = round(rnd.uniform(2000, 5000), 1)  # bez klasifikace
+
+        if phrases & {"H400", "H410", "H411", "H412"}:
+            if rnd.random() < ECO_DATA_SHARE:
+                row["lc50_fish_96h"] = round(rnd.lognormvariate(0, 2), 4)
+                row["ec50_daphnia_48h"] = round(rnd.lognormvariate(0, 2), 4)
+                row["ec50_algae_72h"] = round(rnd.lognormvariate(0, 2), 4)
+                row["noec_chronic"] = round(rnd.lognormvariate(-2, 2), 4)
+            if phrases & {"H400", "H410"}:
+                row["m_factor_acute"] = rnd.choice((1, 1, 10, 100))
+                row["m_factor_chronic"] = rnd.choice((1, 1, 10))
+        return row
+
+    def substances(self, count: int, start: int = 0) -> List[Dict[str, Any]]:
+        return [self.substance(index) for index in range(start, start + count)]
+
+    def scl_string(self, phrases) -> Optional[str]:
+        """SCL ve formátu parse_scls ('Kat: >= 10, Kat2: >= 1; < 5') nebo None."""
+        candidates = [c for code in sorted(phrases) for c in self._scl_categories.get(code, [])]
+        if not candidates or self.random.random() >= SCL_SHARE:
+            return None
+        parts = []
+        for category in self.random.sample(candidates, k=min(2, len(candidates))):
+            low = self.random.choice((0.1, 1, 3, 5, 10, 25))
+            if self.random.random() < 0.3:
+                parts.append(f"{category}: >= {low}; < {low * 5:g}")
+            else:
+                parts.append(f"{category}: >= {low}")
+        return ", ".join(parts)
+
+    @staticmethod
+    def _join(codes) -> Optional[str]:
+        return ", ".join(sorted(codes)) or None
+
+    # === Směsi ===
+
+    def concentrations(self, count: int, total: float) -> List[float]:
+        """`count` kladných koncentrací se součtem nejvýše `total` (%)."""
+        weights = [self.random.uniform(0.2, 1.0) for _ in range(count)]
+        scale = total / sum(weights)
+        # Zaokrouhlení dolů, aby součet nepřekročil total
+        return [max(int(w * scale * 10000) / 10000, 0.0001) for w in weights]
+
+    def build_mixture(self, substance_ids: List[int], components: int, depth: int,
+                      name: str) -> Mixture:
+        """
+        Vytvoří směs s `components` látkami rozloženými do `depth` úrovní.
+
+        Každá úroveň kromě nejhlubší obsahuje vnořenou směs (NESTED_CONCENTRATION %).
+        Látky se vybírají z `substance_ids` bez opakování.
+
+        Returns:
+            Nejvyšší směs (uložená, commit)
+        """
+        if components > len(substance_ids):
+            raise ValueError("Katalog má méně látek než požadovaný počet komponent")
+        depth = max(1, min(depth, components))
+        chosen = self.random.sample(substance_ids, components)
+        per_level = [components // depth] * depth
+        per_level[-1] += components - sum(per_level)
+
+        child = None
+        offset = components
+        for level in reversed(range(depth)):
+            ids = chosen[offset - per_level[level]:offset]
+            offset -= per_level[level]
+            total = 100.0 if child is None else 100.0 - NESTED_CONCENTRATION
+            mixture = Mixture(name=f"{name} L{level}")
+            db.session.add(mixture)
+            db.session.flush()
+
+            rows = [
+                {"mixture_id": mixture.id, "component_type": ComponentType.SUBSTANCE,
+                 "substance_id": substance_id, "concentration": concentration}
+                for substance_id, concentration in zip(ids, self.concentrations(len(ids), total))
+            ]
+            if child is not None:
+                rows.append({"mixture_id": mixture.id, "component_type": ComponentType.MIXTURE,
+                             "component_mixture_id": child.id, "concentration": NESTED_CONCENTRATION})
+            db.session.execute(db.insert(MixtureComponent), rows)
+            child = mixture
+
+        db.session.commit()
+        return child
+
+
+def seed_catalogue(catalogue: SyntheticCatalogue, count: int) -> List[int]:
+    """Vloží `count` syntetických látek (hromadný INSERT) a vrátí jejich ID."""
+    rows = catalogue.substances(count)
+    keys = sorted({key for row in rows for key in row})
+    db.session.execute(db.insert(Substance), [{key: row.get(key) for key in keys} for row in rows])
+    db.session.commit()
+    return db.session.execute(
+        db.select(Substance.id).where(Substance.name.like("Synthetic substance %")).order_by(Substance.id)
+    ).scalars().all()
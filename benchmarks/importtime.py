@@ -0,0 +1,120 @@
+"""
+Čas importů při startu: python -m benchmarks.importtime [--runs 5] [--top 25]
+
+Spustí v čistém procesu `python -X importtime` kód startu (výchozí
+create_app("testing") - stejné importy jako worker i příkaz flask), rozparsuje
+výpis a vypíše celkový čas importů, nejdražší moduly (kumulativně) a líně
+načítané moduly (LAZY_MODULES), které se přesto naimportovaly. Z více běhů se
+u každého modulu bere minimum - první běh platí i kompilaci .pyc a šum disku.
+
+Rozpočet (IMPORT_MODULE_BUDGET, IMPORT_BUDGET_MS) hlídá tests/unit/test_import_budget.py.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple
+
+ROOT = Path(__file__).resolve().parent.parent
+
+STARTUP_CODE = "from app import create_app; create_app('testing')"
+
+# Načítají se až při použití (ECHA klient, exporty, admin, Flask-Migrate/alembic)
+LAZY_MODULES = (
+    "requests",
+    "urllib3",
+    "alembic",
+    "flask_migrate",
+    "app.services.echa_service",
+    "app.services.echa_cache",
+    "app.services.http_transport",
+    "app.services.export_service",
+)
+
+# Rozpočet startu. Počet modulů je deterministický a hlídá nové závislosti
+# (před zlenivěním 909, po něm ~700); čas (součet, minimum z běhů, orientačně
+# ~420 ms na vývojovém stroji) je hrubá pojistka - IMPORT_BUDGET_MS pro pomalé CI.
+IMPORT_MODULE_BUDGET = int(os.environ.get("IMPORT_MODULE_BUDGET", 760))
+IMPORT_BUDGET_MS = float(os.environ.get("IMPORT_BUDGET_MS", 800))
+
+
+class ImportRecord(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(output: str) -> List[ImportRecord]:
+    """Řádky `import time: self | cumulative | modul` z výstupu -X importtime."""
+    records = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # hlavička "self [us] | cumulative | imported package"
+        name = parts[2].rstrip()
+        records.append(ImportRecord(
+            module=name.strip(),
+            self_us=int(parts[0]),
+            cumulative_us=int(parts[1]),
+            depth=(len(name) - len(name.lstrip()) - 1) // 2,
+        ))
+    return records
+
+
+def run_importtime(code: str = STARTUP_CODE, runs: int = 3) -> Dict[str, ImportRecord]:
+    """Modul -> záznam s nejmenším kumulativním časem z `runs` čistých procesů."""
+    # Bez coverage z pytest-cov (COV_CORE_*) a bez příznaku příkazu flask
+    env = {key: value for key, value in os.environ.items()
+           if not key.startswith("COV_CORE_") and key != "FLASK_RUN_FROM_CLI"}
+    env.setdefault("FLASK_ENV", "testing")
+    best: Dict[str, ImportRecord] = {}
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+        )
+        for record in parse_importtime(result.stderr):
+            current = best.get(record.module)
+            if current is None or record.cumulative_us < current.cumulative_us:
+                best[record.module] = record
+    return best
+
+
+def total_ms(records: Iterable[ImportRecord]) -> float:
+    """Celkový čas importů (součet vlastních časů všech modulů)."""
+    return sum(record.self_us for record in records) / 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.importtime", description="Čas importů při startu.")
+    parser.add_argument("--runs", type=int, default=5, help="Počet běhů (bere se minimum).")
+    parser.add_argument("--top", type=int, default=25, help="Kolik nejdražších modulů vypsat.")
+    parser.add_argument("--prefix", default="", help="Jen moduly s touto předponou (např. app.).")
+    parser.add_argument("--code", default=STARTUP_CODE, help="Měřený kód startu.")
+    args = parser.parse_args(argv)
+
+    records = run_importtime(args.code, args.runs)
+    total = total_ms(records.values())
+    print(f"celkem {total:.1f} ms, {len(records)} modulů "
+          f"(rozpočet {IMPORT_BUDGET_MS:.0f} ms, {IMPORT_MODULE_BUDGET} modulů)")
+    print(f"{'kumul. ms':>10} {'vlastní ms':>10}  modul")
+    shown = sorted((r for r in records.values() if r.module.startswith(args.prefix)),
+                   key=lambda r: r.cumulative_us, reverse=True)
+    for record in shown[:args.top]:
+        print(f"{record.cumulative_us / 1000:>10.1f} {record.self_us / 1000:>10.1f}  "
+              f"{'  ' * record.depth}{record.module}")
+
+    eager = [name for name in LAZY_MODULES if name in records]
+    if eager:
+        print("\nLíně načítané moduly importované při startu: " + ", ".join(eager))
+    over_budget = total > IMPORT_BUDGET_MS or len(records) > IMPORT_MODULE_BUDGET
+    return 1 if eager or over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
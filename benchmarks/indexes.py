@@ -0,0 +1,127 @@
+"""
+Benchmark indexů: python -m benchmarks.indexes [--substances 20000] [--mixtures 5000]
+
+Naplní dočasnou databázi velkým syntetickým katalogem a změří klíčové dotazy
+z app.monitoring.index_advisor dvakrát - bez indexů z migrace d8a4f1c7e352
+(stav před ní) a s nimi. Vypíše medián doby dotazu a jestli plán prochází
+tabulku sekvenčně.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from app import create_app
+from app.config import TestingConfig
+from app.extensions import db
+from app.models import ComponentType, Mixture, MixtureComponent, Substance
+from app.monitoring.index_advisor import HOT_QUERIES, explain, literal_sql, plan_issues, sample_parameters
+
+# Indexy přidané migrací d8a4f1c7e352 (stav "před" je bez nich)
+MIGRATION_INDEXES = (
+    "ix_mixture_component_mixture",
+    "ix_mixture_component_substance",
+    "ix_mixture_component_component_mixture",
+    "ix_mixture_updated_at",
+)
+
+
+def _migration_indexes():
+    indexes = {index.name: index for table in (Mixture.__table__, MixtureComponent.__table__)
+               for index in table.indexes}
+    return [indexes[name] for name in MIGRATION_INDEXES]
+
+
+def seed(substances: int, mixtures: int, components: int, nested_ratio: float, seed_value: int) -> None:
+    """Hromadně vloží látky, směsi a jejich složky (bez ORM a auditu)."""
+    rnd = random.Random(seed_value)
+    db.session.execute(db.insert(Substance), [
+        {"name": f"Látka {i:06d}", "cas_number": f"{10000 + i}-{i % 100:02d}-{i % 10}"} for i in range(substances)
+    ])
+    db.session.execute(db.insert(Mixture), [{"name": f"Směs {i:06d}"} for i in range(mixtures)])
+    rows = []
+    for mixture_id in range(1, mixtures + 1):
+        for _ in range(components):
+            if mixture_id > 1 and rnd.random() < nested_ratio:
+                rows.append({"mixture_id": mixture_id, "component_type": ComponentType.MIXTURE,
+                             "component_mixture_id": rnd.randint(1, mixture_id - 1), "concentration": 1.0})
+            else:
+                rows.append({"mixture_id": mixture_id, "component_type": ComponentType.SUBSTANCE,
+                             "substance_id": rnd.randint(1, substances), "concentration": 1.0})
+    db.session.execute(db.insert(MixtureComponent), rows)
+    db.session.commit()
+
+
+def measure(repeat: int):
+    """Medián doby (ms) a problémy v plánu pro každý dotaz z HOT_QUERIES."""
+    connection = db.session.connection()
+    params = sample_parameters(db.session)
+    results = {}
+    for name, _, build in HOT_QUERIES:
+        statement = build(params)
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            db.session.execute(statement).all()
+            timings.append((time.perf_counter() - started) * 1000)
+        plan = explain(connection, literal_sql(connection, statement))
+        results[name] = (statistics.median(timings), plan_issues(connection.dialect.name, plan))
+    db.session.rollback()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.indexes", description="Dotazy bez/s indexy.")
+    parser.add_argument("--substances", type=int, default=20000, help="Počet látek.")
+    parser.add_argument("--mixtures", type=int, default=5000, help="Počet směsí.")
+    parser.add_argument("--components", type=int, default=10, help="Složek na směs.")
+    parser.add_argument("--nested-ratio", type=float, default=0.1, help="Podíl složek, které jsou směsí.")
+    parser.add_argument("--repeat", type=int, default=20, help="Opakování každého dotazu.")
+    parser.add_argument("--seed", type=int, default=0, help="Semínko generátoru.")
+    parser.add_argument("--database", help="URL databáze (bude vyprázdněna!), výchozí dočasná SQLite.")
+    args = parser.parse_args(argv)
+
+    database = args.database or "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="clp_index_bench_"), "bench.db")
+
+    class BenchmarkConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = database
+        SECRET_KEY = "benchmark"
+
+    app = create_app(BenchmarkConfig)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        print(f"... plním katalog ({args.substances} látek, {args.mixtures} směsí)", file=sys.stderr)
+        seed(args.substances, args.mixtures, args.components, args.nested_ratio, args.seed)
+
+        indexes = _migration_indexes()
+        with db.engine.begin() as connection:
+            for index in indexes:
+                index.drop(connection)
+        before = measure(args.repeat)
+        with db.engine.begin() as connection:
+            for index in indexes:
+                index.create(connection)
+        after = measure(args.repeat)
+
+        db.session.remove()
+        db.drop_all()
+
+    print(f"{'dotaz':26} {'před ms':>9} {'po ms':>9} {'zrychlení':>10}  plán před")
+    for name, _, _ in HOT_QUERIES:
+        before_ms, issues = before[name]
+        after_ms, after_issues = after[name]
+        speedup = before_ms / after_ms if after_ms else float("inf")
+        note = ", ".join(issues) or "-"
+        if after_issues:
+            note += f" (po: {', '.join(after_issues)})"
+        print(f"{name:26} {before_ms:>9.3f} {after_ms:>9.3f} {speedup:>9.1f}x  {note}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
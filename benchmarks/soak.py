@@ -0,0 +1,101 @@
+"""
+Soak test paměti: python -m benchmarks.soak [--cycles 50] [--components 50]
+
+Opakuje cyklus klasifikace, exportu a importu JSON zálohy nad dočasnou
+in-memory SQLite a po každém cyklu (po gc.collect) zaznamená trasovanou
+paměť (tracemalloc). Pokud paměť po zahřívacích cyklech dál roste rychleji
+než --max-growth-kb na cyklus, skončí s kódem 1 a vypíše místa s největším
+nárůstem - vhodné jako noční kontrola v CI.
+"""
+
+import argparse
+import gc
+import io
+import sys
+import tracemalloc
+
+from app import create_app
+from app.config import TestingConfig
+from app.extensions import db
+from app.models import Mixture
+from app.monitoring.memory import TRACE_FRAMES, growth_trend
+from app.services.clp import run_clp_classification
+from app.services.export_service import write_data_json
+from app.services.import_service import import_data_from_json
+
+from .generator import SyntheticCatalogue, seed_catalogue
+
+
+def run_cycle(catalogue: SyntheticCatalogue, substance_ids, components: int, depth: int, index: int) -> None:
+    """Jeden cyklus: nová směs -> klasifikace -> export -> import -> smazání směsi."""
+    mixture = catalogue.build_mixture(substance_ids, components, depth, name=f"Soak {index:05d}")
+    run_clp_classification(mixture)
+    db.session.commit()
+
+    output = io.StringIO()
+    write_data_json(output)
+    import_data_from_json(io.BytesIO(output.getvalue().encode("utf-8")))
+    db.session.commit()
+
+    # Databáze má zůstat stejně velká, aby rostla jen případně unikající paměť procesu
+    for leftover in Mixture.query.filter(Mixture.name.like("Soak %")).all():
+        db.session.delete(leftover)
+    db.session.commit()
+    db.session.expunge_all()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.soak", description="Soak test paměti.")
+    parser.add_argument("--cycles", type=int, default=50, help="Počet měřených cyklů.")
+    parser.add_argument("--warmup", type=int, default=5, help="Zahřívací cykly (nepočítají se do trendu).")
+    parser.add_argument("--substances", type=int, default=500, help="Velikost katalogu látek.")
+    parser.add_argument("--components", type=int, default=50, help="Počet komponent směsi.")
+    parser.add_argument("--depth", type=int, default=2, help="Hloubka vnoření směsi.")
+    parser.add_argument("--max-growth-kb", type=float, default=16.0, help="Povolený nárůst paměti na cyklus (kB).")
+    parser.add_argument("--seed", type=int, default=0, help="Semínko generátoru.")
+    args = parser.parse_args(argv)
+
+    class SoakConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+        SECRET_KEY = "soak"
+
+    app = create_app(SoakConfig)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        catalogue = SyntheticCatalogue(args.seed)
+        substance_ids = seed_catalogue(catalogue, args.substances)
+
+        tracemalloc.start(TRACE_FRAMES)
+        samples = []
+        baseline = None
+        for index in range(args.warmup + args.cycles):
+            run_cycle(catalogue, substance_ids, args.components, args.depth, index)
+            gc.collect()
+            samples.append(tracemalloc.get_traced_memory()[0])
+            if index + 1 == args.warmup:
+                baseline = tracemalloc.take_snapshot()
+            print(f"... cyklus {index + 1}: {samples[-1] / 1024:.1f} kB", file=sys.stderr)
+        final = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        db.session.remove()
+        db.drop_all()
+
+    trend = growth_trend(samples, warmup=args.warmup)
+    slope_kb = trend["slope"] / 1024
+    print(f"Trend po {trend['cycles']} cyklech: {slope_kb:+.2f} kB/cyklus "
+          f"(celkem {trend['growth'] / 1024:+.1f} kB, limit {args.max_growth_kb} kB/cyklus)")
+    if slope_kb <= args.max_growth_kb:
+        print("OK - paměť neroste.")
+        return 0
+
+    print("\nPaměť roste. Největší nárůsty od konce zahřívání:")
+    if baseline is not None:
+        for stat in final.compare_to(baseline, "lineno")[:15]:
+            print(f"  {stat}")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
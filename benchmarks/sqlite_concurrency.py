@@ -0,0 +1,140 @@
+"""
+Benchmark souběžného provozu na SQLite: python -m benchmarks.sqlite_concurrency
+
+Porovná profily nad dočasnou souborovou databází:
+    default - výchozí nastavení (rollback journal, bez fronty)
+    wal     - SQLITE_TUNING (WAL, busy_timeout, synchronous=NORMAL, mmap, cache)
+    wal+lock- navíc fronta zapisovatelů (SQLITE_WRITER_LOCK)
+
+Vlákna (jako vlákna waitress) střídají čtení (seznam látek) a zápisy
+(úprava --write-rows látek včetně záznamů do audit logu) v poměru --write-ratio.
+Vypisuje propustnost, chyby "database is locked" a latence zápisu.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy.exc import OperationalError
+
+from app import create_app
+from app.config import TestingConfig
+from app.extensions import db
+from app.models import Substance
+
+PROFILES = {
+    "default": {"SQLITE_TUNING": False, "SQLITE_WRITER_LOCK": False},
+    "wal": {"SQLITE_TUNING": True, "SQLITE_WRITER_LOCK": False},
+    "wal+lock": {"SQLITE_TUNING": True, "SQLITE_WRITER_LOCK": True},
+}
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def run_profile(name, settings, threads, seconds, write_ratio, write_rows, substances, seed, directory=None):
+    path = os.path.join(tempfile.mkdtemp(prefix="clp_sqlite_bench_", dir=directory), "bench.db")
+
+    class BenchmarkConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + path
+        SECRET_KEY = "benchmark"
+
+    for key, value in settings.items():
+        setattr(BenchmarkConfig, key, value)
+
+    app = create_app(BenchmarkConfig)
+    with app.app_context():
+        db.create_all()
+        db.session.execute(db.insert(Substance), [
+            {"name": f"Bench {i:05d}", "cas_number": f"{1000 + i}-00-0"} for i in range(substances)
+        ])
+        db.session.commit()
+
+    stats = {"reads": 0, "writes": 0, "errors": 0, "write_ms": []}
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def worker(index):
+        rnd = random.Random(seed + index)
+        reads = writes = errors = 0
+        write_ms = []
+        with app.app_context():
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                try:
+                    if rnd.random() < write_ratio:
+                        first = rnd.randint(1, max(substances - write_rows, 1))
+                        for substance in Substance.query.filter(
+                            Substance.id.between(first, first + write_rows - 1)
+                        ):
+                            substance.ph = round(rnd.uniform(1, 14), 2)
+                        db.session.commit()
+                        writes += 1
+                        write_ms.append((time.perf_counter() - started) * 1000)
+                    else:
+                        offset = rnd.randint(0, max(substances - 50, 0))
+                        Substance.query.order_by(Substance.name).offset(offset).limit(50).all()
+                        reads += 1
+                except (OperationalError, TimeoutError):
+                    db.session.rollback()
+                    errors += 1
+                db.session.remove()
+        with lock:
+            stats["reads"] += reads
+            stats["writes"] += writes
+            stats["errors"] += errors
+            stats["write_ms"].extend(write_ms)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+
+    with app.app_context():
+        db.engine.dispose()
+    return {
+        "profile": name,
+        "reads_per_s": stats["reads"] / seconds,
+        "writes_per_s": stats["writes"] / seconds,
+        "errors": stats["errors"],
+        "write_p50_ms": statistics.median(stats["write_ms"]) if stats["write_ms"] else 0.0,
+        "write_p95_ms": _percentile(stats["write_ms"], 0.95),
+        "write_max_ms": max(stats["write_ms"], default=0.0),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.sqlite_concurrency",
+                                     description="Souběžné čtení a zápisy nad SQLite.")
+    parser.add_argument("--profiles", default=",".join(PROFILES), help="Profily (čárkou).")
+    parser.add_argument("--threads", type=int, default=8, help="Počet vláken (jako waitress --threads).")
+    parser.add_argument("--seconds", type=float, default=10, help="Délka běhu každého profilu.")
+    parser.add_argument("--write-ratio", type=float, default=0.2, help="Podíl zápisů (0-1).")
+    parser.add_argument("--write-rows", type=int, default=10, help="Látek upravených v jedné transakci.")
+    parser.add_argument("--substances", type=int, default=2000, help="Počet látek v databázi.")
+    parser.add_argument("--seed", type=int, default=0, help="Semínko generátoru.")
+    parser.add_argument("--dir", help="Adresář pro dočasnou databázi (měřte na disku produkce, ne v tmpfs).")
+    args = parser.parse_args(argv)
+
+    print(f"{'profil':10} {'čtení/s':>9} {'zápisy/s':>9} {'chyby':>6} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    for name in args.profiles.split(","):
+        name = name.strip()
+        row = run_profile(name, PROFILES[name], args.threads, args.seconds, args.write_ratio,
+                          args.write_rows, args.substances, args.seed, args.dir)
+        print(f"{row['profile']:10} {row['reads_per_s']:>9.0f} {row['writes_per_s']:>9.0f} {row['errors']:>6} "
+              f"{row['write_p50_ms']:>8.1f} {row['write_p95_ms']:>8.1f} {row['write_max_ms']:>8.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
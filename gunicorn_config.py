@@ -0,0 +1,31 @@
+"""
+Konfigurace gunicornu: gunicorn -c gunicorn_config.py wsgi:app
+
+Hodnoty lze přepsat proměnnými prostředí (GUNICORN_*). S preload_app se
+aplikace načte a zahřeje (importy, šablony, cache) jednou v masteru a
+workery ji sdílejí díky copy-on-write; post_fork pak v každém workeru
+zahodí zděděná spojení do DB a zahřátí zopakuje (viz app/warmup.py).
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 100))
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") == "1"
+accesslog = os.environ.get("GUNICORN_ACCESSLOG", "-")
+
+if preload_app:
+    # Master zahřívá synchronně - běžící vlákno by při forku mohlo držet zámky
+    os.environ.setdefault("WARMUP_MODE", "sync")
+
+
+def post_fork(server, worker):
+    # Bez preload_app se aplikace vytváří až ve workeru a zahřeje se v create_app
+    if preload_app:
+        from app.warmup import after_fork
+        after_fork(worker.app.wsgi())
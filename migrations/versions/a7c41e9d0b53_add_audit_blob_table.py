@@ -0,0 +1,31 @@
+"""Add audit_blob table for deduplicated large audit values
+
+Revision ID: a7c41e9d0b53
+Revises: d5a9e3b1c2f8
+Create Date: 2026-10-18 23:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c41e9d0b53'
+down_revision = 'd5a9e3b1c2f8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'audit_blob',
+        sa.Column('hash', sa.String(length=64), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('hash')
+    )
+
+
+def downgrade():
+    op.drop_table('audit_blob')
@@ -0,0 +1,30 @@
+"""Add composite audit_log indexes for entity history and keyset pagination
+
+Revision ID: b3e8f6a2c914
+Revises: a7c41e9d0b53
+Create Date: 2026-10-19 00:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3e8f6a2c914'
+down_revision = 'a7c41e9d0b53'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('audit_log', schema=None) as batch_op:
+        batch_op.create_index('ix_audit_log_entity_timeline', ['entity_type', 'entity_id', 'timestamp', 'id'], unique=False)
+        batch_op.create_index('ix_audit_log_timeline', ['timestamp', 'id'], unique=False)
+        batch_op.create_index('ix_audit_log_user_timeline', ['user_id', 'timestamp', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('audit_log', schema=None) as batch_op:
+        batch_op.drop_index('ix_audit_log_user_timeline')
+        batch_op.drop_index('ix_audit_log_timeline')
+        batch_op.drop_index('ix_audit_log_entity_timeline')
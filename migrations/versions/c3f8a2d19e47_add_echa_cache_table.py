@@ -0,0 +1,39 @@
+"""Add echa_cache table for persistent ECHA API responses
+
+Revision ID: c3f8a2d19e47
+Revises: b7e2c91d4a30
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f8a2d19e47'
+down_revision = 'b7e2c91d4a30'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'echa_cache',
+        sa.Column('key', sa.String(length=512), nullable=False),
+        sa.Column('status_code', sa.Integer(), nullable=False),
+        sa.Column('body', sa.JSON(), nullable=True),
+        sa.Column('etag', sa.String(length=255), nullable=True),
+        sa.Column('last_modified', sa.String(length=64), nullable=True),
+        sa.Column('fetched_at', sa.DateTime(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('key')
+    )
+    with op.batch_alter_table('echa_cache', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_echa_cache_expires_at'), ['expires_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('echa_cache', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_echa_cache_expires_at'))
+
+    op.drop_table('echa_cache')
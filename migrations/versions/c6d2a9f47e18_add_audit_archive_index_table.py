@@ -0,0 +1,39 @@
+"""Add audit_archive_index table for archived audit log lookup
+
+Revision ID: c6d2a9f47e18
+Revises: b3e8f6a2c914
+Create Date: 2026-10-19 01:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6d2a9f47e18'
+down_revision = 'b3e8f6a2c914'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'audit_archive_index',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('month', sa.String(length=7), nullable=False),
+        sa.Column('entity_type', sa.String(length=50), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('first_at', sa.DateTime(), nullable=True),
+        sa.Column('last_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('month', 'entity_type', 'entity_id', name='uq_audit_archive_index_month_entity')
+    )
+    with op.batch_alter_table('audit_archive_index', schema=None) as batch_op:
+        batch_op.create_index('ix_audit_archive_index_entity', ['entity_type', 'entity_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('audit_archive_index', schema=None) as batch_op:
+        batch_op.drop_index('ix_audit_archive_index_entity')
+    op.drop_table('audit_archive_index')
@@ -0,0 +1,68 @@
+"""Add annex_vi_entry and annex_vi_synonym tables for offline harmonised classification
+
+Revision ID: d5a9e3b1c2f8
+Revises: c3f8a2d19e47
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5a9e3b1c2f8'
+down_revision = 'c3f8a2d19e47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'annex_vi_entry',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('index_number', sa.String(length=20), nullable=True),
+        sa.Column('cas_number', sa.String(length=20), nullable=True),
+        sa.Column('ec_number', sa.String(length=20), nullable=True),
+        sa.Column('name', sa.Text(), nullable=False),
+        sa.Column('hazard_classes', sa.JSON(), nullable=True),
+        sa.Column('h_phrases', sa.JSON(), nullable=True),
+        sa.Column('ghs_symbols', sa.JSON(), nullable=True),
+        sa.Column('scl_limits', sa.JSON(), nullable=True),
+        sa.Column('ate_values', sa.JSON(), nullable=True),
+        sa.Column('m_factor_acute', sa.Integer(), nullable=True),
+        sa.Column('m_factor_chronic', sa.Integer(), nullable=True),
+        sa.Column('notes', sa.String(length=100), nullable=True),
+        sa.Column('imported_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('annex_vi_entry', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_annex_vi_entry_index_number'), ['index_number'], unique=False)
+        batch_op.create_index(batch_op.f('ix_annex_vi_entry_cas_number'), ['cas_number'], unique=False)
+        batch_op.create_index(batch_op.f('ix_annex_vi_entry_ec_number'), ['ec_number'], unique=False)
+
+    op.create_table(
+        'annex_vi_synonym',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('entry_id', sa.Integer(), nullable=False),
+        sa.Column('key', sa.String(length=500), nullable=False),
+        sa.ForeignKeyConstraint(['entry_id'], ['annex_vi_entry.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('annex_vi_synonym', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_annex_vi_synonym_entry_id'), ['entry_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_annex_vi_synonym_key'), ['key'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('annex_vi_synonym', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_annex_vi_synonym_key'))
+        batch_op.drop_index(batch_op.f('ix_annex_vi_synonym_entry_id'))
+
+    op.drop_table('annex_vi_synonym')
+
+    with op.batch_alter_table('annex_vi_entry', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_annex_vi_entry_ec_number'))
+        batch_op.drop_index(batch_op.f('ix_annex_vi_entry_cas_number'))
+        batch_op.drop_index(batch_op.f('ix_annex_vi_entry_index_number'))
+
+    op.drop_table('annex_vi_entry')
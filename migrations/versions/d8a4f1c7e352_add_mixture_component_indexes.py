@@ -0,0 +1,36 @@
+"""Add foreign key indexes on mixture_component and mixture.updated_at
+
+Revision ID: d8a4f1c7e352
+Revises: c6d2a9f47e18
+Create Date: 2026-10-19 02:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8a4f1c7e352'
+down_revision = 'c6d2a9f47e18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('mixture_component', schema=None) as batch_op:
+        batch_op.create_index('ix_mixture_component_mixture', ['mixture_id', 'component_type'], unique=False)
+        batch_op.create_index('ix_mixture_component_substance', ['substance_id', 'mixture_id'], unique=False)
+        batch_op.create_index('ix_mixture_component_component_mixture', ['component_mixture_id', 'mixture_id'], unique=False)
+
+    with op.batch_alter_table('mixture', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_mixture_updated_at'), ['updated_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('mixture', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_mixture_updated_at'))
+
+    with op.batch_alter_table('mixture_component', schema=None) as batch_op:
+        batch_op.drop_index('ix_mixture_component_component_mixture')
+        batch_op.drop_index('ix_mixture_component_substance')
+        batch_op.drop_index('ix_mixture_component_mixture')
@@ -0,0 +1,36 @@
+"""Add cache_generation table for cross-process cache invalidation
+
+Revision ID: e4b7c2d9a1f3
+Revises: d8a4f1c7e352
+Create Date: 2026-10-19 03:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4b7c2d9a1f3'
+down_revision = 'd8a4f1c7e352'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    cache_generation = op.create_table(
+        'cache_generation',
+        sa.Column('kind', sa.String(length=50), nullable=False),
+        sa.Column('generation', sa.BigInteger(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('kind')
+    )
+    # Řádky předem - zápisy pak jen zvyšují generaci (UPDATE)
+    op.bulk_insert(cache_generation, [
+        {'kind': 'substance', 'generation': 0},
+        {'kind': 'mixture', 'generation': 0},
+        {'kind': 'annex_vi', 'generation': 0},
+    ])
+
+
+def downgrade():
+    op.drop_table('cache_generation')
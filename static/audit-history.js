@@ -0,0 +1,101 @@
+/**
+ * Historie změn entity načítaná až na vyžádání.
+ *
+ * Element <details data-audit-history="URL"> po prvním rozbalení stáhne první
+ * stránku historie (JSON z /<entita>/<id>/history) a tlačítko
+ * [data-audit-more] dotáhne další podle next_cursor (keyset stránkování).
+ */
+(function () {
+    const ACTION_BADGES = { CREATE: 'badge-success', UPDATE: 'badge-warning', DELETE: 'badge-danger' };
+
+    function el(tag, className, text) {
+        const node = document.createElement(tag);
+        if (className) node.className = className;
+        if (text !== undefined) node.textContent = text;
+        return node;
+    }
+
+    function valueText(value) {
+        if (value === null || value === undefined) return '—';
+        if (typeof value === 'object' && value.blob) return '[' + value.size + ' znaků]';
+        return String(value);
+    }
+
+    function renderChanges(changes) {
+        const cell = el('td');
+        Object.entries(changes || {}).forEach(([field, diff]) => {
+            const line = el('div', 'mb-1');
+            line.appendChild(el('code', 'text-xs', field));
+            line.appendChild(document.createTextNode(': '));
+            if (diff.derived) {
+                (diff.added || []).forEach(code => line.appendChild(el('span', 'text-success', '+' + code + ' ')));
+                (diff.removed || []).forEach(code => line.appendChild(el('span', 'text-muted strike', '−' + code + ' ')));
+                if (!(diff.added || []).length && !(diff.removed || []).length) {
+                    line.appendChild(el('span', 'text-muted', 'přepočítáno'));
+                }
+            } else {
+                line.appendChild(el('span', 'text-muted strike', valueText(diff.old)));
+                line.appendChild(document.createTextNode(' ➡️ '));
+                line.appendChild(el('span', 'text-success', valueText(diff.new)));
+            }
+            cell.appendChild(line);
+        });
+        return cell;
+    }
+
+    function renderRow(item, showChanges) {
+        const row = el('tr');
+        const date = item.timestamp ? new Date(item.timestamp + 'Z').toLocaleString('cs-CZ') : '';
+        row.appendChild(el('td', 'text-muted', date));
+        row.appendChild(el('td', 'font-medium', item.user || 'Systém'));
+        const action = el('td');
+        action.appendChild(el('span', 'badge ' + (ACTION_BADGES[item.action] || ''), item.action));
+        row.appendChild(action);
+        if (showChanges) {
+            row.appendChild(item.changes ? renderChanges(item.changes) : el('td', '', ''));
+        }
+        return row;
+    }
+
+    function setup(container) {
+        const body = container.querySelector('[data-audit-rows]');
+        const more = container.querySelector('[data-audit-more]');
+        const status = container.querySelector('[data-audit-status]');
+        const showChanges = container.hasAttribute('data-audit-changes');
+        let cursor = null;
+        let loading = false;
+
+        async function load() {
+            if (loading) return;
+            loading = true;
+            const url = new URL(container.dataset.auditHistory, window.location.origin);
+            url.searchParams.set('limit', container.dataset.pageSize || '10');
+            if (cursor) url.searchParams.set('cursor', cursor);
+            try {
+                const response = await fetch(url, { credentials: 'same-origin' });
+                if (!response.ok) throw new Error(response.status);
+                const page = await response.json();
+                page.items.forEach(item => body.appendChild(renderRow(item, showChanges)));
+                cursor = page.next_cursor;
+                more.hidden = !cursor;
+                status.textContent = body.children.length ? '' : 'Zatím žádné změny.';
+            } catch (error) {
+                status.textContent = 'Historii se nepodařilo načíst.';
+            } finally {
+                loading = false;
+            }
+        }
+
+        container.addEventListener('toggle', () => {
+            if (container.open && !container.dataset.loaded) {
+                container.dataset.loaded = '1';
+                load();
+            }
+        });
+        more.addEventListener('click', load);
+    }
+
+    document.addEventListener('DOMContentLoaded', () => {
+        document.querySelectorAll('[data-audit-history]').forEach(setup);
+    });
+})();
@@ -0,0 +1,118 @@
+/**
+ * Navazovatelný (chunked) upload pro importní formuláře.
+ *
+ * Formulář s atributem data-chunked-upload nahraje soubor po částech přes
+ * /data/uploads, po výpadku spojení naváže od offsetu hlášeného serverem a
+ * nakonec odešle formulář pouze s `upload_id` (bez samotného souboru).
+ */
+(function () {
+    const MAX_RETRIES = 5;
+
+    function csrfToken() {
+        const meta = document.querySelector('meta[name="csrf-token"]');
+        return meta ? meta.getAttribute('content') : '';
+    }
+
+    async function sha256Hex(buffer) {
+        if (!window.crypto || !window.crypto.subtle) {
+            return null;
+        }
+        const digest = await window.crypto.subtle.digest('SHA-256', buffer);
+        return Array.from(new Uint8Array(digest))
+            .map(b => b.toString(16).padStart(2, '0'))
+            .join('');
+    }
+
+    async function request(method, url, body, headers) {
+        const response = await fetch(url, {
+            method: method,
+            body: body,
+            credentials: 'same-origin',
+            headers: Object.assign({ 'X-CSRFToken': csrfToken() }, headers || {}),
+        });
+        const data = response.status === 204 ? {} : await response.json();
+        return { status: response.status, data: data };
+    }
+
+    async function uploadFile(file, onProgress) {
+        const created = await request('POST', '/data/uploads', JSON.stringify({
+            filename: file.name,
+            size: file.size,
+        }), { 'Content-Type': 'application/json' });
+        if (created.status !== 201) {
+            throw new Error(created.data.error || 'Upload se nepodařilo založit.');
+        }
+
+        const uploadId = created.data.upload_id;
+        const chunkSize = created.data.chunk_size;
+        let offset = 0;
+        let retries = 0;
+
+        while (offset < file.size) {
+            try {
+                const chunk = await file.slice(offset, offset + chunkSize).arrayBuffer();
+                const headers = { 'Upload-Offset': String(offset) };
+                const checksum = await sha256Hex(chunk);
+                if (checksum) {
+                    headers['X-Chunk-Sha256'] = checksum;
+                }
+                const res = await request('PUT', '/data/uploads/' + uploadId, chunk, headers);
+                if (res.status === 200) {
+                    offset = res.data.offset;
+                    retries = 0;
+                } else if (res.status === 409 && res.data.offset !== undefined) {
+                    offset = res.data.offset;  // Server má jiný stav - navážeme
+                } else {
+                    throw new Error(res.data.error || 'Chyba při nahrávání.');
+                }
+            } catch (err) {
+                if (++retries > MAX_RETRIES) {
+                    throw err;
+                }
+                // Výpadek spojení - počkáme a zjistíme, kolik dat server skutečně má
+                await new Promise(r => setTimeout(r, 1000 * retries));
+                const status = await request('GET', '/data/uploads/' + uploadId);
+                if (status.status === 200) {
+                    offset = status.data.offset;
+                }
+            }
+            onProgress(offset / file.size);
+        }
+
+        const done = await request('POST', '/data/uploads/' + uploadId + '/complete');
+        if (done.status !== 200) {
+            throw new Error(done.data.error || 'Upload se nepodařilo dokončit.');
+        }
+        return uploadId;
+    }
+
+    document.addEventListener('DOMContentLoaded', function () {
+        document.querySelectorAll('form[data-chunked-upload]').forEach(form => {
+            form.addEventListener('submit', async function (e) {
+                const input = form.querySelector('input[type="file"]');
+                if (!input || !input.files.length || form.dataset.uploaded) {
+                    return;
+                }
+                e.preventDefault();
+
+                const progress = form.querySelector('.upload-progress');
+                const button = form.querySelector('button[type="submit"]');
+                if (button) button.disabled = true;
+                if (progress) progress.hidden = false;
+
+                try {
+                    const uploadId = await uploadFile(input.files[0], ratio => {
+                        if (progress) progress.value = Math.round(ratio * 100);
+                    });
+                    form.querySelector('input[name="upload_id"]').value = uploadId;
+                    input.disabled = true;  // Soubor už je na serveru
+                    form.dataset.uploaded = '1';
+                    form.submit();
+                } catch (err) {
+                    alert(err.message);
+                    if (button) button.disabled = false;
+                }
+            });
+        });
+    });
+})();
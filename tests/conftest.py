@@ -14,6 +14,9 @@ def app():
         "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
         "WTF_CSRF_ENABLED": False,
         "SECRET_KEY": "test-key",
+        "JOBS_EAGER": True,
+        "METRICS_DIR": "",
+        "SLOW_REQUEST_ENABLED": False,
     }
     
     class TestConfig(Config):
@@ -72,3 +75,41 @@ def sample_substance(app):
         db.session.add(substance)
         db.session.commit()
         return substance
+
+
+@pytest.fixture
+def admin_client(client, app):
+    # Přihlášený klient s rolí admin (správa dat, audit, administrace)
+    # Talisman přesměrovává HTTP na HTTPS, proto se klient hlásí jako za HTTPS proxy
+    client.environ_base["HTTP_X_FORWARDED_PROTO"] = "https"
+    with app.app_context():
+        from app.models import Role
+        role = Role(name="admin")
+        db.session.add(role)
+        db.session.commit()
+
+        user = User(username="adminuser", role_id=role.id)
+        user.set_password("adminpass")
+        db.session.add(user)
+        db.session.commit()
+
+    client.post(
+        "/login",
+        data={"username": "adminuser", "password": "adminpass"},
+        follow_redirects=True,
+    )
+    return client
+
+
+@pytest.fixture
+def echa_stub():
+    # Lokální stub ECHA API (viz tests/echa_stub.py)
+    from tests.echa_stub import EchaStub
+
+    stub = EchaStub().start()
+    stub.add_substance(
+        "64-17-5", "100.000.526", "ethanol",
+        h_phrases=["H225", "H319"], pictograms=["GHS02", "GHS07"],
+    )
+    yield stub
+    stub.stop()
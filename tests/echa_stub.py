@@ -0,0 +1,152 @@
+"""
+Lokální stub ECHA CHEM API pro testy.
+
+Spouští ThreadingHTTPServer na náhodném portu a odpovídá na stejné cesty,
+které volá ECHAService. Data látek se přidávají přes add_substance, umělá
+latence přes `delay`, výpadky endpointů přes `failures`. Odpovědi nesou ETag
+a na shodný If-None-Match stub vrací 304.
+"""
+import hashlib
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+class EchaStub:
+    """Stub server s daty látek a logem přijatých požadavků."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.routes = {}        # cesta -> JSON odpověď
+        self.search = {}        # CAS/EC -> rmlId
+        self.failures = {}      # cesta -> HTTP status
+        self.requests = []
+        self.conditional = []   # cesty dotazované s If-None-Match
+        self._connections = set()
+        self._stopped = False
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._stopped:
+            return
+        self._stopped = True
+        self._server.shutdown()
+        self._server.server_close()
+        # Keep-alive spojení klientů (pool HTTP transportu) se musí také zavřít
+        with self._lock:
+            connections = list(self._connections)
+        for connection in connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def add_substance(self, cas, rml_id, name, h_phrases=(), pictograms=(), ates=(), obligations=()):
+        """Zaregistruje látku včetně harmonizované klasifikace."""
+        class_id = f"C-{rml_id}"
+        self.search[cas] = rml_id
+        self.routes[f"/api-substance/v1/substance/{rml_id}"] = {
+            "rmlName": name, "rmlCas": cas, "rmlId": rml_id,
+        }
+        self.routes[f"/api-cnl-inventory/harmonized/{rml_id}/classifications"] = {
+            "items": [{"classificationId": class_id, "isProminentFlag": True}],
+        }
+        self.routes[f"/api-cnl-inventory/harmonized/pictograms/{class_id}"] = {
+            "items": [{"code": code} for code in pictograms],
+        }
+        self.routes[f"/api-cnl-inventory/harmonized/labelling/{class_id}"] = {
+            "items": [{"hazardStatement": {"hazardStatementCode": code}} for code in h_phrases],
+        }
+        self.routes[f"/api-cnl-inventory/harmonized/specific-concentration-limits/{class_id}"] = {"items": []}
+        self.routes[f"/api-cnl-inventory/harmonized/acute-toxicity-estimates/{class_id}"] = {
+            "items": [
+                {
+                    "acuteToxicity": {"estimation": value, "unit": "mg/kg"},
+                    "routeExposure": {"routeOfExposure": route},
+                }
+                for route, value in ates
+            ],
+        }
+        self.routes[f"/api-obligation-substance/v1/{rml_id}/summary/"] = {
+            "items": [{"legalObligationLabel": label, "legalObligationType": ""} for label in obligations],
+        }
+        return class_id
+
+    def count(self, prefix=""):
+        with self._lock:
+            return sum(1 for path in self.requests if path.startswith(prefix))
+
+    def _respond(self, path, query):
+        with self._lock:
+            self.requests.append(path)
+        if self.delay:
+            time.sleep(self.delay)
+        if path in self.failures:
+            return self.failures[path], {"error": "stub failure"}
+        if path == "/api-substance/v1/substance":
+            text = query.get("searchText", [""])[0]
+            rml_id = self.search.get(text)
+            items = [{"substanceIndex": {"rmlId": rml_id, "rmlCas": text}}] if rml_id else []
+            return 200, {"items": items}
+        if path in self.routes:
+            return 200, self.routes[path]
+        return 404, {"error": "not found"}
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub._connections.add(self.connection)
+
+            def finish(self):
+                with stub._lock:
+                    stub._connections.discard(self.connection)
+                super().finish()
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                status, payload = stub._respond(parts.path, parse_qs(parts.query))
+                body = json.dumps(payload).encode("utf-8")
+                etag = '"%s"' % hashlib.sha1(body).hexdigest()
+                if_none_match = self.headers.get("If-None-Match")
+                if if_none_match:
+                    with stub._lock:
+                        stub.conditional.append(parts.path)
+                if status == 200 and if_none_match == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                if status == 200:
+                    self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
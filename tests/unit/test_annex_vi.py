@@ -0,0 +1,87 @@
+import csv
+import io
+import time
+from app.extensions import db
+from app.services.annex_vi import AnnexViImporter, AnnexViIndex, parse_ates, parse_m_factors, parse_scl
+from app.services.echa_service import ECHAService
+
+ANNEX_VI_ROWS = [
+    ["Index No", "Chemical name", "EC No", "CAS No", "Hazard Class and Category Code(s)",
+     "Hazard statement Code(s)", "Pictogram, Signal Word Code(s)",
+     "Specific Conc. Limits, M-factors and ATE", "Synonyms"],
+    ["603-002-00-5", "ethanol\nethyl alcohol", "200-578-6", "64-17-5", "Flam. Liq. 2\nEye Irrit. 2",
+     "H225\nH319", "GHS02\nGHS07\nDgr", "", "alcohol"],
+    ["016-020-00-8", "sulphuric acid ... %", "231-639-5", "7664-93-9", "Skin Corr. 1A", "H314", "GHS05\nDgr",
+     "Skin Corr. 1A; H314: C ≥ 15 %\nSkin Irrit. 2; H315: 5 % ≤ C < 15 %", ""],
+    ["029-015-00-5", "copper(I) oxide", "215-270-7", "1317-39-1",
+     "Acute Tox. 4\nAquatic Acute 1\nAquatic Chronic 1", "H302\nH400\nH410", "GHS07\nGHS09\nWng",
+     "M=100\nM=10", ""],
+]
+
+
+def _csv(rows):
+    out = io.StringIO()
+    csv.writer(out, delimiter=";").writerows(rows)
+    return out.getvalue()
+
+
+ANNEX_VI_CSV = _csv(ANNEX_VI_ROWS)
+
+
+def _import(csv_text=ANNEX_VI_CSV):
+    entries, errors = AnnexViImporter.parse_csv(io.BytesIO(csv_text.encode("utf-8")))
+    assert errors == []
+    return AnnexViImporter.import_entries(entries)
+
+
+def test_field_parsers():
+    assert parse_scl("Skin Corr. 1A; H314: C ≥ 25 %\nSkin Irrit. 2; H315: 10 % ≤ C < 25 %") == [
+        "Skin Corr. 1A: >= 25", "Skin Irrit. 2: >= 10; < 25",
+    ]
+    assert parse_scl("Muta. 1B; H340: C ≥ 0,1 %\nSkin Corr. 1A; H314: C ≥ 25 %\nM=10\nATE: 100 mg/kg") == [
+        "Muta. 1B: >= 0.1", "Skin Corr. 1A: >= 25",
+    ]
+    assert parse_m_factors("M=10") == (10, 10)
+    assert parse_m_factors("M=100\nM=10") == (100, 10)
+    assert parse_m_factors("M = 1 (chronic)") == (None, 1)
+    assert parse_ates("oral: ATE = 100 mg/kg bw; inhalation: ATE = 0,5 mg/L (dusts or mists)") == {
+        "oral": 100.0, "inhalation_dust_mist": 0.5,
+    }
+
+
+def test_lookup_by_cas_ec_index_and_synonyms(app):
+    assert _import() == 3
+    index = AnnexViIndex(db.engine)
+
+    hit = index.lookup("64-17-5")
+    assert hit["name"] == "ethanol"
+    assert hit["h_phrases"] == ["H225", "H319"]
+    assert hit["ghs_symbols"] == ["GHS02", "GHS07"]
+    assert hit["hazard_classes"] == ["Flam. Liq. 2", "Eye Irrit. 2"]
+    assert "is_svhc" not in hit
+    for query in ("200-578-6", "603-002-00-5", "Ethyl  Alcohol", "alcohol"):
+        assert index.lookup(query)["cas"] == "64-17-5"
+
+    assert index.lookup("7664-93-9")["scl_limits"] == ["Skin Corr. 1A: >= 15", "Skin Irrit. 2: >= 5; < 15"]
+    assert index.lookup("1317-39-1")["m_factors"] == {"acute": 100, "chronic": 10}
+    assert index.lookup("50-00-0") is None
+
+    # Import v jiném procesu se projeví po kontrole signatury
+    index.reload_seconds = 0
+    time.sleep(0.01)
+    _import(_csv(ANNEX_VI_ROWS[:2]))
+    assert len(index) == 1
+
+
+def test_fetch_data_resolves_locally_first(app, echa_stub):
+    _import()
+    service = ECHAService(base_url=echa_stub.url, timeout=2, local_index=AnnexViIndex(db.engine))
+
+    result = service.fetch_data("64-17-5")
+    assert result["source"] == "annex_vi"
+    assert echa_stub.requests == []
+
+    # Látka mimo tabulku jde na síť, stejně jako lokální=False
+    assert service.fetch_data("64-17-5", local=False)["name"] == "ethanol"
+    assert service.fetch_data("67-64-1")["error"]
+    assert echa_stub.requests.count("/api-substance/v1/substance") == 2
@@ -0,0 +1,93 @@
+import gzip
+import json
+from datetime import datetime
+
+from app.extensions import db
+from app.models import AuditArchiveIndex, AuditBlob, AuditLog
+from app.services.audit_archive import (
+    archive_audit_log, archive_path, list_archives, prune_blobs, read_archive, restore_archive, search_archive,
+)
+from app.services.audit_service import insert_blobs
+
+BLOB = "c" * 64
+
+
+def _seed():
+    insert_blobs(db.session.connection(), {BLOB: "velký klasifikační log"})
+    rows = [
+        {"entity_type": "mixture", "entity_id": 7, "action": "UPDATE", "timestamp": datetime(2025, 1, 10),
+         "changes": {"classification_log": {"derived": True, "old": None, "new": {"blob": BLOB, "size": 22}}}},
+        {"entity_type": "mixture", "entity_id": 7, "action": "CREATE", "timestamp": datetime(2025, 1, 5),
+         "changes": {"initial": {"name": "Směs"}}},
+        {"entity_type": "substance", "entity_id": 3, "action": "UPDATE", "timestamp": datetime(2025, 2, 1),
+         "changes": {"name": {"old": "A", "new": "B"}}},
+        {"entity_type": "substance", "entity_id": 3, "action": "UPDATE", "timestamp": datetime.utcnow(),
+         "changes": {"name": {"old": "B", "new": "C"}}},
+    ]
+    db.session.execute(db.insert(AuditLog), rows)
+    db.session.commit()
+
+
+def test_archive_moves_old_rows_into_monthly_files(app, tmp_path):
+    _seed()
+    result = archive_audit_log(str(tmp_path), datetime(2026, 1, 1), batch_size=2)
+
+    assert result == {"archived": 3, "months": ["2025-01", "2025-02"]}
+    assert [a["month"] for a in list_archives(str(tmp_path))] == ["2025-01", "2025-02"]
+    assert AuditLog.query.count() == 1  # čerstvý záznam zůstává
+    index = AuditArchiveIndex.query.filter_by(entity_type="mixture", entity_id=7).one()
+    assert (index.month, index.count) == ("2025-01", 2)
+
+    records = list(read_archive(archive_path(str(tmp_path), "2025-01")))
+    assert records[0]["action"] == "CREATE"
+    assert records[1]["blobs"] == {BLOB: "velký klasifikační log"}
+
+
+def test_prune_blobs_after_archive_keeps_referenced(app, tmp_path):
+    _seed()
+    kept = "d" * 64
+    insert_blobs(db.session.connection(), {kept: "stále používaný log"})
+    db.session.execute(db.insert(AuditLog), [{
+        "entity_type": "mixture", "entity_id": 8, "action": "UPDATE", "timestamp": datetime.utcnow(),
+        "changes": {"classification_log": {"derived": True, "old": {"blob": kept, "size": 19}, "new": None}},
+    }])
+    db.session.commit()
+
+    archive_audit_log(str(tmp_path), datetime(2026, 1, 1))
+    assert db.session.get(AuditBlob, BLOB) is not None  # archivace bloky nemaže
+
+    assert prune_blobs(batch_size=1) == 1
+    assert db.session.get(AuditBlob, BLOB) is None  # obsah je v archivu
+    assert db.session.get(AuditBlob, kept).content == "stále používaný log"
+
+
+def test_search_and_restore_archived_history(app, tmp_path):
+    _seed()
+    archive_audit_log(str(tmp_path), datetime(2026, 1, 1))
+    # Duplicitní dávka (pád po zápisu archivu, před smazáním) se při čtení zahodí
+    path = archive_path(str(tmp_path), "2025-01")
+    with gzip.open(path, "rt", encoding="utf-8") as archive:
+        lines = archive.read()
+    with open(path, "ab") as raw, gzip.GzipFile(fileobj=raw, mode="wb") as archive:
+        archive.write(lines.encode("utf-8"))
+
+    history = search_archive(str(tmp_path), "mixture", 7)
+    assert [record["action"] for record in history] == ["UPDATE", "CREATE"]
+
+    db.session.execute(db.delete(AuditBlob))
+    db.session.commit()
+    assert restore_archive(str(tmp_path), "2025-01", "mixture", 7) == 2
+    assert restore_archive(str(tmp_path), "2025-01") == 0
+    assert db.session.get(AuditBlob, BLOB).content == "velký klasifikační log"
+    assert AuditLog.query.filter_by(entity_type="mixture", entity_id=7).count() == 2
+
+
+def test_cli_archive_uses_retention(app, runner, tmp_path):
+    app.config["AUDIT_ARCHIVE_DIR"] = str(tmp_path)
+    app.config["AUDIT_ARCHIVE_PAUSE"] = 0
+    _seed()
+    result = runner.invoke(args=["audit", "archive", "--older-than-days", "30"])
+    assert "Archivováno 3 záznamů" in result.output
+    assert "Smazáno 1 nepoužívaných bloků" in result.output
+    result = runner.invoke(args=["audit", "search", "substance", "3"])
+    assert json.loads(result.stdout.splitlines()[0])["changes"]["name"]["new"] == "B"
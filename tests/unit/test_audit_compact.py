@@ -0,0 +1,62 @@
+import json
+
+from app.extensions import db
+from app.models import AuditBlob, AuditLog, Mixture, Substance
+from app.services.audit_service import INLINE_MAX, compact_audit_log, load_blob
+
+BIG_LOG = [{"step": f"Krok {i}", "detail": "x" * 50} for i in range(40)]
+
+
+def test_derived_fields_are_hashed_and_deduplicated(app):
+    first, second = Mixture(name="Směs A"), Mixture(name="Směs B")
+    db.session.add_all([first, second])
+    db.session.commit()
+
+    for mixture in (first, second):
+        mixture.final_health_hazards = "H302, H315"
+        mixture.classification_log = BIG_LOG
+    db.session.commit()
+    assert first.final_health_hazards == "H302, H315"  # reklasifikace směs nejdřív načte
+    first.final_health_hazards = "H302, H319"
+    db.session.commit()
+
+    updates = AuditLog.query.filter_by(action="UPDATE", entity_id=first.id).order_by(AuditLog.id).all()
+    log_diff = updates[0].changes["classification_log"]
+    assert log_diff["derived"] and log_diff["old"] is None
+    assert json.loads(load_blob(log_diff["new"]["blob"])) == BIG_LOG
+    assert updates[1].changes["final_health_hazards"]["added"] == ["H319"]
+    assert updates[1].changes["final_health_hazards"]["removed"] == ["H315"]
+    assert all(len(json.dumps(log.changes)) < 1000 for log in updates)
+    # Stejný log u obou směsí a stejné seznamy kódů - každý obsah jen jednou
+    assert AuditBlob.query.count() == 3
+
+
+def test_compact_audit_log_converts_legacy_rows(app):
+    substance = Substance(name="Látka")
+    db.session.add(substance)
+    db.session.commit()
+    legacy = {
+        "name": {"old": "Stará", "new": "Látka"},
+        "scl_limits": {"old": None, "new": "y" * (INLINE_MAX + 1)},
+    }
+    db.session.add(AuditLog(entity_type="substance", entity_id=substance.id, action="UPDATE", changes=legacy))
+    db.session.commit()
+
+    assert compact_audit_log(batch_size=1)["updated"] == 1
+    row = AuditLog.query.filter_by(action="UPDATE").one()
+    assert row.changes["name"] == {"old": "Stará", "new": "Látka"}
+    assert load_blob(row.changes["scl_limits"]["new"]["blob"]) == "y" * (INLINE_MAX + 1)
+    assert compact_audit_log()["updated"] == 0
+
+
+def test_audit_page_renders_compact_diffs(app, admin_client):
+    mixture = Mixture(name="Směs")
+    db.session.add(mixture)
+    db.session.commit()
+    mixture.final_ghs_codes = "GHS07"
+    mixture.classification_log = BIG_LOG
+    db.session.commit()
+
+    html = admin_client.get("/admin/audit-log").get_data(as_text=True)
+    assert "+GHS07" in html
+    assert "přepočítáno" in html
@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.models import AuditLog, Mixture
+from app.monitoring.sql import track_queries
+from app.services.audit_history import audit_page
+
+NOW = datetime(2026, 10, 1, 12, 0, 0)
+
+
+def _logs(count, **values):
+    rows = [
+        # Po dvou se stejným časem - stránkování musí rozhodnout podle id
+        dict(dict(entity_type="mixture", entity_id=1, action="UPDATE", timestamp=NOW + timedelta(minutes=i // 2)), **values)
+        for i in range(count)
+    ]
+    db.session.execute(db.insert(AuditLog), rows)
+    db.session.commit()
+
+
+def test_keyset_pages_cover_all_rows_once(app):
+    _logs(25)
+    seen, cursor, pages = [], None, 0
+    while True:
+        rows, cursor = audit_page(entity_type="mixture", entity_id=1, cursor=cursor, limit=10)
+        seen.extend(rows)
+        pages += 1
+        if cursor is None:
+            break
+    assert pages == 3
+    assert len({log.id for log in seen}) == 25
+    assert [(log.timestamp, log.id) for log in seen] == sorted(((log.timestamp, log.id) for log in seen), reverse=True)
+
+
+def test_audit_page_filters(app):
+    _logs(4)
+    _logs(2, action="DELETE", entity_id=2)
+    assert len(audit_page(action="DELETE")[0]) == 2
+    assert len(audit_page(entity_type="mixture", entity_id=1)[0]) == 4
+    assert len(audit_page(since=NOW + timedelta(minutes=1))[0]) == 2
+    assert audit_page(until=NOW)[0] == []
+
+
+def test_mixture_history_is_loaded_on_demand(admin_client):
+    mixture = Mixture(name="Směs s historií")
+    db.session.add(mixture)
+    db.session.commit()
+    for index in range(3):
+        mixture.ph = float(index)
+        db.session.commit()
+
+    with track_queries() as stats:
+        assert admin_client.get(f"/mixture/{mixture.id}").status_code == 200
+    assert not any("audit_log" in sql for sql, _ in stats.statements)
+
+    first = admin_client.get(f"/mixture/{mixture.id}/history?limit=2").get_json()
+    assert [item["action"] for item in first["items"]] == ["UPDATE", "UPDATE"]
+    assert first["items"][0]["changes"]["ph"]["new"] == "2.0"
+    rest = admin_client.get(f"/mixture/{mixture.id}/history?limit=2&cursor={first['next_cursor']}").get_json()
+    assert [item["action"] for item in rest["items"]] == ["UPDATE", "CREATE"]
+    assert rest["next_cursor"] is None
+    assert admin_client.get(f"/mixture/{mixture.id}/history?cursor=x").status_code == 400
+
+
+def test_admin_audit_log_filters_and_next_page(admin_client):
+    _logs(60)
+    html = admin_client.get("/admin/audit-log?action=UPDATE&entity_type=mixture").get_data(as_text=True)
+    assert "Starší záznamy" in html
+    assert "cursor=" in html and "action=UPDATE" in html
@@ -0,0 +1,44 @@
+from app.extensions import db
+from app.models import AuditLog, Mixture, Substance
+from app.monitoring.sql import track_queries
+from app.services.audit_service import get_writer
+
+
+def _audit_inserts(stats):
+    return [sql for sql, _ in stats.statements if sql.startswith("INSERT INTO audit_log")]
+
+
+def test_flush_writes_audit_entries_in_one_insert(app):
+    with track_queries() as stats:
+        db.session.add_all([Substance(name=f"Látka {i}") for i in range(5)] + [Mixture(name="Směs")])
+        db.session.commit()
+    assert len(_audit_inserts(stats)) == 1
+    assert AuditLog.query.filter_by(action="CREATE").count() == 6
+
+    substance = Substance.query.filter_by(name="Látka 0").one()
+    substance.cas_number = "50-00-0"
+    db.session.commit()
+    update = AuditLog.query.filter_by(action="UPDATE").one()
+    assert update.changes == {"cas_number": {"old": None, "new": "50-00-0"}}
+
+
+def test_rollback_discards_audit_entries(app):
+    db.session.add(Substance(name="Zahozená"))
+    db.session.flush()
+    db.session.rollback()
+    assert AuditLog.query.count() == 0
+
+
+def test_async_mode_writes_after_commit(app):
+    app.config["AUDIT_WRITE_MODE"] = "async"
+    try:
+        with track_queries() as stats:
+            db.session.add_all([Substance(name=f"Async {i}") for i in range(3)])
+            db.session.commit()
+        assert _audit_inserts(stats) == []
+        get_writer().flush()
+        assert AuditLog.query.filter_by(entity_type="substance").count() == 3
+        assert get_writer().written == 3
+    finally:
+        get_writer().close()
+        app.config["AUDIT_WRITE_MODE"] = "transactional"
@@ -0,0 +1,46 @@
+import pytest
+from app.services.clp.scl import parse_scls
+from app.services.mixture_service import MixtureService
+from benchmarks.engine import compare, run_suite
+from benchmarks.generator import SyntheticCatalogue, seed_catalogue
+
+
+def test_generator_is_deterministic_and_scls_parse():
+    first = SyntheticCatalogue(seed=7).substances(300)
+    assert first == SyntheticCatalogue(seed=7).substances(300)
+
+    scls = [row["scl_limits"] for row in first if row["scl_limits"]]
+    assert scls
+    for value in scls:
+        assert parse_scls(value)
+    assert any(row.get("ate_oral") for row in first)
+    assert any(row.get("lc50_fish_96h") for row in first)
+
+
+@pytest.mark.parametrize("components,depth", [(10, 1), (40, 4), (9, 8)])
+def test_build_mixture_components_and_depth(app, components, depth):
+    catalogue = SyntheticCatalogue(seed=1)
+    ids = seed_catalogue(catalogue, 50)
+    mixture = catalogue.build_mixture(ids, components, depth, "Bench")
+
+    expanded = MixtureService.expand_mixture_components(mixture.id)
+    assert len(expanded) == components
+    assert 0 < sum(e["concentration"] for e in expanded) <= 100
+
+    levels, current = 1, mixture
+    while any(c.component_mixture for c in current.components):
+        current = next(c.component_mixture for c in current.components if c.component_mixture)
+        levels += 1
+    assert levels == min(depth, components)
+
+
+def test_run_suite_reports_all_benchmarks(app):
+    report = run_suite(sizes=(10,), depths=(1, 2), repeat=1)
+
+    names = {row["name"] for row in report["results"]}
+    assert names == {
+        "run_clp_classification", "expand_mixture_components", "parse_scls", "stage.ate",
+        "stage.health", "stage.env", "stage.euh", "stage.p_phrases",
+    }
+    assert all(row["median_ms"] >= 0 and "alloc_peak_kb" in row for row in report["results"])
+    assert {row["ratio"] is not None for row in compare(report, report)} == {True}
@@ -0,0 +1,91 @@
+import pytest
+
+from app import create_app
+from app.config import TestingConfig
+from app.db_routing import STICKY_KEY, get_router
+from app.extensions import db
+from app.models import Substance
+
+
+def _make_app(tmp_path, replica_url, **overrides):
+    class ReplicaConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'primary.db'}"
+        DATABASE_REPLICA_URLS = [replica_url]
+        SECRET_KEY = "test-key"
+        WTF_CSRF_ENABLED = False
+        METRICS_DIR = ""
+        SLOW_REQUEST_ENABLED = False
+
+    for key, value in overrides.items():
+        setattr(ReplicaConfig, key, value)
+    app = create_app(ReplicaConfig)
+
+    @app.route("/_names", methods=["GET", "POST"])
+    def names():
+        return {"names": [s.name for s in Substance.query.order_by(Substance.name)]}
+
+    return app
+
+
+@pytest.fixture
+def replica_app(tmp_path):
+    # Dvě SQLite databáze - obsah se liší, takže je vidět, odkud se četlo
+    app = _make_app(tmp_path, f"sqlite:///{tmp_path / 'replica.db'}")
+    with app.app_context():
+        db.create_all()
+        replica = get_router(app).replicas[0].engine
+        db.metadata.create_all(replica)
+        db.session.add(Substance(name="Primární"))
+        db.session.commit()
+        with replica.begin() as connection:
+            connection.execute(db.insert(Substance), [{"name": "Z repliky"}])
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def test_reads_go_to_replica_until_request_writes(replica_app):
+    with replica_app.test_request_context("/_names"):
+        replica_app.preprocess_request()
+        assert [s.name for s in Substance.query.all()] == ["Z repliky"]
+
+        db.session.add(Substance(name="Nová"))
+        db.session.flush()
+        assert sorted(s.name for s in Substance.query.all()) == ["Nová", "Primární"]
+        db.session.rollback()
+
+    with replica_app.test_request_context("/_names", method="POST"):
+        replica_app.preprocess_request()
+        assert [s.name for s in Substance.query.all()] == ["Primární"]
+
+
+def test_read_your_writes_after_post(replica_app):
+    client = replica_app.test_client()
+    client.environ_base["HTTP_X_FORWARDED_PROTO"] = "https"  # Talisman jinak přesměrovává
+    assert client.get("/_names").json["names"] == ["Z repliky"]
+
+    assert client.post("/_names").json["names"] == ["Primární"]
+    with client.session_transaction() as session:
+        assert STICKY_KEY in session
+    assert client.get("/_names").json["names"] == ["Primární"]
+
+    with client.session_transaction() as session:
+        session[STICKY_KEY] = 0
+    assert client.get("/_names").json["names"] == ["Z repliky"]
+
+
+def test_unavailable_replica_falls_back_to_primary(tmp_path):
+    app = _make_app(tmp_path, f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    with app.app_context():
+        db.create_all()
+        db.session.add(Substance(name="Primární"))
+        db.session.commit()
+
+        client = app.test_client()
+        client.environ_base["HTTP_X_FORWARDED_PROTO"] = "https"
+        assert client.get("/_names").json["names"] == ["Primární"]
+        [status] = get_router(app).status()
+        assert status["available"] is False
+        assert status["last_error"]
+        db.session.remove()
+        db.drop_all()
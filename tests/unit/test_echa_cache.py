@@ -0,0 +1,117 @@
+import time
+import pytest
+from app.extensions import db
+from app.services.echa_cache import EchaCache
+from app.services.echa_service import ECHAService
+
+
+def _service(stub, cache):
+    return ECHAService(base_url=stub.url, timeout=2, cache=cache)
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def cache(app):
+    return EchaCache(db.engine, ttl=3600, stale_ttl=3600)
+
+
+def test_repeat_lookup_is_served_from_memory(echa_stub, cache):
+    first = _service(echa_stub, cache).fetch_data("64-17-5")
+    requests_after_first = len(echa_stub.requests)
+
+    started = time.perf_counter()
+    second = _service(echa_stub, cache).fetch_data("64-17-5")
+    elapsed = time.perf_counter() - started
+
+    assert second == first
+    assert len(echa_stub.requests) == requests_after_first
+    assert elapsed < 0.01
+    assert cache.stats["hit"] == 8
+
+
+def test_cache_survives_restart(echa_stub, cache):
+    expected = _service(echa_stub, cache).fetch_data("64-17-5")
+    requests_after_first = len(echa_stub.requests)
+
+    # Nový proces = prázdné LRU, data se načtou z tabulky echa_cache
+    restarted = EchaCache(db.engine, ttl=3600, stale_ttl=3600)
+    assert _service(echa_stub, restarted).fetch_data("64-17-5") == expected
+    assert len(echa_stub.requests) == requests_after_first
+
+
+def test_stale_entry_is_served_and_revalidated_in_background(echa_stub, app):
+    cache = EchaCache(db.engine, ttl=0, stale_ttl=3600)
+    expected = _service(echa_stub, cache).fetch_data("64-17-5")
+
+    assert _service(echa_stub, cache).fetch_data("64-17-5") == expected
+    assert cache.stats["stale"] == 8
+    # Revalidace posílá If-None-Match a stub odpoví 304
+    assert _wait_for(lambda: cache.stats["revalidated"] == 8)
+    assert len(echa_stub.conditional) == 8
+
+
+def test_offline_fallback(echa_stub, app):
+    cache = EchaCache(db.engine, ttl=0, stale_ttl=0)
+    expected = _service(echa_stub, cache).fetch_data("64-17-5")
+    echa_stub.stop()
+
+    assert _service(echa_stub, cache).fetch_data("64-17-5") == expected
+    assert cache.stats["offline"] == 8
+
+
+def test_admin_purge_and_prewarm(admin_client, app, echa_stub):
+    app.config["ECHA_BASE_URL"] = echa_stub.url
+    response = admin_client.post("/admin/echa-cache/prewarm", data={"queries": "64-17-5"})
+    assert response.status_code == 302
+
+    cache = EchaCache.from_app(app)
+    assert cache.summary()["entries"] == 8
+    assert admin_client.get("/admin/echa-cache").status_code == 200
+
+    admin_client.post("/admin/echa-cache/purge", data={"scope": "all"})
+    assert cache.summary()["entries"] == 0
+
+
+def test_purge_clears_memory_of_other_processes(echa_stub, app):
+    worker_a = EchaCache(db.engine, ttl=3600, stale_ttl=3600, purge_check_seconds=0)
+    worker_b = EchaCache(db.engine, ttl=3600, stale_ttl=3600, purge_check_seconds=0)
+    _service(echa_stub, worker_b).fetch_data("64-17-5")
+    requests_after_first = len(echa_stub.requests)
+
+    worker_a.purge()
+
+    _service(echa_stub, worker_b).fetch_data("64-17-5")
+    assert len(echa_stub.requests) > requests_after_first
+    assert worker_b.stats["miss"] > 0
+
+
+def test_revalidation_uses_bounded_pool(app):
+    import threading
+    from types import SimpleNamespace
+
+    cache = EchaCache(db.engine, ttl=0, stale_ttl=3600, revalidate_workers=2)
+    stale = {"status_code": 200, "body": {"ok": True}, "etag": '"v1"', "last_modified": None,
+             "expires_at": time.time() - 1}
+    release = threading.Event()
+
+    def do_get(headers):
+        release.wait(5)
+        return SimpleNamespace(status_code=304, headers={})
+
+    for index in range(200):
+        cache._remember(f"key-{index}", dict(stale))
+        assert cache.fetch(f"key-{index}", None, do_get).json() == {"ok": True}
+
+    workers = [t for t in threading.enumerate() if t.name.startswith("echa-revalidate")]
+    assert len(workers) <= 2
+    assert len(cache._refreshing) == 2 * 32  # zbytek přeskočen, vrací se stale obsah
+    release.set()
+    assert _wait_for(lambda: not cache._refreshing)
@@ -0,0 +1,111 @@
+import time
+import pytest
+from app.extensions import db
+from app.models import Job, JobStatus, Mixture, MixtureComponent, Substance
+from app.services.echa_enrichment import TokenBucket, diff_substance, echa_to_substance_fields
+from app.services.job_service import JobService
+
+
+@pytest.fixture
+def enrich_app(app, echa_stub):
+    app.config["ECHA_BASE_URL"] = echa_stub.url
+    app.config["ECHA_ENRICH_BACKOFF"] = 0.01
+    app.config["ECHA_ENRICH_RATE"] = 1000
+    app.config["ECHA_HTTP_RETRIES"] = 0  # opakování testuje úroveň úlohy, ne transport
+    return app
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=20, capacity=1)
+    started = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    # První token je k dispozici hned, dalších 5 po 50 ms
+    assert time.monotonic() - started >= 0.2
+
+
+def test_mapping_and_diff_ignore_phrase_order():
+    fields = echa_to_substance_fields({
+        "h_phrases": ["H319", "H225", "H400"],
+        "ghs_symbols": ["GHS07", "GHS02"],
+        "is_svhc": True,
+        "ate_values": {"oral": 500},
+    })
+    assert fields["health_h_phrases"] == "H319"
+    assert fields["physical_h_phrases"] == "H225"
+    assert fields["env_h_phrases"] == "H400"
+    assert fields["ate_oral"] == 500
+
+    existing = {k: v for k, v in fields.items()}
+    existing["ghs_codes"] = "GHS07, GHS02"
+    assert diff_substance(existing, fields) == {}
+
+
+def test_enrichment_job_updates_and_reclassifies(enrich_app, echa_stub):
+    ethanol = Substance(name="Ethanol", cas_number="64-17-5", health_h_phrases="H319")
+    unknown = Substance(name="Neznámá", cas_number="50-00-0")
+    mixture = Mixture(name="Čistič")
+    db.session.add_all([ethanol, unknown, mixture])
+    db.session.flush()
+    db.session.add(MixtureComponent(mixture_id=mixture.id, substance_id=ethanol.id, concentration=30))
+    db.session.commit()
+
+    job = JobService.submit("echa_enrich")
+
+    assert job.status == JobStatus.SUCCEEDED
+    assert job.result["updated"] == 1
+    assert job.result["not_found"] == 1
+    assert job.result["affected_mixtures"] == 1
+    db.session.expire_all()
+    refreshed = db.session.get(Substance, ethanol.id)
+    assert refreshed.physical_h_phrases == "H225"
+    assert refreshed.ghs_codes == "GHS02, GHS07"
+    followup = db.session.get(Job, job.result["reclassify_job_id"])
+    assert followup.params == {"mixture_ids": [mixture.id]}
+
+
+def test_enrichment_bypasses_response_cache(enrich_app, echa_stub):
+    db.session.add(Substance(name="Ethanol", cas_number="64-17-5"))
+    db.session.commit()
+
+    JobService.submit("echa_enrich")
+    requests_after_first = len(echa_stub.requests)
+    JobService.submit("echa_enrich")
+
+    # Druhý běh se znovu ptá ECHA, i když by odpovědi byly v cache čerstvé
+    assert len(echa_stub.requests) == 2 * requests_after_first
+
+
+def test_enrichment_resumes_from_checkpoint(enrich_app, echa_stub):
+    echa_stub.add_substance("67-64-1", "100.000.602", "acetone", h_phrases=["H225"])
+    first = Substance(name="Ethanol", cas_number="64-17-5")
+    second = Substance(name="Aceton", cas_number="67-64-1")
+    db.session.add_all([first, second])
+    db.session.commit()
+
+    crashed = Job(kind="echa_enrich", status=JobStatus.FAILED, params={},
+                  result={"checkpoint": {"last_id": first.id, "processed": 1, "updated": 1,
+                                         "unchanged": 0, "not_found": 0, "failed": 0, "conflicts": 0,
+                                         "changed_ids": [], "errors": []}})
+    db.session.add(crashed)
+    db.session.commit()
+
+    job = JobService.submit("echa_enrich", {"resume_job_id": crashed.id})
+
+    assert job.result["processed"] == 2
+    assert job.result["updated"] == 2
+    assert "64-17-5" not in str(echa_stub.requests)
+    assert echa_stub.count("/api-substance/v1/substance/100.000.526") == 0
+
+
+def test_enrichment_retries_connection_errors(enrich_app, echa_stub):
+    db.session.add(Substance(name="Ethanol", cas_number="64-17-5"))
+    db.session.commit()
+    echa_stub.failures["/api-substance/v1/substance"] = 503
+
+    job = JobService.submit("echa_enrich")
+
+    assert job.result["failed"] == 1
+    assert len(job.result["errors"]) == 1
+    # 1 pokus + ECHA_ENRICH_MAX_RETRIES opakování
+    assert echa_stub.count("/api-substance/v1/substance") == 4
@@ -0,0 +1,43 @@
+import time
+from app.services.echa_service import ECHAService
+
+
+def _timed_fetch(service, query):
+    started = time.perf_counter()
+    result = service.fetch_data(query)
+    return result, time.perf_counter() - started
+
+
+def test_fetch_data_from_stub(echa_stub):
+    service = ECHAService(base_url=echa_stub.url, timeout=5)
+    result = service.fetch_data("64-17-5")
+
+    assert result["name"] == "ethanol"
+    assert result["h_phrases"] == ["H225", "H319"]
+    assert result["ghs_symbols"] == ["GHS02", "GHS07"]
+    # vyhledání, detail, klasifikace, 4 doplňující endpointy, povinnosti
+    assert len(echa_stub.requests) == 8
+
+
+def test_failing_endpoint_does_not_break_lookup(echa_stub):
+    echa_stub.failures["/api-cnl-inventory/harmonized/pictograms/C-100.000.526"] = 500
+    result = ECHAService(base_url=echa_stub.url, timeout=5).fetch_data("64-17-5")
+
+    assert "error" not in result
+    assert result["ghs_symbols"] == []
+    assert result["h_phrases"] == ["H225", "H319"]
+
+
+def test_parallel_fetch_reduces_latency(echa_stub):
+    # Každý požadavek trvá 100 ms: sekvenčně 8 round-tripů, souběžně 3 vlny
+    echa_stub.delay = 0.1
+    sequential, sequential_time = _timed_fetch(
+        ECHAService(base_url=echa_stub.url, timeout=5, max_concurrency=1), "64-17-5"
+    )
+    parallel, parallel_time = _timed_fetch(
+        ECHAService(base_url=echa_stub.url, timeout=5, max_concurrency=8), "64-17-5"
+    )
+
+    assert parallel == sequential
+    assert sequential_time >= 0.8
+    assert parallel_time < sequential_time * 0.6
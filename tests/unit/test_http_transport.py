@@ -0,0 +1,66 @@
+import time
+import pytest
+import requests
+from app.services.echa_service import ECHAService
+from app.services.http_transport import CircuitBreaker, CircuitOpenError, HttpTransport, get_transport
+
+
+def test_idempotent_get_is_retried_on_503(echa_stub):
+    echa_stub.failures["/api-substance/v1/substance"] = 503
+    transport = HttpTransport(retries=2, backoff=0)
+
+    response = transport.get(f"{echa_stub.url}/api-substance/v1/substance", endpoint="search", timeout=2)
+
+    assert response.status_code == 503
+    assert echa_stub.count("/api-substance/v1/substance") == 3
+    assert transport.metrics()["endpoints"]["search"]["errors"] == 1
+
+
+def test_breaker_fails_fast_after_consecutive_errors(echa_stub):
+    echa_stub.failures["/api-substance/v1/substance"] = 500
+    transport = HttpTransport(retries=0, failure_threshold=2, reset_timeout=60)
+    url = f"{echa_stub.url}/api-substance/v1/substance"
+
+    transport.get(url, timeout=2)
+    transport.get(url, timeout=2)
+    with pytest.raises(CircuitOpenError):
+        transport.get(url, timeout=2)
+
+    assert echa_stub.count() == 2
+    # fetch_data vrací chybu spojení, kterou lze opakovat později
+    service = ECHAService(base_url=echa_stub.url, transport=transport)
+    result = service.fetch_data("64-17-5")
+    assert result["retryable"] is True
+    assert echa_stub.count() == 2
+
+
+def test_breaker_half_open_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()          # jeden zkušební požadavek
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_fetch_data_records_endpoint_metrics(echa_stub):
+    transport = HttpTransport(retries=0)
+    ECHAService(base_url=echa_stub.url, timeout=5, transport=transport).fetch_data("64-17-5")
+
+    endpoints = transport.metrics()["endpoints"]
+    assert set(endpoints) == {
+        "search", "detail", "classifications", "obligations",
+        "pictograms", "labelling", "specific-concentration-limits", "acute-toxicity-estimates",
+    }
+    assert all(m["count"] == 1 and m["errors"] == 0 for m in endpoints.values())
+
+
+def test_shared_transport_reused_per_options():
+    first = get_transport("test", retries=1)
+    assert get_transport("test", retries=1) is first
+    assert get_transport("test", retries=2) is not first
+    assert isinstance(first.session, requests.Session)
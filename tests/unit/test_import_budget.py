@@ -0,0 +1,38 @@
+from benchmarks.importtime import (
+    IMPORT_BUDGET_MS, IMPORT_MODULE_BUDGET, LAZY_MODULES, parse_importtime, run_importtime, total_ms,
+)
+
+SAMPLE = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     _abc
+import time:       300 |        420 |   abc
+import time:        80 |        500 | app
+[2025-01-01 10:00:00] INFO in logging_config: start
+"""
+
+
+def test_parse_importtime_output():
+    records = parse_importtime(SAMPLE)
+    assert [(r.module, r.depth) for r in records] == [("_abc", 2), ("abc", 1), ("app", 0)]
+    assert records[-1].cumulative_us == 500
+    assert total_ms(records) == 0.5
+
+
+def test_create_app_stays_within_import_budget():
+    records = run_importtime(runs=3)
+    assert "app" in records
+
+    eager = [name for name in LAZY_MODULES if name in records]
+    assert not eager, f"Při startu se importují líně načítané moduly: {eager}"
+    assert len(records) <= IMPORT_MODULE_BUDGET, (
+        f"Start importuje {len(records)} modulů (rozpočet {IMPORT_MODULE_BUDGET}) - "
+        "python -m benchmarks.importtime ukáže, co přibylo"
+    )
+    assert total_ms(records.values()) <= IMPORT_BUDGET_MS
+
+
+def test_lazy_flask_migrate_resolves_on_first_use(app):
+    db_group = app.cli.commands["db"]
+    assert {"upgrade", "heads", "index-advisor"} <= set(db_group.list_commands(None))
+    assert app.extensions["migrate"].directory == "migrations"
+    assert type(app.extensions["migrate"]).__module__ == "flask_migrate"
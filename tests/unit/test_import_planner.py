@@ -0,0 +1,173 @@
+import io
+import pytest
+from app.extensions import db
+from app.models import ComponentType, Job, JobStatus, Mixture, MixtureComponent, Substance, User
+from app.models.audit import AuditBlob, AuditLog
+from app.services.import_planner import ImportPlanner
+from app.services.job_service import JobService
+from app.services.mixture_service import MixtureService
+
+
+@pytest.fixture
+def catalogue(app):
+    ethanol = Substance(name="Ethanol", cas_number="64-17-5", health_h_phrases="H319", ate_oral=7000)
+    acetone = Substance(name="Aceton", cas_number="67-64-1", health_h_phrases="H319")
+    db.session.add_all([ethanol, acetone])
+    db.session.commit()
+    return ethanol, acetone
+
+
+def _csv(text):
+    return io.BytesIO(text.encode("utf-8"))
+
+
+def test_plan_classifies_rows(catalogue):
+    rows, fields, errors, _ = ImportPlanner.rows_from_csv(_csv(
+        "name,cas_number,health_h_phrases\n"
+        "Ethanol,64-17-5,\"H225,H319\"\n"   # změna H-vět
+        "Aceton,67-64-1,H319\n"             # beze změny
+        "Voda,7732-18-5,\n"                 # nová látka
+        "Aceton,64-17-5,H319\n"             # CAS patří jiné látce než název
+    ))
+    assert errors == []
+    assert "ate_oral" not in fields
+
+    plan = ImportPlanner.plan(rows, fields)
+
+    assert [row["name"] for row in plan["inserts"]] == ["Voda"]
+    assert plan["unchanged"] == 1
+    assert len(plan["conflicts"]) == 1
+    (update,) = plan["updates"]
+    assert update["name"] == "Ethanol"
+    # Sloupec ate_oral v CSV chybí - nesmí se vynulovat
+    assert update["changes"] == {"health_h_phrases": {"old": "H319", "new": "H225,H319"}}
+
+
+def test_apply_updates_audits_and_finds_mixtures(catalogue):
+    ethanol, acetone = catalogue
+    inner = Mixture(name="Vnitřní")
+    outer = Mixture(name="Vnější")
+    db.session.add_all([inner, outer])
+    db.session.flush()
+    db.session.add_all([
+        MixtureComponent(mixture_id=inner.id, substance_id=ethanol.id, concentration=50),
+        MixtureComponent(mixture_id=outer.id, component_type=ComponentType.MIXTURE,
+                         component_mixture_id=inner.id, concentration=20),
+        MixtureComponent(mixture_id=outer.id, substance_id=acetone.id, concentration=10),
+    ])
+    db.session.commit()
+
+    rows, fields, _, _ = ImportPlanner.rows_from_csv(_csv("name,cas_number,ate_oral\nEthanol,64-17-5,5000\n"))
+    result = ImportPlanner.apply(ImportPlanner.plan(rows, fields), user_id=None)
+
+    assert result["updated"] == 1
+    db.session.expire_all()
+    assert db.session.get(Substance, ethanol.id).ate_oral == 5000
+    audit = db.session.execute(
+        db.select(AuditLog).filter_by(entity_id=ethanol.id, action="UPDATE")
+    ).scalar_one()
+    assert audit.changes["ate_oral"] == {"old": "7000.0", "new": "5000.0"}
+    assert MixtureService.find_affected_mixtures(result["substance_ids"]) == {inner.id, outer.id}
+
+
+def test_apply_writes_compact_audit_with_blobs(catalogue):
+    ethanol, _ = catalogue
+    scl_limits = "; ".join(f"Eye Irrit. 2: >= {value}" for value in range(1, 40))
+    plan = ImportPlanner.plan([{"name": "Ethanol", "scl_limits": scl_limits}], ["name", "scl_limits"])
+
+    ImportPlanner.apply(plan)
+
+    audit = db.session.execute(
+        db.select(AuditLog).filter_by(entity_id=ethanol.id, action="UPDATE")
+    ).scalar_one()
+    change = audit.changes["scl_limits"]
+    assert change["old"] is None
+    assert change["new"]["size"] == len(scl_limits)
+    assert db.session.get(AuditBlob, change["new"]["blob"]).content == scl_limits
+
+
+def test_apply_skips_rows_changed_since_planning(catalogue):
+    ethanol, _ = catalogue
+    rows, fields, _, _ = ImportPlanner.rows_from_csv(_csv("name,health_h_phrases\nEthanol,H225\n"))
+    plan = ImportPlanner.plan(rows, fields)
+
+    ethanol.health_h_phrases = "H226"
+    db.session.commit()
+
+    result = ImportPlanner.apply(plan)
+    assert result["updated"] == 0
+    assert len(result["conflicts"]) == 1
+    assert db.session.get(Substance, ethanol.id).health_h_phrases == "H226"
+
+
+def test_apply_skips_inserts_created_since_planning(catalogue):
+    rows, fields, _, _ = ImportPlanner.rows_from_csv(_csv(
+        "name,cas_number\nVoda,7732-18-5\nMethanol,67-56-1\nGlycerol,56-81-5\n"
+    ))
+    plan = ImportPlanner.plan(rows, fields)
+    assert len(plan["inserts"]) == 3
+
+    db.session.add_all([Substance(name="Voda"), Substance(name="Methylalkohol", cas_number="67-56-1")])
+    db.session.commit()
+
+    result = ImportPlanner.apply(plan)
+    assert result["inserted"] == 1
+    assert len(result["conflicts"]) == 2
+    assert db.session.execute(db.select(Substance).filter_by(name="Glycerol")).scalar_one()
+
+
+def test_plan_preview_and_apply_routes(admin_client, app, tmp_path, catalogue):
+    app.config["JOBS_RESULT_DIR"] = str(tmp_path / "job_results")
+    app.config["UPLOAD_SPOOL_DIR"] = str(tmp_path / "uploads")
+    payload = b'{"substances": [{"id": 99, "name": "Aceton", "cas_number": "67-64-1", "ate_oral": 5800}]}'
+
+    response = admin_client.post(
+        "/data/import/plan",
+        data={"file": (io.BytesIO(payload), "catalogue.json")},
+        content_type="multipart/form-data",
+    )
+    assert response.status_code == 302
+    plan_job = db.session.execute(db.select(Job).filter_by(kind="import_plan")).scalar_one()
+    assert plan_job.result["updates"] == 1
+
+    preview = admin_client.get(f"/data/import/plan/{plan_job.id}")
+    assert preview.status_code == 200
+    assert "Aceton".encode() in preview.data
+
+    status = admin_client.get(f"/jobs/{plan_job.id}").get_json()
+    assert "plan_file" not in status["result"]
+    assert status["preview_url"].endswith(f"/data/import/plan/{plan_job.id}")
+
+    assert admin_client.post(f"/data/import/plan/{plan_job.id}/apply").status_code == 302
+    db.session.expire_all()
+    assert db.session.get(Substance, catalogue[1].id).ate_oral == 5800
+
+
+def test_apply_job_validates_plan_job(app, tmp_path):
+    owner, other = User(username="autor"), User(username="jiny")
+    for user in (owner, other):
+        user.set_password("heslo")
+    db.session.add_all([owner, other])
+    db.session.flush()
+    plan_file = tmp_path / "plan.json"
+    plan_file.write_text('{"inserts": [], "updates": []}', encoding="utf-8")
+    finished = Job(kind="import_plan", status=JobStatus.SUCCEEDED, user_id=owner.id,
+                   result={"plan_file": str(plan_file)})
+    running = Job(kind="import_plan", status=JobStatus.RUNNING, user_id=owner.id)
+    export = Job(kind="export_json", status=JobStatus.SUCCEEDED, user_id=owner.id)
+    db.session.add_all([finished, running, export])
+    db.session.commit()
+
+    cases = [
+        (99999, owner.id, "neexistuje"),
+        (export.id, owner.id, "neexistuje"),
+        (running.id, owner.id, "není dokončený"),
+        (finished.id, other.id, "jinému uživateli"),
+    ]
+    for plan_job_id, user_id, message in cases:
+        job = JobService.submit("import_apply", {"plan_job_id": plan_job_id}, user_id=user_id)
+        assert job.status == JobStatus.FAILED
+        assert message in job.error
+
+    job = JobService.submit("import_apply", {"plan_job_id": finished.id}, user_id=owner.id)
+    assert job.status == JobStatus.SUCCEEDED
@@ -0,0 +1,29 @@
+from app.extensions import db
+from app.monitoring.index_advisor import HOT_QUERIES, plan_issues, run_advisor
+
+
+def test_plan_issues_sqlite():
+    plan = [
+        "SCAN mixture_component",
+        "SEARCH substance USING INDEX ix_substance_cas_number (cas_number=?)",
+        "SCAN mixture USING INDEX ix_mixture_created_date",
+        "USE TEMP B-TREE FOR ORDER BY",
+    ]
+    assert plan_issues("sqlite", plan) == ["sekvenční průchod tabulkou mixture_component", "třídění mimo index"]
+
+
+def test_plan_issues_postgresql():
+    plan = [
+        "Limit  (cost=10.1..10.2 rows=20 width=4)",
+        "  ->  Sort  (cost=10.1..10.5 rows=150 width=4)",
+        "        ->  Seq Scan on mixture  (cost=0.00..6.50 rows=150 width=4)",
+        "  ->  Index Scan using ix_mixture_component_mixture on mixture_component",
+    ]
+    assert plan_issues("postgresql", plan) == ["třídění mimo index", "sekvenční průchod tabulkou mixture"]
+
+
+def test_hot_queries_use_indexes(app):
+    report = run_advisor(db.session)
+
+    assert [item["name"] for item in report] == [name for name, _, _ in HOT_QUERIES]
+    assert {item["name"]: item["issues"] for item in report if item["issues"]} == {}
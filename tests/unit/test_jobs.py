@@ -0,0 +1,84 @@
+import io
+import pytest
+from app.extensions import db
+from app.models import Job, JobStatus, Mixture, Substance
+from app.services.job_service import JobService
+
+
+@pytest.fixture(autouse=True)
+def job_dirs(app, tmp_path):
+    app.config["JOBS_RESULT_DIR"] = str(tmp_path / "job_results")
+    app.config["UPLOAD_SPOOL_DIR"] = str(tmp_path / "uploads")
+
+
+def test_submit_eager_runs_reclassification(app):
+    db.session.add_all([Mixture(name="Směs A"), Mixture(name="Směs B")])
+    db.session.commit()
+
+    job = JobService.submit("reclassify_mixtures")
+
+    assert job.status == JobStatus.SUCCEEDED
+    assert job.result == {"mixtures": 2}
+    assert job.percent == 100
+
+
+def test_unknown_kind_is_rejected(app):
+    with pytest.raises(ValueError):
+        JobService.submit("neexistuje")
+
+
+def test_queued_job_is_claimed_once_and_can_be_cancelled(app):
+    app.config["JOBS_EAGER"] = False
+    first = JobService.submit("reclassify_mixtures")
+    second = JobService.submit("reclassify_mixtures")
+    assert first.status == JobStatus.QUEUED
+
+    assert JobService.claim_next("w1") == first.id
+    assert JobService.claim_next("w2") == second.id
+    assert JobService.claim_next("w3") is None
+
+    third = JobService.submit("reclassify_mixtures")
+    JobService.request_cancel(third.id)
+    assert db.session.get(Job, third.id).status == JobStatus.CANCELLED
+    assert JobService.claim_next("w1") is None
+
+
+def test_failed_handler_marks_job_failed(app):
+    job = JobService.submit("import_json", {"upload_id": "0" * 32})
+
+    assert job.status == JobStatus.FAILED
+    assert job.error
+
+
+def test_export_csv_job_download(admin_client, app):
+    db.session.add(Substance(name="Ethanol", cas_number="64-17-5"))
+    db.session.commit()
+
+    response = admin_client.post("/data/export/substances/csv")
+    assert response.status_code == 302
+    job_id = int(response.headers["Location"].rstrip("/").split("/")[-2])
+
+    status = admin_client.get(f"/jobs/{job_id}").get_json()
+    assert status["status"] == JobStatus.SUCCEEDED
+    assert "file" not in status["result"]
+    assert status["result"]["substances"] == 1
+
+    download = admin_client.get(status["download_url"])
+    assert download.status_code == 200
+    assert b"Ethanol" in download.data
+
+
+def test_json_import_job(admin_client, app):
+    payload = b'{"substances": [{"name": "Voda", "cas_number": "7732-18-5"}], "mixtures": []}'
+    response = admin_client.post(
+        "/data/import",
+        data={"file": (io.BytesIO(payload), "backup.json")},
+        content_type="multipart/form-data",
+    )
+    assert response.status_code == 302
+
+    job = db.session.execute(db.select(Job).order_by(Job.id.desc())).scalar()
+    assert job.kind == "import_json"
+    assert job.status == JobStatus.SUCCEEDED
+    assert job.result["substances"] == 1
+    assert db.session.execute(db.select(Substance).filter_by(name="Voda")).scalar() is not None
@@ -0,0 +1,68 @@
+import json
+
+from app.extensions import db
+from app.models import CacheGeneration, Mixture, Substance
+from app.services.mixture_service import MIXTURE_CHOICES, SUBSTANCE_CHOICES
+from app.services.local_cache import _origin, bump_generations, get_registry
+
+
+def _generation(kind):
+    row = db.session.get(CacheGeneration, kind)
+    return row.generation if row else 0
+
+
+def _loader(calls, value):
+    def load():
+        calls.append(value)
+        return value
+    return load
+
+
+def test_write_bumps_generation_in_same_transaction(app):
+    db.session.add(Substance(name="Ethanol"))
+    db.session.rollback()
+    assert _generation("substance") == 0
+
+    db.session.add(Substance(name="Ethanol"))
+    db.session.add(Mixture(name="Směs"))
+    db.session.commit()
+    assert _generation("substance") == 1
+    assert _generation("mixture") == 1
+
+    # Hromadný UPDATE mimo flush také zvyšuje generaci
+    db.session.execute(db.update(Substance).values(cas_number="64-17-5"))
+    db.session.commit()
+    assert _generation("substance") == 2
+    assert _generation("mixture") == 1
+
+
+def test_change_from_other_process_invalidates_dependent_cache(app):
+    calls = []
+    with app.test_request_context():
+        assert SUBSTANCE_CHOICES.get_or_load("all", _loader(calls, ["a"])) == ["a"]
+        assert MIXTURE_CHOICES.get_or_load("all", _loader(calls, ["m"])) == ["m"]
+    with app.test_request_context():
+        assert SUBSTANCE_CHOICES.get_or_load("all", _loader(calls, ["b"])) == ["a"]
+    db.session.commit()
+
+    # Jiný worker zapsal látku - tento proces se to dozví z tabulky generací
+    with db.engine.begin() as connection:
+        bump_generations(connection, ["substance"])
+    with app.test_request_context():
+        assert SUBSTANCE_CHOICES.get_or_load("all", _loader(calls, ["c"])) == ["c"]
+        assert MIXTURE_CHOICES.get_or_load("all", _loader(calls, ["n"])) == ["m"]
+    assert calls == [["a"], ["m"], ["c"]]
+
+
+def test_redis_message_invalidates_only_foreign_origin(app):
+    registry = get_registry(app)
+    calls = []
+    MIXTURE_CHOICES.get_or_load("all", _loader(calls, ["m"]))
+    known = registry.status()["generations"].get("mixture", 0)
+
+    registry.handle_message(json.dumps({"origin": _origin(), "generations": {"mixture": known + 1}}))
+    assert registry.status()["segments"]["mixture_form_mixtures"] == 1
+
+    registry.handle_message(json.dumps({"origin": "jiny-host:1", "generations": {"mixture": known + 1}}))
+    assert registry.status()["segments"]["mixture_form_mixtures"] == 0
+    assert registry.status()["generations"]["mixture"] == known + 1
@@ -0,0 +1,55 @@
+from app.monitoring import memory
+
+
+def _allocate():
+    return [bytearray(1024) for _ in range(500)]
+
+
+def test_snapshot_diff_shows_allocation_site():
+    memory.start()
+    try:
+        before = memory.take_snapshot("před")
+        kept = _allocate()
+        after = memory.take_snapshot("po")
+        diff = memory.compare(before["id"], after["id"])
+        assert diff[0]["size_diff"] >= 500 * 1024
+        assert "test_memory_diagnostics.py" in diff[0]["location"]
+        assert memory.top(after["id"])
+        assert [s["label"] for s in memory.status()["snapshots"]][-2:] == ["před", "po"]
+        del kept
+    finally:
+        memory.stop()
+    status = memory.status()
+    assert not status["tracing"] and status["snapshots"] == []
+
+
+def test_measure_block_reports_growth():
+    kept = None
+    with memory.measure_block() as result:
+        kept = _allocate()
+    assert result["traced_growth"] >= 500 * 1024
+    assert result["traced_peak"] >= result["traced_growth"]
+    assert "test_memory_diagnostics.py" in result["top_growth"][0]["location"]
+    assert not memory.status()["tracing"]
+    del kept
+
+
+def test_growth_trend_ignores_warmup():
+    flat = memory.growth_trend([0, 5000, 9000, 9000, 9010, 8990, 9000], warmup=3)
+    assert abs(flat["slope"]) < 10
+    leaking = memory.growth_trend([100, 200, 300, 400], warmup=0)
+    assert leaking["slope"] == 100
+    assert leaking["growth"] == 300
+
+
+def test_admin_memory_page(admin_client):
+    try:
+        assert admin_client.post("/admin/memory/start").status_code == 302
+        admin_client.post("/admin/memory/snapshot", data={"label": "první"})
+        admin_client.post("/admin/memory/snapshot", data={"label": "druhý"})
+        response = admin_client.get("/admin/memory")
+        assert response.status_code == 200
+        html = response.get_data(as_text=True)
+        assert "první" in html and "Nárůst mezi snapshoty" in html
+    finally:
+        memory.stop()
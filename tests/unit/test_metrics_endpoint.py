@@ -0,0 +1,97 @@
+import json
+import os
+
+from app.monitoring import MetricsRegistry
+from app.monitoring.exporter import AGGREGATE_FILE, MetricsStore, render_prometheus
+from app.services.job_service import JobService
+
+
+def test_metrics_endpoint_exposes_request_and_job_metrics(app, client):
+    assert client.get("/health", headers={"X-Forwarded-Proto": "https"}).status_code == 200
+    JobService.submit("reclassify_mixtures", {"mixture_ids": []})
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain; version=0.0.4")
+    body = response.get_data(as_text=True)
+    assert "# TYPE http_request_duration_seconds histogram" in body
+    assert 'http_request_duration_seconds_bucket{endpoint="health.health_check",method="GET",status="200",le="+Inf"}' in body
+    assert 'jobs_finished_total{kind="reclassify_mixtures",status="succeeded"}' in body
+    assert 'job_duration_seconds_count{kind="reclassify_mixtures"}' in body
+
+
+def test_metrics_endpoint_is_not_rate_limited(client):
+    statuses = {client.get("/metrics").status_code for _ in range(60)}
+    assert statuses == {200}
+
+
+def test_metrics_token_required_when_configured(app, client):
+    app.config["METRICS_TOKEN"] = "scrape-secret"
+    assert client.get("/metrics").status_code == 401
+    response = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+    assert response.status_code == 200
+
+
+def test_store_aggregates_processes(tmp_path):
+    registry = MetricsRegistry()
+    registry.counter("jobs_finished_total", "Úlohy", labels=("kind", "status")).inc(kind="export_json", status="succeeded")
+    registry.gauge("db_pool_checked_out", "Pool").set(2)
+    store = MetricsStore(str(tmp_path), registry=registry)
+
+    # Snapshot jiného (už skončeného) workeru
+    dead = MetricsRegistry()
+    dead.counter("jobs_finished_total", "Úlohy", labels=("kind", "status")).inc(3, kind="export_json", status="succeeded")
+    dead.gauge("db_pool_checked_out", "Pool").set(5)
+    with open(os.path.join(tmp_path, "metrics_999999999.json"), "w") as f:
+        json.dump({"pid": 999999999, "metrics": dead.snapshot()}, f)
+
+    merged = store.collect()
+    assert merged["jobs_finished_total"]["samples"][0]["value"] == 4
+    assert merged["db_pool_checked_out"]["samples"][0]["value"] == 2  # gauge jen od živých procesů
+    assert os.path.exists(os.path.join(tmp_path, f"metrics_{os.getpid()}.json"))
+
+
+def test_dead_process_snapshots_are_compacted(tmp_path):
+    registry = MetricsRegistry()
+    registry.counter("jobs_finished_total", "Úlohy", labels=("kind", "status")).inc(kind="export_json", status="succeeded")
+    store = MetricsStore(str(tmp_path), registry=registry)
+
+    for pid in (999999998, 999999999):
+        dead = MetricsRegistry()
+        dead.counter("jobs_finished_total", "Úlohy", labels=("kind", "status")).inc(2, kind="export_json", status="succeeded")
+        dead.gauge("db_pool_checked_out", "Pool").set(5)
+        with open(os.path.join(tmp_path, f"metrics_{pid}.json"), "w") as f:
+            json.dump({"pid": pid, "token": "stary", "metrics": dead.snapshot()}, f)
+
+    assert store.collect()["jobs_finished_total"]["samples"][0]["value"] == 5
+    assert sorted(os.listdir(tmp_path)) == sorted([AGGREGATE_FILE, f"metrics_{os.getpid()}.json", ".metrics.lock"])
+    with open(os.path.join(tmp_path, AGGREGATE_FILE)) as f:
+        assert "db_pool_checked_out" not in json.load(f)["metrics"]
+
+    # Opakovaný scrape nic nezapočítá dvakrát
+    assert store.collect()["jobs_finished_total"]["samples"][0]["value"] == 5
+
+
+def test_reused_pid_does_not_overwrite_dead_counters(tmp_path):
+    dead = MetricsRegistry()
+    dead.counter("jobs_finished_total", "Úlohy", labels=("kind", "status")).inc(3, kind="export_json", status="succeeded")
+    with open(os.path.join(tmp_path, f"metrics_{os.getpid()}.json"), "w") as f:
+        json.dump({"pid": os.getpid(), "token": "predchozi-proces", "metrics": dead.snapshot()}, f)
+
+    registry = MetricsRegistry()
+    registry.counter("jobs_finished_total", "Úlohy", labels=("kind", "status")).inc(kind="export_json", status="succeeded")
+    merged = MetricsStore(str(tmp_path), registry=registry).collect()
+    assert merged["jobs_finished_total"]["samples"][0]["value"] == 4
+
+
+def test_render_histogram_is_cumulative():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Latence", labels=("endpoint",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value, endpoint='a"b')
+
+    text = render_prometheus(registry.snapshot())
+    assert 'latency_seconds_bucket{endpoint="a\\"b",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{endpoint="a\\"b",le="1"} 3' in text
+    assert 'latency_seconds_bucket{endpoint="a\\"b",le="+Inf"} 4' in text
+    assert 'latency_seconds_count{endpoint="a\\"b"} 4' in text
@@ -0,0 +1,96 @@
+import pytest
+from flask import g
+
+from app.extensions import db
+from app.models import ComponentType, Mixture, MixtureComponent, Substance
+from app.monitoring.sql import assert_max_queries, track_queries
+
+
+def _mixture_with_components(substances, nested):
+    mixture = Mixture(name=f"Směs {substances}/{nested}")
+    db.session.add(mixture)
+    db.session.flush()
+    for index in range(substances):
+        substance = Substance(name=f"Látka {substances}-{index}", cas_number=f"{substances}{index}-00-0")
+        db.session.add(substance)
+        db.session.flush()
+        db.session.add(MixtureComponent(
+            mixture_id=mixture.id, component_type=ComponentType.SUBSTANCE,
+            substance_id=substance.id, concentration=1.0,
+        ))
+    for index in range(nested):
+        inner = Mixture(name=f"Vnořená {substances}-{index}")
+        db.session.add(inner)
+        db.session.flush()
+        db.session.add(MixtureComponent(
+            mixture_id=mixture.id, component_type=ComponentType.MIXTURE,
+            component_mixture_id=inner.id, concentration=1.0,
+        ))
+    db.session.commit()
+    return mixture.id
+
+
+def _fresh_request_state():
+    # Testy sdílí s požadavky app context: zahodit identity map i uživatele uloženého v g,
+    # aby se počítaly stejné dotazy jako u samostatného požadavku
+    g.pop("_login_user", None)
+    db.session.expunge_all()
+
+
+def test_track_queries_counts_nested_blocks(app):
+    with track_queries() as outer:
+        db.session.execute(db.text("SELECT 1"))
+        with track_queries() as inner:
+            db.session.execute(db.text("SELECT 2"))
+    assert (outer.count, inner.count) == (2, 1)
+    assert outer.seconds >= inner.seconds
+
+
+def test_assert_max_queries_reports_statements(app):
+    with pytest.raises(AssertionError, match="nejvýš 1 SQL dotazů, provedeno 2"):
+        with assert_max_queries(1):
+            db.session.execute(db.text("SELECT 1"))
+            db.session.execute(db.text("SELECT 2"))
+
+
+def test_mixture_detail_query_count_does_not_grow_with_components(admin_client):
+    small = _mixture_with_components(2, 1)
+    large = _mixture_with_components(12, 4)
+
+    counts = []
+    for mixture_id in (small, large):
+        _fresh_request_state()
+        with track_queries() as stats:
+            assert admin_client.get(f"/mixture/{mixture_id}").status_code == 200
+        counts.append(stats.count)
+    assert counts[0] == counts[1]
+
+    _fresh_request_state()
+    with assert_max_queries(4):
+        admin_client.get(f"/mixture/{large}")
+
+
+def test_substance_delete_query_budget(admin_client):
+    mixture_id = _mixture_with_components(10, 0)
+    used = db.session.get(Mixture, mixture_id).components[0].substance_id
+    free = Substance(name="Nepoužitá", cas_number="50-00-0")
+    db.session.add(free)
+    db.session.commit()
+    free_id = free.id
+    _fresh_request_state()
+
+    with assert_max_queries(6):
+        admin_client.post(f"/substance/{used}/delete")
+    assert db.session.get(Substance, used) is not None
+
+    _fresh_request_state()
+    with assert_max_queries(6):  # včetně zvýšení generace cache (local_cache)
+        admin_client.post(f"/substance/{free_id}/delete")
+    assert db.session.get(Substance, free_id) is None
+
+
+def test_query_header_in_development_mode(app, admin_client):
+    app.config["SQL_QUERY_HEADER"] = True
+    response = admin_client.get("/health")
+    assert int(response.headers["X-SQL-Queries"]) >= 1
+    assert response.headers["Server-Timing"].startswith("sql;dur=")
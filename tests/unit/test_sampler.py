@@ -0,0 +1,61 @@
+import os
+import threading
+import time
+
+from app.monitoring import sampler as profiler_sampler
+from app.monitoring.sampler import StackSampler, render_flamegraph
+
+
+def _burn(seconds):
+    deadline = time.monotonic() + seconds
+    total = 0
+    while time.monotonic() < deadline:
+        total += sum(range(200))
+    return total
+
+
+def test_sampler_records_busy_thread_stacks(tmp_path):
+    worker = threading.Thread(target=_burn, args=(0.4,))
+    worker.start()
+    sampler = StackSampler(interval=0.002, seconds=0.2, output_dir=str(tmp_path))
+    sampler.start()
+    sampler.join()
+    worker.join()
+
+    assert sampler.samples > 10
+    assert any(stack.endswith("test_sampler:_burn") for stack in sampler.stacks)
+    assert sorted(os.listdir(tmp_path)) == sorted(sampler.files)
+    collapsed = (tmp_path / sampler.files[0]).read_text(encoding="utf-8")
+    assert collapsed.splitlines()[0].rsplit(" ", 1)[1].isdigit()
+
+
+def test_flamegraph_widths_follow_sample_counts():
+    svg = render_flamegraph({"app:main;app:slow": 3, "app:main;app:fast": 1}, width=400)
+    assert svg.startswith("<svg")
+    assert 'width="300.00"' in svg  # app:slow = 3/4 šířky
+    assert 'width="100.00"' in svg
+    assert "app:slow (3 vzorků, 75.0 %)" in svg
+
+
+def test_admin_profiler_for_n_requests(app, admin_client, tmp_path):
+    app.config.update({"PROFILER_DIR": str(tmp_path), "PROFILER_INTERVAL_MS": 1})
+
+    response = admin_client.post("/admin/profiler/start", data={"mode": "requests", "value": "2"})
+    assert response.status_code == 302
+    sampler = profiler_sampler.current_sampler()
+    assert sampler.is_alive() and sampler.requests_left == 2
+
+    # Druhé spuštění ve stejném procesu se odmítne
+    admin_client.post("/admin/profiler/start", data={"mode": "seconds", "value": "5"})
+    assert profiler_sampler.current_sampler() is sampler
+
+    admin_client.get("/health")
+    admin_client.get("/health")
+    sampler.join(timeout=5)
+    assert not sampler.is_alive()
+
+    page = admin_client.get("/admin/profiler")
+    assert sampler.files[1].encode() in page.data
+    svg = admin_client.get(f"/admin/profiler/files/{sampler.files[1]}")
+    assert svg.status_code == 200 and svg.data.startswith(b"<svg")
+    assert admin_client.get("/admin/profiler/files/..%2Fconfig.py").status_code == 404
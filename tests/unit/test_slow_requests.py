@@ -0,0 +1,91 @@
+import os
+
+from app.extensions import db
+from app.constants.clp import PhysicalState, UserType
+from app.models import Mixture, Substance
+from app.monitoring import NULL_TIMER, resolve_timer
+from app.monitoring.slow_requests import SlowRequestStore
+
+
+def _enable(app, tmp_path, **overrides):
+    settings = {
+        "SLOW_REQUEST_ENABLED": True,
+        "SLOW_REQUEST_DIR": str(tmp_path),
+        "SLOW_REQUEST_THRESHOLD_MS": 0,
+        "SLOW_REQUEST_SAMPLE_RATE": 0.0,
+        "SLOW_REQUEST_PROFILE": "sampled",
+    }
+    app.config.update(settings, **overrides)
+    app.extensions.pop("slow_request_store", None)
+    return SlowRequestStore.from_app(app)
+
+
+def test_slow_request_captures_sql_and_stages(app, admin_client, tmp_path):
+    substance = Substance(name="Ethanol", cas_number="64-17-5", physical_h_phrases="H225", health_h_phrases="H319")
+    mixture = Mixture(name="Pomalá směs")
+    db.session.add_all([substance, mixture])
+    db.session.commit()
+    store = _enable(app, tmp_path, CLP_STAGE_TIMING="metrics")
+
+    response = admin_client.post(f"/mixture/{mixture.id}/edit", data={
+        "name": "Pomalá směs",
+        "physical_state": PhysicalState.LIQUID.value,
+        "user_type": UserType.PROFESSIONAL.value,
+        "component_type": "substance",
+        "substance_id": str(substance.id),
+        "concentration": "40",
+    })
+    assert response.status_code == 302
+
+    records = [r for r in store.list() if r["endpoint"] == "mixtures.edit"]
+    assert len(records) == 1
+    assert records[0]["reason"] == "threshold" and not records[0]["profiled"]
+
+    record = store.load(records[0]["name"])
+    assert record["sql_count"] >= 1
+    assert any("mixture" in q["statement"] for q in record["sql"])
+    assert "health" in record["stages"][0]["stages"]
+
+    page = admin_client.get(f"/admin/slow-requests/{records[0]['name']}")
+    assert page.status_code == 200
+    assert "Kroky klasifikace".encode() in page.data
+
+
+def test_sampled_request_is_profiled_and_directory_rotates(app, admin_client, tmp_path):
+    store = _enable(app, tmp_path, SLOW_REQUEST_THRESHOLD_MS=60_000, SLOW_REQUEST_SAMPLE_RATE=1.0,
+                    SLOW_REQUEST_MAX_FILES=3)
+
+    for _ in range(5):
+        admin_client.get("/health")
+
+    records = store.list()
+    assert len(records) == 3
+    assert all(r["reason"] == "sample" and r["profiled"] for r in records)
+    assert "cumulative" in store.load(records[0]["name"])["profile"]
+    assert len([n for n in os.listdir(tmp_path) if n.endswith(".json")]) == 3
+
+
+def test_fast_requests_are_not_recorded(app, admin_client, tmp_path):
+    store = _enable(app, tmp_path, SLOW_REQUEST_THRESHOLD_MS=60_000)
+    admin_client.get("/health")
+    assert store.list() == []
+    assert admin_client.get("/admin/slow-requests/../../etc/passwd").status_code == 404
+
+
+def _request_timer(app):
+    with app.app_context(), app.test_request_context("/health", headers={"X-Forwarded-Proto": "https"}):
+        app.preprocess_request()
+        return resolve_timer()
+
+
+def test_configured_stage_timing_mode_is_kept(app, tmp_path):
+    _enable(app, tmp_path, CLP_STAGE_TIMING="log")
+    assert _request_timer(app).attach_to_log
+
+    app.config["CLP_STAGE_TIMING"] = "off"
+    assert _request_timer(app) is NULL_TIMER
+
+    # Vypnuté časování se zapne jen u náhodně vybraného požadavku
+    app.config["SLOW_REQUEST_SAMPLE_RATE"] = 1.0
+    timer = _request_timer(app)
+    assert timer is not NULL_TIMER and not timer.attach_to_log
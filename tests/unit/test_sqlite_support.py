@@ -0,0 +1,73 @@
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.sqlite_support import FairWriterLock, install_pragmas, install_writer_lock, sqlite_pragmas
+
+
+def test_writer_lock_is_fifo_and_reentrant():
+    lock = FairWriterLock(timeout=5)
+    lock.acquire()
+    assert lock.acquire() == 0.0  # reentrantní pro stejné vlákno
+
+    order = []
+
+    def writer(name):
+        lock.acquire()
+        order.append(name)
+        lock.release()
+
+    threads = []
+    for name in ("a", "b", "c"):
+        thread = threading.Thread(target=writer, args=(name,))
+        thread.start()
+        threads.append(thread)
+        while lock.waiting < len(threads):
+            time.sleep(0.001)
+
+    lock.release()
+    assert lock.status()["busy"]  # pořád drží vnější acquire
+    lock.release()
+    for thread in threads:
+        thread.join(5)
+    assert order == ["a", "b", "c"]
+    assert lock.status() == {"waiting": 0, "acquired": 4, "timeouts": 0, "busy": False}
+
+
+def test_writer_lock_timeout():
+    lock = FairWriterLock(timeout=0.05)
+    holder = threading.Thread(target=lock.acquire)
+    holder.start()
+    holder.join()
+
+    with pytest.raises(TimeoutError):
+        lock.acquire()
+    assert lock.status()["timeouts"] == 1
+    assert lock.waiting == 0
+
+
+def test_pragmas_and_writer_lock_on_file_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'clp.db'}")
+    install_pragmas(engine, sqlite_pragmas({"SQLITE_BUSY_TIMEOUT_MS": 1234}))
+    lock = FairWriterLock(timeout=5)
+    install_writer_lock(engine, lock)
+
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert connection.execute(text("PRAGMA busy_timeout")).scalar() == 1234
+        assert connection.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+
+        connection.execute(text("CREATE TABLE t (x INTEGER)"))
+        assert lock.status()["busy"]
+        connection.commit()
+        assert not lock.status()["busy"]
+
+        connection.execute(text("SELECT 1"))  # čtení frontou neprochází
+        assert lock.status()["acquired"] == 1
+
+        connection.execute(text("INSERT INTO t VALUES (1)"))
+        connection.rollback()
+    assert lock.status() == {"waiting": 0, "acquired": 2, "timeouts": 0, "busy": False}
+    engine.dispose()
@@ -0,0 +1,59 @@
+from flask import g
+from app.monitoring import NULL_TIMER, MetricsRegistry, StageTimer, resolve_timer
+from app.monitoring.metrics import merge_snapshots
+from app.monitoring.timing import stage_histogram
+from app.services.clp import run_clp_classification
+from benchmarks.generator import SyntheticCatalogue, seed_catalogue
+
+
+def _nested_mixture():
+    catalogue = SyntheticCatalogue(seed=3)
+    ids = seed_catalogue(catalogue, 20)
+    return catalogue.build_mixture(ids, 12, 3, "Timed")
+
+
+def test_timing_disabled_by_default(app):
+    assert resolve_timer() is NULL_TIMER
+    mixture = _nested_mixture()
+    run_clp_classification(mixture)
+    assert all(entry["step"] != "Časování kroků" for entry in mixture.classification_log)
+
+
+def test_stage_timings_attached_to_log_and_metrics(app):
+    mixture = _nested_mixture()
+    registry = MetricsRegistry()
+    timer = StageTimer(attach_to_log=True, registry=registry)
+
+    run_clp_classification(mixture, timing=timer)
+
+    entry = mixture.classification_log[-1]
+    assert entry["step"] == "Časování kroků"
+    summary = entry["timing"]
+    assert set(summary["stages"]) == {"expand", "ate", "health", "env", "physical", "euh", "p_phrases"}
+    assert summary["components"] == 5  # 4 látky + vnořená směs
+    assert summary["substances"] == 12
+    assert summary["total"]["wall_ms"] >= summary["stages"]["health"]["wall_ms"]
+
+    histogram = stage_histogram(registry)
+    assert histogram.count(stage="total") == 1
+    assert histogram.count(stage="expand") == 1
+
+
+def test_timing_mode_per_request_overrides_config(app):
+    app.config["CLP_STAGE_TIMING"] = "metrics"
+    timer = resolve_timer()
+    assert isinstance(timer, StageTimer) and not timer.attach_to_log
+
+    g.clp_stage_timing = "off"
+    assert resolve_timer() is NULL_TIMER
+
+
+def test_merge_snapshots_sums_processes():
+    first, second = MetricsRegistry(), MetricsRegistry()
+    for registry, value in ((first, 0.02), (second, 3.0)):
+        registry.counter("jobs_total", "Úlohy", labels=("kind",)).inc(kind="export")
+        registry.histogram("latency", "Latence", buckets=(0.1, 1.0)).observe(value)
+
+    merged = merge_snapshots([first.snapshot(), second.snapshot()])
+    assert merged["jobs_total"]["samples"] == [{"labels": ["export"], "value": 2.0}]
+    assert merged["latency"]["samples"][0]["value"] == [1, 0, 1, 3.02, 2]
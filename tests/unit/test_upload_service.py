@@ -0,0 +1,94 @@
+import hashlib
+import io
+import pytest
+from app.models import Substance
+from app.services.upload_service import UploadService, UploadError
+
+
+@pytest.fixture
+def service(tmp_path):
+    return UploadService(str(tmp_path / "uploads"), max_size=1024 * 1024)
+
+
+def test_chunked_upload_roundtrip(service):
+    payload = b"name,cas_number\n" + b"x" * 5000
+    meta = service.create("big.csv", len(payload), sha256=hashlib.sha256(payload).hexdigest())
+
+    service.append_chunk(meta["upload_id"], 0, io.BytesIO(payload[:2000]))
+    service.append_chunk(meta["upload_id"], 2000, io.BytesIO(payload[2000:]))
+    done = service.complete(meta["upload_id"])
+
+    assert done["complete"] is True
+    with open(service.completed_path(meta["upload_id"]), "rb") as f:
+        assert f.read() == payload
+
+
+def test_resume_after_wrong_offset(service):
+    meta = service.create("data.json", 10)
+    service.append_chunk(meta["upload_id"], 0, io.BytesIO(b"12345"))
+
+    # Klient po výpadku posílá znovu od nuly - server vrátí offset k navázání
+    with pytest.raises(UploadError) as exc:
+        service.append_chunk(meta["upload_id"], 0, io.BytesIO(b"12345"))
+    assert exc.value.status_code == 409
+    assert exc.value.offset == 5
+
+    service.append_chunk(meta["upload_id"], 5, io.BytesIO(b"67890"))
+    assert service.complete(meta["upload_id"])["size"] == 10
+
+
+def test_chunk_checksum_mismatch_is_rolled_back(service):
+    meta = service.create("data.csv", 6)
+    with pytest.raises(UploadError) as exc:
+        service.append_chunk(meta["upload_id"], 0, io.BytesIO(b"abc"), chunk_sha256="00" * 32)
+    assert exc.value.status_code == 422
+    assert service.status(meta["upload_id"])["offset"] == 0
+
+
+def test_incomplete_upload_cannot_be_completed(service):
+    meta = service.create("data.csv", 6)
+    service.append_chunk(meta["upload_id"], 0, io.BytesIO(b"abc"))
+    with pytest.raises(UploadError):
+        service.complete(meta["upload_id"])
+    with pytest.raises(UploadError):
+        service.completed_path(meta["upload_id"])
+
+
+def test_invalid_upload_id_rejected(service):
+    with pytest.raises(UploadError):
+        service.status("../../etc/passwd")
+
+
+def test_csv_import_via_chunked_upload(admin_client, app, tmp_path):
+    app.config["UPLOAD_SPOOL_DIR"] = str(tmp_path / "spool")
+    payload = b"name,cas_number,health_h_phrases\nAceton,67-64-1,H319\n"
+
+    res = admin_client.post("/data/uploads", json={"filename": "latky.csv", "size": len(payload)})
+    assert res.status_code == 201
+    upload_id = res.get_json()["upload_id"]
+
+    res = admin_client.put(
+        f"/data/uploads/{upload_id}",
+        data=payload,
+        headers={"Upload-Offset": "0", "X-Chunk-Sha256": hashlib.sha256(payload).hexdigest()},
+    )
+    assert res.get_json()["offset"] == len(payload)
+    assert admin_client.post(f"/data/uploads/{upload_id}/complete").status_code == 200
+
+    admin_client.post("/data/import/substances/csv", data={"upload_id": upload_id})
+
+    with app.app_context():
+        assert Substance.query.filter_by(cas_number="67-64-1").count() == 1
+
+
+def test_rejected_multipart_upload_is_not_spooled(admin_client, app, tmp_path):
+    spool = tmp_path / "spool"
+    app.config["UPLOAD_SPOOL_DIR"] = str(spool)
+
+    res = admin_client.post(
+        "/data/import/substances/csv",
+        data={"file": (io.BytesIO(b"{}"), "zaloha.json")},
+        content_type="multipart/form-data",
+    )
+    assert res.status_code == 302
+    assert not spool.exists() or list(spool.iterdir()) == []
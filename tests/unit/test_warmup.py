@@ -0,0 +1,75 @@
+import threading
+
+import pytest
+
+from app import create_app, warmup
+from app.config import TestingConfig
+from app.extensions import db
+from app.models import Substance
+from app.services.mixture_service import SUBSTANCE_CHOICES
+
+
+def _make_app(tmp_path, mode):
+    class WarmupConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'warmup.db'}"
+        SECRET_KEY = "test-key"
+        WARMUP_MODE = mode
+
+    return create_app(WarmupConfig)
+
+
+def _client(app):
+    client = app.test_client()
+    client.environ_base["HTTP_X_FORWARDED_PROTO"] = "https"  # Talisman jinak přesměrovává
+    return client
+
+
+@pytest.fixture(autouse=True)
+def _not_from_cli(monkeypatch):
+    # Dřívější test CLI (FlaskCliRunner) nastaví FLASK_RUN_FROM_CLI pro celý proces
+    monkeypatch.delenv("FLASK_RUN_FROM_CLI", raising=False)
+
+
+def test_ready_immediately_without_warmup(app, client):
+    client.environ_base["HTTP_X_FORWARDED_PROTO"] = "https"
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    assert response.json["warmup"]["mode"] == "off"
+
+
+def test_sync_warmup_compiles_templates_and_primes_caches(tmp_path):
+    app = _make_app(tmp_path, "off")
+    with app.app_context():
+        db.create_all()
+        db.session.add(Substance(name="Ethanol"))
+        db.session.commit()
+        db.session.remove()
+
+    app.config["WARMUP_MODE"] = "sync"
+    state = warmup.start_warmup(app)
+    assert state.ready
+    assert all("ms" in step for step in state.steps.values()), state.steps
+    assert "mixture_form.html" in {name for _, name in app.jinja_env.cache.keys()}
+
+    with app.app_context():
+        calls = []
+        SUBSTANCE_CHOICES.get_or_load("all", lambda: calls.append(1))
+        assert calls == []
+        db.drop_all()
+
+
+def test_not_ready_until_background_warmup_finishes(tmp_path, monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(warmup, "WARMUP_STEPS", [("blocked", lambda app: release.wait(5))])
+    app = _make_app(tmp_path, "background")
+    client = _client(app)
+
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json["status"] == "warming_up"
+
+    release.set()
+    warmup.get_state(app).join(5)
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    assert "blocked" in response.json["warmup"]["steps"]